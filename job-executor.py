@@ -92,9 +92,16 @@ from job_executor.config import (
     ISO_DIRECTORY,
     FIRMWARE_DIRECTORY,
     MEDIA_SERVER_PORT,
+    MEDIA_SERVER_MAX_CONNECTIONS,
+    MEDIA_SERVER_KEEPALIVE_TIMEOUT,
+    MEDIA_SERVER_MAX_MBPS,
+    MEDIA_SERVER_CLIENT_MAX_MBPS,
     MEDIA_SERVER_ENABLED,
     API_SERVER_PORT,
     API_SERVER_ENABLED,
+    API_SERVER_MAX_WORKERS,
+    API_SERVER_KEEPALIVE_TIMEOUT,
+    API_SERVER_REQUEST_TIMEOUT,
 )
 from job_executor.connectivity import ConnectivityMixin
 from job_executor.scp import ScpMixin
@@ -104,6 +111,8 @@ from job_executor.mixins.credentials import CredentialsMixin
 from job_executor.mixins.vcenter_ops import VCenterMixin
 from job_executor.mixins.vcenter_db_upsert import VCenterDbUpsertMixin
 from job_executor.mixins.idrac_ops import IdracMixin
+from job_executor.mixins.discovery_cache import DiscoveryCacheMixin
+from job_executor.mixins.inventory_fingerprint import InventoryFingerprintMixin
 from job_executor.utils import UNICODE_FALLBACKS, _normalize_unicode, _safe_json_parse, _safe_to_stdout
 from job_executor.dell_redfish.adapter import DellRedfishAdapter
 from job_executor.handlers import (
@@ -215,7 +224,7 @@ print("=" * 60)
 # Job Executor Class
 # ============================================================================
 
-class JobExecutor(DatabaseMixin, CredentialsMixin, VCenterMixin, VCenterDbUpsertMixin, ScpMixin, ConnectivityMixin, IdracMixin):
+class JobExecutor(DatabaseMixin, CredentialsMixin, VCenterMixin, VCenterDbUpsertMixin, ScpMixin, ConnectivityMixin, IdracMixin, DiscoveryCacheMixin, InventoryFingerprintMixin):
     def get_local_ip(self) -> str:
         """Get the local IP address of this machine"""
         import socket
@@ -951,6 +960,7 @@ class JobExecutor(DatabaseMixin, CredentialsMixin, VCenterMixin, VCenterDbUpsert
     # - _parse_health_from_response
     # - _fetch_initial_event_logs
     # - _store_event_logs
+    # - _execute_fetch_event_logs_impl
     # - _fetch_bios_attributes
     # - _fetch_storage_drives
     # - _sync_server_drives
@@ -1003,6 +1013,7 @@ class JobExecutor(DatabaseMixin, CredentialsMixin, VCenterMixin, VCenterDbUpsert
     # - execute_browse_datastore -> DatastoreHandler
     # - execute_firmware_upload -> MediaUploadHandler
     # - execute_catalog_sync -> MediaUploadHandler
+    # - execute_firmware_stage -> FirmwareHandler
     # - execute_vcenter_connectivity_test -> VCenterHandlers
 
     def execute_job(self, job: Dict):
@@ -1019,7 +1030,7 @@ class JobExecutor(DatabaseMixin, CredentialsMixin, VCenterMixin, VCenterDbUpsert
             'prepare_host_for_update', 'verify_host_after_update', 'rolling_cluster_update',
             'esxi_upgrade', 'esxi_then_firmware', 'firmware_then_esxi',
             'idrac_network_read', 'idrac_network_write',
-            'firmware_inventory_scan'
+            'firmware_inventory_scan', 'firmware_stage'
         ]
         
         if job_type in idrac_job_types and self.check_idrac_pause():
@@ -1036,6 +1047,7 @@ class JobExecutor(DatabaseMixin, CredentialsMixin, VCenterMixin, VCenterDbUpsert
         handler_map = {
             'discovery_scan': self.discovery_handler.execute_discovery_scan,
             'firmware_update': self.firmware_handler.execute_firmware_update,
+            'firmware_stage': self.firmware_handler.execute_firmware_stage,
             'full_server_update': self.firmware_handler.execute_full_server_update,
             'test_credentials': self.discovery_handler.execute_test_credentials,
             'power_action': self.power_handler.execute_power_action,
@@ -1724,7 +1736,13 @@ class JobExecutor(DatabaseMixin, CredentialsMixin, VCenterMixin, VCenterDbUpsert
         # Start API server if enabled (for instant operations like console-launch)
         if API_SERVER_ENABLED:
             try:
-                self.api_server = APIServer(self, API_SERVER_PORT)
+                self.api_server = APIServer(
+                    self,
+                    API_SERVER_PORT,
+                    max_workers=API_SERVER_MAX_WORKERS,
+                    keepalive_timeout=API_SERVER_KEEPALIVE_TIMEOUT,
+                    request_timeout=API_SERVER_REQUEST_TIMEOUT,
+                )
                 self.api_server.start()
                 self.log("="*70)
                 self.log(f"API SERVER STARTED: http://{self.get_local_ip()}:{API_SERVER_PORT}")
@@ -1741,7 +1759,13 @@ class JobExecutor(DatabaseMixin, CredentialsMixin, VCenterMixin, VCenterDbUpsert
         # Start media server if enabled (serves ISOs + firmware DUPs)
         if MEDIA_SERVER_ENABLED:
             try:
-                self.media_server = MediaServer(ISO_DIRECTORY, FIRMWARE_DIRECTORY, MEDIA_SERVER_PORT)
+                self.media_server = MediaServer(
+                    ISO_DIRECTORY, FIRMWARE_DIRECTORY, MEDIA_SERVER_PORT,
+                    max_connections=MEDIA_SERVER_MAX_CONNECTIONS,
+                    keepalive_timeout=MEDIA_SERVER_KEEPALIVE_TIMEOUT,
+                    max_bytes_per_sec=MEDIA_SERVER_MAX_MBPS * 125000,
+                    client_max_bytes_per_sec=MEDIA_SERVER_CLIENT_MAX_MBPS * 125000
+                )
                 self.media_server.start()
                 self.log("="*70)
                 self.log(f"MEDIA SERVER STARTED: http://{self.get_local_ip()}:{MEDIA_SERVER_PORT}")
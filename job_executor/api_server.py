@@ -1,13 +1,171 @@
-"""HTTP API Server for instant operations"""
+"""
+HTTP API Server for instant operations
+
+Requests run on a bounded worker pool with HTTP/1.1 keep-alive, so a long
+preflight stream or datastore browse no longer blocks /api/health or a
+console launch for other sessions. Slow endpoints additionally have their
+own concurrency limits, and every request is timed per endpoint
+(GET /api/metrics).
+"""
 
 import json
+import select
+import threading
+import time
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from http.server import HTTPServer, BaseHTTPRequestHandler
 from threading import Thread
-from typing import Dict
+from typing import Dict, Optional
 from datetime import datetime, timezone
 import ssl
 
+from job_executor.request_coalescer import get_request_coalescer
+from job_executor.vcenter_pool import get_vcenter_pool
+
+
+# Endpoints that hold an iDRAC, vCenter or ZFS appliance busy for seconds to
+# minutes: at most this many run at once, further callers wait briefly and
+# then get 429
+ENDPOINT_CONCURRENCY = {
+    '/api/preflight-check': 2,
+    '/api/preflight-check-stream': 2,
+    '/api/browse-datastore': 4,
+    '/api/vcenter-sync': 1,
+    '/api/partial-vcenter-sync': 2,
+    '/api/manage-datastore': 2,
+    '/api/scan-datastore-status': 2,
+    '/api/cluster-safety-check': 2,
+    '/api/sync-protection-config': 2,
+    '/api/network-config-write': 4,
+    '/api/iso-upload/*': 8,
+}
+# Seconds a request waits for its endpoint's limit before 429
+ENDPOINT_WAIT_SECONDS = 10
+
+# Connections waiting for a worker beyond the pool size before new ones get 503
+REQUEST_QUEUE_SIZE = 64
+# Seconds between checks for queued connections while a keep-alive connection is idle
+IDLE_POLL_SECONDS = 0.25
+
+
+def endpoint_key(path: str) -> str:
+    """Metrics / limit key for a request path ('/api/iso-upload/<id>/...' -> '/api/iso-upload/*')"""
+    path = path.split('?', 1)[0]
+    segments = path.split('/')
+    if len(segments) > 3:
+        return '/'.join(segments[:3]) + '/*'
+    return path
+
+
+class RequestMetrics:
+    """Per-endpoint request counts, latency and concurrency"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints: Dict[str, Dict] = {}
+        self._limits = {key: threading.BoundedSemaphore(limit) for key, limit in ENDPOINT_CONCURRENCY.items()}
+    
+    def acquire(self, key: str) -> bool:
+        """Take a slot for a limited endpoint (True if not limited)"""
+        limit = self._limits.get(key)
+        if limit is None:
+            return True
+        if limit.acquire(timeout=ENDPOINT_WAIT_SECONDS):
+            return True
+        self._bucket(key)['rejected'] += 1
+        return False
+    
+    def release(self, key: str):
+        limit = self._limits.get(key)
+        if limit is not None:
+            limit.release()
+    
+    def _bucket(self, key: str) -> Dict:
+        with self._lock:
+            return self._endpoints.setdefault(key, {
+                'count': 0, 'errors': 0, 'rejected': 0, 'in_flight': 0,
+                'total_ms': 0.0, 'max_ms': 0.0, 'last_ms': 0.0,
+            })
+    
+    def started(self, key: str):
+        bucket = self._bucket(key)
+        with self._lock:
+            bucket['in_flight'] += 1
+    
+    def finished(self, key: str, elapsed_ms: float, status: Optional[int]):
+        bucket = self._bucket(key)
+        with self._lock:
+            bucket['in_flight'] -= 1
+            bucket['count'] += 1
+            bucket['total_ms'] += elapsed_ms
+            bucket['last_ms'] = elapsed_ms
+            bucket['max_ms'] = max(bucket['max_ms'], elapsed_ms)
+            if status is None or status >= 500:
+                bucket['errors'] += 1
+    
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                key: {
+                    **{k: v for k, v in bucket.items() if k not in ('total_ms',)},
+                    'avg_ms': round(bucket['total_ms'] / bucket['count'], 1) if bucket['count'] else 0.0,
+                    'max_ms': round(bucket['max_ms'], 1),
+                    'last_ms': round(bucket['last_ms'], 1),
+                    'limit': ENDPOINT_CONCURRENCY.get(key),
+                }
+                for key, bucket in sorted(self._endpoints.items())
+            }
+
+
+class PooledHTTPServer(HTTPServer):
+    """HTTPServer that hands each connection to a bounded thread pool"""
+    
+    allow_reuse_address = True
+    request_queue_size = 128
+    
+    def __init__(self, server_address, handler_class, max_workers: int):
+        self.max_workers = max_workers
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='api')
+        self._slots = threading.BoundedSemaphore(max_workers + REQUEST_QUEUE_SIZE)
+        self._connections_lock = threading.Lock()
+        self._connections = 0  # Accepted and not yet closed (running or queued for a worker)
+        self.metrics = RequestMetrics()
+        super().__init__(server_address, handler_class)
+    
+    def connections_waiting(self) -> bool:
+        """True if accepted connections are queued because every worker is taken"""
+        with self._connections_lock:
+            return self._connections > self.max_workers
+    
+    def process_request(self, request, client_address):
+        if not self._slots.acquire(blocking=False):
+            try:
+                request.sendall(b'HTTP/1.1 503 Service Unavailable\r\nRetry-After: 2\r\n'
+                                b'Content-Length: 0\r\nConnection: close\r\n\r\n')
+            except OSError:
+                pass
+            self.shutdown_request(request)
+            return
+        with self._connections_lock:
+            self._connections += 1
+        self.pool.submit(self._process_request_worker, request, client_address)
+    
+    def _process_request_worker(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            with self._connections_lock:
+                self._connections -= 1
+            self._slots.release()
+    
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False)
+
 # Zerfaux router for /api/replication/* endpoints
 _zerfaux_router = None
 
@@ -24,24 +182,118 @@ class APIHandler(BaseHTTPRequestHandler):
     """HTTP request handler for instant operations"""
     
     executor = None  # Will be set by APIServer
+    protocol_version = 'HTTP/1.1'
+    timeout = 30  # Socket timeout while a request is read and answered
+    keepalive_timeout = 5  # Idle keep-alive connections give their worker back after this
     
-    def _set_headers(self, status=200, content_type='application/json'):
+    def handle_one_request(self):
+        """
+        Wait for the next request on the connection, then serve it.
+        
+        An idle connection holds a pool worker, so the next request is only
+        awaited for keepalive_timeout, and no longer once other connections
+        queue for a worker. Once it arrives the request timeout applies.
+        """
+        if not self._wait_for_request():
+            self.close_connection = True
+            return
+        self.connection.settimeout(self.timeout)
+        self._requests_served = getattr(self, '_requests_served', 0) + 1
+        super().handle_one_request()
+    
+    def _wait_for_request(self) -> bool:
+        """True once the next request (or EOF) is readable, False if the connection stayed idle"""
+        self.connection.settimeout(0)
+        try:
+            if self.rfile.peek(1):  # Already buffered, e.g. a pipelined request
+                return True
+        except OSError:
+            pass
+        deadline = time.monotonic() + self.keepalive_timeout
+        idle = getattr(self, '_requests_served', 0) > 0  # A new connection gets its first request served
+        while not (idle and self.server.connections_waiting()):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            if select.select([self.connection], [], [], min(remaining, IDLE_POLL_SECONDS))[0]:
+                return True
+        return False
+    
+    def _set_headers(self, status=200, content_type='application/json', content_length: int = None):
         """Set response headers with CORS"""
         self.send_response(status)
         self.send_header('Content-Type', content_type)
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, PUT, DELETE, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization, X-Chunk-SHA256')
+        self.send_header('Access-Control-Expose-Headers', 'X-Response-Time-Ms')
+        if getattr(self, '_request_started', None):
+            self.send_header('X-Response-Time-Ms', f'{(time.monotonic() - self._request_started) * 1000:.1f}')
+        if content_length is not None:
+            self.send_header('Content-Length', str(content_length))
+        else:
+            # Body length unknown - the end of the connection marks the end of the body
+            self.send_header('Connection', 'close')
+            self.close_connection = True
         self.end_headers()
     
+    def send_response(self, code, message=None):
+        self._response_status = code
+        super().send_response(code, message)
+    
     def do_OPTIONS(self):
         """Handle CORS preflight"""
-        self._set_headers()
+        self._request_started = None
+        self._set_headers(content_length=0)
     
     def _send_json(self, data: Dict, status=200):
         """Send JSON response"""
-        self._set_headers(status)
-        self.wfile.write(json.dumps(data).encode('utf-8'))
+        body = json.dumps(data).encode('utf-8')
+        self._set_headers(status, content_length=len(body))
+        self.wfile.write(body)
+    
+    def _run_endpoint(self, route):
+        """Run a request under its endpoint's concurrency limit and record its timing"""
+        metrics = self.server.metrics
+        key = endpoint_key(self.path)
+        self._request_started = time.monotonic()
+        self._response_status = None
+        self._body_consumed = False
+        
+        if not metrics.acquire(key):
+            self.close_connection = True
+            body = json.dumps({'error': f'Too many concurrent {key} requests - retry shortly',
+                               'success': False}).encode('utf-8')
+            self.send_response(429)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.send_header('Retry-After', '5')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        
+        metrics.started(key)
+        try:
+            route()
+        finally:
+            metrics.release(key)
+            metrics.finished(key, (time.monotonic() - self._request_started) * 1000, self._response_status)
+            if int(self.headers.get('Content-Length') or 0) and not self._body_consumed:
+                # Unread request body would be parsed as the next request
+                self.close_connection = True
+    
+    def do_POST(self):
+        self._run_endpoint(self._route_post)
+    
+    def do_GET(self):
+        self._run_endpoint(self._route_get)
+    
+    def do_PUT(self):
+        self._run_endpoint(self._route_put)
+    
+    def do_DELETE(self):
+        self._run_endpoint(self._route_delete)
     
     def _send_error(self, message: str, status=500):
         """Send error response"""
@@ -51,6 +303,7 @@ class APIHandler(BaseHTTPRequestHandler):
         """Read and parse JSON request body"""
         content_length = int(self.headers.get('Content-Length', 0))
         body = self.rfile.read(content_length)
+        self._body_consumed = True
         return json.loads(body.decode('utf-8'))
     
     def _log_operation(
@@ -89,7 +342,7 @@ class APIHandler(BaseHTTPRequestHandler):
         except Exception as e:
             self.executor.log(f"Failed to log API operation: {e}", "ERROR")
     
-    def do_POST(self):
+    def _route_post(self):
         """Handle POST requests"""
         try:
             # Check Zerfaux router first
@@ -100,6 +353,10 @@ class APIHandler(BaseHTTPRequestHandler):
             
             if self.path == '/api/console-launch':
                 self._handle_console_launch()
+            elif self.path == '/api/iso-upload':
+                self._handle_iso_upload_start()
+            elif self.path.startswith('/api/iso-upload/') and self.path.endswith('/complete'):
+                self._handle_iso_upload_complete()
             elif self.path == '/api/power-control':
                 self._handle_power_control()
             elif self.path == '/api/connectivity-test':
@@ -157,7 +414,7 @@ class APIHandler(BaseHTTPRequestHandler):
             self.executor.log(f"Traceback: {traceback.format_exc()}", "ERROR")
             self._send_error(str(e), 500)
     
-    def do_GET(self):
+    def _route_get(self):
         """Handle GET requests"""
         try:
             # Check Zerfaux router first
@@ -170,6 +427,12 @@ class APIHandler(BaseHTTPRequestHandler):
                 self._send_json({'status': 'ok', 'version': '1.0.0'})
             elif self.path == '/api/status':
                 self._handle_status()
+            elif self.path == '/api/metrics':
+                self._handle_metrics()
+            elif self.path == '/api/media-server/transfers':
+                self._handle_media_transfers()
+            elif self.path.startswith('/api/iso-upload/'):
+                self._handle_iso_upload_status()
             elif self.path.startswith('/api/preflight-check-stream'):
                 self._handle_preflight_check_stream()
             else:
@@ -215,9 +478,12 @@ class APIHandler(BaseHTTPRequestHandler):
                 'api_server': {
                     'running': True,
                     'port': self.executor.api_server.port if self.executor.api_server else None,
+                    'workers': self.server.max_workers,
+                    'in_flight': sum(e['in_flight'] for e in self.server.metrics.snapshot().values()),
                 },
                 'media_server': {
                     'running': self.executor.media_server is not None,
+                    **self._media_server_summary(),
                 },
                 'operations_paused': self.executor.activity_settings.get('pause_idrac_operations', False),
             }
@@ -228,25 +494,161 @@ class APIHandler(BaseHTTPRequestHandler):
             self.executor.log(f"Error getting status: {e}", "ERROR")
             self._send_error(str(e), 500)
     
-    def do_PUT(self):
+    def _handle_metrics(self):
+        """Per-endpoint request timing, API worker pool and vCenter session pool usage"""
+        self._send_json({
+            'success': True,
+            'workers': self.server.max_workers,
+            'endpoints': self.server.metrics.snapshot(),
+            'idrac_reads': dict(get_request_coalescer().stats),
+            'vcenter_sessions': get_vcenter_pool().snapshot(),
+        })
+    
+    def _media_server_summary(self) -> Dict:
+        """Headline transfer numbers for /api/status"""
+        media_server = self.executor.media_server
+        if media_server is None:
+            return {}
+        stats = media_server.get_transfer_stats()
+        return {
+            'active_clients': stats['active_clients'],
+            'throughput_bps': stats['throughput_bps'],
+            'total_bytes_sent': stats['total_bytes_sent'],
+        }
+    
+    def _handle_media_transfers(self):
+        """Live MediaServer transfers with per-transfer throughput and bandwidth limits"""
+        media_server = self.executor.media_server
+        if media_server is None:
+            self._send_error('Media server is not running', 503)
+            return
+        self._send_json({'success': True, **media_server.get_transfer_stats()})
+    
+    def _iso_upload_path(self) -> list:
+        """Path segments after /api/iso-upload/"""
+        return [p for p in self.path.split('?', 1)[0][len('/api/iso-upload/'):].split('/') if p]
+    
+    def _handle_iso_upload_start(self):
+        """Create (or resume) a chunked ISO upload"""
+        from job_executor.iso_upload import UploadError, get_upload_manager
+        data = self._read_json_body()
+        iso_image_id = data.get('iso_image_id')
+        try:
+            session = get_upload_manager().start(
+                upload_id=data.get('upload_id') or iso_image_id,
+                filename=data.get('filename'),
+                size=data.get('size'),
+                chunk_size=data.get('chunk_size'),
+                sha256=data.get('sha256'),
+                iso_image_id=iso_image_id
+            )
+        except UploadError as e:
+            self._send_error(str(e), e.status)
+            return
+        
+        state = session.to_dict()
+        if iso_image_id:
+            self.executor.media_handler.update_iso_image_record(iso_image_id, {
+                'upload_status': 'uploading',
+                'upload_progress': int(state['bytes_received'] * 100 / state['size']),
+            })
+        self.executor.log(f"API: ISO upload {state['upload_id']} ({state['filename']}, "
+                          f"{state['total_chunks'] - len(state['missing'])}/{state['total_chunks']} chunks present)")
+        self._send_json({'success': True, **state})
+    
+    def _handle_iso_upload_chunk(self):
+        """PUT /api/iso-upload/<upload_id>/chunks/<index> - stream one chunk to disk"""
+        from job_executor.iso_upload import UploadError, get_upload_manager
+        parts = self._iso_upload_path()
+        if len(parts) != 3 or parts[1] != 'chunks' or not parts[2].isdigit():
+            self.close_connection = True
+            self._send_error(f'Unknown endpoint: {self.path}', 404)
+            return
+        try:
+            session = get_upload_manager().get(parts[0])
+            before = session.to_dict()['bytes_received']
+            state = session.write_chunk(
+                int(parts[2]), self.rfile,
+                int(self.headers.get('Content-Length', 0)),
+                sha256=self.headers.get('X-Chunk-SHA256')
+            )
+            self._body_consumed = True
+        except UploadError as e:
+            self.close_connection = True  # Body may be partly unread
+            self._send_error(str(e), e.status)
+            return
+        
+        # Progress in 5% steps - not one database write per chunk
+        iso_image_id = session.state.get('iso_image_id')
+        progress = int(state['bytes_received'] * 100 / state['size'])
+        if iso_image_id and progress // 5 > int(before * 100 / state['size']) // 5:
+            self.executor.media_handler.update_iso_image_record(iso_image_id, {'upload_progress': min(progress, 99)})
+        self._send_json({'success': True, **{k: v for k, v in state.items() if k != 'missing'},
+                         'missing_count': len(state['missing'])})
+    
+    def _handle_iso_upload_status(self):
+        """GET /api/iso-upload/<upload_id> - which chunks are still missing"""
+        from job_executor.iso_upload import UploadError, get_upload_manager
+        parts = self._iso_upload_path()
+        try:
+            self._send_json({'success': True, **get_upload_manager().get(parts[0] if parts else '').to_dict()})
+        except UploadError as e:
+            self._send_error(str(e), e.status)
+    
+    def _handle_iso_upload_complete(self):
+        """POST /api/iso-upload/<upload_id>/complete - verify, move into ISO_DIRECTORY and register"""
+        from job_executor.iso_upload import UploadError, get_upload_manager
+        parts = self._iso_upload_path()
+        manager = get_upload_manager()
+        try:
+            session = manager.get(parts[0] if parts else '')
+            result = manager.finish(session.upload_id)
+        except UploadError as e:
+            self._send_error(str(e), e.status)
+            return
+        
+        iso_url = self.executor.media_handler.register_uploaded_iso(
+            session.state.get('iso_image_id'), result['local_path'], result['checksum'], result['size']
+        )
+        self.executor.log(f"API: ISO upload complete: {result['local_path']} ({result['size']} bytes)")
+        self._send_json({'success': True, 'served_url': iso_url, **result})
+    
+    def _handle_iso_upload_abort(self):
+        """DELETE /api/iso-upload/<upload_id> - discard a partial upload"""
+        from job_executor.iso_upload import UploadError, get_upload_manager
+        parts = self._iso_upload_path()
+        try:
+            get_upload_manager().abort(parts[0] if parts else '')
+        except UploadError as e:
+            self._send_error(str(e), e.status)
+            return
+        self._send_json({'success': True})
+    
+    def _route_put(self):
         """Handle PUT requests"""
         try:
             if self.path.startswith('/api/replication') or self.path.startswith('/api/zerfaux'):
                 router = get_zerfaux_router(self.executor)
                 if router.route_put(self.path, self):
                     return
+            if self.path.startswith('/api/iso-upload/'):
+                self._handle_iso_upload_chunk()
+                return
             self._send_error(f'Unknown endpoint: {self.path}', 404)
         except Exception as e:
             self.executor.log(f"API error: {e}", "ERROR")
             self._send_error(str(e), 500)
     
-    def do_DELETE(self):
+    def _route_delete(self):
         """Handle DELETE requests"""
         try:
             if self.path.startswith('/api/replication') or self.path.startswith('/api/zerfaux'):
                 router = get_zerfaux_router(self.executor)
                 if router.route_delete(self.path, self):
                     return
+            if self.path.startswith('/api/iso-upload/'):
+                self._handle_iso_upload_abort()
+                return
             self._send_error(f'Unknown endpoint: {self.path}', 404)
         except Exception as e:
             self.executor.log(f"API error: {e}", "ERROR")
@@ -396,6 +798,8 @@ class APIHandler(BaseHTTPRequestHandler):
                 job_id=None
             )
             
+            get_request_coalescer().invalidate(server_id)  # Cached health shows the old power state
+            
             response_time_ms = int((datetime.now() - start_time).total_seconds() * 1000)
             
             if result.get('success'):
@@ -563,7 +967,6 @@ class APIHandler(BaseHTTPRequestHandler):
         self.executor.log(f"API: Browse datastore {datastore_name}")
         
         try:
-            from pyVim.connect import Disconnect
             from pyVmomi import vim
             import time
             
@@ -591,7 +994,6 @@ class APIHandler(BaseHTTPRequestHandler):
             container.Destroy()
             
             if not datastore:
-                Disconnect(si)
                 self._send_error(f"Datastore '{datastore_name}' not found", 404)
                 return
             
@@ -609,7 +1011,6 @@ class APIHandler(BaseHTTPRequestHandler):
                 time.sleep(0.5)
             
             if task.info.state == vim.TaskInfo.State.error:
-                Disconnect(si)
                 self._send_error(f"Datastore browse failed: {task.info.error.msg}", 500)
                 return
             
@@ -633,8 +1034,6 @@ class APIHandler(BaseHTTPRequestHandler):
                             'is_directory': isinstance(file_info, vim.host.DatastoreBrowser.FolderInfo)
                         })
             
-            Disconnect(si)
-            
             response_time_ms = int((datetime.now() - start_time).total_seconds() * 1000)
             response = {
                 'success': True,
@@ -1081,12 +1480,16 @@ class APIHandler(BaseHTTPRequestHandler):
             ip_address = server['ip_address']
             dell_ops = self.executor._get_dell_operations()
             
-            health_data = dell_ops.get_health_status(
-                ip=ip_address,
-                username=username,
-                password=password,
-                server_id=server_id,
-                job_id=None
+            health_data, source = get_request_coalescer().fetch(
+                ('health_check', server_id),
+                lambda: dell_ops.get_health_status(
+                    ip=ip_address,
+                    username=username,
+                    password=password,
+                    server_id=server_id,
+                    job_id=None
+                ),
+                refresh=bool(data.get('refresh'))
             )
             
             response_time_ms = int((datetime.now() - start_time).total_seconds() * 1000)
@@ -1106,20 +1509,22 @@ class APIHandler(BaseHTTPRequestHandler):
                 'storage_health': health_data.get('storage_health'),
                 'network_health': health_data.get('network_health'),
                 'sensors': health_data.get('sensors'),
+                'source': source,
             }
             
-            self._log_operation(
-                server_id=server_id,
-                operation_name='health_check',
-                endpoint='/api/health-check',
-                full_url=f'http://localhost:{self.executor.api_server.port}/api/health-check',
-                request_body=data,
-                status_code=200,
-                response_time_ms=response_time_ms,
-                response_body={'success': True},
-                success=True,
-                operation_type='idrac_api'
-            )
+            if source == 'fetched':
+                self._log_operation(
+                    server_id=server_id,
+                    operation_name='health_check',
+                    endpoint='/api/health-check',
+                    full_url=f'http://localhost:{self.executor.api_server.port}/api/health-check',
+                    request_body=data,
+                    status_code=200,
+                    response_time_ms=response_time_ms,
+                    response_body={'success': True},
+                    success=True,
+                    operation_type='idrac_api'
+                )
             
             self._send_json(response)
             
@@ -1173,8 +1578,7 @@ class APIHandler(BaseHTTPRequestHandler):
                 username=username,
                 password=password,
                 limit=limit,
-                server_id=server_id,
-                job_id=None
+                server_id=server_id
             )
             
             response_time_ms = int((datetime.now() - start_time).total_seconds() * 1000)
@@ -1313,7 +1717,7 @@ class APIHandler(BaseHTTPRequestHandler):
         start_time = datetime.now()
         data = self._read_json_body()
         server_id = data.get('server_id')
-        notes = data.get('notes', 'Instant API snapshot')
+        notes = data.get('notes')
         
         if not server_id:
             self._send_error('server_id is required', 400)
@@ -1335,52 +1739,77 @@ class APIHandler(BaseHTTPRequestHandler):
             ip_address = server['ip_address']
             dell_ops = self.executor._get_dell_operations()
             
-            bios_data = dell_ops.get_bios_attributes(
-                ip=ip_address,
-                username=username,
-                password=password,
-                server_id=server_id,
-                job_id=None
-            )
-            
-            # Insert new record to bios_configurations table
-            config_id = None
-            try:
-                result = self.executor.supabase.table('bios_configurations').insert({
-                    'server_id': server_id,
-                    'attributes': bios_data.get('attributes', {}),
-                    'bios_version': bios_data.get('bios_version'),
-                    'snapshot_type': 'current',
-                    'notes': notes,
-                    'captured_at': datetime.now().isoformat(),
-                }).execute()
-                if result.data:
-                    config_id = result.data[0].get('id')
-            except Exception as db_error:
-                self.executor.log(f"Failed to save BIOS config: {db_error}", "WARNING")
+            def read_bios() -> Dict:
+                bios_data = dell_ops.get_bios_attributes(
+                    ip=ip_address,
+                    username=username,
+                    password=password,
+                    server_id=server_id,
+                    job_id=None
+                )
+                
+                # Insert new record to bios_configurations table unless the content
+                # hash matches the latest snapshot (then reuse that snapshot) - an
+                # unchanged snapshot without notes would be a duplicate row
+                config_id = None
+                comparison = self.executor.compare_bios_snapshot(
+                    server_id, bios_data.get('attributes', {}), None, bios_data.get('bios_version')
+                )
+                if comparison['unchanged'] and not notes:
+                    config_id = comparison['previous_id']
+                else:
+                    try:
+                        result = self.executor.supabase.table('bios_configurations').insert({
+                            'server_id': server_id,
+                            'attributes': bios_data.get('attributes', {}),
+                            'attributes_hash': comparison['attributes_hash'],
+                            'bios_version': bios_data.get('bios_version'),
+                            'snapshot_type': 'current',
+                            'notes': notes or 'Instant API snapshot',
+                            'captured_at': datetime.now().isoformat(),
+                        }).execute()
+                        if result.data:
+                            config_id = result.data[0].get('id')
+                    except Exception as db_error:
+                        self.executor.log(f"Failed to save BIOS config: {db_error}", "WARNING")
+                return {'bios_data': bios_data, 'comparison': comparison, 'config_id': config_id}
+            
+            # Concurrent readers share one fetch and one snapshot row; a read with
+            # notes asks for its own annotated snapshot, so it is never shared
+            if notes:
+                snapshot, source = read_bios(), 'fetched'
+            else:
+                snapshot, source = get_request_coalescer().fetch(
+                    ('bios_config_read', server_id), read_bios, refresh=bool(data.get('refresh'))
+                )
+            bios_data, comparison, config_id = snapshot['bios_data'], snapshot['comparison'], snapshot['config_id']
             
             response_time_ms = int((datetime.now() - start_time).total_seconds() * 1000)
             response = {
                 'success': True,
                 'server_id': server_id,
                 'config_id': config_id,
+                'unchanged': comparison['unchanged'],
+                'changed_attributes': comparison['changed_attributes'],
                 'attributes': bios_data.get('attributes', {}),
                 'bios_version': bios_data.get('bios_version'),
                 'attribute_registry': bios_data.get('attribute_registry'),
+                'source': source,
             }
             
-            self._log_operation(
-                server_id=server_id,
-                operation_name='bios_config_read',
-                endpoint='/api/bios-config-read',
-                full_url=f'http://localhost:{self.executor.api_server.port}/api/bios-config-read',
-                request_body=data,
-                status_code=200,
-                response_time_ms=response_time_ms,
-                response_body={'success': True, 'config_id': config_id},
-                success=True,
-                operation_type='idrac_api'
-            )
+            if source == 'fetched':
+                self._log_operation(
+                    server_id=server_id,
+                    operation_name='bios_config_read',
+                    endpoint='/api/bios-config-read',
+                    full_url=f'http://localhost:{self.executor.api_server.port}/api/bios-config-read',
+                    request_body=data,
+                    status_code=200,
+                    response_time_ms=response_time_ms,
+                    response_body={'success': True, 'config_id': config_id},
+                    success=True,
+                    operation_type='idrac_api'
+                )
             
             self._send_json(response)
             
@@ -1428,12 +1857,16 @@ class APIHandler(BaseHTTPRequestHandler):
             ip_address = server['ip_address']
             dell_ops = self.executor._get_dell_operations()
             
-            firmware = dell_ops.get_firmware_inventory(
-                ip=ip_address,
-                username=username,
-                password=password,
-                server_id=server_id,
-                job_id=None
+            firmware, source = get_request_coalescer().fetch(
+                ('firmware_inventory', server_id),
+                lambda: dell_ops.get_firmware_inventory(
+                    ip=ip_address,
+                    username=username,
+                    password=password,
+                    server_id=server_id,
+                    job_id=None
+                ),
+                refresh=bool(data.get('refresh'))
             )
             
             response_time_ms = int((datetime.now() - start_time).total_seconds() * 1000)
@@ -1442,20 +1875,22 @@ class APIHandler(BaseHTTPRequestHandler):
                 'server_id': server_id,
                 'firmware': firmware or [],
                 'count': len(firmware) if firmware else 0,
+                'source': source,
             }
             
-            self._log_operation(
-                server_id=server_id,
-                operation_name='firmware_inventory',
-                endpoint='/api/firmware-inventory',
-                full_url=f'http://localhost:{self.executor.api_server.port}/api/firmware-inventory',
-                request_body=data,
-                status_code=200,
-                response_time_ms=response_time_ms,
-                response_body={'success': True, 'count': len(firmware) if firmware else 0},
-                success=True,
-                operation_type='idrac_api'
-            )
+            if source == 'fetched':
+                self._log_operation(
+                    server_id=server_id,
+                    operation_name='firmware_inventory',
+                    endpoint='/api/firmware-inventory',
+                    full_url=f'http://localhost:{self.executor.api_server.port}/api/firmware-inventory',
+                    request_body=data,
+                    status_code=200,
+                    response_time_ms=response_time_ms,
+                    response_body={'success': True, 'count': len(firmware) if firmware else 0},
+                    success=True,
+                    operation_type='idrac_api'
+                )
             
             self._send_json(response)
             
@@ -1504,13 +1939,17 @@ class APIHandler(BaseHTTPRequestHandler):
             ip_address = server['ip_address']
             dell_ops = self.executor._get_dell_operations()
             
-            jobs = dell_ops.get_idrac_job_queue(
-                ip=ip_address,
-                username=username,
-                password=password,
-                include_details=include_details,
-                server_id=server_id,
-                job_id=None
+            jobs, source = get_request_coalescer().fetch(
+                ('idrac_jobs', server_id, bool(include_details)),
+                lambda: dell_ops.get_idrac_job_queue(
+                    ip=ip_address,
+                    username=username,
+                    password=password,
+                    include_details=include_details,
+                    server_id=server_id,
+                    job_id=None
+                ),
+                refresh=bool(data.get('refresh'))
             )
             
             response_time_ms = int((datetime.now() - start_time).total_seconds() * 1000)
@@ -1519,20 +1958,22 @@ class APIHandler(BaseHTTPRequestHandler):
                 'server_id': server_id,
                 'jobs': jobs or [],
                 'count': len(jobs) if jobs else 0,
+                'source': source,
             }
             
-            self._log_operation(
-                server_id=server_id,
-                operation_name='idrac_jobs',
-                endpoint='/api/idrac-jobs',
-                full_url=f'http://localhost:{self.executor.api_server.port}/api/idrac-jobs',
-                request_body=data,
-                status_code=200,
-                response_time_ms=response_time_ms,
-                response_body={'success': True, 'count': len(jobs) if jobs else 0},
-                success=True,
-                operation_type='idrac_api'
-            )
+            if source == 'fetched':
+                self._log_operation(
+                    server_id=server_id,
+                    operation_name='idrac_jobs',
+                    endpoint='/api/idrac-jobs',
+                    full_url=f'http://localhost:{self.executor.api_server.port}/api/idrac-jobs',
+                    request_body=data,
+                    status_code=200,
+                    response_time_ms=response_time_ms,
+                    response_body={'success': True, 'count': len(jobs) if jobs else 0},
+                    success=True,
+                    operation_type='idrac_api'
+                )
             
             self._send_json(response)
             
@@ -1809,11 +2250,12 @@ class APIHandler(BaseHTTPRequestHandler):
         
         self.executor.log(f"API: Pre-flight check stream for {len(server_ids)} servers (parallel), firmware_source={firmware_source}")
         
-        # Set up SSE headers
+        # Set up SSE headers (the stream ends when the connection closes)
+        self.close_connection = True
         self.send_response(200)
         self.send_header('Content-Type', 'text/event-stream')
         self.send_header('Cache-Control', 'no-cache')
-        self.send_header('Connection', 'keep-alive')
+        self.send_header('Connection', 'close')
         self.send_header('Access-Control-Allow-Origin', '*')
         self.end_headers()
         
@@ -2652,22 +3094,27 @@ class APIHandler(BaseHTTPRequestHandler):
 class APIServer:
     """HTTP API server for instant operations"""
     
-    def __init__(self, executor, port: int):
+    def __init__(self, executor, port: int, max_workers: int = 32, keepalive_timeout: int = 5,
+                 request_timeout: int = 30):
         self.executor = executor
         self.port = port
+        self.max_workers = max_workers
+        self.keepalive_timeout = keepalive_timeout
         self.server = None
         self.thread = None
         self.ssl_enabled = False
         
         # Set executor reference for handler
         APIHandler.executor = executor
+        APIHandler.keepalive_timeout = keepalive_timeout
+        APIHandler.timeout = request_timeout
     
     def start(self):
         """Start the API server in a background thread"""
         from job_executor import config
         
         try:
-            self.server = HTTPServer(('0.0.0.0', self.port), APIHandler)
+            self.server = PooledHTTPServer(('0.0.0.0', self.port), APIHandler, max_workers=self.max_workers)
             
             # Wrap with SSL if enabled
             protocol = "http"
@@ -2693,9 +3140,12 @@ class APIServer:
             
             self.thread = Thread(target=self.server.serve_forever, daemon=True)
             self.thread.start()
-            self.executor.log(f"API server started on {protocol}://0.0.0.0:{self.port}")
+            self.executor.log(f"API server started on {protocol}://0.0.0.0:{self.port} ({self.max_workers} workers)")
             self.executor.log(f"Available endpoints:")
             self.executor.log(f"  GET  /api/health")
+            self.executor.log(f"  GET  /api/metrics")
+            self.executor.log(f"  GET  /api/media-server/transfers")
+            self.executor.log(f"  POST /api/iso-upload (PUT .../chunks/<n>, POST .../complete)")
             self.executor.log(f"  POST /api/console-launch")
             self.executor.log(f"  POST /api/power-control")
             self.executor.log(f"  POST /api/connectivity-test")
@@ -0,0 +1,455 @@
+"""
+Discovery Batch Writer - Streams discovery results into bulk database writes
+
+Provides:
+- Bulk upsert of discovered / auth-failed servers (on_conflict=ip_address)
+- Batched vCenter auto-linking by service tag
+- Bulk audit_logs inserts
+- Bulk creation of follow-up jobs (automatic SCP backups)
+- JobTaskWriter: bulk creation and batched status updates of job_tasks
+
+Rows are buffered and written in arrays of N, so large scans no longer pay
+one REST round trip (or three) per host. If a batch is rejected (for example
+a service_tag unique conflict on one row) the batch falls back to per-row
+writes so a single bad row cannot drop its neighbours.
+"""
+
+import threading
+import time
+import requests
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from job_executor.config import DSM_URL, SERVICE_ROLE_KEY, VERIFY_SSL
+from job_executor.utils import _safe_json_parse, utc_now_iso
+
+
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_TASK_FLUSH_INTERVAL = 2.0
+
+
+class DiscoveryBatchWriter:
+    """
+    Thread-safe buffered writer for discovery and refresh results.
+
+    Producers call add_*() from any thread; a batch is written as soon as it
+    reaches batch_size, and close() writes whatever is left.
+    """
+
+    def __init__(self, executor, job_id: str, batch_size: int = DEFAULT_BATCH_SIZE):
+        """
+        Initialize the writer.
+
+        Args:
+            executor: JobExecutor instance (logging, record builders, drive sync)
+            job_id: Job that owns the writes (discovery_job_id, audit/job creator)
+            batch_size: Rows per bulk request
+        """
+        self.executor = executor
+        self.job_id = job_id
+        self.batch_size = max(1, int(batch_size or DEFAULT_BATCH_SIZE))
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()  # One bulk write in flight at a time
+
+        self.pending_servers: List[Dict] = []  # {'record': row, 'drives': [...]}
+        self.pending_audits: List[Dict] = []
+        self.pending_jobs: List[Dict] = []
+
+        self.server_ids: Dict[str, str] = {}  # ip_address -> server id
+        self.stats = {
+            'servers_written': 0,
+            'servers_failed': 0,
+            'audit_entries': 0,
+            'jobs_created': 0,
+            'requests': 0,
+        }
+        self._created_by = None
+        self._created_by_loaded = False
+
+        self.headers = {
+            "apikey": SERVICE_ROLE_KEY,
+            "Authorization": f"Bearer {SERVICE_ROLE_KEY}",
+            "Content-Type": "application/json",
+        }
+
+    # ------------------------------------------------------------------
+    # Producers
+    # ------------------------------------------------------------------
+
+    def add_discovered_server(self, server: Dict):
+        """Queue an authenticated discover_single_ip() result"""
+        record = self.executor._build_discovered_server_record(server, self.job_id)
+        record['ip_address'] = server['ip']
+        self._add('pending_servers', {'record': record, 'drives': server.get('drives')})
+
+    def add_auth_failed_server(self, ip: str):
+        """Queue an iDRAC that was detected but rejected every credential set"""
+        record = self.executor._build_auth_failed_server_record(ip, self.job_id)
+        self._add('pending_servers', {'record': record, 'drives': None})
+
+    def add_audit_entry(self, server_id: str, action: str, summary: str, details: Dict = None):
+        """Queue an audit_logs entry (same shape as _create_server_audit_entry)"""
+        self._add('pending_audits', {
+            'action': action,
+            'details': {
+                'server_id': server_id,
+                'summary': summary,
+                **(details or {})
+            },
+        })
+
+    def add_scp_backup_job(self, server_id: str):
+        """Queue an automatic SCP backup job for a newly synced server"""
+        self._add('pending_jobs', {
+            'job_type': 'scp_export',
+            'target_scope': {'server_ids': [server_id]},
+            'details': {
+                'backup_name': f'Initial-{datetime.now().strftime("%Y%m%d-%H%M%S")}',
+                'description': 'Automatic backup on server discovery',
+                'include_bios': True,
+                'include_idrac': True,
+                'include_raid': True,
+                'include_nic': True
+            }
+        })
+
+    def _add(self, queue_name: str, item: Dict):
+        with self.lock:
+            queue = getattr(self, queue_name)
+            queue.append(item)
+            full = len(queue) >= self.batch_size
+        if full:
+            self.flush(queue_name)
+
+    # ------------------------------------------------------------------
+    # Flushing
+    # ------------------------------------------------------------------
+
+    def flush(self, queue_name: Optional[str] = None):
+        """Write buffered rows (one queue, or all queues when queue_name is None)"""
+        names = [queue_name] if queue_name else ['pending_servers', 'pending_audits', 'pending_jobs']
+
+        with self.flush_lock:
+            for name in names:
+                with self.lock:
+                    items = getattr(self, name)
+                    setattr(self, name, [])
+                if not items:
+                    continue
+
+                for i in range(0, len(items), self.batch_size):
+                    batch = items[i:i + self.batch_size]
+                    if name == 'pending_servers':
+                        self._write_servers(batch)
+                    elif name == 'pending_audits':
+                        self._write_audits(batch)
+                    else:
+                        self._write_jobs(batch)
+
+    def close(self) -> Dict:
+        """Flush everything still buffered and return write statistics"""
+        self.flush()
+        return dict(self.stats)
+
+    def _post(self, table: str, rows: List[Dict], params: Dict = None, prefer: str = "return=minimal"):
+        self.stats['requests'] += 1
+        return requests.post(
+            f"{DSM_URL}/rest/v1/{table}",
+            headers={**self.headers, "Prefer": prefer},
+            params=params,
+            json=rows,
+            verify=VERIFY_SSL,
+            timeout=60
+        )
+
+    def _write_servers(self, batch: List[Dict]):
+        """Bulk upsert servers by ip_address, then run batched follow-ups"""
+        written = []
+
+        # PostgREST bulk inserts require every object to have the same keys, so
+        # discovered and auth-failed rows are written as separate groups
+        groups: Dict[frozenset, List[Dict]] = {}
+        for item in batch:
+            groups.setdefault(frozenset(item['record'].keys()), []).append(item)
+
+        for items in groups.values():
+            rows = [item['record'] for item in items]
+            try:
+                response = self._post(
+                    'servers', rows,
+                    params={'on_conflict': 'ip_address', 'select': 'id,ip_address,service_tag'},
+                    prefer='resolution=merge-duplicates,return=representation'
+                )
+                if response.status_code in [200, 201]:
+                    written.extend(_safe_json_parse(response) or [])
+                    continue
+                self.executor.log(
+                    f"Bulk server upsert rejected (HTTP {response.status_code}), retrying {len(rows)} row(s) individually",
+                    "WARN"
+                )
+            except Exception as e:
+                self.executor.log(f"Bulk server upsert failed ({e}), retrying {len(rows)} row(s) individually", "WARN")
+
+            for row in rows:
+                try:
+                    response = self._post(
+                        'servers', [row],
+                        params={'on_conflict': 'ip_address', 'select': 'id,ip_address,service_tag'},
+                        prefer='resolution=merge-duplicates,return=representation'
+                    )
+                    if response.status_code in [200, 201]:
+                        written.extend(_safe_json_parse(response) or [])
+                    else:
+                        self.stats['servers_failed'] += 1
+                        self.executor.log(f"Error upserting server {row['ip_address']}: HTTP {response.status_code} - {response.text[:200]}", "ERROR")
+                except Exception as e:
+                    self.stats['servers_failed'] += 1
+                    self.executor.log(f"Error upserting server {row['ip_address']}: {e}", "ERROR")
+
+        if not written:
+            return
+
+        self.stats['servers_written'] += len(written)
+        for row in written:
+            self.server_ids[row['ip_address']] = row['id']
+        self.executor.log(f"Upserted {len(written)} server(s) in bulk")
+
+        # Drive inventory is per-server by nature (bulk upsert per server already)
+        drives_by_ip = {item['record']['ip_address']: item['drives'] for item in batch if item.get('drives')}
+        for ip, drives in drives_by_ip.items():
+            server_id = self.server_ids.get(ip)
+            if server_id:
+                self.executor._sync_server_drives(server_id, drives)
+
+        tags = {row['service_tag']: row['id'] for row in written if row.get('service_tag')}
+        if tags:
+            self._auto_link_vcenter_batch(tags)
+
+    def _auto_link_vcenter_batch(self, server_ids_by_tag: Dict[str, str]):
+        """One lookup for all unlinked vCenter hosts matching this batch's service tags"""
+        try:
+            tag_list = ','.join(f'"{tag}"' for tag in server_ids_by_tag)
+            response = requests.get(
+                f"{DSM_URL}/rest/v1/vcenter_hosts",
+                headers=self.headers,
+                params={
+                    'serial_number': f'in.({tag_list})',
+                    'server_id': 'is.null',
+                    'select': 'id,name,serial_number'
+                },
+                verify=VERIFY_SSL,
+                timeout=30
+            )
+            self.stats['requests'] += 1
+            if response.status_code != 200:
+                return
+
+            for host in _safe_json_parse(response) or []:
+                server_id = server_ids_by_tag.get(host.get('serial_number'))
+                if not server_id:
+                    continue
+                # Link server → vCenter host
+                requests.patch(
+                    f"{DSM_URL}/rest/v1/servers?id=eq.{server_id}",
+                    json={'vcenter_host_id': host['id']},
+                    headers=self.headers,
+                    verify=VERIFY_SSL
+                )
+                # Link vCenter host → server (bidirectional)
+                requests.patch(
+                    f"{DSM_URL}/rest/v1/vcenter_hosts?id=eq.{host['id']}",
+                    json={'server_id': server_id},
+                    headers=self.headers,
+                    verify=VERIFY_SSL
+                )
+                self.executor.log(f"  ✓ Auto-linked to vCenter host: {host.get('name', 'Unknown')} ({host['id']})")
+        except Exception as e:
+            self.executor.log(f"  Auto-link check failed: {e}", "WARN")
+
+    def _get_created_by(self) -> Optional[str]:
+        """Creator of the owning job (looked up once, not per row)"""
+        if not self._created_by_loaded:
+            self._created_by_loaded = True
+            try:
+                response = requests.get(
+                    f"{DSM_URL}/rest/v1/jobs?id=eq.{self.job_id}&select=created_by",
+                    headers=self.headers,
+                    verify=VERIFY_SSL,
+                    timeout=10
+                )
+                if response.status_code == 200:
+                    jobs = _safe_json_parse(response)
+                    if jobs:
+                        self._created_by = jobs[0].get('created_by')
+            except Exception as e:
+                self.executor.log(f"  Could not look up job creator: {e}", "DEBUG")
+        return self._created_by
+
+    def _write_audits(self, batch: List[Dict]):
+        created_by = self._get_created_by()
+        rows = [{**entry, 'user_id': created_by} for entry in batch]
+        try:
+            response = self._post('audit_logs', rows)
+            if response.status_code in [200, 201, 204]:
+                self.stats['audit_entries'] += len(rows)
+            else:
+                self.executor.log(f"  Could not create {len(rows)} audit entries: HTTP {response.status_code}", "DEBUG")
+        except Exception as e:
+            self.executor.log(f"  Could not create audit entries: {e}", "DEBUG")
+
+    def _write_jobs(self, batch: List[Dict]):
+        created_by = self._get_created_by()
+        if not created_by:
+            self.executor.log(f"  Cannot create {len(batch)} SCP backup job(s): no user found for parent job", "WARN")
+            return
+
+        rows = [{**job, 'created_by': created_by} for job in batch]
+        try:
+            response = self._post('jobs', rows)
+            if response.status_code in [200, 201, 204]:
+                self.stats['jobs_created'] += len(rows)
+                self.executor.log(f"  ✓ Created {len(rows)} automatic SCP backup job(s)", "INFO")
+            else:
+                self.executor.log(f"  Failed to create SCP backup jobs: HTTP {response.status_code}", "WARN")
+        except Exception as e:
+            self.executor.log(f"  Failed to create SCP backup jobs: {e}", "WARN")
+
+
+class JobTaskWriter:
+    """
+    Single writer for the job_tasks of one job.
+
+    Tasks are created with one bulk insert. Status changes from worker
+    threads only update an in-memory copy of each row; dirty rows are
+    written together with an upsert on id once batch_size rows changed or
+    flush_interval seconds passed. Log lines are appended locally, so no
+    read-modify-write round trip is needed per update.
+    """
+
+    def __init__(self, executor, job_id: str, batch_size: int = DEFAULT_BATCH_SIZE,
+                 flush_interval: float = DEFAULT_TASK_FLUSH_INTERVAL):
+        self.executor = executor
+        self.job_id = job_id
+        self.batch_size = max(1, int(batch_size or DEFAULT_BATCH_SIZE))
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+
+        self.tasks: Dict[str, Dict] = {}  # task id -> full row
+        self.dirty: set = set()
+        self.last_flush = time.monotonic()
+        self.stats = {'tasks_created': 0, 'updates': 0, 'requests': 0, 'failed_writes': 0}
+
+        self.headers = {
+            "apikey": SERVICE_ROLE_KEY,
+            "Authorization": f"Bearer {SERVICE_ROLE_KEY}",
+            "Content-Type": "application/json",
+        }
+
+    def create_tasks(self, server_ids: List[str], log_messages: Dict[str, str] = None) -> Dict[str, str]:
+        """
+        Create one pending task per server in a single request.
+
+        Returns:
+            Map of server id -> task id (empty if the insert failed)
+        """
+        if not server_ids:
+            return {}
+        rows = [{
+            'job_id': self.job_id,
+            'server_id': server_id,
+            'status': 'pending',
+            'log': (log_messages or {}).get(server_id),
+        } for server_id in server_ids]
+
+        task_map = {}
+        for i in range(0, len(rows), self.batch_size):
+            chunk = rows[i:i + self.batch_size]
+            try:
+                self.stats['requests'] += 1
+                response = requests.post(
+                    f"{DSM_URL}/rest/v1/job_tasks",
+                    headers={**self.headers, "Prefer": "return=representation"},
+                    json=chunk,
+                    verify=VERIFY_SSL,
+                    timeout=30
+                )
+                if response.status_code not in [200, 201]:
+                    self.executor.log(f"  Could not create {len(chunk)} task(s): HTTP {response.status_code}", "WARN")
+                    continue
+                for task in _safe_json_parse(response) or []:
+                    task_map[task['server_id']] = task['id']
+                    with self.lock:
+                        self.tasks[task['id']] = {
+                            'id': task['id'],
+                            'job_id': self.job_id,
+                            'server_id': task['server_id'],
+                            'status': task.get('status') or 'pending',
+                            'log': task.get('log'),
+                            'progress': task.get('progress'),
+                            'started_at': task.get('started_at'),
+                            'completed_at': task.get('completed_at'),
+                        }
+            except Exception as e:
+                self.executor.log(f"  Could not create tasks: {e}", "WARN")
+        self.stats['tasks_created'] += len(task_map)
+        return task_map
+
+    def update(self, task_id: Optional[str], status: str, log: Optional[str] = None,
+               progress: Optional[int] = None):
+        """Record a status change (and optional log line) for a task"""
+        if not task_id:
+            return
+        with self.lock:
+            row = self.tasks.get(task_id)
+            if row is None:
+                return
+            row['status'] = status
+            if status == 'running' and not row.get('started_at'):
+                row['started_at'] = utc_now_iso()
+            elif status in ('completed', 'failed', 'cancelled'):
+                row['completed_at'] = utc_now_iso()
+            if progress is not None:
+                row['progress'] = progress
+            if log:
+                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                line = f"[{timestamp}] {log}"
+                row['log'] = f"{row['log']}\n{line}" if row.get('log') else line
+            self.dirty.add(task_id)
+            self.stats['updates'] += 1
+            due = len(self.dirty) >= self.batch_size or \
+                time.monotonic() - self.last_flush >= self.flush_interval
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write every task changed since the last flush"""
+        with self.flush_lock:
+            with self.lock:
+                rows = [dict(self.tasks[task_id]) for task_id in self.dirty]
+                self.dirty = set()
+                self.last_flush = time.monotonic()
+            for i in range(0, len(rows), self.batch_size):
+                batch = rows[i:i + self.batch_size]
+                try:
+                    self.stats['requests'] += 1
+                    response = requests.post(
+                        f"{DSM_URL}/rest/v1/job_tasks",
+                        headers={**self.headers, "Prefer": "resolution=merge-duplicates,return=minimal"},
+                        params={'on_conflict': 'id'},
+                        json=batch,
+                        verify=VERIFY_SSL,
+                        timeout=30
+                    )
+                    if response.status_code not in [200, 201, 204]:
+                        raise Exception(f"HTTP {response.status_code}")
+                except Exception as e:
+                    self.stats['failed_writes'] += 1
+                    self.executor.log(f"  Could not write {len(batch)} task update(s): {e}", "WARN")
+                    with self.lock:  # Retry with the next flush
+                        self.dirty.update(row['id'] for row in batch)
+
+    def close(self) -> Dict:
+        """Flush outstanding updates and return write statistics"""
+        self.flush()
+        return dict(self.stats)
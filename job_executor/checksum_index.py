@@ -0,0 +1,188 @@
+"""
+Persistent SHA-256 index for files in the ISO and firmware directories
+
+Provides:
+- hash_file(): SHA-256 of a file read with a large reusable buffer
+- ChecksumIndex: digests keyed by path and validated against the file's
+  (inode, size, mtime_ns), persisted as JSON next to the media directories
+- checksum_files(): digests for many files - unchanged files come from the
+  index, changed ones are hashed in parallel
+- get_checksum_index(): the process-wide index
+
+A directory rescan only stats its files; multi-GB ISOs are re-read only
+when they were replaced or modified.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, Optional
+
+from job_executor.config import CHECKSUM_INDEX_PATH
+
+
+INDEX_FORMAT_VERSION = 1
+
+# Read size for hashing; big reads keep large ISOs I/O bound rather than syscall bound
+HASH_BUFFER_SIZE = 4 * 1024 * 1024
+DEFAULT_HASH_WORKERS = min(4, os.cpu_count() or 1)
+
+
+def hash_file(path: str, buffer_size: int = HASH_BUFFER_SIZE) -> str:
+    """SHA-256 hex digest of path, read through one reusable buffer"""
+    sha256 = hashlib.sha256()
+    buffer = bytearray(buffer_size)
+    view = memoryview(buffer)
+    with open(path, 'rb', buffering=0) as f:
+        while True:
+            read = f.readinto(buffer)
+            if not read:
+                break
+            sha256.update(view[:read])
+    return sha256.hexdigest()
+
+
+def _signature(st: os.stat_result) -> list:
+    return [st.st_ino, st.st_size, st.st_mtime_ns]
+
+
+class ChecksumIndex:
+    """
+    SHA-256 digests by absolute path, trusted while (inode, size, mtime) match.
+
+    Replacing a file (new inode), appending to it or touching it invalidates
+    its entry. Thread safe; save() writes atomically and only when dirty.
+    """
+
+    def __init__(self, index_path: str = None):
+        self.index_path = index_path
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict] = {}
+        self._dirty = False
+        if index_path:
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.index_path, 'r') as f:
+                data = json.load(f)
+            if data.get('version') == INDEX_FORMAT_VERSION:
+                self._entries = data.get('entries', {})
+        except (OSError, ValueError):
+            self._entries = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, path: str, st: os.stat_result = None) -> Optional[str]:
+        """Indexed digest for path if the file is unchanged, else None"""
+        path = os.path.abspath(path)
+        try:
+            st = st or os.stat(path)
+        except OSError:
+            return None
+        with self._lock:
+            entry = self._entries.get(path)
+        if entry and entry.get('sig') == _signature(st):
+            return entry.get('sha256')
+        return None
+
+    def update(self, path: str, sha256: str, st: os.stat_result = None):
+        """Record a digest for path as it is on disk now"""
+        path = os.path.abspath(path)
+        st = st or os.stat(path)
+        with self._lock:
+            self._entries[path] = {'sig': _signature(st), 'sha256': sha256}
+            self._dirty = True
+
+    def prune(self, directory: str, keep: Iterable[str]):
+        """Drop entries under directory whose files are no longer present"""
+        root = os.path.join(os.path.abspath(directory), '')
+        keep = {os.path.abspath(p) for p in keep}
+        with self._lock:
+            for path in [p for p in self._entries if p.startswith(root) and p not in keep]:
+                del self._entries[path]
+                self._dirty = True
+
+    def save(self):
+        if not self.index_path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {'version': INDEX_FORMAT_VERSION, 'entries': self._entries}
+            os.makedirs(os.path.dirname(self.index_path) or '.', exist_ok=True)
+            tmp_path = f'{self.index_path}.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.index_path)
+            self._dirty = False
+
+
+def checksum_files(paths: Iterable[str], index: ChecksumIndex = None, max_workers: int = DEFAULT_HASH_WORKERS,
+                   log: Callable = None) -> Dict[str, Dict]:
+    """
+    SHA-256 for each path, hashing only files the index does not vouch for.
+
+    Hashing runs on a thread pool: hashlib and file reads release the GIL
+    for large buffers, so threads use several cores without pickling data
+    between processes.
+
+    Returns:
+        {path: {'sha256', 'size', 'cached'}} - files that could not be read
+        are left out (and logged)
+    """
+    log = log or (lambda msg, level='INFO': None)
+    results = {}
+    pending = {}
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError as e:
+            log(f"  Cannot stat {path}: {e}", "WARN")
+            continue
+        digest = index.lookup(path, st) if index is not None else None
+        if digest:
+            results[path] = {'sha256': digest, 'size': st.st_size, 'cached': True}
+        else:
+            pending[path] = st
+
+    if pending:
+        log(f"Hashing {len(pending)} new or changed file(s) "
+            f"({sum(st.st_size for st in pending.values()) / (1024 * 1024):.1f} MB)")
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pending)))) as pool:
+            futures = {pool.submit(hash_file, path): path for path in pending}
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    digest = future.result()
+                except OSError as e:
+                    log(f"  Cannot hash {path}: {e}", "WARN")
+                    continue
+                st = pending[path]
+                try:
+                    after = os.stat(path)
+                except OSError:
+                    continue
+                if index is not None and _signature(after) == _signature(st):
+                    index.update(path, digest, after)  # Not indexed if it changed while hashing
+                results[path] = {'sha256': digest, 'size': after.st_size, 'cached': False}
+
+    if index is not None:
+        index.save()
+    return results
+
+
+_index_lock = threading.Lock()
+_index: Optional[ChecksumIndex] = None
+
+
+def get_checksum_index() -> ChecksumIndex:
+    """Process-wide index stored at CHECKSUM_INDEX_PATH"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = ChecksumIndex(CHECKSUM_INDEX_PATH)
+        return _index
@@ -12,6 +12,14 @@ SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv("SERVICE_
 # API Server Configuration (for instant operations)
 API_SERVER_PORT = int(os.getenv("API_SERVER_PORT", "8081"))
 API_SERVER_ENABLED = os.getenv("API_SERVER_ENABLED", "true").lower() == "true"
+# Worker threads for API requests (each keep-alive connection holds one while active)
+API_SERVER_MAX_WORKERS = int(os.getenv("API_SERVER_MAX_WORKERS", "32"))
+# Seconds an idle keep-alive connection waits for its next request (it holds a worker meanwhile)
+API_SERVER_KEEPALIVE_TIMEOUT = int(os.getenv("API_SERVER_KEEPALIVE_TIMEOUT", "5"))
+# Seconds a request may stall on the socket once it has started arriving
+API_SERVER_REQUEST_TIMEOUT = int(os.getenv("API_SERVER_REQUEST_TIMEOUT", "30"))
+# Seconds an instant iDRAC read (health, firmware, jobs, BIOS) is reused for the same server
+API_RESULT_CACHE_SECONDS = float(os.getenv("API_RESULT_CACHE_SECONDS", "5"))
 
 # API Server SSL Configuration (required for remote HTTPS browser access)
 API_SERVER_SSL_ENABLED = os.getenv("API_SERVER_SSL_ENABLED", "false").lower() == "true"
@@ -46,14 +54,50 @@ SUPABASE_URL = os.getenv("SUPABASE_URL", DSM_URL)
 
 # PropertyCollector sync feature flags
 ENABLE_DEEP_RELATIONSHIPS = os.getenv("ENABLE_DEEP_RELATIONSHIPS", "false").lower() == "true"
+# Keep a WaitForUpdatesEx filter per vCenter and push only changed rows on repeat syncs
+VCENTER_INCREMENTAL_SYNC = os.getenv("VCENTER_INCREMENTAL_SYNC", "true").lower() == "true"
+# vCenters synced at the same time when a sync job covers several
+VCENTER_SYNC_MAX_PARALLEL = int(os.getenv("VCENTER_SYNC_MAX_PARALLEL", "4"))
+# Objects per PropertyCollector page; full syncs upsert each VM page while the next is fetched
+VCENTER_SYNC_PAGE_SIZE = int(os.getenv("VCENTER_SYNC_PAGE_SIZE", "1000"))
+# Shared vCenter sessions: re-check a session before reuse after this long,
+# ping idle sessions on this interval, and log out sessions unused this long
+VCENTER_POOL_VALIDATE_SECONDS = int(os.getenv("VCENTER_POOL_VALIDATE_SECONDS", "60"))
+VCENTER_POOL_KEEPALIVE_SECONDS = int(os.getenv("VCENTER_POOL_KEEPALIVE_SECONDS", "300"))
+VCENTER_POOL_IDLE_SECONDS = int(os.getenv("VCENTER_POOL_IDLE_SECONDS", "3600"))
+# VM upserts: only changed rows are written, in parallel batches whose size adapts
+# between the bounds (halved when a batch fails or takes longer than the slow threshold);
+# unchanged rows get last_sync bumped in chunks
+VCENTER_UPSERT_WORKERS = int(os.getenv("VCENTER_UPSERT_WORKERS", "4"))
+VCENTER_UPSERT_BATCH_SIZE = int(os.getenv("VCENTER_UPSERT_BATCH_SIZE", "50"))
+VCENTER_UPSERT_BATCH_MIN = int(os.getenv("VCENTER_UPSERT_BATCH_MIN", "25"))
+VCENTER_UPSERT_BATCH_MAX = int(os.getenv("VCENTER_UPSERT_BATCH_MAX", "500"))
+VCENTER_UPSERT_SLOW_SECONDS = float(os.getenv("VCENTER_UPSERT_SLOW_SECONDS", "4"))
+VM_TOUCH_CHUNK_SIZE = int(os.getenv("VM_TOUCH_CHUNK_SIZE", "200"))
+# Managed objects found by MoRef or name are reused for this long before being re-checked
+VCENTER_LOOKUP_CACHE_SECONDS = int(os.getenv("VCENTER_LOOKUP_CACHE_SECONDS", "30"))
+# Alarm definitions (name, description) are cached by alarm MoRef across alarm syncs for this long
+VCENTER_ALARM_DEFINITION_TTL_SECONDS = int(os.getenv("VCENTER_ALARM_DEFINITION_TTL_SECONDS", "3600"))
 
 # Media Server Configuration (for virtual media and firmware)
 ISO_DIRECTORY = os.getenv("ISO_DIRECTORY", "/var/lib/idrac-manager/isos")
 FIRMWARE_DIRECTORY = os.getenv("FIRMWARE_DIRECTORY", "/var/lib/idrac-manager/firmware")
+CATALOG_CACHE_DIRECTORY = os.getenv("CATALOG_CACHE_DIRECTORY", os.path.join(FIRMWARE_DIRECTORY, ".catalog"))
+# A catalog index older than this is revalidated upstream (conditional GET) before use (0 = never)
+CATALOG_INDEX_MAX_AGE_HOURS = float(os.getenv("CATALOG_INDEX_MAX_AGE_HOURS", "24"))
 MEDIA_SERVER_PORT = int(os.getenv("MEDIA_SERVER_PORT", "8888"))
 MEDIA_SERVER_ENABLED = os.getenv("MEDIA_SERVER_ENABLED", "true").lower() == "true"
+MEDIA_SERVER_MAX_CONNECTIONS = int(os.getenv("MEDIA_SERVER_MAX_CONNECTIONS", "64"))
+MEDIA_SERVER_KEEPALIVE_TIMEOUT = int(os.getenv("MEDIA_SERVER_KEEPALIVE_TIMEOUT", "30"))
+# Bandwidth caps in megabits/s (0 = unlimited); the global cap is shared evenly between clients
+MEDIA_SERVER_MAX_MBPS = float(os.getenv("MEDIA_SERVER_MAX_MBPS", "0"))
+MEDIA_SERVER_CLIENT_MAX_MBPS = float(os.getenv("MEDIA_SERVER_CLIENT_MAX_MBPS", "0"))
 ISO_MAX_STORAGE_GB = int(os.getenv("ISO_MAX_STORAGE_GB", "100"))
 FIRMWARE_MAX_STORAGE_GB = int(os.getenv("FIRMWARE_MAX_STORAGE_GB", "200"))
+# Persisted SHA-256 index for the ISO and firmware directories (skips re-hashing unchanged files)
+CHECKSUM_INDEX_PATH = os.getenv(
+    "CHECKSUM_INDEX_PATH", os.path.join(os.path.dirname(ISO_DIRECTORY.rstrip("/")), "checksum-index.json")
+)
 
 # ZFS NFS Export Options
 # CRITICAL: 'nohide' is required for ZFS child datasets (VM folders) to be visible via NFS
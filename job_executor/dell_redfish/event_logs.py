@@ -0,0 +1,196 @@
+"""
+Incremental paging helpers for iDRAC SEL and Lifecycle log collections.
+
+A high-water mark (last entry Id and Created timestamp) is kept per server
+and log type. Collections are read with $top/$skip pages from the newest
+end and paging stops at the first entry that is not newer than the mark,
+so collection cost scales with new events rather than log size.
+
+iDRAC returns Lifecycle entries newest first while SEL is commonly oldest
+first; the page order is detected and oldest-first collections are read
+backwards from the tail using Members@odata.count.
+
+At most max_entries (the newest) are returned per collection. When more
+than that arrived since the mark, the older ones are not read at all; the
+returned mark then carries 'skipped_entries' so the caller can report the
+gap.
+"""
+
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+DEFAULT_PAGE_SIZE = 50
+
+# fetch_page(skip, top) -> (members, total_count or None)
+FetchPage = Callable[[int, int], Tuple[List[Dict], Optional[int]]]
+
+
+def _parse_created(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        if value.endswith('Z'):
+            value = value[:-1] + '+00:00'
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _numeric_id(value) -> Optional[int]:
+    try:
+        return int(str(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def compare_entries(entry: Dict, mark: Dict) -> int:
+    """
+    Compare a log entry with a high-water mark.
+
+    Numeric Ids (iDRAC sequence numbers) are authoritative; the Created
+    timestamp is used when either side lacks one.
+
+    Returns:
+        1 if the entry is newer than the mark, 0 if equal, -1 if older
+    """
+    entry_id = _numeric_id(entry.get('Id'))
+    mark_id = _numeric_id(mark.get('last_event_id'))
+    if entry_id is not None and mark_id is not None:
+        return (entry_id > mark_id) - (entry_id < mark_id)
+
+    entry_created = _parse_created(entry.get('Created'))
+    mark_created = _parse_created(mark.get('last_event_created'))
+    if entry_created and mark_created:
+        try:
+            return (entry_created > mark_created) - (entry_created < mark_created)
+        except TypeError:  # naive vs aware timestamps
+            pass
+    # Unknown ordering - treat as new and let database de-duplication decide
+    return 1
+
+
+def is_newer(entry: Dict, mark: Optional[Dict]) -> bool:
+    """True if the entry is past the high-water mark (everything is new without one)"""
+    if not mark or (mark.get('last_event_id') is None and not mark.get('last_event_created')):
+        return True
+    return compare_entries(entry, mark) > 0
+
+
+def high_water_mark(entries: List[Dict], previous: Optional[Dict] = None) -> Optional[Dict]:
+    """Newest entry among entries as a mark (falls back to the previous mark)"""
+    mark = previous
+    for entry in entries:
+        if mark is None or is_newer(entry, mark):
+            mark = {
+                'last_event_id': str(entry.get('Id')) if entry.get('Id') is not None else None,
+                'last_event_created': entry.get('Created'),
+            }
+    return mark
+
+
+def _page_is_oldest_first(members: List[Dict]) -> bool:
+    if len(members) < 2:
+        return False
+    first, last = members[0], members[-1]
+    mark = {'last_event_id': first.get('Id'), 'last_event_created': first.get('Created')}
+    return compare_entries(last, mark) > 0
+
+
+def collect_new_entries(
+    fetch_page: FetchPage,
+    mark: Optional[Dict] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    max_entries: int = 500
+) -> Tuple[List[Dict], Optional[Dict]]:
+    """
+    Page through a log collection and return only entries newer than mark.
+
+    Args:
+        fetch_page: Callback returning one page for ($skip, $top)
+        mark: Stored high-water mark, or None for a first collection
+        page_size: $top per request
+        max_entries: Cap on entries returned (newest kept)
+
+    Returns:
+        (new entries oldest first, updated high-water mark). With a mark,
+        if new entries were left out because of max_entries, the returned
+        mark has 'skipped_entries': their number, or None if the Ids do
+        not tell.
+    """
+    members, total = fetch_page(0, page_size)
+    if not members:
+        return [], mark
+
+    new_entries: List[Dict] = []
+    oldest_first = _page_is_oldest_first(members)
+    reached_mark = True  # False if paging stopped at max_entries before reaching the mark
+
+    if oldest_first and total and total > len(members):
+        # Oldest first: walk backwards from the tail of the collection
+        device_newest = None
+        end = total
+        while end > 0:
+            if len(new_entries) >= max_entries:
+                reached_mark = False
+                break
+            skip = max(0, end - page_size)
+            page = fetch_page(skip, end - skip)[0]
+            if not page:
+                break
+            device_newest = device_newest or page[-1]
+            newer = [e for e in page if is_newer(e, mark)]
+            new_entries = newer + new_entries
+            if len(newer) < len(page):
+                break
+            end = skip
+    elif oldest_first:
+        # Oldest first without a total count: read forward to the end
+        page, skip = members, 0
+        while page:
+            new_entries.extend(e for e in page if is_newer(e, mark))
+            device_newest = page[-1]
+            if len(page) < page_size:
+                break
+            skip += len(page)
+            page = fetch_page(skip, page_size)[0]
+    else:
+        # Newest first: stop at the first page reaching the mark
+        device_newest = members[0]
+        page, skip = members, 0
+        while page:
+            newer = [e for e in page if is_newer(e, mark)]
+            new_entries.extend(newer)
+            if len(newer) < len(page) or len(page) < page_size:
+                break
+            if len(new_entries) >= max_entries:
+                reached_mark = False
+                break
+            skip += len(page)
+            page = fetch_page(skip, page_size)[0]
+        new_entries.reverse()
+
+    # Log was cleared on the iDRAC (sequence restarted below the mark): start over
+    if mark and not new_entries and device_newest is not None and compare_entries(device_newest, mark) < 0:
+        return collect_new_entries(fetch_page, None, page_size, max_entries)
+
+    skipped = max(0, len(new_entries) - max_entries)
+    if skipped:
+        new_entries = new_entries[-max_entries:]
+
+    new_mark = high_water_mark(new_entries, mark)
+    if mark and (skipped or not reached_mark):
+        if not reached_mark:
+            skipped = _count_skipped(new_entries[0], mark)  # 0 if the cap fell exactly on the mark
+        if skipped != 0:
+            new_mark = dict(new_mark, skipped_entries=skipped)
+    return new_entries, new_mark
+
+
+def _count_skipped(oldest_returned: Dict, mark: Dict) -> Optional[int]:
+    """Entries between the mark and the oldest returned entry, from sequence Ids"""
+    oldest_id = _numeric_id(oldest_returned.get('Id'))
+    mark_id = _numeric_id(mark.get('last_event_id'))
+    if oldest_id is None or mark_id is None or oldest_id <= mark_id:
+        return None
+    return oldest_id - mark_id - 1
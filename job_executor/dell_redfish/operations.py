@@ -10,6 +10,7 @@ import time
 from .adapter import DellRedfishAdapter
 from .helpers import DellRedfishHelpers
 from .errors import DellRedfishError, get_firmware_friendly_message, is_firmware_up_to_date_response
+from .event_logs import collect_new_entries, DEFAULT_PAGE_SIZE
 
 
 class DellOperations:
@@ -448,6 +449,7 @@ class DellOperations:
         username: str,
         password: str,
         firmware_uri: str,
+        apply_time: str = None,
         job_id: str = None,
         server_id: str = None,
         user_id: str = None
@@ -464,6 +466,8 @@ class DellOperations:
             username: iDRAC username
             password: iDRAC password
             firmware_uri: HTTP/HTTPS URI to firmware file (.exe)
+            apply_time: Optional @Redfish.OperationApplyTime (e.g. 'Immediate');
+                use stage_firmware_simple() for 'OnReset'
             job_id: Optional job ID for logging
             server_id: Optional server ID for logging
             user_id: Optional user ID for logging
@@ -479,6 +483,8 @@ class DellOperations:
             'ImageURI': firmware_uri,
             'TransferProtocol': 'HTTP'
         }
+        if apply_time:
+            payload['@Redfish.OperationApplyTime'] = apply_time
         
         response = self.adapter.make_request(
             method='POST',
@@ -515,12 +521,128 @@ class DellOperations:
         )
         
         return {
+            'success': task_result.get('TaskState') == 'Completed',
             'task_uri': task_uri,
             'task_state': task_result.get('TaskState'),
             'messages': task_result.get('Messages', []),
             'percent_complete': task_result.get('PercentComplete', 100)
         }
     
+    def stage_firmware_simple(
+        self,
+        ip: str,
+        username: str,
+        password: str,
+        image_uri: str,
+        apply_time: str = 'OnReset',
+        timeout: int = 1800,
+        poll_interval: int = 15,
+        job_id: str = None,
+        server_id: str = None,
+        user_id: str = None
+    ) -> Dict[str, Any]:
+        """
+        Download a DUP into the iDRAC and schedule it without installing.
+        
+        Dell pattern:
+        - POST UpdateService.SimpleUpdate with an HTTP ImageURI and
+          @Redfish.OperationApplyTime 'OnReset'
+        - iDRAC pulls the package, verifies it and leaves its job Scheduled
+        - The install runs on the next host reboot
+        
+        Args:
+            ip: iDRAC IP address
+            username: iDRAC username
+            password: iDRAC password
+            image_uri: HTTP URI of the DUP (typically on the executor MediaServer)
+            apply_time: Apply time for the staged job (default 'OnReset')
+            timeout: Seconds to wait for the download to finish
+            poll_interval: Seconds between task polls
+            job_id: Optional job ID for logging
+            server_id: Optional server ID for logging
+            user_id: Optional user ID for logging
+            
+        Returns:
+            dict: 'success', 'staged' (scheduled for reboot), 'task_uri',
+                'job_state' and 'message'
+            
+        Raises:
+            DellRedfishError: On API errors, failed download or timeout
+        """
+        response = self.adapter.make_request(
+            method='POST',
+            ip=ip,
+            endpoint='/redfish/v1/UpdateService/Actions/UpdateService.SimpleUpdate',
+            username=username,
+            password=password,
+            payload={
+                'ImageURI': image_uri,
+                'TransferProtocol': 'HTTP',
+                '@Redfish.OperationApplyTime': apply_time
+            },
+            operation_name='Stage Firmware Update',
+            job_id=job_id,
+            server_id=server_id,
+            user_id=user_id
+        )
+        
+        task_uri = self.helpers.get_task_uri_from_response(response)
+        if not task_uri:
+            raise DellRedfishError(
+                message="Failed to get task URI from firmware staging response",
+                error_code='NO_TASK_URI'
+            )
+        
+        # The Dell job behind the task reports 'Scheduled' once the package is
+        # downloaded and verified; TaskState stays Running/Pending until reboot
+        start_time = time.time()
+        while time.time() - start_time < timeout:
+            task = self.adapter.make_request(
+                method='GET',
+                ip=ip,
+                endpoint=task_uri,
+                username=username,
+                password=password,
+                operation_name='Stage Firmware Update - Poll Task',
+                job_id=job_id,
+                server_id=server_id,
+                user_id=user_id
+            )
+            task_state = task.get('TaskState', '')
+            job_state = (task.get('Oem', {}).get('Dell', {}) or {}).get('JobState') or task.get('JobState') or ''
+            messages = task.get('Messages') or []
+            message = (messages[0].get('Message', '') if messages else '') or \
+                (task.get('Oem', {}).get('Dell', {}) or {}).get('Message', '')
+            
+            if job_state in ('Scheduled', 'Downloaded'):
+                return {
+                    'success': True,
+                    'staged': True,
+                    'task_uri': task_uri,
+                    'job_state': job_state or task_state,
+                    'message': message
+                }
+            if task_state == 'Completed' or job_state == 'Completed':
+                # Components that need no reboot (e.g. some NIC firmware) install right away
+                return {
+                    'success': True,
+                    'staged': False,
+                    'task_uri': task_uri,
+                    'job_state': 'Completed',
+                    'message': message
+                }
+            if task_state in ('Exception', 'Killed', 'Cancelled') or job_state in ('Failed', 'CompletedWithErrors'):
+                raise DellRedfishError(
+                    message=f"Firmware staging failed: {message or job_state or task_state}",
+                    error_code=job_state or task_state
+                )
+            time.sleep(poll_interval)
+        
+        raise DellRedfishError(
+            message=f"Firmware staging timed out after {timeout} seconds",
+            error_code='TIMEOUT'
+        )
+    
     def monitor_firmware_task(
         self,
         ip: str,
@@ -797,12 +919,13 @@ class DellOperations:
                     user_id=user_id
                 )
                 
-                # Extract Dell-specific component type
-                component_type = None
+                # Extract Dell-specific component type and device identity
+                # (ComponentID / PCI ids are what Catalog.xml SupportedDevices match on)
+                dell_sw = {}
                 oem = component.get('Oem', {})
                 if 'Dell' in oem:
-                    dell_sw = oem['Dell'].get('DellSoftwareInventory', {})
-                    component_type = dell_sw.get('ComponentType')
+                    dell_sw = oem['Dell'].get('DellSoftwareInventory', {}) or {}
+                component_type = dell_sw.get('ComponentType')
                 
                 inventory.append({
                     'Name': component.get('Name'),
@@ -810,6 +933,11 @@ class DellOperations:
                     'Version': component.get('Version'),
                     'Updateable': component.get('Updateable', False),
                     'ComponentType': component_type,
+                    'ComponentID': dell_sw.get('ComponentID'),
+                    'VendorID': dell_sw.get('VendorID'),
+                    'DeviceID': dell_sw.get('DeviceID'),
+                    'SubVendorID': dell_sw.get('SubVendorID'),
+                    'SubDeviceID': dell_sw.get('SubDeviceID'),
                     'Status': component.get('Status', {}).get('State', 'Unknown')
                 })
                 
@@ -1886,14 +2014,62 @@ class DellOperations:
     
     # Event Log Operations
     
-    def get_sel_logs(
+    def _get_log_entries(
         self,
         ip: str,
         username: str,
         password: str,
+        endpoint: str,
+        operation_name: str,
         limit: int = 50,
+        since: Optional[Dict] = None,
         server_id: str = None,
         user_id: str = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Read a log collection page by page ($top/$skip), newest entries only.
+        
+        Args:
+            endpoint: Log entries collection endpoint
+            limit: Maximum number of entries to return
+            since: Optional high-water mark {'last_event_id', 'last_event_created'};
+                   only entries newer than the mark are fetched
+            
+        Returns:
+            list: Raw log members, newest first
+        """
+        page_size = max(1, min(limit, DEFAULT_PAGE_SIZE))
+        
+        def fetch_page(skip: int, top: int):
+            response = self.adapter.make_request(
+                method='GET',
+                ip=ip,
+                endpoint=f"{endpoint}?$skip={skip}&$top={top}",
+                username=username,
+                password=password,
+                operation_name=operation_name,
+                server_id=server_id,
+                user_id=user_id
+            )
+            members = response.get('Members', [])
+            total = response.get('Members@odata.count')
+            if len(members) > top:
+                # Firmware ignored paging and returned the whole collection
+                members = members[skip:skip + top] if total is None or len(members) >= total else members[:top]
+            return members, total
+        
+        entries, _ = collect_new_entries(fetch_page, since, page_size=page_size, max_entries=limit)
+        return list(reversed(entries))
+    
+    def get_sel_logs(
+        self,
+        ip: str,
+        username: str,
+        password: str,
+        limit: int = 50,
+        server_id: str = None,
+        user_id: str = None,
+        since: Optional[Dict] = None
     ) -> List[Dict[str, Any]]:
         """
         Get System Event Log (SEL) entries from iDRAC.
@@ -1907,29 +2083,27 @@ class DellOperations:
             limit: Maximum number of entries to return
             server_id: Optional server ID for logging
             user_id: Optional user ID for logging
+            since: Optional high-water mark; only newer entries are fetched
             
         Returns:
-            list: SEL log entries with timestamp, severity, message
+            list: SEL log entries with timestamp, severity, message (newest first)
             
         Raises:
             DellRedfishError: On API errors
         """
-        response = self.adapter.make_request(
-            method='GET',
-            ip=ip,
+        members = self._get_log_entries(
+            ip, username, password,
             endpoint='/redfish/v1/Managers/iDRAC.Embedded.1/Logs/Sel',
-            username=username,
-            password=password,
             operation_name='Get SEL Logs',
+            limit=limit,
+            since=since,
             server_id=server_id,
             user_id=user_id
         )
         
-        members = response.get('Members', [])
-        
         # Parse and return log entries
         logs = []
-        for member in members[:limit]:
+        for member in members:
             logs.append({
                 'id': member.get('Id'),
                 'timestamp': member.get('Created'),
@@ -1950,7 +2124,8 @@ class DellOperations:
         password: str,
         limit: int = 50,
         server_id: str = None,
-        user_id: str = None
+        user_id: str = None,
+        since: Optional[Dict] = None
     ) -> List[Dict[str, Any]]:
         """
         Get Lifecycle Controller logs from iDRAC.
@@ -1964,29 +2139,27 @@ class DellOperations:
             limit: Maximum number of entries to return
             server_id: Optional server ID for logging
             user_id: Optional user ID for logging
+            since: Optional high-water mark; only newer entries are fetched
             
         Returns:
-            list: Lifecycle log entries with timestamp, severity, message
+            list: Lifecycle log entries with timestamp, severity, message (newest first)
             
         Raises:
             DellRedfishError: On API errors
         """
-        response = self.adapter.make_request(
-            method='GET',
-            ip=ip,
+        members = self._get_log_entries(
+            ip, username, password,
             endpoint='/redfish/v1/Managers/iDRAC.Embedded.1/LogServices/Lclog/Entries',
-            username=username,
-            password=password,
             operation_name='Get Lifecycle Logs',
+            limit=limit,
+            since=since,
             server_id=server_id,
             user_id=user_id
         )
         
-        members = response.get('Members', [])
-        
         # Parse and return log entries
         logs = []
-        for member in members[:limit]:
+        for member in members:
             logs.append({
                 'id': member.get('Id'),
                 'timestamp': member.get('Created'),
@@ -2575,11 +2748,17 @@ class DellOperations:
         server_id: str = None,
         job_id: str = None,
         user_id: str = None,
-        timeout: int = 300
+        timeout: int = 300,
+        catalog_index=None,
+        model: str = None
     ) -> Dict[str, Any]:
         """
         Check what updates are available from Dell catalog WITHOUT applying them.
         
+        When a parsed catalog index (job_executor.firmware_catalog) that
+        covers the server model is passed, updates are computed locally from
+        FirmwareInventory and the iDRAC-side repository scan is skipped.
+        
         Uses InstallFromRepository with ApplyUpdate=False to scan the catalog
         and determine available updates. This allows checking before entering
         maintenance mode.
@@ -2596,6 +2775,8 @@ class DellOperations:
             job_id: Optional job ID for logging
             user_id: Optional user ID for logging
             timeout: Max time to wait for catalog scan (default 300s)
+            catalog_index: Optional CatalogIndex for an offline check
+            model: Server model used to look up the catalog index
             
         Returns:
             dict: Contains 'available_updates' list with update details
@@ -2603,6 +2784,20 @@ class DellOperations:
         import time
         from urllib.parse import urlparse
         
+        if catalog_index is not None and catalog_index.has_model(model):
+            inventory = self.get_firmware_inventory(
+                ip, username, password, job_id=job_id, server_id=server_id, user_id=user_id
+            )
+            available_updates = catalog_index.find_updates(inventory, model=model)
+            return {
+                'success': True,
+                'available_updates': available_updates,
+                'update_count': len(available_updates),
+                'message': f"{len(available_updates)} update(s) available" if available_updates else 'Server firmware is up to date - no updates available in catalog',
+                'info_code': None if available_updates else 'UP_TO_DATE',
+                'source': 'catalog_index'
+            }
+        
         parsed = urlparse(catalog_url)
         
         # Call InstallFromRepository with ApplyUpdate=False (scan only)
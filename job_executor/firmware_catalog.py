@@ -0,0 +1,659 @@
+"""
+Offline Dell Catalog.xml index
+
+Provides:
+- Streaming parse of Catalog.xml / Catalog.xml.gz (iterparse, constant memory)
+- A compact index: model (and SystemID) -> device key -> package versions
+- Local computation of available updates from FirmwareInventory results
+- A process-wide cache of the index, persisted as gzip JSON
+- Conditional (ETag / Last-Modified) catalog refresh for catalog_sync jobs,
+  and before use once the index is older than CATALOG_INDEX_MAX_AGE_HOURS
+
+Computing updates locally replaces asking every iDRAC to run
+InstallFromRepository(ApplyUpdate=False) and polling it for minutes: the
+catalog is parsed once and each server only needs its FirmwareInventory.
+
+Device keys follow the iDRAC inventory:
+- 'c:<componentID>' for embedded components (BIOS, iDRAC, CPLD, PERC, ...)
+- 'p:<ven>:<dev>:<subven>:<subdev>' for PCI devices (NICs, HBAs, ...)
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import xml.etree.ElementTree as ET
+from typing import Dict, IO, List, Optional, Tuple
+
+import requests
+
+from job_executor.config import CATALOG_CACHE_DIRECTORY, CATALOG_INDEX_MAX_AGE_HOURS
+
+
+DEFAULT_CATALOG_URL = 'https://downloads.dell.com/catalog/Catalog.xml'
+INDEX_FILENAME = 'catalog-index.json.gz'
+INDEX_FORMAT_VERSION = 2
+META_FILENAME = 'catalog-meta.json'
+# After a failed revalidation the cached index is used for this long before trying again
+REVALIDATE_RETRY_SECONDS = 900
+# After a failed build (download or parse) get_catalog_index() returns None this long without retrying
+BUILD_RETRY_SECONDS = 300
+
+# Packages without SupportedSystems apply to every model
+ANY_MODEL = '*'
+
+CRITICALITY_MAP = {'1': 'Critical', '2': 'Recommended', '3': 'Optional'}
+
+# Dell installs firmware, BIOS and application packages through iDRAC; drivers are OS-side
+UPDATEABLE_COMPONENT_TYPES = {'FRMW', 'BIOS', 'APAC'}
+
+
+def normalize_model(model: Optional[str]) -> Optional[str]:
+    """'PowerEdge R640' / 'R640' / 'poweredge r640 ' -> 'R640'"""
+    if not model:
+        return None
+    token = re.sub(r'(?i)\bpoweredge\b', '', model).strip().upper()
+    return re.sub(r'\s+', ' ', token) or None
+
+
+def normalize_system_id(system_id) -> Optional[str]:
+    """SystemID as the catalog writes it (4 hex digits), from int or string"""
+    if system_id is None or system_id == '':
+        return None
+    if isinstance(system_id, int):
+        return f'{system_id:04X}'
+    value = str(system_id).strip()
+    if value.isdigit() and len(value) > 4:
+        return f'{int(value):04X}'
+    return value.upper().zfill(4)
+
+
+def version_key(version: Optional[str]) -> Tuple:
+    """
+    Sortable key for Dell version strings.
+
+    Handles '2.19.1', '7.00.00.174', '22.31.6', 'A05', '1.6.13_A00' by
+    comparing numeric runs numerically and text runs case-insensitively.
+    """
+    if not version:
+        return ()
+    parts = []
+    for token in re.findall(r'\d+|[A-Za-z]+', version):
+        parts.append((0, int(token), '') if token.isdigit() else (1, 0, token.lower()))
+    # Trailing zero components do not make a version newer (2.8 == 2.8.0)
+    while parts and parts[-1] == (0, 0, ''):
+        parts.pop()
+    return tuple(parts)
+
+
+def is_newer_version(candidate: Optional[str], installed: Optional[str]) -> bool:
+    """True if candidate is strictly newer than installed"""
+    if not candidate or not installed:
+        return False
+    return version_key(candidate) > version_key(installed)
+
+
+def inventory_device_keys(item: Dict) -> List[str]:
+    """Device keys for one FirmwareInventory entry (see get_firmware_inventory)"""
+    keys = []
+    component_id = item.get('ComponentID') or item.get('component_id')
+    if not component_id:
+        # Ids look like 'Installed-159-2.19.1' or 'Installed-101560-22.31.6__NIC.Integrated.1-1-1'
+        match = re.match(r'^(?:Installed|Current)-(\d+)-', item.get('Id') or '')
+        if match and match.group(1) != '0':
+            component_id = match.group(1)
+    if component_id:
+        keys.append(f'c:{component_id}')
+
+    pci = [item.get(k) for k in ('VendorID', 'DeviceID', 'SubVendorID', 'SubDeviceID')]
+    if pci[0] and pci[1]:
+        keys.append('p:' + ':'.join((v or '').lower() for v in pci))
+    return keys
+
+
+class CatalogIndex:
+    """
+    Compact, JSON-serializable index of a Dell catalog.
+
+    packages holds one dict per SoftwareComponent; models maps a normalized
+    model token to {device_key: [package index, ...]}.
+    """
+
+    def __init__(self, meta: Dict = None, packages: List[Dict] = None,
+                 models: Dict[str, Dict[str, List[int]]] = None, system_ids: Dict[str, str] = None):
+        self.meta = meta or {}
+        self.packages = packages or []
+        self.models = models or {}
+        self.system_ids = system_ids or {}
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def resolve_model(self, model: Optional[str] = None, system_id=None) -> Optional[str]:
+        """Model token present in the index for a server, or None"""
+        sid = normalize_system_id(system_id)
+        if sid and sid in self.system_ids:
+            return self.system_ids[sid]
+        token = normalize_model(model)
+        if token and token in self.models:
+            return token
+        return None
+
+    def has_model(self, model: Optional[str] = None, system_id=None) -> bool:
+        return self.resolve_model(model, system_id) is not None
+
+    def candidates(self, model_token: str, device_key: str) -> List[Dict]:
+        """Catalog packages for one device on one model"""
+        indexes = list(self.models.get(model_token, {}).get(device_key, []))
+        indexes += self.models.get(ANY_MODEL, {}).get(device_key, [])
+        return [self.packages[i] for i in indexes]
+
+    def find_updates(self, inventory: List[Dict], model: Optional[str] = None, system_id=None) -> List[Dict]:
+        """
+        Compute available updates for one server from its FirmwareInventory.
+
+        Returns:
+            List of update dicts in the shape check_available_catalog_updates
+            returns ('name', 'component', 'current_version',
+            'available_version', 'criticality', 'reboot_required',
+            'package_path', 'status', 'source')
+        """
+        model_token = self.resolve_model(model, system_id)
+        if not model_token:
+            return []
+
+        updates = []
+        seen = set()
+        for item in inventory:
+            name = item.get('Name') or item.get('name') or item.get('component_name') or 'Unknown'
+            installed = item.get('Version') or item.get('version')
+            if not installed:
+                continue
+            # Only installed (not previous/staged) copies are compared
+            item_id = item.get('Id') or ''
+            if item_id and not item_id.startswith(('Installed', 'Current')):
+                continue
+
+            best = None
+            for key in inventory_device_keys(item):
+                for pkg in self.candidates(model_token, key):
+                    if best is None or version_key(pkg['version']) > version_key(best['version']):
+                        best = pkg
+            if not best or not is_newer_version(best['version'], installed):
+                continue
+
+            dedupe_key = (name, best['path'])
+            if dedupe_key in seen:
+                continue
+            seen.add(dedupe_key)
+
+            updates.append({
+                'name': name,
+                'component': best.get('component_type') or item.get('ComponentType') or 'Unknown',
+                'current_version': installed,
+                'available_version': best['version'],
+                'criticality': best.get('criticality') or 'Optional',
+                'reboot_required': best.get('reboot_required', True),
+                'package_path': best['path'],
+                'package_name': best.get('name'),
+                'hash_md5': best.get('hash_md5'),
+                'size': best.get('size'),
+                'status': 'Available',
+                'source': 'catalog_index',
+            })
+        return updates
+
+    def packages_for_models(self, model_tokens: List[str], latest_only: bool = False) -> List[Dict]:
+        """
+        All packages applicable to any of the given models (for pre-fetching).
+
+        With latest_only, just the newest package per model and device is
+        returned - what an update to current would actually install.
+        """
+        indexes = set()
+        for token in model_tokens:
+            for pkg_indexes in self.models.get(token, {}).values():
+                if latest_only:
+                    indexes.add(max(pkg_indexes, key=lambda i: version_key(self.packages[i]['version'])))
+                else:
+                    indexes.update(pkg_indexes)
+        return [self.packages[i] for i in sorted(indexes)]
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def to_dict(self) -> Dict:
+        return {
+            'format': INDEX_FORMAT_VERSION,
+            'meta': self.meta,
+            'packages': self.packages,
+            'models': self.models,
+            'system_ids': self.system_ids,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'CatalogIndex':
+        if data.get('format') != INDEX_FORMAT_VERSION:
+            raise ValueError(f"Unsupported catalog index format: {data.get('format')}")
+        return cls(data.get('meta'), data.get('packages'), data.get('models'), data.get('system_ids'))
+
+    def save(self, path: str):
+        """Atomically write the index as gzip JSON"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f'{path}.tmp'
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'CatalogIndex':
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+# ----------------------------------------------------------------------
+# Parsing
+# ----------------------------------------------------------------------
+
+def _local(tag: str) -> str:
+    return tag.rsplit('}', 1)[-1]
+
+
+def _display(elem) -> Optional[str]:
+    for child in elem:
+        if _local(child.tag) == 'Display' and (child.text or '').strip():
+            return child.text.strip()
+    return None
+
+
+def open_catalog(path: str) -> IO[bytes]:
+    """Open Catalog.xml or Catalog.xml.gz (detected by magic bytes)"""
+    f = open(path, 'rb')
+    magic = f.read(2)
+    f.seek(0)
+    if magic == b'\x1f\x8b':
+        return gzip.GzipFile(fileobj=f)
+    return f
+
+
+def parse_catalog(source) -> CatalogIndex:
+    """
+    Stream-parse a Dell catalog into a CatalogIndex.
+
+    Args:
+        source: Path or binary file object (plain or gzip XML)
+    """
+    fileobj = open_catalog(source) if isinstance(source, str) else source
+    if hasattr(fileobj, 'peek') and fileobj.peek(2)[:2] == b'\x1f\x8b':
+        fileobj = gzip.GzipFile(fileobj=fileobj)
+
+    meta: Dict = {}
+    packages: List[Dict] = []
+    models: Dict[str, Dict[str, List[int]]] = {}
+    system_ids: Dict[str, str] = {}
+    root = None
+
+    try:
+        for event, elem in ET.iterparse(fileobj, events=('start', 'end')):
+            tag = _local(elem.tag)
+
+            if event == 'start':
+                if root is None:
+                    root = elem
+                    meta = {
+                        'base_location': elem.get('baseLocation'),
+                        'catalog_version': elem.get('version'),
+                        'catalog_date': elem.get('dateTime'),
+                    }
+                continue
+
+            if tag != 'SoftwareComponent':
+                continue
+
+            component_type = None
+            name = None
+            criticality = None
+            hash_sha256 = None
+            device_keys = []
+            model_tokens = []
+
+            for child in elem:
+                child_tag = _local(child.tag)
+                if child_tag == 'Name':
+                    name = _display(child)
+                elif child_tag == 'ComponentType':
+                    component_type = child.get('value')
+                elif child_tag == 'Criticality':
+                    criticality = CRITICALITY_MAP.get(child.get('value'), child.get('value'))
+                elif child_tag == 'Cryptography':
+                    for digest in child:
+                        if _local(digest.tag) == 'Hash' and (digest.get('algorithm') or '').upper() == 'SHA256':
+                            hash_sha256 = (digest.text or '').strip().lower() or None
+                elif child_tag == 'SupportedDevices':
+                    for device in child:
+                        if _local(device.tag) != 'Device':
+                            continue
+                        if device.get('componentID'):
+                            device_keys.append(f"c:{device.get('componentID')}")
+                        for info in device:
+                            if _local(info.tag) == 'PCIInfo':
+                                device_keys.append('p:' + ':'.join(
+                                    (info.get(k) or '').lower()
+                                    for k in ('vendorID', 'deviceID', 'subVendorID', 'subDeviceID')
+                                ))
+                elif child_tag == 'SupportedSystems':
+                    for brand in child:
+                        for model in brand:
+                            if _local(model.tag) != 'Model':
+                                continue
+                            token = normalize_model(_display(model))
+                            if not token:
+                                continue
+                            model_tokens.append(token)
+                            sid = normalize_system_id(model.get('systemID'))
+                            if sid:
+                                system_ids.setdefault(sid, token)
+
+            version = elem.get('vendorVersion') or elem.get('dellVersion')
+            if device_keys and version and (component_type or '').upper() in UPDATEABLE_COMPONENT_TYPES:
+                index = len(packages)
+                packages.append({
+                    'name': name,
+                    'version': version,
+                    'dell_version': elem.get('dellVersion'),
+                    'component_type': component_type,
+                    'criticality': criticality,
+                    'reboot_required': (elem.get('rebootRequired') or 'true').lower() == 'true',
+                    'path': elem.get('path'),
+                    'hash_md5': elem.get('hashMD5'),
+                    'hash_sha256': hash_sha256,
+                    'size': int(elem.get('size')) if (elem.get('size') or '').isdigit() else None,
+                    'release_date': elem.get('releaseDate'),
+                })
+                for token in (model_tokens or [ANY_MODEL]):
+                    by_device = models.setdefault(token, {})
+                    for key in set(device_keys):
+                        by_device.setdefault(key, []).append(index)
+
+            # Free the parsed subtree - keeps memory flat on a 100+ MB catalog
+            elem.clear()
+            if root is not None:
+                root.clear()
+    finally:
+        if isinstance(source, str):
+            fileobj.close()
+
+    meta['package_count'] = len(packages)
+    meta['model_count'] = len([m for m in models if m != ANY_MODEL])
+    meta['indexed_at'] = time.time()
+    return CatalogIndex(meta, packages, models, system_ids)
+
+
+# ----------------------------------------------------------------------
+# Process-wide cache
+# ----------------------------------------------------------------------
+
+_index_lock = threading.Lock()
+_indexes: Dict[str, CatalogIndex] = {}
+_build_locks: Dict[str, threading.Lock] = {}  # catalog_url -> held while one thread builds its index
+_build_failed_until: Dict[str, float] = {}  # catalog_url -> retry time after a failed build
+_revalidate_lock = threading.Lock()
+_revalidate_after: Dict[str, float] = {}  # catalog_url -> retry time after a failed revalidation
+
+
+def index_path(catalog_url: str, cache_dir: str = None) -> str:
+    """Where the persisted index for a catalog URL lives"""
+    digest = hashlib.sha256((catalog_url or DEFAULT_CATALOG_URL).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_dir or CATALOG_CACHE_DIRECTORY, f'{digest}-{INDEX_FILENAME}')
+
+
+def set_catalog_index(catalog_url: str, index: CatalogIndex, cache_dir: str = None, persist: bool = True):
+    """Install a freshly built index for catalog_url (memory and disk)"""
+    catalog_url = catalog_url or DEFAULT_CATALOG_URL
+    index.meta['catalog_url'] = catalog_url
+    if persist:
+        index.save(index_path(catalog_url, cache_dir))
+    with _index_lock:
+        _indexes[catalog_url] = index
+        _build_failed_until.pop(catalog_url, None)
+
+
+def clear_catalog_index_cache():
+    """Drop in-memory indexes and remembered build failures (persisted files are kept)"""
+    with _index_lock:
+        _indexes.clear()
+        _build_failed_until.clear()
+
+
+def _download_catalog(catalog_url: str, dest_path: str, timeout: int = 120,
+                      validators: Dict = None) -> Optional[Dict]:
+    """
+    Stream a catalog to disk (never held in memory).
+
+    Args:
+        validators: Stored {'etag', 'last_modified'} to send as
+            If-None-Match / If-Modified-Since
+
+    Returns:
+        New validators, or None if the server answered 304 Not Modified
+        (dest_path is then left untouched)
+    """
+    headers = {}
+    if validators and validators.get('etag'):
+        headers['If-None-Match'] = validators['etag']
+    if validators and validators.get('last_modified'):
+        headers['If-Modified-Since'] = validators['last_modified']
+
+    os.makedirs(os.path.dirname(dest_path) or '.', exist_ok=True)
+    with requests.get(catalog_url, headers=headers, stream=True, timeout=(10, timeout)) as response:
+        if response.status_code == 304:
+            return None
+        response.raise_for_status()
+        tmp_path = f'{dest_path}.part'
+        with open(tmp_path, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=1024 * 1024):
+                if chunk:
+                    f.write(chunk)
+        os.replace(tmp_path, dest_path)
+        return {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+        }
+
+
+def _meta_path(catalog_url: str, cache_dir: str = None) -> str:
+    return index_path(catalog_url, cache_dir)[:-len(INDEX_FILENAME)] + META_FILENAME
+
+
+def load_catalog_validators(catalog_url: str, cache_dir: str = None) -> Dict:
+    """ETag / Last-Modified recorded by the last successful sync_catalog"""
+    try:
+        with open(_meta_path(catalog_url, cache_dir), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_catalog_validators(catalog_url: str, cache_dir: str, validators: Dict):
+    """Record validators and the time the index was last known to match upstream"""
+    validators = {**validators, 'catalog_url': catalog_url, 'synced_at': time.time()}
+    tmp_path = _meta_path(catalog_url, cache_dir) + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(validators, f)
+    os.replace(tmp_path, _meta_path(catalog_url, cache_dir))
+
+
+def index_age(catalog_url: str, cache_dir: str = None) -> Optional[float]:
+    """Seconds since the persisted index was built or revalidated (None if there is none)"""
+    synced_at = load_catalog_validators(catalog_url, cache_dir).get('synced_at')
+    if synced_at is None:
+        try:
+            synced_at = os.path.getmtime(index_path(catalog_url, cache_dir))
+        except OSError:
+            return None
+    return time.time() - synced_at
+
+
+def sync_catalog(catalog_url: str = None, cache_dir: str = None, force: bool = False, log=None) -> Dict:
+    """
+    Refresh the persisted index for a catalog if the upstream copy changed.
+
+    HTTP catalogs are fetched with If-None-Match / If-Modified-Since from
+    the previous sync; a 304 keeps the current index without downloading or
+    parsing anything. Local catalogs (path or file://) are re-indexed when
+    their mtime or size changes.
+
+    Returns:
+        Dict with 'index' (CatalogIndex), 'changed' (bool) and 'bytes'
+        (downloaded size, 0 when not modified)
+    """
+    catalog_url = catalog_url or DEFAULT_CATALOG_URL
+    log = log or (lambda msg, level='INFO': None)
+    cache_dir = cache_dir or CATALOG_CACHE_DIRECTORY
+    have_index = os.path.exists(index_path(catalog_url, cache_dir))
+    previous = {} if (force or not have_index) else load_catalog_validators(catalog_url, cache_dir)
+
+    local_path = catalog_url[len('file://'):] if catalog_url.startswith('file://') else catalog_url
+    if os.path.exists(local_path):
+        stat = os.stat(local_path)
+        validators = {'mtime': stat.st_mtime, 'size': stat.st_size}
+        if previous and all(previous.get(k) == v for k, v in validators.items()):
+            index = get_catalog_index(catalog_url, cache_dir, log=log, allow_download=False)
+            if index is not None:
+                _save_catalog_validators(catalog_url, cache_dir, previous)
+                return {'index': index, 'changed': False, 'bytes': 0}
+        index = parse_catalog(local_path)
+        downloaded = 0
+    elif catalog_url.startswith(('http://', 'https://')):
+        download_path = os.path.join(cache_dir, os.path.basename(catalog_url.split('?')[0]) or 'Catalog.xml')
+        validators = _download_catalog(catalog_url, download_path, validators=previous)
+        if validators is None:
+            index = get_catalog_index(catalog_url, cache_dir, log=log, allow_download=False)
+            if index is not None:
+                log(f"Catalog {catalog_url} not modified since last sync")
+                _save_catalog_validators(catalog_url, cache_dir, previous)
+                return {'index': index, 'changed': False, 'bytes': 0}
+            # Index vanished between syncs - fetch unconditionally
+            validators = _download_catalog(catalog_url, download_path)
+        downloaded = os.path.getsize(download_path)
+        try:
+            index = parse_catalog(download_path)
+        finally:
+            os.remove(download_path)  # The index is what is kept
+    else:
+        raise ValueError(f"Catalog not found: {catalog_url}")
+
+    set_catalog_index(catalog_url, index, cache_dir)
+    _save_catalog_validators(catalog_url, cache_dir, validators)
+    return {'index': index, 'changed': True, 'bytes': downloaded}
+
+
+def _revalidate_index(catalog_url: str, cache_dir: Optional[str], max_age: float, log) -> Optional[CatalogIndex]:
+    """sync_catalog() if the index is older than max_age; None if fresh or the check failed"""
+    with _revalidate_lock:
+        age = index_age(catalog_url, cache_dir)  # Another thread may have just revalidated
+        if age is None or age < max_age or time.time() < _revalidate_after.get(catalog_url, 0):
+            return None
+        try:
+            synced = sync_catalog(catalog_url, cache_dir, log=log)
+        except Exception as e:
+            _revalidate_after[catalog_url] = time.time() + REVALIDATE_RETRY_SECONDS
+            log(f"Could not revalidate catalog {catalog_url}, using cached index: {e}", "WARN")
+            return None
+        _revalidate_after.pop(catalog_url, None)
+        if synced['changed']:
+            log(f"Catalog {catalog_url} changed upstream - index rebuilt")
+        return synced['index']
+
+
+def get_catalog_index(catalog_url: str = None, cache_dir: str = None, log=None,
+                      allow_download: bool = True, max_age_seconds: float = None) -> Optional[CatalogIndex]:
+    """
+    Return the index for a catalog, building it at most once per process.
+
+    Order: in-memory index -> persisted index file -> local catalog file
+    (path or file:// URL) -> streamed download. Returns None if none of
+    these are available, so callers can fall back to the iDRAC-side check.
+
+    With allow_download, an index older than max_age_seconds (default
+    CATALOG_INDEX_MAX_AGE_HOURS; 0 disables) is first revalidated with
+    sync_catalog(): a conditional request that rebuilds it only if the
+    catalog changed.
+
+    Concurrent callers for the same catalog wait for a single build. A
+    failed build is remembered for BUILD_RETRY_SECONDS so the callers that
+    follow get None at once instead of repeating the download.
+    """
+    catalog_url = catalog_url or DEFAULT_CATALOG_URL
+    log = log or (lambda msg, level='INFO': None)
+    max_age = CATALOG_INDEX_MAX_AGE_HOURS * 3600 if max_age_seconds is None else max_age_seconds
+    if allow_download and max_age > 0:
+        age = index_age(catalog_url, cache_dir)
+        if age is not None and age >= max_age:
+            index = _revalidate_index(catalog_url, cache_dir, max_age, log)
+            if index is not None:
+                return index
+
+    with _index_lock:
+        if catalog_url in _indexes:
+            return _indexes[catalog_url]
+        build_lock = _build_locks.setdefault(catalog_url, threading.Lock())
+
+    # One thread per catalog loads or downloads it; the others wait for its result
+    with build_lock:
+        with _index_lock:
+            if catalog_url in _indexes:
+                return _indexes[catalog_url]
+
+        path = index_path(catalog_url, cache_dir)
+        index = None
+
+        if os.path.exists(path):
+            try:
+                index = CatalogIndex.load(path)
+            except Exception as e:
+                log(f"Catalog index at {path} unreadable, rebuilding: {e}", "WARN")
+
+        if index is None:
+            if time.time() < _build_failed_until.get(catalog_url, 0):
+                return None  # Failed moments ago - don't pay the timeout again for every server
+            local_path = catalog_url[len('file://'):] if catalog_url.startswith('file://') else catalog_url
+            validators = None
+            try:
+                if os.path.exists(local_path):
+                    stat = os.stat(local_path)
+                    validators = {'mtime': stat.st_mtime, 'size': stat.st_size}
+                    index = parse_catalog(local_path)
+                elif allow_download and catalog_url.startswith(('http://', 'https://')):
+                    download_path = os.path.join(cache_dir or CATALOG_CACHE_DIRECTORY,
+                                                 os.path.basename(catalog_url) or 'Catalog.xml')
+                    started = time.time()
+                    validators = _download_catalog(catalog_url, download_path)
+                    index = parse_catalog(download_path)
+                    log(f"Downloaded and indexed {catalog_url} in {time.time() - started:.1f}s")
+            except Exception as e:
+                _build_failed_until[catalog_url] = time.time() + BUILD_RETRY_SECONDS
+                log(f"Could not build catalog index from {catalog_url}: {e}", "WARN")
+                return None
+
+            if index is None:
+                return None
+            index.meta['catalog_url'] = catalog_url
+            try:
+                index.save(path)
+                if validators is not None:
+                    _save_catalog_validators(catalog_url, cache_dir, validators)
+            except OSError as e:
+                log(f"Could not persist catalog index: {e}", "WARN")
+
+        with _index_lock:
+            _indexes[catalog_url] = index
+            _build_failed_until.pop(catalog_url, None)
+        log(f"Catalog index ready: {index.meta.get('package_count', len(index.packages))} packages, "
+            f"{index.meta.get('model_count', len(index.models))} models")
+        return index
@@ -0,0 +1,243 @@
+"""
+Resumable, verified downloads of Dell Update Packages
+
+Provides:
+- download_file(): streamed download into '<dest>.part' with HTTP Range
+  resume (across retries and across runs) and SHA-256 / MD5 verification
+- download_packages(): parallel pre-fetch of catalog packages into a local
+  mirror that keeps the catalog's folder layout (served by MediaServer
+  under /firmware/)
+
+A package is only moved into place after its digest matches the catalog,
+so a half-written or corrupt file is never offered to an iDRAC.
+"""
+
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+from job_executor.checksum_index import ChecksumIndex
+
+
+CHUNK_SIZE = 1024 * 1024
+# Network reads are smaller: a short read discards the chunk in flight
+STREAM_CHUNK_SIZE = 64 * 1024
+DEFAULT_RETRIES = 3
+DEFAULT_WORKERS = 4
+
+
+class ChecksumMismatch(Exception):
+    """Downloaded content does not match the catalog digest"""
+
+
+def _hashers(sha256: Optional[str], md5: Optional[str]) -> Dict:
+    hashers = {}
+    if sha256:
+        hashers['sha256'] = hashlib.sha256()
+    elif md5:
+        hashers['md5'] = hashlib.md5()
+    return hashers
+
+
+def _hash_existing(path: str, hashers: Dict):
+    """Feed a file on disk into hashers"""
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            for h in hashers.values():
+                h.update(chunk)
+
+
+def _verify(hashers: Dict, sha256: Optional[str], md5: Optional[str]):
+    expected = {'sha256': sha256, 'md5': md5}
+    for name, h in hashers.items():
+        actual = h.hexdigest()
+        if actual.lower() != expected[name].lower():
+            raise ChecksumMismatch(f"{name} mismatch: expected {expected[name]}, got {actual}")
+
+
+def file_matches(path: str, size: Optional[int] = None, sha256: Optional[str] = None,
+                 md5: Optional[str] = None, index: ChecksumIndex = None) -> bool:
+    """
+    True if an existing file has the expected size and digest.
+    
+    With an index, an unchanged file's recorded SHA-256 is compared instead
+    of re-reading the file.
+    """
+    if not os.path.isfile(path):
+        return False
+    if size is not None and os.path.getsize(path) != size:
+        return False
+    if index is not None and sha256:
+        indexed = index.lookup(path)
+        if indexed:
+            return indexed.lower() == sha256.lower()
+    hashers = _hashers(sha256, md5)
+    if not hashers:
+        return size is not None
+    _hash_existing(path, hashers)
+    try:
+        _verify(hashers, sha256, md5)
+        if index is not None and sha256:
+            index.update(path, hashers['sha256'].hexdigest())
+        return True
+    except ChecksumMismatch:
+        return False
+
+
+def download_file(url: str, dest_path: str, size: Optional[int] = None, sha256: Optional[str] = None,
+                  md5: Optional[str] = None, session: requests.Session = None, retries: int = DEFAULT_RETRIES,
+                  timeout: int = 120, verify=True, index: ChecksumIndex = None) -> Dict:
+    """
+    Download url to dest_path, resuming a previous partial download.
+
+    Partial content lives in '<dest_path>.part'. Each attempt asks for
+    'Range: bytes=<have>-'; a 206 is appended, a 200 (server ignores
+    ranges) restarts from zero. Connection errors retry from the current
+    offset. The digest covers the whole file, including resumed bytes.
+
+    Args:
+        size: Expected size in bytes (optional)
+        sha256: Expected SHA-256 (preferred when both digests are known)
+        md5: Expected MD5 (Dell catalog hashMD5)
+        index: Checksum index consulted for an existing file and updated
+            with the verified digest
+
+    Returns:
+        Dict with 'status' ('skipped' or 'downloaded'), 'bytes' (fetched
+        over the network) and 'resumed_from' (offset of the first request)
+
+    Raises:
+        ChecksumMismatch: Completed file failed verification (it is deleted)
+        requests.RequestException: Download still failing after retries
+    """
+    if file_matches(dest_path, size, sha256, md5, index=index):
+        return {'status': 'skipped', 'bytes': 0, 'resumed_from': 0}
+
+    os.makedirs(os.path.dirname(dest_path) or '.', exist_ok=True)
+    part_path = f'{dest_path}.part'
+    http = session or requests
+    fetched = 0
+    resumed_from = None
+    last_error = None
+
+    for _attempt in range(retries + 1):
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        if size is not None and offset > size:
+            os.remove(part_path)
+            offset = 0
+        if resumed_from is None:
+            resumed_from = offset
+
+        if size is not None and offset == size:
+            break  # Previous run finished the transfer but not the rename
+
+        headers = {'Range': f'bytes={offset}-'} if offset else {}
+        try:
+            with http.get(url, headers=headers, stream=True, timeout=(10, timeout), verify=verify) as response:
+                if response.status_code == 416:
+                    break  # Nothing left to fetch - verify what is on disk
+                response.raise_for_status()
+                mode = 'ab' if (offset and response.status_code == 206) else 'wb'
+                with open(part_path, mode) as f:
+                    for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                        if chunk:
+                            f.write(chunk)
+                            fetched += len(chunk)
+            last_error = None
+            break
+        except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+            last_error = e
+
+    if last_error is not None:
+        raise last_error
+
+    hashers = _hashers(sha256, md5)
+    if hashers:
+        _hash_existing(part_path, hashers)
+    try:
+        if size is not None and os.path.getsize(part_path) != size:
+            raise ChecksumMismatch(f"size mismatch: expected {size}, got {os.path.getsize(part_path)}")
+        _verify(hashers, sha256, md5)
+    except ChecksumMismatch:
+        os.remove(part_path)
+        raise
+
+    os.replace(part_path, dest_path)
+    if index is not None and 'sha256' in hashers:
+        index.update(dest_path, hashers['sha256'].hexdigest())
+    return {'status': 'downloaded', 'bytes': fetched, 'resumed_from': resumed_from or 0}
+
+
+def mirror_path(dest_dir: str, package_path: str) -> str:
+    """Local path for a catalog package, refusing paths that escape dest_dir"""
+    root = os.path.abspath(dest_dir)
+    path = os.path.abspath(os.path.join(root, package_path.replace('\\', '/').lstrip('/')))
+    if os.path.commonpath([root, path]) != root:
+        raise ValueError(f"Package path escapes firmware directory: {package_path}")
+    return path
+
+
+def download_packages(packages: List[Dict], base_url: str, dest_dir: str, max_workers: int = DEFAULT_WORKERS,
+                      log: Callable = None, verify=True,
+                      progress: Callable[[int, int], None] = None, index: ChecksumIndex = None) -> Dict:
+    """
+    Fetch catalog packages in parallel into dest_dir/<package path>.
+
+    Args:
+        packages: CatalogIndex package dicts ('path', 'size', 'hash_sha256', 'hash_md5')
+        base_url: Repository root, e.g. 'https://downloads.dell.com'
+        max_workers: Concurrent downloads
+        progress: Optional callback(done, total)
+        index: Checksum index, so packages already mirrored are not re-hashed
+
+    Returns:
+        Dict with 'downloaded', 'skipped', 'failed', 'bytes' and 'errors'
+        ([{'path', 'error'}])
+    """
+    log = log or (lambda msg, level='INFO': None)
+    summary = {'downloaded': 0, 'skipped': 0, 'failed': 0, 'bytes': 0, 'errors': []}
+    lock = threading.Lock()
+    total = len(packages)
+    done = 0
+
+    def fetch(pkg: Dict) -> Dict:
+        url = f"{base_url.rstrip('/')}/{pkg['path'].replace(chr(92), '/').lstrip('/')}"
+        return download_file(
+            url, mirror_path(dest_dir, pkg['path']),
+            size=pkg.get('size'), sha256=pkg.get('hash_sha256'), md5=pkg.get('hash_md5'),
+            session=session, verify=verify, index=index
+        )
+
+    with requests.Session() as session:
+        # One pooled connection per worker to the repository host
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=max(1, max_workers))
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            futures = {pool.submit(fetch, pkg): pkg for pkg in packages if pkg.get('path')}
+            for future in as_completed(futures):
+                pkg = futures[future]
+                with lock:
+                    done += 1
+                    try:
+                        result = future.result()
+                        summary[result['status']] += 1
+                        summary['bytes'] += result['bytes']
+                        if result['status'] == 'downloaded':
+                            resumed = f" (resumed at {result['resumed_from']} bytes)" if result['resumed_from'] else ''
+                            log(f"  ✓ {pkg['path']}{resumed}")
+                    except Exception as e:
+                        summary['failed'] += 1
+                        summary['errors'].append({'path': pkg['path'], 'error': str(e)})
+                        log(f"  ✗ {pkg['path']}: {e}", "WARN")
+                    if progress:
+                        progress(done, total)
+
+    if index is not None:
+        index.save()
+    return summary
@@ -0,0 +1,229 @@
+"""
+Process-wide index of the local firmware library (firmware_packages table)
+
+Provides:
+- FirmwarePackageIndex: completed packages keyed by normalized model token
+  and component type, sorted newest first
+- Local-repository update computation shared by the firmware and cluster
+  handlers
+- get_package_index() / invalidate_package_index(): the cached index,
+  revalidated with a one-row query and dropped on uploads or catalog syncs
+
+Before this, every host in a rolling update fetched all completed packages
+(select=*) and matched models by substring in nested loops. The index is
+built once and a per-host lookup only touches the packages that apply.
+"""
+
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+from job_executor.config import DSM_URL, SERVICE_ROLE_KEY, VERIFY_SSL
+from job_executor.firmware_catalog import is_newer_version, normalize_model, version_key
+from job_executor.utils import _safe_json_parse
+
+
+PACKAGE_COLUMNS = (
+    'id,filename,dell_version,component_type,component_name_pattern,applicable_models,'
+    'criticality,reboot_required,served_url,local_path,checksum,file_size_bytes,updated_at'
+)
+
+# How long a built index is trusted before the cheap staleness query runs again
+REVALIDATE_SECONDS = 30
+
+# Packages with no applicable_models apply to every server
+ANY_MODEL = '*'
+
+
+class FirmwarePackageIndex:
+    """
+    Completed firmware_packages rows indexed by model token and component type.
+
+    Package positions follow version order (newest first), so merged lookups
+    stay newest first by sorting positions instead of versions.
+    """
+
+    def __init__(self, packages: List[Dict], fingerprint: Tuple = None):
+        self.packages = sorted(packages, key=lambda p: version_key(p.get('dell_version')), reverse=True)
+        self.fingerprint = fingerprint
+        self.built_at = time.monotonic()
+        # model token -> component type -> [position, ...]
+        self.by_model: Dict[str, Dict[str, List[int]]] = {}
+
+        for position, pkg in enumerate(self.packages):
+            component_type = (pkg.get('component_type') or '').upper()
+            tokens = {normalize_model(m) for m in (pkg.get('applicable_models') or [])} - {None}
+            for token in (tokens or {ANY_MODEL}):
+                self.by_model.setdefault(token, {}).setdefault(component_type, []).append(position)
+
+    def __len__(self) -> int:
+        return len(self.packages)
+
+    def applicable(self, server_model: Optional[str], component_types: List[str] = None) -> List[Dict]:
+        """
+        Packages that apply to a server model, newest first.
+
+        Args:
+            server_model: e.g. 'PowerEdge R750' (None matches model-agnostic packages only)
+            component_types: Component types to include; None or ['all'] for every type
+        """
+        wanted = None
+        if component_types and 'ALL' not in {t.upper() for t in component_types}:
+            wanted = {t.upper() for t in component_types}
+
+        positions = []
+        for token in {normalize_model(server_model), ANY_MODEL} - {None}:
+            by_type = self.by_model.get(token, {})
+            for component_type in (wanted if wanted is not None else by_type.keys()):
+                positions.extend(by_type.get(component_type, []))
+        return [self.packages[p] for p in sorted(set(positions))]
+
+    def find_updates(self, inventory: List[Dict], server_model: Optional[str]) -> List[Dict]:
+        """
+        Compare installed firmware with the applicable library packages.
+
+        A package matches an installed component by component type, by its
+        component_name_pattern (or filename) appearing in the component
+        name, or by its type appearing in the name. Each component gets at
+        most one update - the newest matching package.
+
+        Returns:
+            Update dicts in the shape of the Dell catalog check
+            ('component_name', 'component_type', 'current_version',
+            'available_version', 'version', 'name', 'criticality',
+            'reboot_required', 'package_id', 'source')
+        """
+        installed_items = []
+        by_type: Dict[str, List[int]] = {}
+        for position, item in enumerate(inventory or []):
+            installed_type = (item.get('component_type') or '').upper()
+            installed_items.append((
+                item,
+                (item.get('Name') or item.get('component_name') or '').lower(),
+                installed_type,
+                item.get('Version') or item.get('version') or '',
+            ))
+            if installed_type:
+                by_type.setdefault(installed_type, []).append(position)
+
+        updates = []
+        updated = set()
+        for pkg in self.applicable(server_model):
+            pkg_type = (pkg.get('component_type') or '').upper()
+            pkg_version = pkg.get('dell_version') or ''
+            pattern = (pkg.get('component_name_pattern') or pkg.get('filename') or '').lower()
+
+            # Type matches come straight from the lookup; name matches need a scan
+            candidates = set(by_type.get(pkg_type, []))
+            for position, (_, name, _, _) in enumerate(installed_items):
+                if position not in candidates and (
+                        (pattern and (pattern in name or (name and name in pattern))) or
+                        (pkg_type and pkg_type.lower() in name)):
+                    candidates.add(position)
+
+            for position in sorted(candidates):
+                if position in updated:
+                    continue
+                item, _, installed_type, installed_version = installed_items[position]
+                if not is_newer_version(pkg_version, installed_version):
+                    continue
+                updated.add(position)
+                component_name = item.get('Name') or item.get('component_name')
+                updates.append({
+                    'component_name': component_name,
+                    'component_type': installed_type or pkg_type,
+                    'current_version': installed_version,
+                    'available_version': pkg_version,
+                    'version': pkg_version,
+                    'name': component_name,
+                    'criticality': pkg.get('criticality', 'optional'),
+                    'reboot_required': pkg.get('reboot_required', True),
+                    'package_id': pkg.get('id'),
+                    'source': 'local_repository'
+                })
+                break  # Only one component per package
+        return updates
+
+
+# ----------------------------------------------------------------------
+# Process-wide cache
+# ----------------------------------------------------------------------
+
+_index_lock = threading.Lock()
+_index: Optional[FirmwarePackageIndex] = None
+
+
+def _headers() -> Dict:
+    return {
+        'apikey': SERVICE_ROLE_KEY,
+        'Authorization': f'Bearer {SERVICE_ROLE_KEY}',
+    }
+
+
+def _library_fingerprint() -> Optional[Tuple]:
+    """(row count, newest updated_at) of completed packages - one tiny query"""
+    response = requests.get(
+        f"{DSM_URL}/rest/v1/firmware_packages",
+        headers={**_headers(), 'Prefer': 'count=exact'},
+        params={
+            'select': 'updated_at',
+            'upload_status': 'eq.completed',
+            'order': 'updated_at.desc.nullslast',
+            'limit': '1',
+        },
+        verify=VERIFY_SSL,
+        timeout=15
+    )
+    if response.status_code not in (200, 206):
+        return None
+    total = (response.headers.get('Content-Range') or '*/').rsplit('/', 1)[-1]
+    rows = _safe_json_parse(response) or []
+    return (total, rows[0].get('updated_at') if rows else None)
+
+
+def _load_packages() -> List[Dict]:
+    response = requests.get(
+        f"{DSM_URL}/rest/v1/firmware_packages",
+        headers=_headers(),
+        params={'select': PACKAGE_COLUMNS, 'upload_status': 'eq.completed'},
+        verify=VERIFY_SSL,
+        timeout=30
+    )
+    if response.status_code != 200:
+        raise RuntimeError(f"Could not query firmware packages: {response.status_code}")
+    return _safe_json_parse(response) or []
+
+
+def get_package_index(log=None) -> Optional[FirmwarePackageIndex]:
+    """
+    Return the shared package index, rebuilding it only when the library changed.
+
+    Within REVALIDATE_SECONDS of the last build the cached index is returned
+    as is; after that a count + newest updated_at query decides whether to
+    reload. Returns None if the library cannot be read.
+    """
+    global _index
+    log = log or (lambda msg, level='INFO': None)
+    with _index_lock:
+        if _index is not None and time.monotonic() - _index.built_at < REVALIDATE_SECONDS:
+            return _index
+        try:
+            fingerprint = _library_fingerprint()
+            if _index is not None and fingerprint is not None and fingerprint == _index.fingerprint:
+                _index.built_at = time.monotonic()
+                return _index
+            _index = FirmwarePackageIndex(_load_packages(), fingerprint)
+            log(f"Firmware library index built: {len(_index)} package(s)", "DEBUG")
+            return _index
+        except Exception as e:
+            log(f"Could not build firmware library index: {e}", "WARN")
+            return _index
+
+
+def invalidate_package_index():
+    """Drop the cached index (after an upload or catalog change)"""
+    global _index
+    with _index_lock:
+        _index = None
@@ -4,7 +4,8 @@ from typing import Dict
 from datetime import datetime, timezone
 import requests
 from .base import BaseHandler
-from job_executor.utils import utc_now_iso
+from job_executor.request_coalescer import get_request_coalescer
+from job_executor.utils import utc_now_iso, _safe_json_parse
 
 
 class BootHandler(BaseHandler):
@@ -233,36 +234,55 @@ class BootHandler(BaseHandler):
             except Exception as e:
                 self.log(f"  Could not retrieve pending attributes: {e}", "WARN")
             
-            # Save to database via REST API
-            config_data = {
-                'server_id': server_id,
-                'job_id': job['id'],
-                'attributes': current_attributes,
-                'pending_attributes': pending_attributes,
-                'bios_version': bios_version,
-                'snapshot_type': snapshot_type,
-                'created_by': job['created_by'],
-                'notes': notes,
-                'captured_at': utc_now_iso()
-            }
-            
-            headers = {
-                'apikey': SERVICE_ROLE_KEY,
-                'Authorization': f'Bearer {SERVICE_ROLE_KEY}',
-                'Content-Type': 'application/json'
-            }
-            
-            db_response = requests.post(
-                f"{SUPABASE_URL}/rest/v1/bios_configurations",
-                headers=headers,
-                json=config_data,
-                timeout=30
+            # Compare with the latest snapshot by content hash
+            comparison = self.executor.compare_bios_snapshot(
+                server_id, current_attributes, pending_attributes, bios_version
             )
             
-            if db_response.status_code not in [200, 201]:
-                raise Exception(f"Failed to save BIOS configuration: {db_response.text}")
+            # An unchanged 'current' snapshot without notes would be a duplicate row
+            config_id = None
+            if comparison['unchanged'] and snapshot_type == 'current' and not notes:
+                config_id = comparison['previous_id']
+                self.log(f"  [OK] BIOS configuration unchanged since {comparison['previous_captured_at']}, snapshot not duplicated")
+            else:
+                # Save to database via REST API
+                config_data = {
+                    'server_id': server_id,
+                    'job_id': job['id'],
+                    'attributes': current_attributes,
+                    'pending_attributes': pending_attributes,
+                    'attributes_hash': comparison['attributes_hash'],
+                    'bios_version': bios_version,
+                    'snapshot_type': snapshot_type,
+                    'created_by': job['created_by'],
+                    'notes': notes,
+                    'captured_at': utc_now_iso()
+                }
+                
+                headers = {
+                    'apikey': SERVICE_ROLE_KEY,
+                    'Authorization': f'Bearer {SERVICE_ROLE_KEY}',
+                    'Content-Type': 'application/json',
+                    'Prefer': 'return=representation'
+                }
+                
+                db_response = requests.post(
+                    f"{SUPABASE_URL}/rest/v1/bios_configurations?select=id",
+                    headers=headers,
+                    json=config_data,
+                    timeout=30
+                )
+                
+                if db_response.status_code not in [200, 201]:
+                    raise Exception(f"Failed to save BIOS configuration: {db_response.text}")
+                
+                saved = _safe_json_parse(db_response) or []
+                config_id = saved[0].get('id') if saved else None
+                self.log(f"  [OK] BIOS configuration saved to database")
             
-            self.log(f"  [OK] BIOS configuration saved to database")
+            changed_attributes = comparison['changed_attributes']
+            if changed_attributes:
+                self.log(f"  {len(changed_attributes)} attribute(s) changed since last snapshot")
             
             # Update job status
             self.update_job_status(
@@ -273,7 +293,11 @@ class BootHandler(BaseHandler):
                     'attribute_count': len(current_attributes),
                     'pending_count': len(pending_attributes) if pending_attributes else 0,
                     'bios_version': bios_version,
-                    'snapshot_type': snapshot_type
+                    'snapshot_type': snapshot_type,
+                    'config_id': config_id,
+                    'unchanged': comparison['unchanged'],
+                    'changed_attributes': changed_attributes[:200] if changed_attributes else changed_attributes,
+                    'changed_count': len(changed_attributes) if changed_attributes is not None else None,
                 }
             )
             self.log(f"BIOS config read job completed successfully")
@@ -422,3 +446,7 @@ class BootHandler(BaseHandler):
                 completed_at=datetime.now().isoformat(),
                 details={'error': str(e)}
             )
+        finally:
+            server_id = (job.get('details') or {}).get('server_id')
+            if server_id:
+                get_request_coalescer().invalidate(server_id)  # Cached BIOS reads show the old settings
@@ -1343,63 +1343,13 @@ class ClusterHandler(BaseHandler):
         Returns:
             List of applicable firmware package dicts
         """
-        from job_executor.config import DSM_URL, SERVICE_ROLE_KEY, VERIFY_SSL
+        from job_executor.firmware_library import get_package_index
         
-        try:
-            # Query completed firmware packages from database
-            response = requests.get(
-                f"{DSM_URL}/rest/v1/firmware_packages",
-                headers={
-                    'apikey': SERVICE_ROLE_KEY, 
-                    'Authorization': f'Bearer {SERVICE_ROLE_KEY}'
-                },
-                params={
-                    'select': '*',
-                    'upload_status': 'eq.completed',
-                    'order': 'dell_version.desc'
-                },
-                verify=VERIFY_SSL
-            )
-            
-            if response.status_code != 200:
-                self.log(f"    ⚠ Failed to query firmware packages: {response.status_code}", "WARN")
-                return []
-            
-            packages = response.json()
-            applicable = []
-            
-            for pkg in packages:
-                # Check model applicability
-                applicable_models = pkg.get('applicable_models') or []
-                
-                # If applicable_models is specified, check if server matches
-                if applicable_models and server_model:
-                    # Check for partial match (e.g., "R750" matches "PowerEdge R750")
-                    model_matches = False
-                    for model in applicable_models:
-                        if model.lower() in server_model.lower() or server_model.lower() in model.lower():
-                            model_matches = True
-                            break
-                    
-                    if not model_matches:
-                        continue
-                
-                # Check component filter
-                pkg_type = (pkg.get('component_type') or '').upper()
-                
-                if 'all' not in [f.lower() for f in component_filter]:
-                    # Map component types for matching
-                    filter_upper = [f.upper() for f in component_filter]
-                    if pkg_type not in filter_upper:
-                        continue
-                
-                applicable.append(pkg)
-            
-            return applicable
-            
-        except Exception as e:
-            self.log(f"    ⚠ Error querying firmware packages: {e}", "WARN")
+        index = get_package_index(log=self.log)
+        if index is None:
+            self.log(f"    ⚠ Failed to query firmware packages", "WARN")
             return []
+        return index.applicable(server_model, component_filter)
     
     def _check_local_repository_updates(
         self,
@@ -1427,8 +1377,7 @@ class ClusterHandler(BaseHandler):
         Returns:
             List of available update dicts with component_name, available_version, etc.
         """
-        from job_executor.config import DSM_URL, SERVICE_ROLE_KEY, VERIFY_SSL
-        import requests
+        from job_executor.firmware_library import get_package_index
         
         available_updates = []
         
@@ -1454,86 +1403,12 @@ class ClusterHandler(BaseHandler):
                 self.log(f"      No firmware inventory returned", "WARN")
                 return []
             
-            # Query completed firmware packages from database
-            response = requests.get(
-                f"{DSM_URL}/rest/v1/firmware_packages",
-                headers={
-                    'apikey': SERVICE_ROLE_KEY, 
-                    'Authorization': f'Bearer {SERVICE_ROLE_KEY}'
-                },
-                params={
-                    'select': '*',
-                    'upload_status': 'eq.completed',
-                    'order': 'dell_version.desc'
-                },
-                verify=VERIFY_SSL,
-                timeout=30
-            )
-            
-            if response.status_code != 200:
-                self.log(f"      Could not query firmware packages: {response.status_code}", "WARN")
-                return []
-            
-            packages = response.json()
-            
-            if not packages:
+            index = get_package_index(log=self.log)
+            if index is None:
+                self.log(f"      Could not query firmware packages", "WARN")
                 return []
             
-            for pkg in packages:
-                # Check model applicability if specified
-                applicable_models = pkg.get('applicable_models') or []
-                
-                if applicable_models and server_model:
-                    model_matches = False
-                    for model in applicable_models:
-                        if model.lower() in server_model.lower() or server_model.lower() in model.lower():
-                            model_matches = True
-                            break
-                    
-                    if not model_matches:
-                        continue
-                
-                pkg_type = (pkg.get('component_type') or '').upper()
-                pkg_version = pkg.get('dell_version', '')
-                pkg_name_pattern = pkg.get('component_name_pattern') or pkg.get('filename', '')
-                
-                # Find matching component in installed inventory
-                for installed in current_inventory:
-                    installed_name = (installed.get('Name') or installed.get('component_name') or '').lower()
-                    installed_type = (installed.get('component_type') or '').upper()
-                    installed_version = installed.get('Version') or installed.get('version') or ''
-                    
-                    # Match by component type
-                    type_match = pkg_type and installed_type and pkg_type == installed_type
-                    
-                    # Match by name pattern
-                    name_match = False
-                    if pkg_name_pattern:
-                        pattern_lower = pkg_name_pattern.lower()
-                        if pattern_lower in installed_name or installed_name in pattern_lower:
-                            name_match = True
-                    
-                    # Match by component type in name (fallback)
-                    if not type_match and not name_match and pkg_type:
-                        if pkg_type.lower() in installed_name:
-                            name_match = True
-                    
-                    if type_match or name_match:
-                        # Compare versions
-                        if self._is_newer_version(pkg_version, installed_version):
-                            available_updates.append({
-                                'component_name': installed.get('Name') or installed.get('component_name'),
-                                'component_type': installed_type or pkg_type,
-                                'current_version': installed_version,
-                                'available_version': pkg_version,
-                                'version': pkg_version,
-                                'name': installed.get('Name') or installed.get('component_name'),
-                                'criticality': pkg.get('criticality', 'optional'),
-                                'reboot_required': pkg.get('reboot_required', True),
-                                'package_id': pkg.get('id'),
-                                'source': 'local_repository'
-                            })
-                            break  # Only one update per component
+            available_updates = index.find_updates(current_inventory, server_model)
             
         except Exception as e:
             self.log(f"      Error checking local repository: {e}", "WARN")
@@ -3229,62 +3104,101 @@ class ClusterHandler(BaseHandler):
                                 server_model = server.get('model', '')
                                 component_filter = details.get('component_filter', ['all'])
                                 
-                                # Get applicable firmware packages from library
-                                applicable_packages = self._get_applicable_firmware_packages(
-                                    server_model=server_model,
-                                    component_filter=component_filter
-                                )
+                                # Packages pre-staged by a firmware_stage job are already on the
+                                # iDRAC as Scheduled jobs - only the reboot is left to do
+                                staged_jobs = []
+                                if details.get('use_staged_firmware') and update_pass == 1:
+                                    try:
+                                        pending_check = dell_ops.get_pending_idrac_jobs(
+                                            ip=server['ip_address'],
+                                            username=username,
+                                            password=password,
+                                            server_id=host['server_id'],
+                                            job_id=job['id'],
+                                            user_id=job['created_by']
+                                        )
+                                        staged_jobs = [
+                                            j for j in pending_check.get('jobs', [])
+                                            if j.get('status') in ('Scheduled', 'Downloaded') and
+                                               (j.get('id') or '').startswith('JID_')
+                                        ]
+                                    except Exception as staged_err:
+                                        self.log(f"    ⚠ Could not inspect staged iDRAC jobs: {staged_err}", "WARN")
                                 
-                                if not applicable_packages:
-                                    raise Exception(
-                                        f"No firmware packages in library for model '{server_model}'. "
-                                        f"Upload DUP files in Settings → Firmware Library, or use 'Dell Online Catalog' source."
+                                if staged_jobs:
+                                    self.log(f"    Found {len(staged_jobs)} staged firmware job(s) - rebooting to apply")
+                                    for sj in staged_jobs[:5]:
+                                        self.log(f"      - {sj.get('id')}: {sj.get('name', 'Unknown')} ({sj.get('status')})")
+                                    dell_ops.graceful_reboot(
+                                        server['ip_address'], username, password,
+                                        job_id=job['id'],
+                                        server_id=host['server_id'],
+                                        user_id=job['created_by']
+                                    )
+                                    update_result = {
+                                        'success': True,
+                                        'staged_jobs': [{'id': j.get('id'), 'name': j.get('name')} for j in staged_jobs]
+                                    }
+                                    reboot_required = True
+                                else:
+                                    if details.get('use_staged_firmware') and update_pass == 1:
+                                        self.log(f"    No staged firmware jobs found - applying packages directly")
+                                    # Get applicable firmware packages from library
+                                    applicable_packages = self._get_applicable_firmware_packages(
+                                        server_model=server_model,
+                                        component_filter=component_filter
                                     )
+                                    
+                                    if not applicable_packages:
+                                        raise Exception(
+                                            f"No firmware packages in library for model '{server_model}'. "
+                                            f"Upload DUP files in Settings → Firmware Library, or use 'Dell Online Catalog' source."
+                                        )
                                 
-                                self.log(f"    Found {len(applicable_packages)} applicable package(s) for {server_model or 'this server'}")
-                                packages_applied = 0
-                                update_result = {'success': True, 'packages_applied': []}
+                                    self.log(f"    Found {len(applicable_packages)} applicable package(s) for {server_model or 'this server'}")
+                                    packages_applied = 0
+                                    update_result = {'success': True, 'packages_applied': []}
                                 
-                                for pkg in applicable_packages:
-                                    firmware_uri = pkg.get('served_url') or pkg.get('local_path')
-                                    if not firmware_uri:
-                                        self.log(f"      ⚠ Package {pkg['filename']} has no URL - skipping", "WARN")
-                                        continue
+                                    for pkg in applicable_packages:
+                                        firmware_uri = pkg.get('served_url') or pkg.get('local_path')
+                                        if not firmware_uri:
+                                            self.log(f"      ⚠ Package {pkg['filename']} has no URL - skipping", "WARN")
+                                            continue
                                     
-                                    self.log(f"      Applying: {pkg.get('component_type', 'Unknown')} v{pkg['dell_version']} ({pkg['filename']})")
+                                        self.log(f"      Applying: {pkg.get('component_type', 'Unknown')} v{pkg['dell_version']} ({pkg['filename']})")
                                     
-                                    pkg_result = dell_ops.update_firmware_simple(
-                                        ip=server['ip_address'],
-                                        username=username,
-                                        password=password,
-                                        firmware_uri=firmware_uri,
-                                        apply_time='Immediate',
-                                        job_id=job['id'],
-                                        server_id=host['server_id']
-                                    )
+                                        pkg_result = dell_ops.update_firmware_simple(
+                                            ip=server['ip_address'],
+                                            username=username,
+                                            password=password,
+                                            firmware_uri=firmware_uri,
+                                            apply_time='Immediate',
+                                            job_id=job['id'],
+                                            server_id=host['server_id']
+                                        )
                                     
-                                    if pkg_result.get('success'):
-                                        packages_applied += 1
-                                        update_result['packages_applied'].append({
-                                            'filename': pkg['filename'],
-                                            'component': pkg.get('component_type'),
-                                            'version': pkg['dell_version']
-                                        })
-                                        self.log(f"        ✓ Package applied successfully")
-                                    else:
-                                        error_msg = pkg_result.get('error', 'Unknown error')
-                                        # Check if package is not applicable (not an error)
-                                        if 'already' in error_msg.lower() or 'not applicable' in error_msg.lower():
-                                            self.log(f"        ℹ Package not needed: {error_msg}")
+                                        if pkg_result.get('success'):
+                                            packages_applied += 1
+                                            update_result['packages_applied'].append({
+                                                'filename': pkg['filename'],
+                                                'component': pkg.get('component_type'),
+                                                'version': pkg['dell_version']
+                                            })
+                                            self.log(f"        ✓ Package applied successfully")
                                         else:
-                                            self.log(f"        ✗ Package failed: {error_msg}", "WARN")
+                                            error_msg = pkg_result.get('error', 'Unknown error')
+                                            # Check if package is not applicable (not an error)
+                                            if 'already' in error_msg.lower() or 'not applicable' in error_msg.lower():
+                                                self.log(f"        ℹ Package not needed: {error_msg}")
+                                            else:
+                                                self.log(f"        ✗ Package failed: {error_msg}", "WARN")
                                 
-                                if packages_applied > 0:
-                                    self.log(f"    ✓ Applied {packages_applied} firmware package(s)")
-                                    reboot_required = True
-                                else:
-                                    self.log(f"    ℹ No firmware packages were applicable - server may be up to date")
-                                    update_result['no_updates_needed'] = True
+                                    if packages_applied > 0:
+                                        self.log(f"    ✓ Applied {packages_applied} firmware package(s)")
+                                        reboot_required = True
+                                    else:
+                                        self.log(f"    ℹ No firmware packages were applicable - server may be up to date")
+                                        update_result['no_updates_needed'] = True
                                 
                             else:
                                 # Manual/legacy mode - requires explicit firmware_uri
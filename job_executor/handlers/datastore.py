@@ -13,7 +13,6 @@ class DatastoreHandler(BaseHandler):
     def execute_browse_datastore(self, job: Dict):
         """Browse files in a vCenter datastore"""
         try:
-            from pyVim.connect import Disconnect
             from pyVmomi import vim
             
             self.log(f"Starting browse_datastore job: {job['id']}")
@@ -36,11 +35,8 @@ class DatastoreHandler(BaseHandler):
             # Connect to vCenter with fresh session
             self.log(f"Connecting to vCenter {vcenter_settings['host']}")
             
-            # Clear any cached connection to ensure fresh session for browse operation
-            if hasattr(self.executor, 'vcenter_conn'):
-                self.executor.vcenter_conn = None
-            
-            si = self.executor.connect_vcenter(settings=vcenter_settings)
+            # Check the pooled session now so the browse starts on a live session
+            si = self.executor.connect_vcenter(settings=vcenter_settings, force_reconnect=True)
             if not si:
                 raise Exception(f"Failed to connect to vCenter {vcenter_settings['host']}")
             
@@ -49,8 +45,7 @@ class DatastoreHandler(BaseHandler):
             # Validate session is active
             if hasattr(self.executor, 'check_vcenter_connection') and not self.executor.check_vcenter_connection(content):
                 self.log("Session expired, reconnecting...", "WARN")
-                self.executor.vcenter_conn = None
-                si = self.executor.connect_vcenter(settings=vcenter_settings)
+                si = self.executor.connect_vcenter(settings=vcenter_settings, force_reconnect=True)
                 if not si:
                     raise Exception("Failed to reconnect to vCenter")
                 content = si.RetrieveContent()
@@ -125,9 +120,6 @@ class DatastoreHandler(BaseHandler):
             
             self.log(f"Found {len(files)} file(s) matching criteria")
             
-            # Disconnect
-            Disconnect(si)
-            
             # Complete job with file list
             self.update_job_status(
                 job['id'],
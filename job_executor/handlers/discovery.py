@@ -7,6 +7,7 @@ import ipaddress
 import time
 import requests
 from .base import BaseHandler
+from job_executor.batch_writer import DiscoveryBatchWriter
 from job_executor.utils import utc_now_iso
 
 
@@ -94,6 +95,10 @@ class DiscoveryHandler(BaseHandler):
             
             self.log(f"Using {len(credential_sets)} credential set(s) for discovery")
             
+            # Learned per-subnet/per-model success statistics drive credential ordering
+            stats_loaded = self.executor.load_credential_stats()
+            self.log(f"Loaded {stats_loaded} credential success statistic(s) for adaptive ordering", "DEBUG")
+            
             # Parse IPs to scan
             ips_to_scan = []
             
@@ -150,6 +155,34 @@ class DiscoveryHandler(BaseHandler):
             ips_processed = 0
             total_ips = len(ips_to_scan)
             
+            # Fast rescan: re-verify known iDRACs first, skip recently-closed IPs,
+            # and fully probe only new or changed addresses
+            rescan_mode = (job.get('details') or {}).get('rescan_mode', 'full')
+            discovery_cache = {}
+            verify_ips = set()
+            cache_skipped = 0
+            probe_results = []  # Raw results persisted to discovery_ip_cache
+            
+            if rescan_mode == 'fast':
+                discovery_cache = self.executor.get_discovery_cache(ips_to_scan)
+                from job_executor.mixins.discovery_cache import DEFAULT_CLOSED_TTL_HOURS
+                closed_ttl_hours = settings.get('discovery_closed_ttl_hours')
+                if closed_ttl_hours is None:
+                    closed_ttl_hours = DEFAULT_CLOSED_TTL_HOURS  # 0 is valid: never skip closed IPs
+                plan = self.executor.plan_discovery_rescan(ips_to_scan, discovery_cache, closed_ttl_hours)
+                verify_ips = set(plan['verify'])
+                cache_skipped = len(plan['skip'])
+                
+                for ip in plan['skip']:
+                    server_results.append({'ip': ip, 'status': 'filtered', 'filter_reason': 'cached_closed'})
+                stage1_filtered += cache_skipped
+                ips_processed += cache_skipped
+                ips_to_scan = plan['verify'] + plan['probe']
+                
+                self.log(f"Fast rescan: {len(plan['verify'])} known iDRACs to re-verify, "
+                         f"{cache_skipped} closed IPs skipped (TTL {closed_ttl_hours}h), "
+                         f"{len(plan['probe'])} IPs to probe")
+            
             # Track per-IP current stage for real-time progress
             import threading
             ip_stages = {}  # {"10.0.0.1": "port_check", ...}
@@ -201,21 +234,26 @@ class DiscoveryHandler(BaseHandler):
                 'running',
                 details={
                     "ips_total": total_ips,
-                    "ips_processed": 0,
+                    "ips_processed": ips_processed,
                     "current_stage": "port_check",
                     "in_port_check": 0,
                     "in_detecting": 0,
                     "in_authenticating": 0,
                     "stage1_passed": 0,
-                    "stage1_filtered": 0,
+                    "stage1_filtered": stage1_filtered,
                     "stage2_passed": 0,
                     "stage2_filtered": 0,
                     "discovered_count": 0,
                     "auth_failures": 0,
-                    "server_results": [],
+                    "rescan_mode": rescan_mode,
+                    "cache_skipped": cache_skipped,
+                    "server_results": server_results[-20:],
                 }
             )
             
+            # Discovered / auth-failed servers are streamed into bulk upserts while the scan runs
+            writer = DiscoveryBatchWriter(self.executor, job['id'])
+            
             with concurrent.futures.ThreadPoolExecutor(max_workers=max_threads) as executor:
                 futures = {}
                 
@@ -230,12 +268,13 @@ class DiscoveryHandler(BaseHandler):
                         ip,
                         credential_sets,
                         job['id'],
-                        stage_callback  # Pass stage callback
+                        stage_callback,  # Pass stage callback
+                        discovery_cache.get(ip) if ip in verify_ips else None
                     )
                     futures[future] = ip
                 
                 timeout_count = 0
-                total_requests = len(ips_to_scan)
+                total_requests = max(len(ips_to_scan), 1)
                 
                 for future in concurrent.futures.as_completed(futures):
                     ip = futures[future]
@@ -243,6 +282,7 @@ class DiscoveryHandler(BaseHandler):
                     
                     try:
                         result = future.result(timeout=30)  # 30s timeout per IP
+                        probe_results.append(result)
                         
                         # Track per-server result for UI
                         server_result = {'ip': ip, 'status': 'filtered'}
@@ -250,6 +290,7 @@ class DiscoveryHandler(BaseHandler):
                         if result['success']:
                             self.log(f"✓ Found iDRAC at {ip}: {result['model']} (using {result['credential_set_name']})")
                             discovered.append(result)
+                            writer.add_discovered_server(result)
                             stage1_passed += 1
                             stage2_passed += 1
                             server_result = {
@@ -265,6 +306,7 @@ class DiscoveryHandler(BaseHandler):
                                 'ip': ip,
                                 'reason': 'iDRAC detected but authentication failed'
                             })
+                            writer.add_auth_failed_server(ip)
                             stage1_passed += 1
                             stage2_passed += 1
                             server_result = {'ip': ip, 'status': 'auth_failed'}
@@ -314,44 +356,43 @@ class DiscoveryHandler(BaseHandler):
             self.log(f"  ⚠ {len(auth_failures)} iDRACs require credentials")
             self.log(f"  ⊗ {stage1_filtered} IPs filtered (port closed)")
             self.log(f"  ⊗ {stage2_filtered} IPs filtered (not iDRAC)")
+            if cache_skipped:
+                self.log(f"  ⊗ {cache_skipped} IPs skipped from discovery cache (closed within TTL)")
             total_filtered = stage1_filtered + stage2_filtered
             if total_filtered > 0:
-                self.log(f"  Optimization: Skipped full auth on {total_filtered} IPs ({total_filtered/len(ips_to_scan)*100:.1f}%)")
+                self.log(f"  Optimization: Skipped full auth on {total_filtered} IPs ({total_filtered/total_ips*100:.1f}%)")
             
-            # Insert discovered servers into database with credential info
-            for server in discovered:
-                self.executor.insert_discovered_server(server, job['id'])
+            # Persist per-IP state so the next fast rescan can skip unchanged addresses
+            cached_count = self.executor.save_discovery_cache(probe_results, job['id'])
+            self.log(f"  Discovery cache updated for {cached_count} IPs", "DEBUG")
             
-            # Insert auth-failed servers for visibility (users can add credentials later)
-            if auth_failures:
-                self.log(f"Inserting {len(auth_failures)} auth-failed servers for visibility...")
-                for failure in auth_failures:
-                    self.executor.insert_auth_failed_server(failure['ip'], job['id'])
+            # Persist learned credential statistics and report how often the first attempt won
+            self.executor.flush_credential_stats()
+            first_attempt_hits = sum(1 for r in discovered if r.get('auth_attempts') == 1)
+            failed_auth_attempts = sum(
+                (r.get('auth_attempts') or 0) - (1 if r.get('success') else 0) for r in probe_results
+            )
+            if discovered:
+                self.log(f"  Credential ordering: {first_attempt_hits}/{len(discovered)} authenticated on first attempt")
+            
+            # Write whatever is still buffered (discovered + auth-failed servers)
+            write_stats = writer.close()
+            self.log(f"  Saved {write_stats['servers_written']} server(s) in {write_stats['requests']} bulk request(s)")
             
             # Auto-trigger full refresh for newly discovered servers
             # This now includes inline SCP backup (runs in same process, no queuing)
             if discovered:
                 self.log(f"Auto-triggering full refresh + SCP backup for {len(discovered)} discovered servers...")
                 try:
-                    # Get server IDs of newly discovered servers
-                    discovered_ips = [s['ip'] for s in discovered]
-                    servers_url = f"{DSM_URL}/rest/v1/servers"
-                    params = {
-                        "ip_address": f"in.({','.join(discovered_ips)})",
-                        "select": "id"
-                    }
-                    response = requests.get(servers_url, headers=self.executor.headers, params=params, verify=VERIFY_SSL)
+                    # Server IDs come back from the bulk upsert - no extra lookup needed
+                    server_ids = [writer.server_ids[s['ip']] for s in discovered if s['ip'] in writer.server_ids]
                     
-                    if response.status_code == 200:
-                        server_records = response.json()
-                        server_ids = [s['id'] for s in server_records]
-                        
-                        if server_ids:
-                            # Call refresh_existing_servers to get full server info + SCP backup
-                            self.executor.refresh_existing_servers(job, server_ids)
-                            self.log(f"✓ Auto-refresh + SCP backup completed for {len(server_ids)} servers")
+                    if server_ids:
+                        # Call refresh_existing_servers to get full server info + SCP backup
+                        self.executor.refresh_existing_servers(job, server_ids)
+                        self.log(f"✓ Auto-refresh + SCP backup completed for {len(server_ids)} servers")
                     else:
-                        self.log(f"Failed to fetch discovered server IDs: {response.status_code}", "WARN")
+                        self.log("No discovered server IDs were returned by the bulk upsert", "WARN")
                 except Exception as e:
                     self.log(f"Auto-refresh failed: {e}", "WARN")
             
@@ -362,9 +403,15 @@ class DiscoveryHandler(BaseHandler):
                 details={
                     "discovered_count": len(discovered),
                     "auth_failures": len(auth_failures),
-                    "scanned_ips": len(ips_to_scan),
+                    "scanned_ips": total_ips,
                     "auth_failure_ips": [f['ip'] for f in auth_failures],
                     "auto_refresh_triggered": len(discovered) > 0,
+                    "rescan_mode": rescan_mode,
+                    "cache_skipped": cache_skipped,
+                    "cache_verified": sum(1 for r in probe_results if r.get('cache_verified')),
+                    "changed_ips": [r['ip'] for r in probe_results if r.get('changed')],
+                    "first_attempt_auth_success": first_attempt_hits,
+                    "failed_auth_attempts": failed_auth_attempts,
                     "stage1_passed": stage1_passed,
                     "stage1_filtered": stage1_filtered,
                     "stage2_passed": stage2_passed,
@@ -373,6 +420,7 @@ class DiscoveryHandler(BaseHandler):
                     "stage3_failed": len(auth_failures),
                     "optimization_enabled": True,
                     "server_results": server_results,
+                    "db_write_requests": write_stats['requests'],
                 }
             )
             
@@ -1807,9 +1807,8 @@ class FailoverHandler:
     def _power_on_dr_shell_vm(self, vm: Dict, group: Dict, failover_type: str, 
                               test_network_id: Optional[str]) -> bool:
         """Power on a DR shell VM via vCenter API."""
-        import ssl
-        from pyVim.connect import SmartConnect, Disconnect
         from pyVmomi import vim
+        from job_executor.vcenter_pool import pooled_smart_connect, release_vcenter_session
         
         dr_vm_id = vm.get('dr_shell_vm_id')
         vm_name = vm.get('dr_shell_vm_name') or vm.get('vm_name')
@@ -1847,18 +1846,9 @@ class FailoverHandler:
         
         si = None
         try:
-            # Connect to vCenter
-            context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
-            context.check_hostname = False
-            context.verify_mode = ssl.CERT_NONE
-            
+            # Connect to vCenter (pooled session, shared with other jobs)
             self.executor.log(f"[Group Failover] Connecting to DR vCenter {vcenter_host}...")
-            si = SmartConnect(
-                host=vcenter_host,
-                user=vcenter_user,
-                pwd=vcenter_password,
-                sslContext=context
-            )
+            si = pooled_smart_connect(vcenter_host, vcenter_user, vcenter_password)
             content = si.RetrieveContent()
             
             # Find VM by moref ID (dr_vm_id is like 'vm-2041')
@@ -1888,16 +1878,12 @@ class FailoverHandler:
             return False
         finally:
             if si:
-                try:
-                    Disconnect(si)
-                except Exception:
-                    pass
+                release_vcenter_session(si)
 
     def _power_off_dr_shell_vm(self, vm: Dict, group: Dict):
         """Power off a DR shell VM during rollback via vCenter API."""
-        import ssl
-        from pyVim.connect import SmartConnect, Disconnect
         from pyVmomi import vim
+        from job_executor.vcenter_pool import pooled_smart_connect, release_vcenter_session
         
         dr_vm_id = vm.get('dr_shell_vm_id')
         vm_name = vm.get('dr_shell_vm_name') or vm.get('vm_name')
@@ -1933,16 +1919,7 @@ class FailoverHandler:
         
         si = None
         try:
-            context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
-            context.check_hostname = False
-            context.verify_mode = ssl.CERT_NONE
-            
-            si = SmartConnect(
-                host=vcenter_host,
-                user=vcenter_user,
-                pwd=vcenter_password,
-                sslContext=context
-            )
+            si = pooled_smart_connect(vcenter_host, vcenter_user, vcenter_password)
             content = si.RetrieveContent()
             
             vm_obj = self._find_vm_by_moref(content, dr_vm_id)
@@ -1965,25 +1942,14 @@ class FailoverHandler:
             self.executor.log(f"[Rollback Failover] Error powering off {vm_name}: {e}", "WARN")
         finally:
             if si:
-                try:
-                    Disconnect(si)
-                except Exception:
-                    pass
+                release_vcenter_session(si)
 
     def _find_vm_by_moref(self, content, moref_id: str):
-        """Find VM by managed object reference ID (e.g., 'vm-2041')."""
+        """Find VM by managed object reference ID (e.g., 'vm-2041'), never a cached hit."""
         from pyVmomi import vim
+        from job_executor.vcenter_lookup import find_by_moref
         
-        container = content.viewManager.CreateContainerView(
-            content.rootFolder, [vim.VirtualMachine], True
-        )
-        try:
-            for vm in container.view:
-                if vm._moId == moref_id:
-                    return vm
-        finally:
-            container.Destroy()
-        return None
+        return find_by_moref(content, vim.VirtualMachine, moref_id, fresh=True)
 
     def _wait_for_vcenter_task(self, task, timeout: int = 120):
         """Wait for a vCenter task to complete."""
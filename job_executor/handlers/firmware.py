@@ -1,13 +1,18 @@
 """Firmware update handlers"""
 
-from typing import Dict
+from typing import Dict, Optional
 from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
 import time
 import requests
 from .base import BaseHandler
 from job_executor.utils import utc_now_iso
 
 
+# Seconds between pause_idrac_operations checks during a parallel scan
+PAUSE_CHECK_INTERVAL = 10
+
+
 class FirmwareHandler(BaseHandler):
     """Handles firmware update operations"""
     
@@ -145,13 +150,16 @@ class FirmwareHandler(BaseHandler):
                         self.update_task_status(task['id'], 'running',
                             log="✓ Connected to iDRAC\n→ Checking for available updates...", progress=10)
                         
+                        from job_executor.firmware_catalog import get_catalog_index
                         dell_ops = self.executor._get_dell_operations()
                         check_result = dell_ops.check_available_catalog_updates(
                             ip, username, password,
                             catalog_url=dell_catalog_url,
                             server_id=server['id'],
                             job_id=job['id'],
-                            user_id=job.get('created_by')
+                            user_id=job.get('created_by'),
+                            catalog_index=get_catalog_index(dell_catalog_url, log=self.log),
+                            model=server.get('model')
                         )
                         
                         available_updates = check_result.get('available_updates', [])
@@ -509,6 +517,222 @@ class FirmwareHandler(BaseHandler):
                 details={"error": str(e)}
             )
 
+    def _staging_image_uri(self, pkg: Dict) -> Optional[str]:
+        """
+        HTTP URI an iDRAC can pull a library package from.
+        
+        Packages stored under FIRMWARE_DIRECTORY are served by the executor
+        MediaServer; otherwise an HTTP served_url recorded at upload is used.
+        """
+        import os
+        from job_executor.config import FIRMWARE_DIRECTORY
+        
+        local_path = pkg.get('local_path')
+        media_server = getattr(self.executor, 'media_server', None)
+        if local_path and media_server and os.path.isfile(local_path):
+            relative = os.path.relpath(os.path.abspath(local_path), os.path.abspath(FIRMWARE_DIRECTORY))
+            if not relative.startswith('..'):
+                return media_server.get_dup_url(relative.replace(os.sep, '/'))
+        
+        served_url = pkg.get('served_url') or ''
+        if served_url.startswith('http://'):
+            return served_url
+        return None
+    
+    def _stage_server_firmware(self, job: Dict, server: Dict, packages: list, apply_time: str,
+                               task_writer, task_id: Optional[str]) -> Dict:
+        """
+        Have one iDRAC pull and schedule each package (runs on a staging worker).
+        
+        Returns:
+            Dict with 'staged', 'installed', 'skipped' and 'failed' package lists
+        """
+        from job_executor.dell_redfish.errors import DellRedfishError
+        
+        hostname = server.get('hostname') or server.get('ip_address')
+        outcome = {'staged': [], 'installed': [], 'skipped': [], 'failed': []}
+        
+        username, password = self.executor.get_server_credentials(server['id'])
+        if not username or not password:
+            raise Exception("No credentials configured")
+        dell_ops = self.executor._get_dell_operations()
+        
+        for position, pkg in enumerate(packages, 1):
+            entry = {'package_id': pkg.get('id'), 'filename': pkg.get('filename'), 'version': pkg.get('dell_version')}
+            image_uri = self._staging_image_uri(pkg)
+            if not image_uri:
+                outcome['failed'].append({**entry, 'error': 'Package is not available over HTTP'})
+                continue
+            
+            task_writer.update(task_id, 'running', log=f"→ Staging {pkg.get('filename')} ({position}/{len(packages)})",
+                               progress=int((position - 1) * 100 / len(packages)))
+            try:
+                result = dell_ops.stage_firmware_simple(
+                    server['ip_address'], username, password, image_uri,
+                    apply_time=apply_time,
+                    job_id=job['id'],
+                    server_id=server['id'],
+                    user_id=job.get('created_by')
+                )
+                bucket = 'staged' if result.get('staged') else 'installed'
+                outcome[bucket].append({**entry, 'task_uri': result.get('task_uri'), 'job_state': result.get('job_state')})
+                self.log(f"    ✓ {hostname}: {pkg.get('filename')} {result.get('job_state')}")
+            except DellRedfishError as e:
+                message = str(e)
+                if 'already' in message.lower() or 'not applicable' in message.lower() or 'SUP0' in message:
+                    outcome['skipped'].append({**entry, 'reason': message})
+                else:
+                    outcome['failed'].append({**entry, 'error': message})
+                    self.log(f"    ✗ {hostname}: {pkg.get('filename')}: {message}", "WARN")
+        
+        return outcome
+    
+    def execute_firmware_stage(self, job: Dict):
+        """
+        Stage firmware on many servers at once ahead of a maintenance window.
+        
+        Each library package is hosted once on the executor MediaServer and
+        every target iDRAC pulls it concurrently via SimpleUpdate with an HTTP
+        ImageURI and 'OnReset' apply time. The packages sit Scheduled in the
+        iDRAC job queue, so the update inside the window is only a reboot
+        (see use_staged_firmware on rolling_cluster_update).
+        
+        Job details:
+            package_ids: Explicit firmware_packages ids (default: all applicable per model)
+            component_filter: Component types when selecting by model (default ['all'])
+            apply_time: Apply time for staged jobs (default 'OnReset')
+            max_concurrent: Servers staged at once (default idrac_max_concurrent)
+        """
+        from job_executor.config import DSM_URL, SERVICE_ROLE_KEY, VERIFY_SSL
+        from job_executor.batch_writer import JobTaskWriter
+        from job_executor.firmware_library import get_package_index
+        
+        job_id = job['id']
+        details = job.get('details', {}) or {}
+        target_scope = job.get('target_scope', {}) or {}
+        server_ids = target_scope.get('server_ids', [])
+        package_ids = set(details.get('package_ids') or [])
+        component_filter = details.get('component_filter', ['all'])
+        apply_time = details.get('apply_time', 'OnReset')
+        
+        self.log(f"Starting firmware staging job {job_id} ({len(server_ids)} servers)")
+        self.update_job_status(job_id, 'running', started_at=utc_now_iso())
+        
+        try:
+            if not getattr(self.executor, 'media_server', None):
+                self.log("  MediaServer is not running - only packages with an HTTP served_url can be staged", "WARN")
+            
+            servers = []
+            if server_ids:
+                response = requests.get(
+                    f"{DSM_URL}/rest/v1/servers",
+                    params={
+                        'id': f'in.({",".join(server_ids)})',
+                        'select': 'id,hostname,ip_address,model'
+                    },
+                    headers={
+                        'apikey': SERVICE_ROLE_KEY,
+                        'Authorization': f'Bearer {SERVICE_ROLE_KEY}',
+                    },
+                    verify=VERIFY_SSL,
+                    timeout=30
+                )
+                if response.ok:
+                    servers = [s for s in response.json() if s.get('ip_address')]
+            if not servers:
+                raise Exception("No servers found to stage")
+            
+            index = get_package_index(log=self.log)
+            if index is None:
+                raise Exception("Could not read the firmware library")
+            
+            plans = {}
+            for server in servers:
+                if package_ids:
+                    plans[server['id']] = [p for p in index.packages if p.get('id') in package_ids]
+                else:
+                    plans[server['id']] = index.applicable(server.get('model'), component_filter)
+            unique_packages = {p.get('id') for plan in plans.values() for p in plan}
+            self.log(f"  {len(unique_packages)} package(s) to stage from the media server")
+            
+            task_writer = JobTaskWriter(self.executor, job_id)
+            task_map = task_writer.create_tasks(
+                [s['id'] for s in servers],
+                {s['id']: f"Pending staging: {len(plans[s['id']])} package(s)" for s in servers}
+            )
+            
+            settings = self.executor.fetch_activity_settings() or {}
+            max_workers = int(details.get('max_concurrent') or settings.get('idrac_max_concurrent') or 4)
+            max_workers = max(1, min(max_workers, len(servers)))
+            
+            results = {}
+            started = time.time()
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                futures = {}
+                for server in servers:
+                    if not plans[server['id']]:
+                        task_writer.update(task_map.get(server['id']), 'completed',
+                                           log="No applicable packages", progress=100)
+                        results[server['id']] = {'staged': [], 'installed': [], 'skipped': [], 'failed': []}
+                        continue
+                    futures[pool.submit(
+                        self._stage_server_firmware, job, server, plans[server['id']],
+                        apply_time, task_writer, task_map.get(server['id'])
+                    )] = server
+                
+                for future in as_completed(futures):
+                    server = futures[future]
+                    hostname = server.get('hostname') or server['ip_address']
+                    task_id = task_map.get(server['id'])
+                    try:
+                        outcome = future.result()
+                    except Exception as e:
+                        outcome = {'staged': [], 'installed': [], 'skipped': [],
+                                   'failed': [{'error': str(e)}]}
+                        self.log(f"  ✗ {hostname}: {e}", "ERROR")
+                    results[server['id']] = outcome
+                    
+                    if outcome['failed'] and not (outcome['staged'] or outcome['installed']):
+                        task_writer.update(task_id, 'failed',
+                                           log=f"✗ Staging failed: {outcome['failed'][0].get('error')}")
+                    else:
+                        task_writer.update(
+                            task_id, 'completed', progress=100,
+                            log=f"✓ {len(outcome['staged'])} staged for {apply_time}, "
+                                f"{len(outcome['installed'])} installed, {len(outcome['skipped'])} not needed, "
+                                f"{len(outcome['failed'])} failed"
+                        )
+                    self.update_job_details_field(job_id, {
+                        'servers_done': len(results),
+                        'servers_total': len(servers),
+                    })
+            task_writer.close()
+            
+            failed_servers = [sid for sid, o in results.items() if o['failed'] and not (o['staged'] or o['installed'])]
+            summary = {
+                'servers_total': len(servers),
+                'servers_failed': len(failed_servers),
+                'packages': len(unique_packages),
+                'staged_count': sum(len(o['staged']) for o in results.values()),
+                'installed_count': sum(len(o['installed']) for o in results.values()),
+                'skipped_count': sum(len(o['skipped']) for o in results.values()),
+                'failed_count': sum(len(o['failed']) for o in results.values()),
+                'apply_time': apply_time,
+                'max_concurrent': max_workers,
+                'elapsed_seconds': round(time.time() - started, 1),
+                'staged_servers': results,
+            }
+            self.log(f"✓ Firmware staging complete: {summary['staged_count']} package(s) staged on "
+                     f"{len(servers) - len(failed_servers)}/{len(servers)} server(s) in {summary['elapsed_seconds']}s")
+            self.update_job_status(
+                job_id, 'failed' if len(failed_servers) == len(servers) else 'completed',
+                completed_at=utc_now_iso(),
+                details=summary
+            )
+        except Exception as e:
+            self.log(f"Firmware staging failed: {e}", "ERROR")
+            self.update_job_status(job_id, 'failed', completed_at=utc_now_iso(), details={'error': str(e)})
+    
     def execute_full_server_update(self, job: Dict):
         """Execute full server update by orchestrating sub-jobs in order"""
         from job_executor.config import DSM_URL, SERVICE_ROLE_KEY, VERIFY_SSL
@@ -646,96 +870,22 @@ class FirmwareHandler(BaseHandler):
         Returns:
             List of available update dicts with component_name, available_version, etc.
         """
-        from job_executor.config import DSM_URL, SERVICE_ROLE_KEY, VERIFY_SSL
-        import requests
+        from job_executor.firmware_library import get_package_index
         
         available_updates = []
         
         try:
-            # Query completed firmware packages from database
-            response = requests.get(
-                f"{DSM_URL}/rest/v1/firmware_packages",
-                headers={
-                    'apikey': SERVICE_ROLE_KEY, 
-                    'Authorization': f'Bearer {SERVICE_ROLE_KEY}'
-                },
-                params={
-                    'select': '*',
-                    'upload_status': 'eq.completed',
-                    'order': 'dell_version.desc'
-                },
-                verify=VERIFY_SSL,
-                timeout=30
-            )
-            
-            if response.status_code != 200:
-                self.log(f"    ⚠ Could not query firmware packages: {response.status_code}", "WARN")
+            index = get_package_index(log=self.log)
+            if index is None:
+                self.log(f"    ⚠ Could not query firmware packages", "WARN")
                 return []
             
-            packages = response.json()
-            
-            if not packages:
+            if not len(index):
                 self.log(f"    No firmware packages in local repository", "DEBUG")
                 return []
             
-            self.log(f"    Comparing against {len(packages)} local package(s)")
-            
-            for pkg in packages:
-                # Check model applicability if specified
-                applicable_models = pkg.get('applicable_models') or []
-                
-                if applicable_models and server_model:
-                    model_matches = False
-                    for model in applicable_models:
-                        if model.lower() in server_model.lower() or server_model.lower() in model.lower():
-                            model_matches = True
-                            break
-                    
-                    if not model_matches:
-                        continue
-                
-                pkg_type = (pkg.get('component_type') or '').upper()
-                pkg_version = pkg.get('dell_version', '')
-                pkg_name_pattern = pkg.get('component_name_pattern') or pkg.get('filename', '')
-                
-                # Find matching component in installed inventory
-                for installed in current_inventory:
-                    installed_name = (installed.get('Name') or installed.get('component_name') or '').lower()
-                    installed_type = (installed.get('component_type') or '').upper()
-                    installed_version = installed.get('Version') or installed.get('version') or ''
-                    
-                    # Match by component type
-                    type_match = False
-                    if pkg_type and installed_type:
-                        type_match = pkg_type == installed_type
-                    
-                    # Match by name pattern
-                    name_match = False
-                    if pkg_name_pattern:
-                        pattern_lower = pkg_name_pattern.lower()
-                        if pattern_lower in installed_name or installed_name in pattern_lower:
-                            name_match = True
-                    
-                    # Match by component type in name (fallback)
-                    if not type_match and not name_match:
-                        if pkg_type.lower() in installed_name:
-                            name_match = True
-                    
-                    if type_match or name_match:
-                        # Compare versions - simple string comparison 
-                        # (Dell uses version strings like "2.8.1.0" that compare lexicographically)
-                        if self._is_newer_version(pkg_version, installed_version):
-                            available_updates.append({
-                                'component_name': installed.get('Name') or installed.get('component_name'),
-                                'component_type': installed_type or pkg_type,
-                                'current_version': installed_version,
-                                'available_version': pkg_version,
-                                'criticality': pkg.get('criticality', 'optional'),
-                                'reboot_required': pkg.get('reboot_required', True),
-                                'package_id': pkg.get('id'),
-                                'source': 'local_repository'
-                            })
-                            break  # Only one update per component
+            self.log(f"    Comparing against {len(index.applicable(server_model))} applicable local package(s)")
+            available_updates = index.find_updates(current_inventory, server_model)
             
             if available_updates:
                 self.log(f"    Found {len(available_updates)} update(s) in local repository")
@@ -822,6 +972,263 @@ class FirmwareHandler(BaseHandler):
         except Exception as e:
             self.log(f"Warning: Could not update job version details: {e}", "WARN")
     
+    def _scan_server_firmware(
+        self,
+        job: Dict,
+        server: Dict,
+        scan_id: Optional[str],
+        firmware_source: str,
+        dell_catalog_url: str,
+        catalog_index=None
+    ) -> Dict:
+        """
+        Scan one server's firmware and store its update_availability_results row.
+        
+        Runs on a scan worker thread; raises on failure so the caller can
+        record a failed result.
+        
+        Returns:
+            Dict with 'record' (the stored result) and 'offline' (True if the
+            catalog index answered without an iDRAC repository scan)
+        """
+        from job_executor.config import DSM_URL, SERVICE_ROLE_KEY, VERIFY_SSL
+        from job_executor.utils import utc_now_iso
+        
+        job_id = job['id']
+        server_id = server['id']
+        hostname = server.get('hostname') or server.get('ip_address', 'Unknown')
+        ip = server.get('ip_address')
+        offline = False
+        headers = {
+            'apikey': SERVICE_ROLE_KEY,
+            'Authorization': f'Bearer {SERVICE_ROLE_KEY}',
+            'Content-Type': 'application/json',
+        }
+        
+        # Get credentials
+        username, password = self.executor.get_server_credentials(server_id)
+        if not username or not password:
+            raise Exception("No credentials configured")
+        
+        # Get firmware inventory via Dell operations
+        dell_ops = self.executor._get_dell_operations()
+        
+        # Always fetch firmware inventory first - this ensures we have component data
+        # regardless of what the catalog check returns
+        current_inventory = dell_ops.get_firmware_inventory(
+            ip, username, password,
+            server_id=server_id,
+            user_id=job.get('created_by')
+        )
+        self.log(f"    Retrieved {len(current_inventory)} firmware components from {hostname}")
+        
+        # Check for updates using catalog or local repository
+        if firmware_source == 'dell_online_catalog' and catalog_index and catalog_index.has_model(server.get('model')):
+            available_updates = catalog_index.find_updates(current_inventory, model=server.get('model'))
+            offline = True
+        elif firmware_source == 'dell_online_catalog':
+            # Model not in the local index (or no index): ask the iDRAC to scan the catalog
+            check_result = dell_ops.check_available_catalog_updates(
+                ip, username, password,
+                catalog_url=dell_catalog_url,
+                server_id=server_id,
+                job_id=job_id,
+                user_id=job.get('created_by')
+            )
+            available_updates = check_result.get('available_updates', [])
+        else:
+            # For local repository, compare against uploaded firmware packages
+            available_updates = self._check_local_repository_updates(
+                current_inventory, 
+                server.get('model'),
+                server_id
+            )
+        
+        # Build firmware components list
+        components = []
+        updates_count = 0
+        critical_count = 0
+        
+        def normalize_name(name: str) -> str:
+            """Remove MAC addresses and disk numbers for matching."""
+            import re
+            # Remove MAC addresses like "- B4:83:51:11:A3:48"
+            name = re.sub(r'\s*-\s*([0-9A-Fa-f]{2}:){5}[0-9A-Fa-f]{2}\s*$', '', name)
+            # Normalize disk names: "Disk 10 in Backplane..." → "Disk in Backplane..."
+            name = re.sub(r'Disk \d+', 'Disk', name)
+            return name.lower().strip()
+        
+        def get_component_category(dell_type: str, name: str) -> str:
+            """Map Dell component type codes to human-readable categories."""
+            name_lower = (name or '').lower()
+            
+            if 'bios' in name_lower:
+                return 'BIOS'
+            if 'idrac' in name_lower or 'remote access' in name_lower:
+                return 'iDRAC'
+            if 'lifecycle' in name_lower:
+                return 'Lifecycle Controller'
+            if 'nic' in name_lower or 'ethernet' in name_lower or 'network' in name_lower or 'x710' in name_lower or 'bcm' in name_lower:
+                return 'Network'
+            if 'fibre channel' in name_lower or 'fc adapter' in name_lower or 'lpe' in name_lower:
+                return 'Fibre Channel'
+            if 'raid' in name_lower or 'perc' in name_lower or 'backplane' in name_lower or 'boss' in name_lower:
+                return 'Storage Controller'
+            if 'disk' in name_lower or 'ssd' in name_lower or 'hdd' in name_lower:
+                return 'Drive'
+            if 'power' in name_lower or 'psu' in name_lower:
+                return 'Power Supply'
+            if 'cpld' in name_lower:
+                return 'System CPLD'
+            if 'tpm' in name_lower:
+                return 'TPM'
+            if 'diagnostics' in name_lower:
+                return 'Diagnostics'
+            if 'driver' in name_lower:
+                return 'Driver'
+            
+            # Fall back to Dell type code
+            dell_type = (dell_type or '').upper()
+            type_map = {'BIOS': 'BIOS', 'FRMW': 'Firmware', 'APAC': 'Application', 'DRVR': 'Driver'}
+            return type_map.get(dell_type, 'Firmware')
+        
+        def get_firmware_family(name: str) -> str:
+            """Identify firmware family for cross-component matching.
+            
+            Components in the same family often share firmware packages.
+            Returns None if component doesn't belong to a known shared-firmware family.
+            """
+            name_lower = name.lower()
+            
+            # iDRAC and Lifecycle Controller share the same firmware package
+            if 'idrac' in name_lower or 'remote access' in name_lower or 'lifecycle controller' in name_lower:
+                return 'idrac_lifecycle'
+            
+            # Intel X710 variants (all port configurations share firmware)
+            if 'x710' in name_lower:
+                return 'intel_x710'
+            
+            # Broadcom BCM5720 / NetXtreme Gigabit variants
+            if 'bcm5720' in name_lower or 'netxtreme gigabit' in name_lower:
+                return 'broadcom_bcm5720'
+            
+            # Broadcom 10G variants
+            if 'broadcom' in name_lower and '10g' in name_lower:
+                return 'broadcom_10g'
+            
+            # Emulex / Fibre Channel adapters
+            if 'emulex' in name_lower or 'lpe31' in name_lower:
+                return 'emulex_fc'
+            
+            return None  # Not part of a known firmware family
+
+        for item in current_inventory:
+            component_name = item.get('Name') or item.get('component_name', 'Unknown')
+            current_version = item.get('Version') or item.get('version', 'Unknown')
+            # Fix: Check PascalCase from Dell API first, then snake_case
+            component_type = item.get('ComponentType') or item.get('component_type', 'Unknown')
+            
+            # Check if there's an update for this component
+            # Fix: Use 'name' field (not 'component_name') and exact matching
+            normalized_inventory_name = normalize_name(component_name)
+            update_info = next(
+                (u for u in available_updates 
+                 if normalize_name(u.get('name', '')) == normalized_inventory_name),
+                None
+            )
+            
+            component_data = {
+                'componentName': component_name,
+                'componentType': get_component_category(component_type, component_name),
+                'currentVersion': current_version,
+                'availableVersion': update_info.get('available_version') if update_info else None,
+                'criticality': update_info.get('criticality', 'optional') if update_info else None,
+                'updateAvailable': bool(update_info),
+                'rebootRequired': update_info.get('reboot_required', True) if update_info else None,
+                'updateInferred': False,
+            }
+            components.append(component_data)
+            
+            if update_info:
+                updates_count += 1
+                # Fix: Case-insensitive criticality check
+                criticality_value = (update_info.get('criticality') or '').lower()
+                if criticality_value in ('urgent', 'critical'):
+                    critical_count += 1
+        
+        # === SECOND PASS: Infer updates for unmatched components ===
+        # Build lookup: {(family, installed_version): update_info}
+        family_updates = {}
+        for comp in components:
+            if comp.get('updateAvailable') and comp.get('availableVersion'):
+                family = get_firmware_family(comp['componentName'])
+                if family:
+                    key = (family, comp['currentVersion'])
+                    if key not in family_updates:
+                        family_updates[key] = {
+                            'available_version': comp['availableVersion'],
+                            'criticality': comp.get('criticality'),
+                            'reboot_required': comp.get('rebootRequired'),
+                        }
+
+        # Apply inferred updates to unmatched components
+        inferred_count = 0
+        for comp in components:
+            if not comp.get('updateAvailable'):
+                family = get_firmware_family(comp['componentName'])
+                if family:
+                    key = (family, comp['currentVersion'])
+                    inferred = family_updates.get(key)
+                    if inferred:
+                        comp['availableVersion'] = inferred['available_version']
+                        comp['criticality'] = inferred['criticality']
+                        comp['updateAvailable'] = True
+                        comp['rebootRequired'] = inferred['reboot_required']
+                        comp['updateInferred'] = True
+                        
+                        updates_count += 1
+                        inferred_count += 1
+                        if (inferred.get('criticality') or '').lower() in ('urgent', 'critical'):
+                            critical_count += 1
+
+        if inferred_count > 0:
+            self.log(f"    ℹ Inferred {inferred_count} additional update(s) from related components")
+        
+        # Create result record
+        result_record = {
+            'scan_id': scan_id,
+            'server_id': server_id,
+            'vcenter_host_id': server.get('vcenter_host_id'),
+            'hostname': hostname,
+            'server_model': server.get('model'),
+            'service_tag': server.get('service_tag'),
+            'firmware_components': components,
+            'total_components': len(components),
+            'updates_available': updates_count,
+            'critical_updates': critical_count,
+            'up_to_date': len(components) - updates_count,
+            'not_in_catalog': 0,
+            'scan_status': 'completed',
+            'scanned_at': utc_now_iso(),
+        }
+        
+        # Insert result into database
+        try:
+            response = requests.post(
+                f"{DSM_URL}/rest/v1/update_availability_results",
+                headers=headers,
+                json=result_record,
+                verify=VERIFY_SSL,
+                timeout=30
+            )
+            if response.status_code not in [200, 201]:
+                self.log(f"Warning: Could not save result for {hostname}: "
+                         f"HTTP {response.status_code} {response.text[:200]}", "WARN")
+        except Exception as db_err:
+            self.log(f"Warning: Could not save result for {hostname}: {db_err}", "WARN")
+        
+        return {'record': result_record, 'offline': offline}
+    
     def execute_firmware_inventory_scan(self, job: Dict):
         """
         Execute firmware inventory scan job to check for available updates.
@@ -944,327 +1351,166 @@ class FirmwareHandler(BaseHandler):
         
         self.log(f"Scanning {len(servers_to_scan)} servers...")
         
-        # Create job tasks for each server
-        task_map = {}
-        for server in servers_to_scan:
-            try:
-                task_response = requests.post(
-                    f"{DSM_URL}/rest/v1/job_tasks",
-                    headers={**headers, 'Prefer': 'return=representation'},
-                    json={
-                        'job_id': job_id,
-                        'server_id': server['id'],
-                        'status': 'pending',
-                        'log': f"Pending scan: {server.get('hostname') or server['ip_address']}"
-                    },
-                    verify=VERIFY_SSL,
-                    timeout=10
-                )
-                if task_response.ok and task_response.json():
-                    task_map[server['id']] = task_response.json()[0]['id']
-            except Exception as te:
-                self.log(f"Warning: Could not create task for {server['id']}: {te}", "WARN")
+        # Parse the Dell catalog once; updates are then computed locally per server
+        catalog_index = None
+        offline_checks = 0
+        if firmware_source == 'dell_online_catalog':
+            from job_executor.firmware_catalog import get_catalog_index
+            catalog_index = get_catalog_index(dell_catalog_url, log=self.log)
+            if catalog_index is None:
+                self.log("  Catalog index unavailable - falling back to iDRAC repository scans", "WARN")
+        
+        # Create job tasks for all servers in one request; status updates are batched
+        from job_executor.batch_writer import JobTaskWriter
+        task_writer = JobTaskWriter(self.executor, job_id)
+        task_map = task_writer.create_tasks(
+            [server['id'] for server in servers_to_scan],
+            {server['id']: f"Pending scan: {server.get('hostname') or server['ip_address']}" for server in servers_to_scan}
+        )
         
-        # Scan each server
+        settings = self.executor.fetch_activity_settings() or {}
+        max_workers = int(details.get('max_concurrent') or settings.get('idrac_max_concurrent') or 4)
+        max_workers = max(1, min(max_workers, len(servers_to_scan)))
+        self.log(f"  Scanning with {max_workers} concurrent worker(s)")
+        
+        # Scan servers in parallel; results are aggregated on this thread only
         results = []
         successful_hosts = 0
         failed_hosts = 0
+        skipped_hosts = []
         total_updates = 0
         total_critical = 0
         total_components = 0
+        paused = False
+        in_flight = {}
+        pending = list(servers_to_scan)
+        last_pause_check = time.monotonic()
+        last_progress = 0.0
         
-        for idx, server in enumerate(servers_to_scan):
-            server_id = server['id']
+        def submit_next(pool):
+            server = pending.pop(0)
             hostname = server.get('hostname') or server.get('ip_address', 'Unknown')
-            ip = server.get('ip_address')
-            task_id = task_map.get(server_id)
-            
-            self.log(f"  [{idx+1}/{len(servers_to_scan)}] Scanning {hostname} ({ip})...")
-            
-            # Update progress in job details
-            progress = int((idx / len(servers_to_scan)) * 100)
-            self.update_job_details_field(job_id, {
-                'hosts_scanned': idx,
-                'hosts_total': len(servers_to_scan),
-                'current_host': hostname,
-                'updates_found': total_updates,
-                'critical_found': total_critical,
-            })
-            
-            if task_id:
-                self.update_task_status(task_id, 'running', log=f"Scanning {hostname}...", started_at=utc_now_iso())
+            self.log(f"  Scanning {hostname} ({server.get('ip_address')})...")
+            task_writer.update(task_map.get(server['id']), 'running', log=f"Scanning {hostname}...")
+            future = pool.submit(
+                self._scan_server_firmware, job, server, scan_id,
+                firmware_source, dell_catalog_url, catalog_index
+            )
+            in_flight[future] = server
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            while pending and len(in_flight) < max_workers:
+                submit_next(pool)
             
-            try:
-                # Get credentials
-                username, password = self.executor.get_server_credentials(server_id)
-                if not username or not password:
-                    raise Exception("No credentials configured")
-                
-                # Get firmware inventory via Dell operations
-                dell_ops = self.executor._get_dell_operations()
-                
-                # Always fetch firmware inventory first - this ensures we have component data
-                # regardless of what the catalog check returns
-                current_inventory = dell_ops.get_firmware_inventory(
-                    ip, username, password,
-                    server_id=server_id,
-                    user_id=job.get('created_by')
-                )
-                self.log(f"    Retrieved {len(current_inventory)} firmware components from {hostname}")
-                
-                # Check for updates using catalog or local repository
-                if firmware_source == 'dell_online_catalog':
-                    check_result = dell_ops.check_available_catalog_updates(
-                        ip, username, password,
-                        catalog_url=dell_catalog_url,
-                        server_id=server_id,
-                        job_id=job_id,
-                        user_id=job.get('created_by')
-                    )
-                    available_updates = check_result.get('available_updates', [])
-                else:
-                    # For local repository, compare against uploaded firmware packages
-                    available_updates = self._check_local_repository_updates(
-                        current_inventory, 
-                        server.get('model'),
-                        server_id
-                    )
-                
-                # Build firmware components list
-                components = []
-                updates_count = 0
-                critical_count = 0
-                
-                def normalize_name(name: str) -> str:
-                    """Remove MAC addresses and disk numbers for matching."""
-                    import re
-                    # Remove MAC addresses like "- B4:83:51:11:A3:48"
-                    name = re.sub(r'\s*-\s*([0-9A-Fa-f]{2}:){5}[0-9A-Fa-f]{2}\s*$', '', name)
-                    # Normalize disk names: "Disk 10 in Backplane..." → "Disk in Backplane..."
-                    name = re.sub(r'Disk \d+', 'Disk', name)
-                    return name.lower().strip()
-                
-                def get_component_category(dell_type: str, name: str) -> str:
-                    """Map Dell component type codes to human-readable categories."""
-                    name_lower = (name or '').lower()
-                    
-                    if 'bios' in name_lower:
-                        return 'BIOS'
-                    if 'idrac' in name_lower or 'remote access' in name_lower:
-                        return 'iDRAC'
-                    if 'lifecycle' in name_lower:
-                        return 'Lifecycle Controller'
-                    if 'nic' in name_lower or 'ethernet' in name_lower or 'network' in name_lower or 'x710' in name_lower or 'bcm' in name_lower:
-                        return 'Network'
-                    if 'fibre channel' in name_lower or 'fc adapter' in name_lower or 'lpe' in name_lower:
-                        return 'Fibre Channel'
-                    if 'raid' in name_lower or 'perc' in name_lower or 'backplane' in name_lower or 'boss' in name_lower:
-                        return 'Storage Controller'
-                    if 'disk' in name_lower or 'ssd' in name_lower or 'hdd' in name_lower:
-                        return 'Drive'
-                    if 'power' in name_lower or 'psu' in name_lower:
-                        return 'Power Supply'
-                    if 'cpld' in name_lower:
-                        return 'System CPLD'
-                    if 'tpm' in name_lower:
-                        return 'TPM'
-                    if 'diagnostics' in name_lower:
-                        return 'Diagnostics'
-                    if 'driver' in name_lower:
-                        return 'Driver'
-                    
-                    # Fall back to Dell type code
-                    dell_type = (dell_type or '').upper()
-                    type_map = {'BIOS': 'BIOS', 'FRMW': 'Firmware', 'APAC': 'Application', 'DRVR': 'Driver'}
-                    return type_map.get(dell_type, 'Firmware')
-                
-                def get_firmware_family(name: str) -> str:
-                    """Identify firmware family for cross-component matching.
-                    
-                    Components in the same family often share firmware packages.
-                    Returns None if component doesn't belong to a known shared-firmware family.
-                    """
-                    name_lower = name.lower()
-                    
-                    # iDRAC and Lifecycle Controller share the same firmware package
-                    if 'idrac' in name_lower or 'remote access' in name_lower or 'lifecycle controller' in name_lower:
-                        return 'idrac_lifecycle'
-                    
-                    # Intel X710 variants (all port configurations share firmware)
-                    if 'x710' in name_lower:
-                        return 'intel_x710'
-                    
-                    # Broadcom BCM5720 / NetXtreme Gigabit variants
-                    if 'bcm5720' in name_lower or 'netxtreme gigabit' in name_lower:
-                        return 'broadcom_bcm5720'
-                    
-                    # Broadcom 10G variants
-                    if 'broadcom' in name_lower and '10g' in name_lower:
-                        return 'broadcom_10g'
-                    
-                    # Emulex / Fibre Channel adapters
-                    if 'emulex' in name_lower or 'lpe31' in name_lower:
-                        return 'emulex_fc'
-                    
-                    return None  # Not part of a known firmware family
-
-                for item in current_inventory:
-                    component_name = item.get('Name') or item.get('component_name', 'Unknown')
-                    current_version = item.get('Version') or item.get('version', 'Unknown')
-                    # Fix: Check PascalCase from Dell API first, then snake_case
-                    component_type = item.get('ComponentType') or item.get('component_type', 'Unknown')
-                    
-                    # Check if there's an update for this component
-                    # Fix: Use 'name' field (not 'component_name') and exact matching
-                    normalized_inventory_name = normalize_name(component_name)
-                    update_info = next(
-                        (u for u in available_updates 
-                         if normalize_name(u.get('name', '')) == normalized_inventory_name),
-                        None
-                    )
-                    
-                    component_data = {
-                        'componentName': component_name,
-                        'componentType': get_component_category(component_type, component_name),
-                        'currentVersion': current_version,
-                        'availableVersion': update_info.get('available_version') if update_info else None,
-                        'criticality': update_info.get('criticality', 'optional') if update_info else None,
-                        'updateAvailable': bool(update_info),
-                        'rebootRequired': update_info.get('reboot_required', True) if update_info else None,
-                        'updateInferred': False,
-                    }
-                    components.append(component_data)
-                    
-                    if update_info:
-                        updates_count += 1
-                        # Fix: Case-insensitive criticality check
-                        criticality_value = (update_info.get('criticality') or '').lower()
-                        if criticality_value in ('urgent', 'critical'):
-                            critical_count += 1
-                
-                # === SECOND PASS: Infer updates for unmatched components ===
-                # Build lookup: {(family, installed_version): update_info}
-                family_updates = {}
-                for comp in components:
-                    if comp.get('updateAvailable') and comp.get('availableVersion'):
-                        family = get_firmware_family(comp['componentName'])
-                        if family:
-                            key = (family, comp['currentVersion'])
-                            if key not in family_updates:
-                                family_updates[key] = {
-                                    'available_version': comp['availableVersion'],
-                                    'criticality': comp.get('criticality'),
-                                    'reboot_required': comp.get('rebootRequired'),
-                                }
-
-                # Apply inferred updates to unmatched components
-                inferred_count = 0
-                for comp in components:
-                    if not comp.get('updateAvailable'):
-                        family = get_firmware_family(comp['componentName'])
-                        if family:
-                            key = (family, comp['currentVersion'])
-                            inferred = family_updates.get(key)
-                            if inferred:
-                                comp['availableVersion'] = inferred['available_version']
-                                comp['criticality'] = inferred['criticality']
-                                comp['updateAvailable'] = True
-                                comp['rebootRequired'] = inferred['reboot_required']
-                                comp['updateInferred'] = True
-                                
-                                updates_count += 1
-                                inferred_count += 1
-                                if (inferred.get('criticality') or '').lower() in ('urgent', 'critical'):
-                                    critical_count += 1
-
-                if inferred_count > 0:
-                    self.log(f"    ℹ Inferred {inferred_count} additional update(s) from related components")
-                
-                total_updates += updates_count
-                total_critical += critical_count
-                total_components += len(components)
-                
-                # Create result record
-                result_record = {
-                    'scan_id': scan_id,
-                    'server_id': server_id,
-                    'vcenter_host_id': server.get('vcenter_host_id'),
-                    'hostname': hostname,
-                    'server_model': server.get('model'),
-                    'service_tag': server.get('service_tag'),
-                    'firmware_components': components,
-                    'total_components': len(components),
-                    'updates_available': updates_count,
-                    'critical_updates': critical_count,
-                    'up_to_date': len(components) - updates_count,
-                    'not_in_catalog': 0,
-                    'scan_status': 'completed',
-                    'scanned_at': utc_now_iso(),
-                }
-                
-                # Insert result into database
-                try:
-                    requests.post(
-                        f"{DSM_URL}/rest/v1/update_availability_results",
-                        headers=headers,
-                        json=result_record,
-                        verify=VERIFY_SSL,
-                        timeout=30
-                    )
-                except Exception as db_err:
-                    self.log(f"Warning: Could not save result for {hostname}: {db_err}", "WARN")
-                
-                results.append(result_record)
-                successful_hosts += 1
+            while in_flight:
+                done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+                for future in done:
+                    server = in_flight.pop(future)
+                    server_id = server['id']
+                    hostname = server.get('hostname') or server.get('ip_address', 'Unknown')
+                    task_id = task_map.get(server_id)
+                    try:
+                        outcome = future.result()
+                        record = outcome['record']
+                        results.append(record)
+                        successful_hosts += 1
+                        offline_checks += 1 if outcome['offline'] else 0
+                        total_updates += record['updates_available']
+                        total_critical += record['critical_updates']
+                        total_components += record['total_components']
+                        task_writer.update(
+                            task_id, 'completed',
+                            log=f"✓ {hostname}: {record['updates_available']} updates available",
+                            progress=100
+                        )
+                        self.log(f"    ✓ {hostname}: {record['total_components']} components, "
+                                 f"{record['updates_available']} updates available")
+                    except Exception as e:
+                        self.log(f"    ✗ {hostname} failed: {e}", "ERROR")
+                        failed_hosts += 1
+                        task_writer.update(task_id, 'failed', log=f"✗ {hostname}: {str(e)}")
+                        
+                        # Save failed result (the error itself is in the task log)
+                        try:
+                            response = requests.post(
+                                f"{DSM_URL}/rest/v1/update_availability_results",
+                                headers=headers,
+                                json={
+                                    'scan_id': scan_id,
+                                    'server_id': server_id,
+                                    'vcenter_host_id': server.get('vcenter_host_id'),
+                                    'hostname': hostname,
+                                    'server_model': server.get('model'),
+                                    'service_tag': server.get('service_tag'),
+                                    'scan_status': 'failed',
+                                    'scanned_at': utc_now_iso(),
+                                },
+                                verify=VERIFY_SSL,
+                                timeout=30
+                            )
+                            if response.status_code not in [200, 201]:
+                                self.log(f"Warning: Could not save failed result for {hostname}: "
+                                         f"HTTP {response.status_code} {response.text[:200]}", "WARN")
+                        except Exception as db_err:
+                            self.log(f"Warning: Could not save failed result for {hostname}: {db_err}", "WARN")
                 
-                if task_id:
-                    self.update_task_status(
-                        task_id, 'completed',
-                        log=f"✓ {hostname}: {updates_count} updates available",
-                        completed_at=utc_now_iso(),
-                        progress=100
-                    )
+                # Stop handing out servers if iDRAC operations were paused meanwhile
+                if pending and not paused and time.monotonic() - last_pause_check >= PAUSE_CHECK_INTERVAL:
+                    last_pause_check = time.monotonic()
+                    paused = bool(self.executor.check_idrac_pause())
                 
-                self.log(f"    ✓ {len(components)} components, {updates_count} updates available")
+                while pending and not paused and len(in_flight) < max_workers:
+                    submit_next(pool)
                 
+                scanned = successful_hosts + failed_hosts
+                if time.monotonic() - last_progress >= 2 or not in_flight:
+                    last_progress = time.monotonic()
+                    self.update_job_details_field(job_id, {
+                        'hosts_scanned': scanned,
+                        'hosts_total': len(servers_to_scan),
+                        'hosts_in_progress': [s.get('hostname') or s.get('ip_address') for s in in_flight.values()],
+                        'updates_found': total_updates,
+                        'critical_found': total_critical,
+                        'max_concurrent': max_workers,
+                    })
+        
+        if paused and pending:
+            self.log(f"  iDRAC operations paused - skipped {len(pending)} remaining server(s)", "WARN")
+            skipped_hosts = pending
+            for server in pending:
+                task_writer.update(task_map.get(server['id']), 'cancelled',
+                                   log="Skipped: iDRAC operations paused")
+            try:
+                response = requests.post(
+                    f"{DSM_URL}/rest/v1/update_availability_results",
+                    headers=headers,
+                    json=[{
+                        'scan_id': scan_id,
+                        'server_id': server['id'],
+                        'vcenter_host_id': server.get('vcenter_host_id'),
+                        'hostname': server.get('hostname') or server.get('ip_address', 'Unknown'),
+                        'server_model': server.get('model'),
+                        'service_tag': server.get('service_tag'),
+                        'scan_status': 'skipped',
+                        'scanned_at': utc_now_iso(),
+                    } for server in pending],
+                    verify=VERIFY_SSL,
+                    timeout=30
+                )
+                if response.status_code not in [200, 201]:
+                    self.log(f"Warning: Could not record skipped servers: "
+                             f"HTTP {response.status_code} {response.text[:200]}", "WARN")
             except Exception as e:
-                self.log(f"    ✗ Failed: {e}", "ERROR")
-                failed_hosts += 1
-                
-                if task_id:
-                    self.update_task_status(
-                        task_id, 'failed',
-                        log=f"✗ {hostname}: {str(e)}",
-                        completed_at=utc_now_iso()
-                    )
-                
-                # Save failed result
-                try:
-                    requests.post(
-                        f"{DSM_URL}/rest/v1/update_availability_results",
-                        headers=headers,
-                        json={
-                            'scan_id': scan_id,
-                            'server_id': server_id,
-                            'vcenter_host_id': server.get('vcenter_host_id'),
-                            'hostname': hostname,
-                            'server_model': server.get('model'),
-                            'service_tag': server.get('service_tag'),
-                            'scan_status': 'failed',
-                            'error_message': str(e),
-                            'scanned_at': utc_now_iso(),
-                        },
-                        verify=VERIFY_SSL,
-                        timeout=30
-                    )
-                except Exception:
-                    pass
+                self.log(f"Warning: Could not record skipped servers: {e}", "WARN")
+        task_stats = task_writer.close()
         
+
         # Update scan summary
         summary = {
             'hostsScanned': len(servers_to_scan),
             'hostsSuccessful': successful_hosts,
             'hostsFailed': failed_hosts,
+            'hostsSkipped': len(skipped_hosts),
             'totalComponents': total_components,
             'updatesAvailable': total_updates,
             'criticalUpdates': total_critical,
@@ -1278,7 +1524,8 @@ class FirmwareHandler(BaseHandler):
                     params={'id': f'eq.{scan_id}'},
                     headers=headers,
                     json={
-                        'status': 'completed' if failed_hosts == 0 else 'completed_with_errors',
+                        # Per-host failures are in the summary; the status CHECK has no partial state
+                        'status': 'cancelled' if skipped_hosts else 'completed',
                         'completed_at': utc_now_iso(),
                         'summary': summary,
                     },
@@ -1289,13 +1536,21 @@ class FirmwareHandler(BaseHandler):
                 self.log(f"Warning: Could not update scan summary: {e}", "WARN")
         
         # Update job status
-        final_status = 'completed' if failed_hosts == 0 else 'failed'
+        if skipped_hosts:
+            final_status = 'cancelled'
+        else:
+            final_status = 'completed' if failed_hosts == 0 else 'failed'
         self.update_job_status(
             job_id, final_status,
             completed_at=utc_now_iso(),
             details={
                 **summary,
                 'scan_id': scan_id,
+                'paused': bool(skipped_hosts),
+                'max_concurrent': max_workers,
+                'task_writes': task_stats,
+                'catalog_index_checks': offline_checks,
+                'catalog_version': catalog_index.meta.get('catalog_version') if catalog_index else None,
             }
         )
         
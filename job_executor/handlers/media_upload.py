@@ -5,6 +5,7 @@ from datetime import datetime, timezone
 import os
 import requests
 from pathlib import Path
+from urllib.parse import quote
 from .base import BaseHandler
 from job_executor.utils import utc_now_iso
 
@@ -12,72 +13,111 @@ from job_executor.utils import utc_now_iso
 class MediaUploadHandler(BaseHandler):
     """Handles ISO and firmware file upload and scanning operations"""
     
+    def _iso_served_url(self, filename: str) -> str:
+        from job_executor.config import MEDIA_SERVER_PORT
+        if self.executor.media_server:
+            return self.executor.media_server.get_iso_url(quote(filename))
+        local_ip = self.executor.get_local_ip()
+        return f"http://{local_ip}:{MEDIA_SERVER_PORT}/isos/{quote(filename)}"
+    
+    def update_iso_image_record(self, iso_image_id: str, fields: Dict) -> bool:
+        from job_executor.config import DSM_URL, SERVICE_ROLE_KEY, VERIFY_SSL
+        response = requests.patch(
+            f"{DSM_URL}/rest/v1/iso_images?id=eq.{iso_image_id}",
+            json=fields,
+            headers={
+                'apikey': SERVICE_ROLE_KEY,
+                'Authorization': f'Bearer {SERVICE_ROLE_KEY}',
+                'Content-Type': 'application/json',
+            },
+            verify=VERIFY_SSL,
+            timeout=30
+        )
+        return response.status_code in [200, 204]
+    
+    def register_uploaded_iso(self, iso_image_id: str, local_path: str, checksum: str, file_size: int) -> str:
+        """
+        Mark an iso_images row ready once its file is in ISO_DIRECTORY.
+        
+        The digest is recorded in the checksum index so the next directory
+        scan does not re-read the file.
+        
+        Returns:
+            The URL the media server serves the ISO at
+        """
+        from job_executor.checksum_index import get_checksum_index
+        
+        index = get_checksum_index()
+        index.update(local_path, checksum)
+        index.save()
+        
+        iso_url = self._iso_served_url(os.path.basename(local_path))
+        if iso_image_id and not self.update_iso_image_record(iso_image_id, {
+            'upload_status': 'ready',
+            'upload_progress': 100,
+            'local_path': local_path,
+            'served_url': iso_url,
+            'checksum': checksum,
+            'file_size_bytes': file_size,
+        }):
+            raise Exception("Failed to update ISO image record")
+        return iso_url
+    
+    def _save_base64_iso(self, iso_data: str, iso_path: str) -> str:
+        """Decode a base64 payload to disk slice by slice, hashing as it goes"""
+        import base64
+        import hashlib
+        
+        sha256 = hashlib.sha256()
+        slice_chars = 4 * 1024 * 1024  # Multiple of 4: every slice decodes on its own
+        with open(iso_path, 'wb') as f:
+            for start in range(0, len(iso_data), slice_chars):
+                chunk = base64.b64decode(iso_data[start:start + slice_chars])
+                f.write(chunk)
+                sha256.update(chunk)
+        return sha256.hexdigest()
+    
     def execute_iso_upload(self, job: Dict):
-        """Handle ISO upload from browser - save to local directory and serve via HTTP"""
+        """
+        Finish an ISO upload from the browser and serve it via HTTP.
+        
+        Uploads normally arrive through the chunked /api/iso-upload endpoints
+        (details.upload_id): the file is already on disk and hashed, so the
+        job only finalizes it. Legacy jobs carrying the ISO as base64
+        (details.iso_data) are still accepted and decoded in slices.
+        """
+        details = job.get('details', {}) or {}
         try:
-            from job_executor.config import ISO_DIRECTORY, DSM_URL, SERVICE_ROLE_KEY, VERIFY_SSL, MEDIA_SERVER_PORT
+            from job_executor.config import ISO_DIRECTORY
             
             self.log(f"Starting ISO upload: {job['id']}")
             self.update_job_status(job['id'], 'running', started_at=utc_now_iso())
             
-            details = job.get('details', {})
             iso_image_id = details.get('iso_image_id')
+            upload_id = details.get('upload_id')
             filename = details.get('filename')
             iso_data = details.get('iso_data')
             
-            if not iso_image_id or not filename or not iso_data:
-                raise Exception("Missing required fields: iso_image_id, filename, or iso_data")
-            
-            self.log(f"Saving ISO: {filename}")
-            
-            # Ensure ISO directory exists
-            Path(ISO_DIRECTORY).mkdir(parents=True, exist_ok=True)
-            
-            # Decode and save ISO
-            import base64
-            iso_path = os.path.join(ISO_DIRECTORY, filename)
-            with open(iso_path, 'wb') as f:
-                f.write(base64.b64decode(iso_data))
-            
-            file_size = os.path.getsize(iso_path)
-            self.log(f"ISO saved: {file_size / (1024*1024):.2f} MB")
-            
-            # Calculate checksum
-            import hashlib
-            sha256 = hashlib.sha256()
-            with open(iso_path, 'rb') as f:
-                for chunk in iter(lambda: f.read(4096), b""):
-                    sha256.update(chunk)
-            checksum = sha256.hexdigest()
-            
-            # Get served URL from ISO server
-            if self.executor.iso_server:
-                iso_url = self.executor.iso_server.get_iso_url(filename)
+            if upload_id:
+                from job_executor.iso_upload import get_upload_manager
+                
+                session = get_upload_manager().get(upload_id)
+                iso_image_id = iso_image_id or session.state.get('iso_image_id')
+                self.log(f"Finalizing chunked upload: {session.state['filename']}")
+                result = get_upload_manager().finish(upload_id)
+                iso_path, checksum, file_size = result['local_path'], result['checksum'], result['size']
             else:
-                local_ip = self.executor.get_local_ip()
-                iso_url = f"http://{local_ip}:{MEDIA_SERVER_PORT}/{filename}"
-            
-            # Update iso_images record
-            update_response = requests.patch(
-                f"{DSM_URL}/rest/v1/iso_images?id=eq.{iso_image_id}",
-                json={
-                    'upload_status': 'ready',
-                    'upload_progress': 100,
-                    'local_path': iso_path,
-                    'served_url': iso_url,
-                    'checksum': checksum,
-                    'file_size_bytes': file_size,
-                },
-                headers={
-                    'apikey': SERVICE_ROLE_KEY,
-                    'Authorization': f'Bearer {SERVICE_ROLE_KEY}',
-                    'Content-Type': 'application/json',
-                },
-                verify=VERIFY_SSL
-            )
+                if not iso_image_id or not filename or not iso_data:
+                    raise Exception("Missing required fields: iso_image_id and upload_id (or filename and iso_data)")
+                
+                self.log(f"Saving ISO: {filename}")
+                Path(ISO_DIRECTORY).mkdir(parents=True, exist_ok=True)
+                iso_path = os.path.join(ISO_DIRECTORY, os.path.basename(filename))
+                checksum = self._save_base64_iso(iso_data, iso_path)
+                file_size = os.path.getsize(iso_path)
             
-            if update_response.status_code not in [200, 204]:
-                raise Exception(f"Failed to update ISO image record: {update_response.status_code}")
+            self.log(f"ISO saved: {file_size / (1024*1024):.2f} MB")
+            iso_url = self.register_uploaded_iso(iso_image_id, iso_path, checksum, file_size)
             
             self.log(f"✓ ISO upload complete: {iso_url}")
             
@@ -86,7 +126,7 @@ class MediaUploadHandler(BaseHandler):
                 'completed',
                 completed_at=utc_now_iso(),
                 details={
-                    'filename': filename,
+                    'filename': os.path.basename(iso_path),
                     'size_bytes': file_size,
                     'served_url': iso_url,
                     'checksum': checksum,
@@ -99,17 +139,7 @@ class MediaUploadHandler(BaseHandler):
             # Update ISO image status to error
             if details.get('iso_image_id'):
                 try:
-                    from job_executor.config import DSM_URL, SERVICE_ROLE_KEY, VERIFY_SSL
-                    requests.patch(
-                        f"{DSM_URL}/rest/v1/iso_images?id=eq.{details['iso_image_id']}",
-                        json={'upload_status': 'error'},
-                        headers={
-                            'apikey': SERVICE_ROLE_KEY,
-                            'Authorization': f'Bearer {SERVICE_ROLE_KEY}',
-                            'Content-Type': 'application/json',
-                        },
-                        verify=VERIFY_SSL
-                    )
+                    self.update_iso_image_record(details['iso_image_id'], {'upload_status': 'error'})
                 except:
                     pass
             
@@ -121,9 +151,17 @@ class MediaUploadHandler(BaseHandler):
             )
     
     def execute_scan_local_isos(self, job: Dict):
-        """Scan ISO_DIRECTORY for .iso files and register them in the database"""
+        """
+        Scan ISO_DIRECTORY for .iso files and register them in the database.
+        
+        Checksums come from the persistent checksum index, so only new or
+        modified ISOs are read. Existing rows are fetched once and all
+        changes are written in one bulk insert and one bulk upsert; rows
+        that already match the file are not touched.
+        """
         try:
             from job_executor.config import ISO_DIRECTORY, DSM_URL, SERVICE_ROLE_KEY, VERIFY_SSL, MEDIA_SERVER_PORT
+            from job_executor.checksum_index import checksum_files, get_checksum_index
             from job_executor.utils import _safe_json_parse
             
             self.log(f"Starting ISO directory scan: {job['id']}")
@@ -134,9 +172,11 @@ class MediaUploadHandler(BaseHandler):
                 iso_dir.mkdir(parents=True, exist_ok=True)
                 self.log(f"Created ISO directory: {ISO_DIRECTORY}")
             
-            found_isos = []
-            new_count = 0
-            updated_count = 0
+            headers = {
+                'apikey': SERVICE_ROLE_KEY,
+                'Authorization': f'Bearer {SERVICE_ROLE_KEY}',
+                'Content-Type': 'application/json',
+            }
             
             # Get media server for URL generation
             if not self.executor.media_server:
@@ -146,105 +186,105 @@ class MediaUploadHandler(BaseHandler):
                 base_url = f"http://{self.executor.media_server.get_local_ip()}:{MEDIA_SERVER_PORT}"
             
             # Scan for ISO files
-            iso_files = list(iso_dir.glob("*.iso"))
+            iso_files = sorted(iso_dir.glob("*.iso"))
             self.log(f"Found {len(iso_files)} ISO files in {ISO_DIRECTORY}")
             
-            import hashlib
+            index = get_checksum_index()
+            checksums = checksum_files([str(p) for p in iso_files], index=index, log=self.log)
+            index.prune(ISO_DIRECTORY, checksums.keys())
+            index.save()
+            hashed = sum(1 for c in checksums.values() if not c['cached'])
+            
+            # Existing registrations, one query
+            columns = ['filename', 'file_size_bytes', 'checksum', 'local_path', 'served_url',
+                       'upload_status', 'upload_progress', 'source_type']
+            existing_response = requests.get(
+                f"{DSM_URL}/rest/v1/iso_images",
+                params={'select': 'id,' + ','.join(columns)},
+                headers=headers,
+                verify=VERIFY_SSL,
+                timeout=30
+            )
+            if existing_response.status_code != 200:
+                raise Exception(f"Failed to query ISO images: {existing_response.status_code}")
+            existing_by_name = {}
+            for row in _safe_json_parse(existing_response) or []:
+                existing_by_name.setdefault(row.get('filename'), row)
             
+            found_isos = []
+            inserts = []
+            updates = []
+            unchanged_count = 0
             for iso_path in iso_files:
-                try:
-                    filename = iso_path.name
-                    file_size = iso_path.stat().st_size
-                    
-                    self.log(f"Processing: {filename} ({file_size / (1024*1024):.2f} MB)")
-                    
-                    # Calculate checksum
-                    sha256 = hashlib.sha256()
-                    with open(iso_path, 'rb') as f:
-                        for chunk in iter(lambda: f.read(8192), b""):
-                            sha256.update(chunk)
-                    checksum = sha256.hexdigest()
-                    
-                    # Generate served URL
-                    served_url = f"{base_url}/isos/{filename}"
-                    
-                    # Check if ISO already exists in database (by filename)
-                    check_response = requests.get(
-                        f"{DSM_URL}/rest/v1/iso_images?filename=eq.{filename}",
-                        headers={
-                            'apikey': SERVICE_ROLE_KEY,
-                            'Authorization': f'Bearer {SERVICE_ROLE_KEY}',
-                        },
-                        verify=VERIFY_SSL
-                    )
-                    
-                    existing_isos = _safe_json_parse(check_response) if check_response.status_code == 200 else []
-                    
-                    iso_data = {
-                        'filename': filename,
-                        'file_size_bytes': file_size,
-                        'checksum': checksum,
-                        'local_path': str(iso_path),
-                        'served_url': served_url,
-                        'upload_status': 'ready',
-                        'upload_progress': 100,
-                        'source_type': 'local',
-                    }
-                    
-                    if existing_isos:
-                        # Update existing ISO
-                        iso_id = existing_isos[0]['id']
-                        update_response = requests.patch(
-                            f"{DSM_URL}/rest/v1/iso_images?id=eq.{iso_id}",
-                            json=iso_data,
-                            headers={
-                                'apikey': SERVICE_ROLE_KEY,
-                                'Authorization': f'Bearer {SERVICE_ROLE_KEY}',
-                                'Content-Type': 'application/json',
-                            },
-                            verify=VERIFY_SSL
-                        )
-                        
-                        if update_response.status_code in [200, 204]:
-                            updated_count += 1
-                            found_isos.append({'id': iso_id, 'filename': filename, 'status': 'updated'})
-                            self.log(f"  ✓ Updated: {filename}")
-                        else:
-                            self.log(f"  ✗ Failed to update: {filename}", "WARN")
-                    else:
-                        # Insert new ISO
-                        insert_response = requests.post(
-                            f"{DSM_URL}/rest/v1/iso_images",
-                            json=iso_data,
-                            headers={
-                                'apikey': SERVICE_ROLE_KEY,
-                                'Authorization': f'Bearer {SERVICE_ROLE_KEY}',
-                                'Content-Type': 'application/json',
-                                'Prefer': 'return=representation',
-                            },
-                            verify=VERIFY_SSL
-                        )
-                        
-                        if insert_response.status_code in [200, 201]:
-                            new_iso = _safe_json_parse(insert_response)[0]
-                            new_count += 1
-                            found_isos.append({'id': new_iso['id'], 'filename': filename, 'status': 'new'})
-                            self.log(f"  ✓ Registered: {filename}")
-                        else:
-                            self.log(f"  ✗ Failed to register: {filename}", "WARN")
-                    
-                except Exception as iso_error:
-                    self.log(f"Error processing {iso_path.name}: {iso_error}", "ERROR")
+                filename = iso_path.name
+                checksum = checksums.get(str(iso_path))
+                if not checksum:
+                    continue
+                iso_data = {
+                    'filename': filename,
+                    'file_size_bytes': checksum['size'],
+                    'checksum': checksum['sha256'],
+                    'local_path': str(iso_path),
+                    'served_url': f"{base_url}/isos/{quote(filename)}",
+                    'upload_status': 'ready',
+                    'upload_progress': 100,
+                    'source_type': 'local',
+                }
+                existing = existing_by_name.get(filename)
+                if existing is None:
+                    inserts.append(iso_data)
+                elif all(existing.get(c) == iso_data[c] for c in columns):
+                    unchanged_count += 1
+                    found_isos.append({'id': existing['id'], 'filename': filename, 'status': 'unchanged'})
+                else:
+                    updates.append({'id': existing['id'], **iso_data})
+            
+            new_count = 0
+            if inserts:
+                insert_response = requests.post(
+                    f"{DSM_URL}/rest/v1/iso_images",
+                    json=inserts,
+                    headers={**headers, 'Prefer': 'return=representation'},
+                    verify=VERIFY_SSL,
+                    timeout=60
+                )
+                if insert_response.status_code in [200, 201]:
+                    for row in _safe_json_parse(insert_response) or []:
+                        new_count += 1
+                        found_isos.append({'id': row['id'], 'filename': row['filename'], 'status': 'new'})
+                        self.log(f"  ✓ Registered: {row['filename']}")
+                else:
+                    self.log(f"  ✗ Failed to register {len(inserts)} ISO(s): {insert_response.status_code}", "WARN")
+            
+            updated_count = 0
+            if updates:
+                upsert_response = requests.post(
+                    f"{DSM_URL}/rest/v1/iso_images?on_conflict=id",
+                    json=updates,
+                    headers={**headers, 'Prefer': 'resolution=merge-duplicates,return=minimal'},
+                    verify=VERIFY_SSL,
+                    timeout=60
+                )
+                if upsert_response.status_code in [200, 201, 204]:
+                    updated_count = len(updates)
+                    for row in updates:
+                        found_isos.append({'id': row['id'], 'filename': row['filename'], 'status': 'updated'})
+                        self.log(f"  ✓ Updated: {row['filename']}")
+                else:
+                    self.log(f"  ✗ Failed to update {len(updates)} ISO(s): {upsert_response.status_code}", "WARN")
             
             result = {
                 'directory': ISO_DIRECTORY,
                 'total_found': len(iso_files),
                 'new_count': new_count,
                 'updated_count': updated_count,
+                'unchanged_count': unchanged_count,
+                'hashed_count': hashed,
                 'isos': found_isos,
             }
             
-            self.log(f"✓ ISO scan complete: {new_count} new, {updated_count} updated")
+            self.log(f"✓ ISO scan complete: {new_count} new, {updated_count} updated, "
+                     f"{unchanged_count} unchanged ({hashed} hashed)")
             
             self.update_job_status(
                 job['id'],
@@ -332,6 +372,12 @@ class MediaUploadHandler(BaseHandler):
                 checksum = sha256.hexdigest()
                 file_size = os.path.getsize(local_path)
                 
+                # Hashed while downloading - later directory scans need not re-read it
+                from job_executor.checksum_index import get_checksum_index
+                checksum_index = get_checksum_index()
+                checksum_index.update(local_path, checksum)
+                checksum_index.save()
+                
                 # Generate served URL from media server
                 if self.executor.media_server:
                     served_url = self.executor.media_server.get_iso_url(filename)
@@ -437,6 +483,10 @@ class MediaUploadHandler(BaseHandler):
             # Implementation depends on firmware storage requirements
             # Similar to ISO upload but for firmware packages
             
+            # The library may have changed - rebuild the package index on next lookup
+            from job_executor.firmware_library import invalidate_package_index
+            invalidate_package_index()
+            
             self.update_job_status(
                 job['id'],
                 'completed',
@@ -454,25 +504,121 @@ class MediaUploadHandler(BaseHandler):
             )
     
     def execute_catalog_sync(self, job: Dict):
-        """Sync firmware catalog from Dell (placeholder - implement as needed)"""
+        """
+        Sync the Dell firmware catalog and optionally pre-fetch DUPs.
+
+        The catalog is fetched conditionally (ETag / Last-Modified) and
+        re-indexed only when it changed. With prefetch_dups, the newest
+        package per device for every model in the fleet (or details.models)
+        is downloaded in parallel into FIRMWARE_DIRECTORY, mirroring the
+        catalog layout so MediaServer can serve it under /firmware/.
+
+        Job details:
+            catalog_url: Catalog URL or local path (default Dell online catalog)
+            force: Ignore stored validators and re-download
+            prefetch_dups: Download packages for owned models
+            models: Explicit model list instead of the servers table
+            package_base_url: Repository root override (default from catalog baseLocation)
+            max_parallel_downloads: Concurrent package downloads (default 4)
+        """
         try:
+            from job_executor.config import FIRMWARE_DIRECTORY, DSM_URL, SERVICE_ROLE_KEY, VERIFY_SSL
+            from job_executor.utils import _safe_json_parse
+            from job_executor.firmware_catalog import DEFAULT_CATALOG_URL, normalize_model, sync_catalog
+            from job_executor.firmware_download import DEFAULT_WORKERS, download_packages
+            from job_executor.checksum_index import get_checksum_index
+            from job_executor.firmware_library import invalidate_package_index
+
             self.log(f"Starting catalog sync: {job['id']}")
-            self.update_job_status(job['id'], 'running', started_at=datetime.now().isoformat())
-            
-            # Implementation for syncing Dell firmware catalog
-            
+            self.update_job_status(job['id'], 'running', started_at=utc_now_iso())
+
+            details = job.get('details') or {}
+            catalog_url = details.get('catalog_url') or DEFAULT_CATALOG_URL
+
+            synced = sync_catalog(catalog_url, force=bool(details.get('force')), log=self.log)
+            index = synced['index']
+            result = {
+                'catalog_url': catalog_url,
+                'not_modified': not synced['changed'],
+                'catalog_bytes': synced['bytes'],
+                'catalog_version': index.meta.get('catalog_version'),
+                'catalog_date': index.meta.get('catalog_date'),
+                'package_count': index.meta.get('package_count', len(index.packages)),
+                'model_count': index.meta.get('model_count'),
+            }
+            if synced['changed']:
+                invalidate_package_index()
+                self.log(f"✓ Catalog {result['catalog_version']} indexed: "
+                         f"{result['package_count']} packages, {result['model_count']} models")
+            else:
+                self.log(f"✓ Catalog unchanged ({result['catalog_version']})")
+
+            if details.get('prefetch_dups'):
+                models = details.get('models')
+                if not models:
+                    response = requests.get(
+                        f"{DSM_URL}/rest/v1/servers",
+                        params={'select': 'model', 'model': 'not.is.null'},
+                        headers={
+                            'apikey': SERVICE_ROLE_KEY,
+                            'Authorization': f'Bearer {SERVICE_ROLE_KEY}',
+                        },
+                        verify=VERIFY_SSL,
+                        timeout=30
+                    )
+                    models = [row['model'] for row in (_safe_json_parse(response) or [])] \
+                        if response.status_code == 200 else []
+
+                tokens = sorted({index.resolve_model(m) for m in models} - {None})
+                unknown = sorted({normalize_model(m) for m in models if not index.has_model(m)} - {None})
+                packages = index.packages_for_models(tokens, latest_only=True)
+
+                base_url = details.get('package_base_url')
+                if not base_url and index.meta.get('base_location'):
+                    scheme = 'http' if catalog_url.startswith('http://') else 'https'
+                    base_url = f"{scheme}://{index.meta['base_location']}"
+
+                result['prefetch'] = {
+                    'models': tokens,
+                    'models_not_in_catalog': unknown,
+                    'packages': len(packages),
+                    'directory': FIRMWARE_DIRECTORY,
+                }
+                if not base_url:
+                    self.log("Catalog has no baseLocation and no package_base_url given - skipping DUP pre-fetch", "WARN")
+                    result['prefetch']['skipped'] = 'no repository base URL'
+                elif packages:
+                    workers = int(details.get('max_parallel_downloads') or DEFAULT_WORKERS)
+                    self.log(f"Pre-fetching {len(packages)} DUPs for {', '.join(tokens)} "
+                             f"from {base_url} ({workers} parallel)")
+
+                    def progress(done, total):
+                        if done == total or done % 10 == 0:
+                            self.update_job_details_field(job['id'], {
+                                'prefetch_progress': {'done': done, 'total': total}
+                            })
+
+                    summary = download_packages(packages, base_url, FIRMWARE_DIRECTORY, max_workers=workers,
+                                                log=self.log, progress=progress, index=get_checksum_index())
+                    summary['errors'] = summary['errors'][:50]
+                    result['prefetch'].update(summary)
+                    self.log(f"✓ DUP pre-fetch: {summary['downloaded']} downloaded, {summary['skipped']} "
+                             f"already present, {summary['failed']} failed "
+                             f"({summary['bytes'] / (1024*1024):.1f} MB)")
+
+            failed = result.get('prefetch', {}).get('failed', 0)
             self.update_job_status(
                 job['id'],
-                'completed',
-                completed_at=datetime.now().isoformat(),
-                details={'message': 'Catalog sync not yet implemented'}
+                'failed' if failed and failed == result['prefetch']['packages'] else 'completed',
+                completed_at=utc_now_iso(),
+                details=result
             )
-            
+
         except Exception as e:
             self.log(f"Catalog sync failed: {e}", "ERROR")
             self.update_job_status(
                 job['id'],
                 'failed',
-                completed_at=datetime.now().isoformat(),
+                completed_at=utc_now_iso(),
                 details={'error': str(e)}
             )
@@ -24,6 +24,7 @@ import requests
 from job_executor.handlers.base import BaseHandler
 from job_executor.config import DSM_URL, SERVICE_ROLE_KEY, VERIFY_SSL
 from job_executor.utils import utc_now_iso
+from job_executor.vcenter_pool import pooled_smart_connect, release_vcenter_session
 
 try:
     import paramiko
@@ -4819,20 +4820,10 @@ chmod 600 ~/.ssh/authorized_keys
         Raises ValueError if VM exists and is powered on.
         """
         from pyVmomi import vim
+        from job_executor.vcenter_lookup import find_by_name, forget_object
         
         # Search for existing VM by name
-        view = content.viewManager.CreateContainerView(
-            content.rootFolder, [vim.VirtualMachine], True
-        )
-        
-        existing_vm = None
-        try:
-            for vm in view.view:
-                if vm.name == shell_vm_name:
-                    existing_vm = vm
-                    break
-        finally:
-            view.Destroy()
+        existing_vm = find_by_name(content, vim.VirtualMachine, shell_vm_name)
         
         if not existing_vm:
             return True  # No conflict, proceed
@@ -4860,6 +4851,8 @@ chmod 600 ~/.ssh/authorized_keys
                 if task.info.state in ['success', 'error']:
                     break
                 time.sleep(1)
+        finally:
+            forget_object(content, vim.VirtualMachine, existing_vm._moId)
         
         return True
 
@@ -4872,6 +4865,7 @@ chmod 600 ~/.ssh/authorized_keys
         Returns False if an active (powered-on) DR Shell exists, True otherwise.
         """
         from pyVmomi import vim
+        from job_executor.vcenter_lookup import forget_object
         
         folder_pattern = f"[{datastore.name}] {source_vm_name}/"
         self._add_console_log(job_id, f"Checking for conflicting VMs in: {folder_pattern}")
@@ -4931,6 +4925,7 @@ chmod 600 ~/.ssh/authorized_keys
             # VM is powered off - safe to unregister to release file locks
             try:
                 vm.UnregisterVM()
+                forget_object(content, vim.VirtualMachine, vm._moId)
                 if is_dr_shell:
                     self._add_console_log(job_id, f"Unregistered existing DR Shell VM: {vm_name}")
                 else:
@@ -5217,21 +5212,10 @@ chmod 600 ~/.ssh/authorized_keys
             
             self._add_console_log(job_id, f"Connecting to DR vCenter: {vcenter_host}")
             
-            # Step 5: Connect to vCenter
-            import ssl
-            from pyVim.connect import SmartConnect, Disconnect
+            # Step 5: Connect to vCenter (pooled session, shared with other jobs)
             from pyVmomi import vim
             
-            context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
-            context.check_hostname = False
-            context.verify_mode = ssl.CERT_NONE
-            
-            si = SmartConnect(
-                host=vcenter_host,
-                user=vcenter_user,
-                pwd=vcenter_password,
-                sslContext=context
-            )
+            si = pooled_smart_connect(vcenter_host, vcenter_user, vcenter_password)
             
             try:
                 content = si.RetrieveContent()
@@ -5461,7 +5445,7 @@ chmod 600 ~/.ssh/authorized_keys
                 return True
                 
             finally:
-                Disconnect(si)
+                release_vcenter_session(si)
                 
         except Exception as e:
             self.executor.log(f"[{job_id}] DR shell creation failed: {e}", "ERROR")
@@ -6,19 +6,19 @@ This is useful for replicating ZFS target templates across sites.
 """
 
 import os
-import ssl
 import time
 import tempfile
 import shutil
 from typing import Dict, Optional, Any
 from datetime import datetime, timezone
 
-from pyVim.connect import SmartConnect, Disconnect
 from pyVmomi import vim
 
 from job_executor.handlers.base import BaseHandler
 from job_executor.config import DSM_URL, SERVICE_ROLE_KEY, VERIFY_SSL
 from job_executor.utils import utc_now_iso
+from job_executor.vcenter_lookup import find_by_moref, find_by_name
+from job_executor.vcenter_pool import pooled_smart_connect, release_vcenter_session
 
 import requests
 
@@ -265,17 +265,11 @@ class TemplateCopyHandler(BaseHandler):
             self._fail_job(job_id, str(e), job_details)
         
         finally:
-            # Cleanup
+            # Cleanup (pooled sessions stay logged in for the next job)
             if source_conn:
-                try:
-                    Disconnect(source_conn)
-                except:
-                    pass
+                release_vcenter_session(source_conn)
             if dest_conn:
-                try:
-                    Disconnect(dest_conn)
-                except:
-                    pass
+                release_vcenter_session(dest_conn)
             if temp_dir and os.path.exists(temp_dir):
                 try:
                     shutil.rmtree(temp_dir)
@@ -318,21 +312,9 @@ class TemplateCopyHandler(BaseHandler):
     
     def _connect_vcenter(self, host: str, username: str, password: str, 
                          port: int = 443, verify_ssl: bool = False):
-        """Establish connection to vCenter."""
+        """Pooled connection to vCenter (shared - release it, do not Disconnect)."""
         try:
-            ssl_context = None
-            if not verify_ssl:
-                ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
-                ssl_context.check_hostname = False
-                ssl_context.verify_mode = ssl.CERT_NONE
-            
-            return SmartConnect(
-                host=host,
-                user=username,
-                pwd=password,
-                port=port,
-                sslContext=ssl_context
-            )
+            return pooled_smart_connect(host, username, password, port, verify_ssl)
         except Exception as e:
             self.log(f'Failed to connect to vCenter {host}: {e}', 'ERROR')
             return None
@@ -340,18 +322,7 @@ class TemplateCopyHandler(BaseHandler):
     def _find_vm_by_moref(self, conn, moref: str):
         """Find VM/template by MoRef ID."""
         try:
-            content = conn.RetrieveContent()
-            container = content.viewManager.CreateContainerView(
-                content.rootFolder, [vim.VirtualMachine], True
-            )
-            
-            for vm in container.view:
-                if str(vm._moId) == moref or f'vm-{vm._moId}' == moref:
-                    container.Destroy()
-                    return vm
-            
-            container.Destroy()
-            return None
+            return find_by_moref(conn, vim.VirtualMachine, moref)
         except Exception as e:
             self.log(f'Error finding VM by moref: {e}', 'ERROR')
             return None
@@ -685,18 +656,10 @@ class TemplateCopyHandler(BaseHandler):
             
             # Find the imported VM
             time.sleep(2)
-            container = content.viewManager.CreateContainerView(
-                content.rootFolder, [vim.VirtualMachine], True
-            )
-            
-            for vm in container.view:
-                if vm.name == new_name:
-                    container.Destroy()
-                    self._log_console(job_id, 'INFO', 'OVF import completed', job_details)
-                    return vm
-            
-            container.Destroy()
-            return None
+            vm = find_by_name(content, vim.VirtualMachine, new_name)
+            if vm:
+                self._log_console(job_id, 'INFO', 'OVF import completed', job_details)
+            return vm
             
         except Exception as e:
             self._log_console(job_id, 'ERROR', f'OVF import failed: {e}', job_details)
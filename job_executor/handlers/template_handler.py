@@ -27,6 +27,7 @@ from pyVmomi import vim
 from job_executor.handlers.base import BaseHandler
 from job_executor.config import DSM_URL, SERVICE_ROLE_KEY, VERIFY_SSL
 from job_executor.utils import utc_now_iso
+from job_executor.vcenter_lookup import find_by_moref
 
 
 class TemplateHandler(BaseHandler):
@@ -2212,20 +2213,9 @@ modprobe error: {result['stdout']} {result['stderr']}
             return None
     
     def _find_vm_by_moref(self, si: Any, moref: str) -> Optional[Any]:
-        """Find VM by MoRef ID"""
+        """Find VM by MoRef ID (never a cached hit - callers act on whether it exists)"""
         try:
-            content = si.RetrieveContent()
-            container = content.viewManager.CreateContainerView(
-                content.rootFolder, [vim.VirtualMachine], True
-            )
-            
-            for vm in container.view:
-                if vm._moId == moref:
-                    container.Destroy()
-                    return vm
-            
-            container.Destroy()
-            return None
+            return find_by_moref(si, vim.VirtualMachine, moref, fresh=True)
         except Exception as e:
             self.log(f'Failed to find VM by moref: {e}', 'ERROR')
             return None
@@ -1,30 +1,59 @@
 """vCenter sync and connectivity handlers"""
 
 from typing import Dict, Optional, List
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone
+import copy
+import threading
 import time
 import requests
 from .base import BaseHandler
 from job_executor.utils import utc_now_iso
+from job_executor.vcenter_pool import release_vcenter_session
 
 
 class VCenterHandlers(BaseHandler):
     """Handles vCenter sync and connectivity test operations"""
     
+    # Guards job_details shared by parallel per-vCenter syncs
+    _progress_lock = threading.RLock()
+    
     def _log_console(self, message: str, level: str, job_details: Dict):
         """Add message to console log for UI display and log to stdout"""
         timestamp = datetime.now(timezone.utc).strftime('%H:%M:%S')
-        if 'console_log' not in job_details:
-            job_details['console_log'] = []
-        job_details['console_log'].append(f'[{timestamp}] [{level}] {message}')
+        with self._progress_lock:
+            if 'console_log' not in job_details:
+                job_details['console_log'] = []
+            job_details['console_log'].append(f'[{timestamp}] [{level}] {message}')
         self.log(message, level)
     
+    def _publish_progress(self, job: Dict, job_details: Dict, vcenter_index: int, fields: Dict):
+        """
+        Merge one vCenter's progress into the job details and publish them.
+        
+        With parallel syncs the top-level fields show the latest update from
+        any vCenter; vcenter_progress keeps each vCenter's own step and status.
+        """
+        with self._progress_lock:
+            job_details.update(fields)
+            vcenter_progress = job_details.setdefault('vcenter_progress', {})
+            vcenter_progress.setdefault(str(vcenter_index), {}).update({
+                key: fields[key]
+                for key in ('current_step', 'current_vcenter_name', 'sync_phase', 'status')
+                if key in fields
+            })
+            snapshot = copy.deepcopy(job_details)
+        self.update_job_status(job['id'], 'running', details=snapshot)
+    
     def execute_vcenter_sync(self, job: Dict):
         """Execute vCenter sync - fetch ESXi hosts and auto-link to Dell servers
         
-        If no specific vcenter_id is provided, syncs ALL sync-enabled vCenters sequentially.
+        If no specific vcenter_id is provided, syncs ALL sync-enabled vCenters,
+        up to VCENTER_SYNC_MAX_PARALLEL (or details.max_parallel_vcenters) at
+        a time, each on its own session. One vCenter failing does not stop
+        the others.
         """
-        from job_executor.config import DSM_URL, SERVICE_ROLE_KEY, VERIFY_SSL
+        from job_executor.config import DSM_URL, SERVICE_ROLE_KEY, VERIFY_SSL, VCENTER_SYNC_MAX_PARALLEL
         from job_executor.utils import _safe_json_parse
         from pyVmomi import vim
         
@@ -102,22 +131,29 @@ class VCenterHandlers(BaseHandler):
                 details=job_details
             )
             
-            # Iterate through ALL vCenters
-            for vcenter_index, vcenter_config in enumerate(vcenters_list):
-                vcenter_result = self._sync_single_vcenter(
-                    job=job,
-                    vcenter_config=vcenter_config,
-                    vcenter_index=vcenter_index,
-                    total_vcenters=total_vcenters,
-                    job_details=job_details
-                )
-                
-                if vcenter_result:
-                    all_vcenter_results.append(vcenter_result)
-                
-                # Check if job was cancelled during sync
-                if vcenter_result and vcenter_result.get('cancelled'):
-                    break
+            max_parallel = max(1, min(
+                int(job_details.get('max_parallel_vcenters') or VCENTER_SYNC_MAX_PARALLEL), total_vcenters
+            ))
+            
+            if max_parallel == 1:
+                # Iterate through ALL vCenters
+                for vcenter_index, vcenter_config in enumerate(vcenters_list):
+                    vcenter_result = self._sync_single_vcenter(
+                        job=job,
+                        vcenter_config=vcenter_config,
+                        vcenter_index=vcenter_index,
+                        total_vcenters=total_vcenters,
+                        job_details=job_details
+                    )
+                    
+                    if vcenter_result:
+                        all_vcenter_results.append(vcenter_result)
+                    
+                    # Check if job was cancelled during sync
+                    if vcenter_result and vcenter_result.get('cancelled'):
+                        break
+            else:
+                all_vcenter_results.extend(self._sync_vcenters_parallel(job, vcenters_list, max_parallel, job_details))
             
             # Complete job with aggregated results
             sync_duration = int(time.time() - sync_start)
@@ -184,8 +220,59 @@ class VCenterHandlers(BaseHandler):
                 details=job_details
             )
     
-    def _sync_single_vcenter(self, job: Dict, vcenter_config: Dict, vcenter_index: int, total_vcenters: int, job_details: Dict) -> Dict:
-        """Sync a single vCenter and return results"""
+    def _sync_vcenters_parallel(self, job: Dict, vcenters_list: List[Dict], max_parallel: int, job_details: Dict) -> List[Dict]:
+        """Sync several vCenters concurrently; results come back in vcenters_list order"""
+        total_vcenters = len(vcenters_list)
+        self._log_console(f"Syncing {total_vcenters} vCenters, {max_parallel} at a time", "INFO", job_details)
+        
+        results_by_index = {}
+        with ThreadPoolExecutor(max_workers=max_parallel, thread_name_prefix='vcenter-sync') as pool:
+            futures = {
+                pool.submit(
+                    self._sync_single_vcenter,
+                    job=job,
+                    vcenter_config=vcenter_config,
+                    vcenter_index=vcenter_index,
+                    total_vcenters=total_vcenters,
+                    job_details=job_details,
+                    dedicated_session=True
+                ): vcenter_index
+                for vcenter_index, vcenter_config in enumerate(vcenters_list)
+            }
+            for future in as_completed(futures):
+                vcenter_index = futures[future]
+                try:
+                    vcenter_result = future.result()
+                except Exception as e:
+                    # _sync_single_vcenter reports its own failures; keep the others going regardless
+                    vcenter_config = vcenters_list[vcenter_index]
+                    self._log_console(f"vCenter {vcenter_config.get('name')} sync crashed: {e}", "ERROR", job_details)
+                    vcenter_result = {
+                        'vcenter_id': vcenter_config.get('id'),
+                        'vcenter_name': vcenter_config.get('name'),
+                        'vcenter_host': vcenter_config.get('host'),
+                        'status': 'failed',
+                        'error': str(e)
+                    }
+                results_by_index[vcenter_index] = vcenter_result
+                if vcenter_result:
+                    self._publish_progress(job, job_details, vcenter_index, {
+                        'status': 'cancelled' if vcenter_result.get('cancelled') else vcenter_result.get('status'),
+                        'vcenters_completed': len(results_by_index),
+                    })
+        
+        return [r for _, r in sorted(results_by_index.items()) if r]
+    
+    def _sync_single_vcenter(self, job: Dict, vcenter_config: Dict, vcenter_index: int, total_vcenters: int,
+                             job_details: Dict, dedicated_session: bool = False) -> Dict:
+        """Sync a single vCenter and return results
+        
+        With dedicated_session the sync takes this vCenter's pooled session
+        directly instead of going through the executor's current connection
+        (self.executor.vcenter_conn), so it can run alongside syncs of other
+        vCenters. The session stays in the pool, and with it the vCenter's
+        incremental-sync filter.
+        """
         from job_executor.config import DSM_URL, SERVICE_ROLE_KEY, VERIFY_SSL
         
         vcenter_start = time.time()
@@ -197,19 +284,15 @@ class VCenterHandlers(BaseHandler):
         self._log_console(f"Syncing vCenter {vcenter_index + 1}/{total_vcenters}: {vcenter_name} ({vcenter_host})", "INFO", job_details)
         
         # Update job with current vCenter info (keep vcenter_name in sync for UI display)
-        job_details.update({
+        self._publish_progress(job, job_details, vcenter_index, {
             "current_step": f"Connecting to {vcenter_name}",
             "total_vcenters": total_vcenters,
             "current_vcenter_index": vcenter_index,
             "current_vcenter_name": vcenter_name,
             "vcenter_name": vcenter_name,  # Keep updated for completed job display
-            "vcenter_host": vcenter_host
+            "vcenter_host": vcenter_host,
+            "status": "running"
         })
-        self.update_job_status(
-            job['id'],
-            'running',
-            details=job_details
-        )
         
         # Create tasks for each sync phase (prefixed with vCenter name if multi)
         # PropertyCollector consolidates to 3 phases: connect, inventory, alarms
@@ -228,10 +311,14 @@ class VCenterHandlers(BaseHandler):
                 self.update_task_status(task_id, 'pending', log=phase['label'], progress=0)
                 phase_tasks[phase['name']] = task_id
         
+        vc = None
         try:
             # Connect to vCenter
             self._log_console(f"Connecting to {vcenter_name}...", "INFO", job_details)
-            vc = self.executor.connect_vcenter(vcenter_config)
+            if dedicated_session:
+                vc = self.executor.vcenter_session(vcenter_config)
+            else:
+                vc = self.executor.connect_vcenter(vcenter_config, lease=True)
             if not vc:
                 raise Exception(f"Failed to connect to vCenter {vcenter_name} - check credentials and network connectivity")
             
@@ -284,38 +371,61 @@ class VCenterHandlers(BaseHandler):
                 self.update_task_status(phase_tasks['inventory'], 'running', 
                     log=f'{phase_prefix}Fetching inventory via PropertyCollector...', progress=0)
             
-            job_details.update({
+            self._publish_progress(job, job_details, vcenter_index, {
                 'current_step': f'PropertyCollector inventory fetch from {vcenter_name}',
                 'total_vcenters': total_vcenters,
                 'current_vcenter_index': vcenter_index,
                 'current_vcenter_name': vcenter_name,
                 'sync_mode': 'property_collector'
             })
-            self.update_job_status(job['id'], 'running', details=job_details)
             
             # Import PropertyCollector module
-            from job_executor.mixins.vcenter_property_collector import sync_vcenter_fast
+            from job_executor.config import VCENTER_INCREMENTAL_SYNC
+            from job_executor.mixins.vcenter_streaming_sync import StreamingInventory
+            from job_executor.mixins.vcenter_incremental_sync import (
+                get_inventory_tracker, sync_vcenter_incremental
+            )
             
-            # Single call fetches ALL inventory (clusters, hosts, vms, datastores, networks)
+            # Fetch only what changed since the last sync of this vCenter, or
+            # stream the full inventory into the database page by page
             inventory_start = time.time()
-            inventory_result = sync_vcenter_fast(content, source_vcenter_id)
-            fetch_time = int((time.time() - inventory_start) * 1000)
-            
-            # DEBUG: Enhanced logging for Marseille VM count diagnosis
-            vm_count = len(inventory_result.get('vms', []))
-            host_count = len(inventory_result.get('hosts', []))
-            self._log_console(f"DEBUG: PropertyCollector returned {vm_count} VMs, {host_count} hosts for {vcenter_name}", "INFO", job_details)
-            if vm_count < 100:
-                # Log sample VM names if count seems low
-                sample_vms = [v.get('name', 'unknown') for v in inventory_result.get('vms', [])[:10]]
-                self._log_console(f"DEBUG: Sample VMs: {sample_vms}", "INFO", job_details)
-            
-            self._log_console(f"PropertyCollector fetched {inventory_result.get('total_objects', 0)} objects in {fetch_time}ms", "INFO", job_details)
-            
-            if 'inventory' in phase_tasks:
-                self.update_task_status(phase_tasks['inventory'], 'running',
-                    log=f'{phase_prefix}Upserting {inventory_result.get("total_objects", 0)} objects to database...',
-                    progress=50)
+            inventory_result = None
+            stream = None
+            if VCENTER_INCREMENTAL_SYNC:
+                try:
+                    inventory_result = sync_vcenter_incremental(
+                        vc, source_vcenter_id,
+                        full_resync=bool((job.get('details') or {}).get('full_resync'))
+                    )
+                    self._log_console(
+                        f"Incremental inventory ({inventory_result['mode']}): "
+                        f"{inventory_result['changed_objects']} of {inventory_result['total_objects']} objects changed",
+                        "INFO", job_details
+                    )
+                except Exception as incremental_err:
+                    self._log_console(f"Incremental sync unavailable ({incremental_err}) - using full fetch", "WARN", job_details)
+            if inventory_result is None:
+                stream = StreamingInventory(content, source_vcenter_id)
+                self._log_console(f"Streaming full inventory from {vcenter_name} "
+                                  f"({stream.page_size} objects per page)", "INFO", job_details)
+            else:
+                fetch_time = int((time.time() - inventory_start) * 1000)
+                
+                # DEBUG: Enhanced logging for Marseille VM count diagnosis
+                vm_count = len(inventory_result.get('vms', []))
+                host_count = len(inventory_result.get('hosts', []))
+                self._log_console(f"DEBUG: PropertyCollector returned {vm_count} VMs, {host_count} hosts for {vcenter_name}", "INFO", job_details)
+                if vm_count < 100:
+                    # Log sample VM names if count seems low
+                    sample_vms = [v.get('name', 'unknown') for v in inventory_result.get('vms', [])[:10]]
+                    self._log_console(f"DEBUG: Sample VMs: {sample_vms}", "INFO", job_details)
+                
+                self._log_console(f"PropertyCollector fetched {inventory_result.get('total_objects', 0)} objects in {fetch_time}ms", "INFO", job_details)
+                
+                if 'inventory' in phase_tasks:
+                    self.update_task_status(phase_tasks['inventory'], 'running',
+                        log=f'{phase_prefix}Upserting {inventory_result.get("total_objects", 0)} objects to database...',
+                        progress=50)
             
             # Check for cancellation before database upsert
             if check_cancelled():
@@ -327,24 +437,34 @@ class VCenterHandlers(BaseHandler):
                     # Scale progress from 50-100% for upsert phase
                     scaled_pct = 50 + int(pct * 0.5)
                     self.update_task_status(phase_tasks['inventory'], 'running', log=msg, progress=scaled_pct)
-                job_details.update({
+                fields = {
                     'current_step': msg,
                     'total_vcenters': total_vcenters,
                     'current_vcenter_index': vcenter_index,
                     'current_vcenter_name': vcenter_name
-                })
+                }
                 # Add sync_phase for monotonic UI progress tracking
                 if phase_idx is not None:
-                    job_details['sync_phase'] = phase_idx
-                self.update_job_status(job['id'], 'running', details=job_details)
-            
-            upsert_result = self.executor.upsert_inventory_fast(
-                inventory_result,
-                source_vcenter_id,
-                vcenter_name=vcenter_name,
-                job_id=job['id'],
-                progress_callback=inventory_progress
-            )
+                    fields['sync_phase'] = phase_idx
+                self._publish_progress(job, job_details, vcenter_index, fields)
+            
+            if stream is not None:
+                upsert_result = self.executor.upsert_inventory_streaming(
+                    stream,
+                    source_vcenter_id,
+                    vcenter_name=vcenter_name,
+                    job_id=job['id'],
+                    progress_callback=inventory_progress
+                )
+                inventory_result = stream.summary()
+            else:
+                upsert_result = self.executor.upsert_inventory_fast(
+                    inventory_result,
+                    source_vcenter_id,
+                    vcenter_name=vcenter_name,
+                    job_id=job['id'],
+                    progress_callback=inventory_progress
+                )
             
             # Map results to legacy format for compatibility
             clusters_result = upsert_result.get('clusters', {})
@@ -353,18 +473,30 @@ class VCenterHandlers(BaseHandler):
             vms_result = upsert_result.get('vms', {})
             hosts_result = upsert_result.get('hosts', {})
             
-            # Collect any upsert errors into sync_errors
+            # Collect any upsert errors (entity and relationship phases) into sync_errors
+            upsert_failed = False
             for entity_type, result in [
                 ('Clusters', clusters_result),
                 ('Hosts', hosts_result),
                 ('Datastores', datastores_result),
                 ('Networks', networks_result),
-                ('VMs', vms_result)
+                ('VMs', vms_result),
+                ('Datastore-host relationships', upsert_result.get('datastore_hosts', {})),
+                ('Network-VM relationships', upsert_result.get('network_vms', {})),
+                ('Datastore-VM relationships', upsert_result.get('datastore_vms', {})),
+                ('VM snapshots', upsert_result.get('vm_snapshots', {})),
+                ('VM custom attributes', upsert_result.get('vm_custom_attributes', {}))
             ]:
                 if result.get('error'):
                     error_msg = f"{entity_type} upsert failed: {result['error']}"
                     self.log(f"⚠️ {error_msg}", "WARN")
                     sync_errors.append(error_msg)
+                    upsert_failed = True
+            
+            if 'changed' in inventory_result and not upsert_failed:
+                # Only a fully written poll counts as pushed; otherwise (cancel, exception,
+                # failed phase) the next poll reports the same rows as changed again
+                get_inventory_tracker(source_vcenter_id, vc).commit()
             
             self._log_console(f"Inventory upsert complete: "
                 f"{clusters_result.get('synced', 0)} clusters, "
@@ -450,13 +582,12 @@ class VCenterHandlers(BaseHandler):
             if 'alarms' in phase_tasks:
                 self.update_task_status(phase_tasks['alarms'], 'running', log=f'{phase_prefix}Syncing alarms...', progress=0)
             
-            job_details.update({
+            self._publish_progress(job, job_details, vcenter_index, {
                 'current_step': f'Syncing alarms from {vcenter_name}',
                 'total_vcenters': total_vcenters,
                 'current_vcenter_index': vcenter_index,
                 'current_vcenter_name': vcenter_name
             })
-            self.update_job_status(job['id'], 'running', details=job_details)
             
             if not self.executor.check_vcenter_connection(content):
                 raise Exception("vCenter connection lost before alarm sync")
@@ -464,14 +595,13 @@ class VCenterHandlers(BaseHandler):
             def alarm_progress(pct, msg):
                 if 'alarms' in phase_tasks:
                     self.update_task_status(phase_tasks['alarms'], 'running', log=msg, progress=pct)
-                job_details.update({
+                self._publish_progress(job, job_details, vcenter_index, {
                     'current_step': msg,
                     'total_vcenters': total_vcenters,
                     'current_vcenter_index': vcenter_index,
                     'current_vcenter_name': vcenter_name,
                     'sync_phase': 5  # Alarms phase
                 })
-                self.update_job_status(job['id'], 'running', details=job_details)
             
             alarms_result = self.executor.sync_vcenter_alarms(content, source_vcenter_id, progress_callback=alarm_progress, vcenter_name=vcenter_name, job_id=job['id'])
             self._log_console(f"Alarms synced: {alarms_result.get('synced', 0)}", "INFO", job_details)
@@ -492,8 +622,24 @@ class VCenterHandlers(BaseHandler):
             # =====================================================================
             # Network sync validation - add warning if networks = 0 but hosts > 0
             # =====================================================================
-            networks_count = networks_result.get('synced', 0)
-            hosts_count = hosts_result.get('synced', 0)
+            if 'changed' in inventory_result:
+                # Incremental sync writes only changed rows - report the inventory it now mirrors
+                inventory_counts = inventory_result['counts']
+                entity_counts = {
+                    'clusters': inventory_counts['clusters'],
+                    'datastores': inventory_counts['datastores'],
+                    'vms': inventory_counts['vms'],
+                }
+                networks_count = inventory_counts['networks'] + inventory_counts['dvpgs']
+                hosts_count = inventory_counts['hosts']
+            else:
+                entity_counts = {
+                    'clusters': clusters_result.get('synced', 0),
+                    'datastores': datastores_result.get('synced', 0),
+                    'vms': vms_result.get('synced', 0),
+                }
+                networks_count = networks_result.get('synced', 0)
+                hosts_count = hosts_result.get('synced', 0)
             
             if networks_count == 0 and hosts_count > 0:
                 warning_msg = (
@@ -536,11 +682,13 @@ class VCenterHandlers(BaseHandler):
                 'vcenter_host': vcenter_host,
                 'status': 'completed_with_warnings' if has_warnings else 'success',
                 'sync_duration_seconds': vcenter_duration,
-                'clusters': clusters_result.get('synced', 0),
-                'datastores': datastores_result.get('synced', 0),
+                'clusters': entity_counts['clusters'],
+                'datastores': entity_counts['datastores'],
                 'networks': networks_count,
-                'vms': vms_result.get('synced', 0),
+                'vms': entity_counts['vms'],
                 'alarms': alarms_result.get('synced', 0),
+                'sync_mode': inventory_result.get('mode', 'full'),
+                'changed_objects': inventory_result.get('changed_objects', inventory_result.get('total_objects', 0)),
                 'hosts': hosts_count,
                 'auto_linked': hosts_result.get('auto_linked', 0),
                 'errors': sync_errors if sync_errors else None
@@ -576,6 +724,10 @@ class VCenterHandlers(BaseHandler):
                 'status': 'failed',
                 'error': str(e)
             }
+        finally:
+            # Hand the lease back on every path (pooled - stays logged in)
+            if vc is not None:
+                release_vcenter_session(vc)
     
     def execute_partial_vcenter_sync(self, job: Dict):
         """Execute partial vCenter sync - fetch only specific object types (hosts, vms, clusters, datastores, networks)"""
@@ -658,13 +810,6 @@ class VCenterHandlers(BaseHandler):
                 total_synced += upsert_result.get('synced', 0)
                 if upsert_result.get('error'):
                     all_errors.append(upsert_result['error'])
-                
-                # Disconnect
-                try:
-                    from pyVim.connect import Disconnect
-                    Disconnect(vc)
-                except:
-                    pass
             
             sync_duration = int(time.time() - sync_start)
             
@@ -771,13 +916,6 @@ class VCenterHandlers(BaseHandler):
                 vcenter_build = "unknown"
                 vcenter_type = "unknown"
             
-            # Disconnect
-            try:
-                from pyVim.connect import Disconnect
-                Disconnect(vc)
-            except:
-                pass
-            
             elapsed_ms = int((time.time() - start_time) * 1000)
             
             # Update vCenter last_sync timestamp to indicate successful connection test
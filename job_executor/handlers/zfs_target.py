@@ -14,7 +14,6 @@ Handles the deploy_zfs_target job type with the following phases:
 """
 
 import io
-import ssl
 import time
 from typing import Dict, Optional, Any, Tuple
 from datetime import datetime, timezone
@@ -28,12 +27,13 @@ except ImportError:
     PARAMIKO_AVAILABLE = False
     paramiko = None
 
-from pyVim.connect import SmartConnect, Disconnect
 from pyVmomi import vim
 
 from job_executor.handlers.base import BaseHandler
 from job_executor.config import DSM_URL, SERVICE_ROLE_KEY, VERIFY_SSL, ZFS_NFS_SHARE_OPTIONS
 from job_executor.utils import utc_now_iso
+from job_executor.vcenter_lookup import find_by_moref, forget_object
+from job_executor.vcenter_pool import pooled_smart_connect, release_vcenter_session
 
 
 class ZfsTargetHandler(BaseHandler):
@@ -1942,40 +1942,17 @@ class ZfsTargetHandler(BaseHandler):
     
     def _connect_vcenter(self, host: str, username: str, password: str,
                          port: int = 443, verify_ssl: bool = False):
-        """Establish connection to vCenter."""
+        """Pooled connection to vCenter (shared - release it, do not Disconnect)."""
         try:
-            ssl_context = None
-            if not verify_ssl:
-                ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
-                ssl_context.check_hostname = False
-                ssl_context.verify_mode = ssl.CERT_NONE
-            
-            return SmartConnect(
-                host=host,
-                user=username,
-                pwd=password,
-                port=port,
-                sslContext=ssl_context
-            )
+            return pooled_smart_connect(host, username, password, port, verify_ssl)
         except Exception as e:
             self.log(f'Failed to connect to vCenter {host}: {e}', 'ERROR')
             return None
     
     def _find_vm_by_moref(self, conn, moref: str):
-        """Find VM by MoRef ID."""
+        """Find VM by MoRef ID (never a cached hit - callers act on whether it exists)."""
         try:
-            content = conn.RetrieveContent()
-            container = content.viewManager.CreateContainerView(
-                content.rootFolder, [vim.VirtualMachine], True
-            )
-            
-            for vm in container.view:
-                if str(vm._moId) == moref or f'vm-{vm._moId}' == moref:
-                    container.Destroy()
-                    return vm
-            
-            container.Destroy()
-            return None
+            return find_by_moref(conn, vim.VirtualMachine, moref, fresh=True)
         except Exception as e:
             self.log(f'Error finding VM by moref: {e}', 'ERROR')
             return None
@@ -2274,10 +2251,7 @@ class ZfsTargetHandler(BaseHandler):
             self.ssh_client = None
         
         if self.vcenter_conn:
-            try:
-                Disconnect(self.vcenter_conn)
-            except:
-                pass
+            release_vcenter_session(self.vcenter_conn)
             self.vcenter_conn = None
     
     # =========================================================================
@@ -3843,6 +3817,7 @@ class ZfsTargetHandler(BaseHandler):
                             vm_name = vm.name
                             task = vm.Destroy_Task()
                             self._wait_for_task_simple(task)
+                            forget_object(self.vcenter_conn, vim.VirtualMachine, deployed_vm_moref)
                             add_result('delete_vm', 'success', f'VM {vm_name} deleted')
                         else:
                             add_result('delete_vm', 'skipped', f'VM not found: {deployed_vm_moref}')
@@ -4082,17 +4057,14 @@ class ZfsTargetHandler(BaseHandler):
             self._log_console(job_id, 'INFO', f'Connecting to vCenter: {vcenter["host"]}', job_details)
             
             # Connect to vCenter
-            context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
-            context.check_hostname = False
-            context.verify_mode = ssl.CERT_NONE
-            
-            self.vcenter_conn = SmartConnect(
-                host=vcenter['host'],
-                user=vcenter['username'],
-                pwd=vcenter['password'],
-                port=vcenter.get('port', 443),
-                sslContext=context
+            self.vcenter_conn = self._connect_vcenter(
+                vcenter['host'],
+                vcenter['username'],
+                vcenter['password'],
+                vcenter.get('port', 443)
             )
+            if not self.vcenter_conn:
+                raise Exception(f'Failed to connect to vCenter: {vcenter["host"]}')
             
             content = self.vcenter_conn.RetrieveContent()
             
@@ -4334,10 +4306,7 @@ class ZfsTargetHandler(BaseHandler):
             self.update_job_status(job_id, 'failed', completed_at=utc_now_iso(), details=job_details)
         finally:
             if self.vcenter_conn:
-                try:
-                    Disconnect(self.vcenter_conn)
-                except:
-                    pass
+                release_vcenter_session(self.vcenter_conn)
                 self.vcenter_conn = None
     
     # =========================================================================
@@ -4395,17 +4364,14 @@ class ZfsTargetHandler(BaseHandler):
             self._log_console(job_id, 'INFO', f'Connecting to vCenter: {vcenter["host"]}', job_details)
             
             # Connect to vCenter
-            context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
-            context.check_hostname = False
-            context.verify_mode = ssl.CERT_NONE
-            
-            self.vcenter_conn = SmartConnect(
-                host=vcenter['host'],
-                user=vcenter['username'],
-                pwd=vcenter['password'],
-                port=vcenter.get('port', 443),
-                sslContext=context
+            self.vcenter_conn = self._connect_vcenter(
+                vcenter['host'],
+                vcenter['username'],
+                vcenter['password'],
+                vcenter.get('port', 443)
             )
+            if not self.vcenter_conn:
+                raise Exception(f'Failed to connect to vCenter: {vcenter["host"]}')
             
             content = self.vcenter_conn.RetrieveContent()
             
@@ -4553,10 +4519,7 @@ class ZfsTargetHandler(BaseHandler):
             self.update_job_status(job_id, 'failed', completed_at=utc_now_iso(), details=job_details)
         finally:
             if self.vcenter_conn:
-                try:
-                    Disconnect(self.vcenter_conn)
-                except:
-                    pass
+                release_vcenter_session(self.vcenter_conn)
                 self.vcenter_conn = None
     
     def _fetch_vcenter(self, vcenter_id: str) -> Optional[Dict]:
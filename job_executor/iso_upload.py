@@ -0,0 +1,377 @@
+"""
+Chunked, resumable ISO uploads
+
+The browser splits an ISO into fixed-size chunks and PUTs them (several at
+a time) to the API server. Each chunk is streamed from the socket straight
+to its offset in '<ISO_DIRECTORY>/.uploads/<upload_id>.part', so memory use
+does not depend on ISO size. Upload state (received chunks) is persisted
+beside the part file; after a dropped connection or an executor restart
+the client asks which chunks are missing and sends only those.
+
+SHA-256 is computed incrementally: whenever the contiguous prefix of
+received chunks grows, the new bytes are fed to the running digest (read
+back from the page cache). Completing an upload therefore only hashes
+whatever arrived out of order since the last advance.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import BinaryIO, Dict, List, Optional
+
+from job_executor.config import ISO_DIRECTORY
+
+
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+MAX_CHUNK_SIZE = 64 * 1024 * 1024
+# Socket reads while streaming a chunk to disk
+STREAM_BUFFER_SIZE = 1024 * 1024
+
+_UPLOAD_ID_RE = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+
+class UploadError(Exception):
+    """Client-side upload problem (reported as HTTP 4xx)"""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def _safe_filename(filename: str) -> str:
+    name = os.path.basename((filename or '').replace('\\', '/'))
+    if not name or name in ('.', '..'):
+        raise UploadError('Invalid filename')
+    return name
+
+
+class UploadSession:
+    """One resumable upload: a preallocated part file plus its chunk bitmap"""
+
+    def __init__(self, upload_dir: str, state: Dict):
+        self.upload_dir = upload_dir
+        self.state = state
+        self._lock = threading.Lock()
+        self._hash_lock = threading.Lock()
+        self._sha256 = hashlib.sha256()
+        self._hashed_chunks = 0  # Contiguous chunks already fed to _sha256
+        self._received = set(state.get('received', []))
+
+    # ------------------------------------------------------------------
+    # Paths and properties
+    # ------------------------------------------------------------------
+
+    @property
+    def upload_id(self) -> str:
+        return self.state['upload_id']
+
+    @property
+    def part_path(self) -> str:
+        return os.path.join(self.upload_dir, f'{self.upload_id}.part')
+
+    @property
+    def state_path(self) -> str:
+        return os.path.join(self.upload_dir, f'{self.upload_id}.json')
+
+    @property
+    def total_chunks(self) -> int:
+        size, chunk_size = self.state['size'], self.state['chunk_size']
+        return max(1, (size + chunk_size - 1) // chunk_size)
+
+    def chunk_length(self, index: int) -> int:
+        chunk_size = self.state['chunk_size']
+        return min(chunk_size, self.state['size'] - index * chunk_size)
+
+    def missing(self) -> List[int]:
+        with self._lock:
+            return [i for i in range(self.total_chunks) if i not in self._received]
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            received = len(self._received)
+            bytes_received = sum(self.chunk_length(i) for i in self._received)
+        return {
+            'upload_id': self.upload_id,
+            'iso_image_id': self.state.get('iso_image_id'),
+            'filename': self.state['filename'],
+            'size': self.state['size'],
+            'chunk_size': self.state['chunk_size'],
+            'total_chunks': self.total_chunks,
+            'received_chunks': received,
+            'bytes_received': bytes_received,
+            'missing': self.missing(),
+            'complete': received == self.total_chunks,
+        }
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def _save_state(self):
+        """Write the chunk bitmap (caller holds _lock)"""
+        self.state['received'] = sorted(self._received)
+        self.state['updated_at'] = time.time()
+        tmp_path = f'{self.state_path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def create_files(self):
+        with open(self.part_path, 'wb') as f:
+            f.truncate(self.state['size'])
+        with self._lock:
+            self._save_state()
+
+    # ------------------------------------------------------------------
+    # Chunks
+    # ------------------------------------------------------------------
+
+    def write_chunk(self, index: int, stream: BinaryIO, length: int, sha256: Optional[str] = None) -> Dict:
+        """
+        Stream one chunk from stream to its offset in the part file.
+
+        Chunks may arrive in any order and concurrently; re-sending a chunk
+        overwrites it. A per-chunk SHA-256 (X-Chunk-SHA256) is checked
+        before the chunk is marked received.
+        """
+        if not 0 <= index < self.total_chunks:
+            raise UploadError(f'Chunk {index} out of range (0-{self.total_chunks - 1})')
+        expected = self.chunk_length(index)
+        if length != expected:
+            raise UploadError(f'Chunk {index} must be {expected} bytes, got {length}')
+
+        resent = self._is_received(index)
+        chunk_hash = hashlib.sha256() if sha256 else None
+        offset = index * self.state['chunk_size']
+        try:
+            fd = os.open(self.part_path, os.O_WRONLY)
+            try:
+                remaining = length
+                while remaining > 0:
+                    data = stream.read(min(STREAM_BUFFER_SIZE, remaining))
+                    if not data:
+                        raise UploadError(f'Chunk {index} truncated: {length - remaining} of {length} bytes')
+                    view = memoryview(data)
+                    while view:
+                        written = os.pwrite(fd, view, offset)
+                        offset += written
+                        view = view[written:]
+                    if chunk_hash:
+                        chunk_hash.update(data)
+                    remaining -= len(data)
+            finally:
+                os.close(fd)
+
+            if chunk_hash and chunk_hash.hexdigest().lower() != sha256.lower():
+                raise UploadError(f'Chunk {index} checksum mismatch', status=422)
+        except Exception:
+            if resent:
+                # The earlier copy is partly overwritten - it has to be sent again
+                with self._lock:
+                    self._received.discard(index)
+                    self._save_state()
+            raise
+        finally:
+            if resent:
+                # A hash pass may have read this chunk before or during the
+                # write; once the write is done, wait for any pass in progress
+                # and start the digest over if it got past this chunk
+                with self._hash_lock:
+                    if index < self._hashed_chunks:
+                        self._sha256, self._hashed_chunks = hashlib.sha256(), 0
+
+        with self._lock:
+            self._received.add(index)
+            self._save_state()
+        self._advance_hash(blocking=False)
+        return self.to_dict()
+
+    def _is_received(self, index: int) -> bool:
+        with self._lock:
+            return index in self._received
+
+    def _advance_hash(self, blocking: bool = True):
+        """
+        Feed newly contiguous chunks into the running SHA-256.
+
+        Chunk writers pass blocking=False: if another request is already
+        hashing, it (or finalize) picks up this chunk too.
+        """
+        if not self._hash_lock.acquire(blocking=blocking):
+            return
+        try:
+            if self._hashed_chunks >= self.total_chunks or not self._is_received(self._hashed_chunks):
+                return
+            with open(self.part_path, 'rb') as f:
+                f.seek(self._hashed_chunks * self.state['chunk_size'])
+                while self._hashed_chunks < self.total_chunks and self._is_received(self._hashed_chunks):
+                    remaining = self.chunk_length(self._hashed_chunks)
+                    while remaining > 0:
+                        data = f.read(min(STREAM_BUFFER_SIZE, remaining))
+                        if not data:
+                            raise UploadError('Part file shorter than expected', status=500)
+                        self._sha256.update(data)
+                        remaining -= len(data)
+                    self._hashed_chunks += 1
+        finally:
+            self._hash_lock.release()
+
+    def finalize(self, dest_dir: str) -> Dict:
+        """
+        Verify and move the completed part file into dest_dir.
+
+        An existing file of the same name in dest_dir is not replaced (409).
+
+        Returns:
+            Dict with 'local_path', 'checksum' and 'size'
+        """
+        missing = self.missing()
+        if missing:
+            raise UploadError(f'{len(missing)} chunk(s) missing', status=409)
+        local_path = os.path.join(dest_dir, self.state['filename'])
+        if os.path.exists(local_path):
+            raise UploadError(f"{self.state['filename']} already exists", status=409)
+        self._advance_hash()
+        with self._hash_lock:
+            checksum = self._sha256.hexdigest()
+        expected = self.state.get('sha256')
+        if expected and expected.lower() != checksum:
+            raise UploadError(f'SHA-256 mismatch: expected {expected}, got {checksum}', status=422)
+
+        os.replace(self.part_path, local_path)
+        try:
+            os.remove(self.state_path)
+        except OSError:
+            pass
+        return {'local_path': local_path, 'checksum': checksum, 'size': self.state['size']}
+
+    def abort(self):
+        for path in (self.part_path, self.state_path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+class UploadManager:
+    """Upload sessions by id, restored from disk on first use"""
+
+    def __init__(self, iso_directory: str = None):
+        self.iso_directory = iso_directory or ISO_DIRECTORY
+        self.upload_dir = os.path.join(self.iso_directory, '.uploads')
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, UploadSession] = {}
+        self._finishing = set()  # Filenames being finalized into iso_directory
+
+    def start(self, upload_id: str, filename: str, size: int, chunk_size: int = None,
+              sha256: str = None, iso_image_id: str = None) -> UploadSession:
+        """
+        Create an upload, or return the existing one for upload_id (resume).
+
+        Args:
+            upload_id: Client-chosen id, usually the iso_images row id
+            size: Total size in bytes
+            chunk_size: Bytes per chunk (default 8 MB)
+            sha256: Expected SHA-256 of the whole file (optional)
+        """
+        if not upload_id or not _UPLOAD_ID_RE.match(upload_id):
+            raise UploadError('Invalid upload_id')
+        filename = _safe_filename(filename)
+        try:
+            size = int(size)
+            chunk_size = int(chunk_size or DEFAULT_CHUNK_SIZE)
+        except (TypeError, ValueError):
+            raise UploadError('size and chunk_size must be integers')
+        if size <= 0:
+            raise UploadError('size must be positive')
+        if not 0 < chunk_size <= MAX_CHUNK_SIZE:
+            raise UploadError(f'chunk_size must be between 1 and {MAX_CHUNK_SIZE}')
+
+        with self._lock:
+            session = self._get_locked(upload_id)
+            if session is not None:
+                same = (session.state['filename'], session.state['size'], session.state['chunk_size']) == \
+                    (filename, size, chunk_size)
+                if same:
+                    return session
+                session.abort()  # Different file under the same id - start over
+
+            os.makedirs(self.upload_dir, exist_ok=True)
+            session = UploadSession(self.upload_dir, {
+                'upload_id': upload_id,
+                'iso_image_id': iso_image_id,
+                'filename': filename,
+                'size': size,
+                'chunk_size': chunk_size,
+                'sha256': sha256,
+                'received': [],
+                'created_at': time.time(),
+            })
+            session.create_files()
+            self._sessions[upload_id] = session
+            return session
+
+    def _get_locked(self, upload_id: str) -> Optional[UploadSession]:
+        session = self._sessions.get(upload_id)
+        if session is not None:
+            return session
+        state_path = os.path.join(self.upload_dir, f'{upload_id}.json')
+        try:
+            with open(state_path, 'r') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        session = UploadSession(self.upload_dir, state)
+        if not os.path.exists(session.part_path):
+            return None
+        self._sessions[upload_id] = session
+        return session
+
+    def get(self, upload_id: str) -> UploadSession:
+        if not upload_id or not _UPLOAD_ID_RE.match(upload_id):
+            raise UploadError('Invalid upload_id')
+        with self._lock:
+            session = self._get_locked(upload_id)
+        if session is None:
+            raise UploadError(f'Unknown upload {upload_id}', status=404)
+        return session
+
+    def finish(self, upload_id: str) -> Dict:
+        """Finalize an upload; 409 while another finish targets the same ISO filename"""
+        session = self.get(upload_id)
+        filename = session.state['filename']
+        with self._lock:
+            if self._sessions.get(upload_id) is not session:
+                raise UploadError(f'Unknown upload {upload_id}', status=404)  # Finished meanwhile
+            if filename in self._finishing:
+                raise UploadError(f'{filename} is already being finished', status=409)
+            self._finishing.add(filename)
+        try:
+            result = session.finalize(self.iso_directory)
+            with self._lock:
+                self._sessions.pop(upload_id, None)
+        finally:
+            with self._lock:
+                self._finishing.discard(filename)
+        return result
+
+    def abort(self, upload_id: str):
+        session = self.get(upload_id)
+        session.abort()
+        with self._lock:
+            self._sessions.pop(upload_id, None)
+
+
+_manager_lock = threading.Lock()
+_manager: Optional[UploadManager] = None
+
+
+def get_upload_manager() -> UploadManager:
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = UploadManager()
+        return _manager
@@ -3,20 +3,418 @@ Media Server Module
 ===================
 HTTP server to serve ISO files and Dell Update Packages (DUPs) to iDRAC.
 Extends the original ISO server to support firmware repository.
+
+Virtual media reads an ISO with many small Range requests over a kept-alive
+connection, so the server:
+- handles each connection on its own thread (a slow iDRAC no longer blocks
+  the others) with a cap on concurrent connections
+- answers single byte ranges with 206 Partial Content
+- streams file bodies with socket.sendfile() (os.sendfile zero-copy where
+  the platform has it)
+- paces bodies through a BandwidthScheduler: optional global and per-client
+  caps, with the global rate shared evenly between active clients, and
+  live per-transfer throughput for the API server
 """
 
 import http.server
 import socketserver
 import threading
 import os
+import re
 import socket
+import time
+from collections import deque
+from email.utils import formatdate
 from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import quote, unquote, urlsplit
+
+
+DEFAULT_MAX_CONNECTIONS = 64
+DEFAULT_KEEPALIVE_TIMEOUT = 30
+
+# Bytes handed to one sendfile() call
+SENDFILE_CHUNK = 4 * 1024 * 1024
+# Smaller slices while a bandwidth cap applies, so pacing stays smooth
+THROTTLED_CHUNK = 256 * 1024
+
+# A (client, file) transfer with no request for this long is considered finished
+TRANSFER_IDLE_SECONDS = 30
+RECENT_TRANSFERS = 50
+
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range Range header into an inclusive (start, end).
+    
+    Returns None when the header is absent or not a single byte range (the
+    whole file is served). Raises ValueError when the range cannot be
+    satisfied for a file of this size.
+    """
+    if not header:
+        return None
+    match = _RANGE_RE.match(header.strip().replace(' ', ''))
+    if not match:
+        return None  # Multiple or malformed ranges - serve the whole file
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError('unsatisfiable range')
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError('unsatisfiable range')
+    return start, end
+
+
+class _TokenBucket:
+    """Rate limiter that lets callers go into debt and sleep it off"""
+    
+    def __init__(self, rate: float, burst_seconds: float = 0.25):
+        self.rate = rate
+        self.burst_seconds = burst_seconds
+        self.tokens = rate * burst_seconds
+        self.updated = time.monotonic()
+    
+    def reserve(self, amount: int, now: float) -> float:
+        """Take amount tokens; returns seconds to wait before sending them"""
+        if self.rate <= 0:
+            return 0.0
+        self.tokens = min(self.rate * self.burst_seconds, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= amount
+        return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+
+class Transfer:
+    """Live statistics for one client reading one file (across its range requests)"""
+    
+    def __init__(self, transfer_id: int, client: str, path: str, size: int):
+        self.id = transfer_id
+        self.client = client
+        self.path = path
+        self.size = size
+        self.bytes_sent = 0
+        self.requests = 0
+        self.active_requests = 0
+        self.started = time.time()
+        self.last_activity = time.monotonic()
+        self.throughput_bps = 0.0
+        self._window_start = time.monotonic()
+        self._window_bytes = 0
+    
+    def record(self, sent: int, now: float):
+        self.bytes_sent += sent
+        self.last_activity = now
+        self._window_bytes += sent
+        elapsed = now - self._window_start
+        if elapsed >= 1.0:
+            self.throughput_bps = self._window_bytes / elapsed
+            self._window_start, self._window_bytes = now, 0
+    
+    def to_dict(self, now: float) -> Dict:
+        active = self.active_requests > 0
+        elapsed = now - self._window_start
+        if elapsed >= 1.0:
+            # Nothing recorded for a while (stalled or slow reader) - report the open window
+            self.throughput_bps = self._window_bytes / elapsed
+        return {
+            'id': self.id,
+            'client': self.client,
+            'path': self.path,
+            'size_bytes': self.size,
+            'bytes_sent': self.bytes_sent,
+            'requests': self.requests,
+            'active': active,
+            'started_at': self.started,
+            'idle_seconds': round(now - self.last_activity, 1),
+            'throughput_bps': round(self.throughput_bps if active else 0.0),
+            'average_bps': round(self.bytes_sent / max(time.time() - self.started, 0.001)),
+        }
+
+
+class BandwidthScheduler:
+    """
+    Paces media transfers under a global and a per-client byte rate.
+    
+    Every sender reserves its next slice from the global bucket and from its
+    client's bucket and sleeps off any debt, so concurrent senders interleave
+    slice by slice. A client's bucket refills at the smaller of the
+    per-client cap and the global rate divided by the number of clients
+    currently reading, so one fast iDRAC (or one opening many connections)
+    cannot take the whole uplink. A rate of 0 disables that cap.
+    """
+    
+    def __init__(self, max_bytes_per_sec: float = 0, client_max_bytes_per_sec: float = 0):
+        self._lock = threading.Lock()
+        self._global = _TokenBucket(0)
+        self._clients: Dict[str, _TokenBucket] = {}
+        self._transfers: Dict[Tuple[str, str], Transfer] = {}
+        self._recent = deque(maxlen=RECENT_TRANSFERS)
+        self._next_id = 1
+        self.total_bytes = 0
+        self.set_limits(max_bytes_per_sec, client_max_bytes_per_sec)
+    
+    @property
+    def throttled(self) -> bool:
+        return self.max_bytes_per_sec > 0 or self.client_max_bytes_per_sec > 0
+    
+    def set_limits(self, max_bytes_per_sec: float, client_max_bytes_per_sec: float):
+        """Change the caps; applies to transfers already running"""
+        with self._lock:
+            self.max_bytes_per_sec = max(0, max_bytes_per_sec or 0)
+            self.client_max_bytes_per_sec = max(0, client_max_bytes_per_sec or 0)
+            self._global.rate = self.max_bytes_per_sec
+            self._rebalance()
+    
+    def _active_clients(self) -> set:
+        return {t.client for t in self._transfers.values() if t.active_requests > 0}
+    
+    def _client_rate(self, active_clients: int) -> float:
+        rates = [r for r in (
+            self.client_max_bytes_per_sec,
+            self.max_bytes_per_sec / active_clients if self.max_bytes_per_sec and active_clients else 0,
+        ) if r > 0]
+        return min(rates) if rates else 0
+    
+    def _rebalance(self):
+        active = self._active_clients()
+        rate = self._client_rate(len(active))
+        for client in active:
+            self._clients.setdefault(client, _TokenBucket(rate)).rate = rate
+        for client in list(self._clients):
+            if client not in active:
+                del self._clients[client]
+    
+    def begin(self, client: str, path: str, size: int) -> Transfer:
+        """Register a request for path from client (joins an ongoing transfer of that file)"""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            transfer = self._transfers.get((client, path))
+            if transfer is None:
+                transfer = Transfer(self._next_id, client, path, size)
+                self._next_id += 1
+                self._transfers[(client, path)] = transfer
+            transfer.requests += 1
+            transfer.active_requests += 1
+            transfer.last_activity = now
+            self._rebalance()
+            return transfer
+    
+    def end(self, transfer: Transfer):
+        with self._lock:
+            transfer.active_requests -= 1
+            transfer.last_activity = time.monotonic()
+            self._rebalance()
+    
+    def _expire(self, now: float):
+        for key, transfer in list(self._transfers.items()):
+            if transfer.active_requests <= 0 and now - transfer.last_activity > TRANSFER_IDLE_SECONDS:
+                self._recent.append(transfer.to_dict(now))
+                del self._transfers[key]
+    
+    def pace(self, transfer: Transfer, amount: int):
+        """Block until amount bytes may be sent for transfer"""
+        if not self.throttled:
+            return
+        with self._lock:
+            now = time.monotonic()
+            wait = self._global.reserve(amount, now)
+            bucket = self._clients.get(transfer.client)
+            if bucket is not None:
+                wait = max(wait, bucket.reserve(amount, now))
+        if wait > 0:
+            time.sleep(wait)
+    
+    def record(self, transfer: Transfer, sent: int):
+        with self._lock:
+            transfer.record(sent, time.monotonic())
+            self.total_bytes += sent
+    
+    def snapshot(self) -> Dict:
+        """Limits, active/idle transfers and recently finished ones"""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            transfers = [t.to_dict(now) for t in self._transfers.values()]
+            active_clients = len(self._active_clients())
+            return {
+                'limits': {
+                    'max_bytes_per_sec': self.max_bytes_per_sec,
+                    'client_max_bytes_per_sec': self.client_max_bytes_per_sec,
+                    'client_share_bytes_per_sec': self._client_rate(active_clients),
+                },
+                'active_clients': active_clients,
+                'throughput_bps': round(sum(t['throughput_bps'] for t in transfers)),
+                'total_bytes_sent': self.total_bytes,
+                'transfers': sorted(transfers, key=lambda t: -t['throughput_bps']),
+                'recent': list(self._recent),
+            }
+
+
+class ThreadingMediaServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    """Thread-per-connection HTTP server that refuses connections beyond a limit"""
+    
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+    
+    def __init__(self, server_address, handler_factory, max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 bandwidth: BandwidthScheduler = None):
+        self.max_connections = max_connections
+        self.bandwidth = bandwidth or BandwidthScheduler()
+        self._slots = threading.BoundedSemaphore(max_connections)
+        super().__init__(server_address, handler_factory)
+    
+    def process_request(self, request, client_address):
+        if not self._slots.acquire(blocking=False):
+            # Over the limit: tell the client to come back instead of queueing forever
+            try:
+                request.sendall(b'HTTP/1.1 503 Service Unavailable\r\nRetry-After: 5\r\n'
+                                b'Content-Length: 0\r\nConnection: close\r\n\r\n')
+            except OSError:
+                pass
+            self.shutdown_request(request)
+            return
+        super().process_request(request, client_address)
+    
+    def process_request_thread(self, request, client_address):
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self._slots.release()
+
+
+class MediaRequestHandler(http.server.SimpleHTTPRequestHandler):
+    """
+    Serves /isos/* and /firmware/* with keep-alive and byte ranges.
+    
+    Files go through send_file(); directory listings still use
+    SimpleHTTPRequestHandler.
+    """
+    
+    protocol_version = 'HTTP/1.1'
+    timeout = DEFAULT_KEEPALIVE_TIMEOUT
+    
+    def __init__(self, *args, iso_dir=None, firmware_dir=None, timeout=None, **kwargs):
+        self.iso_dir = iso_dir
+        self.firmware_dir = firmware_dir
+        if timeout is not None:
+            self.timeout = timeout  # Idle keep-alive connections are closed after this
+        super().__init__(*args, **kwargs)
+    
+    def translate_path(self, path):
+        path = unquote(urlsplit(path).path)
+        # Route /isos/* to ISO directory
+        if path.startswith('/isos/'):
+            root, path = self.iso_dir, path[6:]  # Remove /isos/
+        # Route /firmware/* to firmware directory
+        elif path.startswith('/firmware/'):
+            root, path = self.firmware_dir, path[10:]  # Remove /firmware/
+        # Default to ISO directory for backward compatibility
+        else:
+            root = self.iso_dir
+        root = os.path.abspath(root)
+        resolved = os.path.abspath(os.path.join(root, path.lstrip('/')))
+        if os.path.commonpath([root, resolved]) != root:
+            return os.path.join(root, '\0')  # Never exists - answered with 404
+        return resolved
+    
+    def log_request(self, code='-', size='-'):
+        # Virtual media issues thousands of range reads; only log problems
+        if not str(code).startswith('2'):
+            super().log_request(code, size)
+    
+    def do_GET(self):
+        self.send_file(head_only=False)
+    
+    def do_HEAD(self):
+        self.send_file(head_only=True)
+    
+    def send_file(self, head_only: bool):
+        path = self.translate_path(self.path)
+        if not os.path.isfile(path):
+            if os.path.isdir(path):
+                return super().do_HEAD() if head_only else super().do_GET()
+            self.send_error(404, "File not found")
+            return
+        
+        try:
+            f = open(path, 'rb')
+        except OSError:
+            self.send_error(404, "File not found")
+            return
+        
+        with f:
+            stat = os.fstat(f.fileno())
+            size = stat.st_size
+            etag = f'"{stat.st_mtime_ns:x}-{size:x}"'
+            last_modified = formatdate(stat.st_mtime, usegmt=True)
+            
+            byte_range = None
+            if_range = self.headers.get('If-Range')
+            if if_range is None or if_range in (etag, last_modified):
+                try:
+                    byte_range = parse_range(self.headers.get('Range'), size)
+                except ValueError:
+                    self.send_response(416)
+                    self.send_header('Content-Range', f'bytes */{size}')
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+            
+            start, end = byte_range if byte_range else (0, size - 1)
+            length = end - start + 1 if size else 0
+            self.send_response(206 if byte_range else 200)
+            self.send_header('Content-Type', self.guess_type(path))
+            self.send_header('Content-Length', str(length))
+            self.send_header('Accept-Ranges', 'bytes')
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', last_modified)
+            if byte_range:
+                self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+            self.end_headers()
+            
+            if not head_only and length:
+                self.copy_range(f, start, length)
+    
+    def copy_range(self, f, offset: int, count: int):
+        """Send count bytes of f starting at offset straight from the page cache"""
+        bandwidth = self.server.bandwidth
+        transfer = bandwidth.begin(self.client_address[0], self.path, os.fstat(f.fileno()).st_size)
+        try:
+            while count > 0:
+                chunk = min(count, THROTTLED_CHUNK if bandwidth.throttled else SENDFILE_CHUNK)
+                bandwidth.pace(transfer, chunk)
+                sent = self.connection.sendfile(f, offset, chunk)
+                if not sent:
+                    break
+                bandwidth.record(transfer, sent)
+                offset += sent
+                count -= sent
+        except (BrokenPipeError, ConnectionResetError, socket.timeout):
+            # Client went away mid-transfer (iDRAC aborted a read)
+            self.close_connection = True
+        finally:
+            bandwidth.end(transfer)
+
 
 
 class MediaServer:
     """HTTP server to serve ISO files and firmware packages"""
     
-    def __init__(self, iso_directory: str, firmware_directory: str, port: int = 8888):
+    def __init__(self, iso_directory: str, firmware_directory: str, port: int = 8888,
+                 max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 keepalive_timeout: int = DEFAULT_KEEPALIVE_TIMEOUT,
+                 max_bytes_per_sec: float = 0, client_max_bytes_per_sec: float = 0):
         """
         Initialize media server
         
@@ -24,10 +422,17 @@ class MediaServer:
             iso_directory: Directory containing ISO files
             firmware_directory: Directory containing DUP firmware files
             port: Port to serve on (default 8888)
+            max_connections: Concurrent connections before new ones get 503
+            keepalive_timeout: Seconds an idle keep-alive connection is held open
+            max_bytes_per_sec: Cap on total bytes/s served (0 = unlimited)
+            client_max_bytes_per_sec: Cap on bytes/s per client IP (0 = unlimited)
         """
         self.iso_directory = iso_directory
         self.firmware_directory = firmware_directory
         self.port = port
+        self.max_connections = max_connections
+        self.keepalive_timeout = keepalive_timeout
+        self.bandwidth = BandwidthScheduler(max_bytes_per_sec, client_max_bytes_per_sec)
         self.server = None
         self.thread = None
         
@@ -49,42 +454,28 @@ class MediaServer:
     
     def start(self):
         """Start HTTP server to serve media files"""
-        # Create a custom handler that serves from multiple directories
-        class MediaHandler(http.server.SimpleHTTPRequestHandler):
-            def __init__(self, *args, iso_dir=None, firmware_dir=None, **kwargs):
-                self.iso_dir = iso_dir
-                self.firmware_dir = firmware_dir
-                super().__init__(*args, **kwargs)
-            
-            def translate_path(self, path):
-                # Route /isos/* to ISO directory
-                if path.startswith('/isos/'):
-                    path = path[6:]  # Remove /isos/
-                    return os.path.join(self.iso_dir, path.lstrip('/'))
-                # Route /firmware/* to firmware directory
-                elif path.startswith('/firmware/'):
-                    path = path[10:]  # Remove /firmware/
-                    return os.path.join(self.firmware_dir, path.lstrip('/'))
-                # Default to ISO directory for backward compatibility
-                else:
-                    return os.path.join(self.iso_dir, path.lstrip('/'))
-        
         # Create handler with our directories
         def handler_factory(*args, **kwargs):
-            return MediaHandler(*args, iso_dir=self.iso_directory, 
-                              firmware_dir=self.firmware_directory, **kwargs)
+            return MediaRequestHandler(*args, iso_dir=self.iso_directory,
+                                       firmware_dir=self.firmware_directory,
+                                       timeout=self.keepalive_timeout, **kwargs)
         
-        # Create server
-        self.server = socketserver.TCPServer(("0.0.0.0", self.port), handler_factory)
+        # Create server (one thread per connection, bounded by max_connections)
+        self.server = ThreadingMediaServer(("0.0.0.0", self.port), handler_factory,
+                                           max_connections=self.max_connections,
+                                           bandwidth=self.bandwidth)
         
         # Start server in background thread
         self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
         self.thread.start()
         
         local_ip = self.get_local_ip()
-        print(f"Media Server started: http://{local_ip}:{self.port}")
+        print(f"Media Server started: http://{local_ip}:{self.port} (max {self.max_connections} connections)")
         print(f"  - ISOs: http://{local_ip}:{self.port}/isos/")
         print(f"  - Firmware: http://{local_ip}:{self.port}/firmware/")
+        if self.bandwidth.throttled:
+            print(f"  - Bandwidth caps: {self.bandwidth.max_bytes_per_sec or 'unlimited'} B/s total, "
+                  f"{self.bandwidth.client_max_bytes_per_sec or 'unlimited'} B/s per client")
     
     def stop(self):
         """Stop HTTP server"""
@@ -92,6 +483,16 @@ class MediaServer:
             self.server.shutdown()
             self.server.server_close()
     
+    def set_bandwidth_limits(self, max_bytes_per_sec: float, client_max_bytes_per_sec: float):
+        """Change bandwidth caps at runtime (0 = unlimited)"""
+        self.bandwidth.set_limits(max_bytes_per_sec, client_max_bytes_per_sec)
+    
+    def get_transfer_stats(self) -> Dict:
+        """Live per-transfer throughput and limits (served by the API server)"""
+        stats = self.bandwidth.snapshot()
+        stats['max_connections'] = self.max_connections
+        return stats
+    
     def get_iso_url(self, filename: str) -> str:
         """
         Generate URL that iDRAC can use to fetch the ISO
@@ -110,13 +511,14 @@ class MediaServer:
         Generate URL that iDRAC can use to fetch the DUP firmware package
         
         Args:
-            filename: Name of the DUP file (.exe)
+            filename: Name of the DUP file (.exe), optionally relative to the
+                firmware directory (e.g. a catalog mirror path 'FOLDER1/x.EXE')
             
         Returns:
             Full HTTP URL to the DUP
         """
         local_ip = self.get_local_ip()
-        return f"http://{local_ip}:{self.port}/firmware/{filename}"
+        return f"http://{local_ip}:{self.port}/firmware/{quote(filename.lstrip('/'))}"
     
     def list_isos(self):
         """List all ISO files in the ISO directory"""
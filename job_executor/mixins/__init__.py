@@ -5,5 +5,7 @@ from .credentials import CredentialsMixin
 from .vcenter_ops import VCenterMixin
 from .vcenter_db_upsert import VCenterDbUpsertMixin
 from .idrac_ops import IdracMixin
+from .discovery_cache import DiscoveryCacheMixin
+from .inventory_fingerprint import InventoryFingerprintMixin
 
-__all__ = ['DatabaseMixin', 'CredentialsMixin', 'VCenterMixin', 'VCenterDbUpsertMixin', 'IdracMixin']
+__all__ = ['DatabaseMixin', 'CredentialsMixin', 'VCenterMixin', 'VCenterDbUpsertMixin', 'IdracMixin', 'DiscoveryCacheMixin', 'InventoryFingerprintMixin']
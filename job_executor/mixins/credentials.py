@@ -1,6 +1,7 @@
 """Credential resolution functionality for Job Executor"""
 
 import ipaddress
+import threading
 import requests
 from typing import List, Dict, Optional
 
@@ -20,6 +21,13 @@ class CredentialsMixin:
     # Class attributes (will be set by JobExecutor)
     encryption_key: Optional[str] = None
     
+    # Learned credential ordering: {(scope_type, scope_key, credential_set_id): counts}
+    # None until load_credential_stats() runs, so ad-hoc callers never flush partial counts
+    credential_stats: Optional[Dict[tuple, Dict]] = None
+    # Counts recorded since the last successful flush, per key (persisted as increments)
+    credential_stats_pending: Optional[Dict[tuple, Dict]] = None
+    credential_stats_lock = threading.Lock()
+    
     def get_encryption_key(self) -> Optional[str]:
         """Fetch the encryption key from activity_settings (cached)"""
         if self.encryption_key:
@@ -187,6 +195,147 @@ class CredentialsMixin:
             self.log(f"Error fetching credential sets for IP: {e}", "ERROR")
             return []
 
+    def _credential_subnet_key(self, ip_address: str) -> Optional[str]:
+        """Return the /24 network an IP belongs to (used as the learned-ordering scope)"""
+        try:
+            return str(ipaddress.ip_network(f"{ip_address}/24", strict=False))
+        except ValueError:
+            return None
+
+    def load_credential_stats(self) -> int:
+        """
+        Load per-subnet and per-model credential success statistics.
+        
+        Returns:
+            Number of statistic rows loaded
+        """
+        stats = {}
+        try:
+            url = f"{DSM_URL}/rest/v1/credential_set_stats"
+            headers = {"apikey": SERVICE_ROLE_KEY, "Authorization": f"Bearer {SERVICE_ROLE_KEY}"}
+            params = {"select": "scope_type,scope_key,credential_set_id,success_count,failure_count"}
+            response = requests.get(url, headers=headers, params=params, verify=VERIFY_SSL, timeout=15)
+            
+            if response.status_code == 200:
+                for row in _safe_json_parse(response) or []:
+                    key = (row['scope_type'], row['scope_key'], row['credential_set_id'])
+                    stats[key] = {
+                        'success_count': row.get('success_count') or 0,
+                        'failure_count': row.get('failure_count') or 0,
+                    }
+            else:
+                self.log(f"Could not load credential statistics: HTTP {response.status_code}", "WARN")
+        except Exception as e:
+            self.log(f"Could not load credential statistics: {e}", "WARN")
+        
+        with self.credential_stats_lock:
+            self.credential_stats = stats
+            self.credential_stats_pending = {}
+        return len(stats)
+
+    def record_credential_outcome(self, ip_address: Optional[str], credential_set_id: Optional[str], success: bool, model: Optional[str] = None):
+        """
+        Record an authentication outcome for a credential set.
+        
+        Only definite outcomes should be recorded (200 = success, 401/403 = failure);
+        connection errors say nothing about the credentials.
+        """
+        if not credential_set_id or self.credential_stats is None:
+            return
+        
+        scopes = [('subnet', self._credential_subnet_key(ip_address))]
+        if model:
+            scopes.append(('model', model))
+        
+        field = 'success_count' if success else 'failure_count'
+        with self.credential_stats_lock:
+            for scope_type, scope_key in scopes:
+                if not scope_key:
+                    continue
+                key = (scope_type, scope_key, credential_set_id)
+                entry = self.credential_stats.setdefault(key, {'success_count': 0, 'failure_count': 0})
+                entry[field] += 1
+                pending = self.credential_stats_pending.setdefault(key, {'success_count': 0, 'failure_count': 0})
+                pending[field] += 1
+
+    def order_credentials_by_history(self, ip_address: str, credentials: List[Dict], model: Optional[str] = None) -> List[Dict]:
+        """
+        Order credential sets so the one most likely to succeed is tried first.
+        
+        Ranking uses the Laplace-smoothed success rate for the IP's /24, then
+        for the server model (when known), then the static priority. Sets with
+        no history score 0.5, so a set that keeps failing drops behind untried ones.
+        """
+        stats = self.credential_stats or {}
+        subnet = self._credential_subnet_key(ip_address)
+        
+        def success_rate(scope_type: str, scope_key: Optional[str], credential_set_id: Optional[str]) -> float:
+            entry = stats.get((scope_type, scope_key, credential_set_id))
+            if not entry:
+                return 0.5
+            return (entry['success_count'] + 1) / (entry['success_count'] + entry['failure_count'] + 2)
+        
+        return sorted(
+            credentials,
+            key=lambda c: (
+                -success_rate('subnet', subnet, c.get('id')),
+                -success_rate('model', model, c.get('id')) if model else 0,
+                c.get('priority', 999) if c.get('priority') is not None else 999,
+            )
+        )
+
+    def flush_credential_stats(self) -> int:
+        """
+        Persist the counts recorded since the last flush in one RPC call.
+        
+        The increment_credential_set_stats RPC adds them to the stored counts,
+        so concurrent jobs don't overwrite each other. If the call fails the
+        counts stay pending for the next flush.
+        
+        Returns:
+            Number of rows written
+        """
+        if self.credential_stats is None:
+            return 0
+        
+        with self.credential_stats_lock:
+            pending, self.credential_stats_pending = self.credential_stats_pending, {}
+        
+        if not pending:
+            return 0
+        
+        deltas = [
+            {
+                'scope_type': key[0],
+                'scope_key': key[1],
+                'credential_set_id': key[2],
+                'success_count': counts['success_count'],
+                'failure_count': counts['failure_count'],
+            }
+            for key, counts in pending.items()
+        ]
+        try:
+            url = f"{DSM_URL}/rest/v1/rpc/increment_credential_set_stats"
+            headers = {
+                "apikey": SERVICE_ROLE_KEY,
+                "Authorization": f"Bearer {SERVICE_ROLE_KEY}",
+                "Content-Type": "application/json"
+            }
+            response = requests.post(url, headers=headers, json={'p_deltas': deltas}, verify=VERIFY_SSL, timeout=30)
+            if response.status_code in [200, 201, 204]:
+                return len(deltas)
+            self.log(f"Could not save credential statistics: HTTP {response.status_code} - {response.text[:200]}", "WARN")
+        except Exception as e:
+            self.log(f"Could not save credential statistics: {e}", "WARN")
+        
+        # Keep the counts for the next flush (merged with any recorded meanwhile)
+        with self.credential_stats_lock:
+            for key, counts in pending.items():
+                entry = self.credential_stats_pending.setdefault(key, {'success_count': 0, 'failure_count': 0})
+                entry['success_count'] += counts['success_count']
+                entry['failure_count'] += counts['failure_count']
+        return 0
+
     def get_esxi_credentials_for_host(self, host_id: str, host_ip: str, credential_set_id: Optional[str] = None) -> Optional[Dict]:
         """
         Get ESXi SSH credentials for a host with priority:
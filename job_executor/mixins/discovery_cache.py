@@ -0,0 +1,193 @@
+"""Per-IP discovery cache for fast rescan discovery mode"""
+
+import requests
+from typing import List, Dict, Optional
+from datetime import datetime, timezone, timedelta
+
+from job_executor.config import DSM_URL, SERVICE_ROLE_KEY, VERIFY_SSL
+from job_executor.utils import _safe_json_parse, utc_now_iso
+
+
+# PostgREST in.() filters go into the URL, keep lookups well under URL limits
+CACHE_LOOKUP_CHUNK = 200
+CACHE_UPSERT_CHUNK = 500
+
+DEFAULT_CLOSED_TTL_HOURS = 24
+
+
+class DiscoveryCacheMixin:
+    """
+    Mixin providing the persisted discovery_ip_cache used by fast rescans.
+
+    Each probed IP stores its last port state, whether an iDRAC was detected,
+    the service tag and the credential set that authenticated. A fast rescan
+    uses this to re-verify known iDRACs first, skip addresses that were closed
+    within the TTL, and fully probe only new or changed IPs.
+    """
+
+    def get_discovery_cache(self, ips: List[str]) -> Dict[str, Dict]:
+        """
+        Load cached discovery state for a list of IPs.
+
+        Args:
+            ips: IP addresses about to be scanned
+
+        Returns:
+            Dict keyed by ip_address (missing IPs have never been probed)
+        """
+        cache = {}
+        headers = {
+            "apikey": SERVICE_ROLE_KEY,
+            "Authorization": f"Bearer {SERVICE_ROLE_KEY}",
+        }
+
+        for i in range(0, len(ips), CACHE_LOOKUP_CHUNK):
+            chunk = ips[i:i + CACHE_LOOKUP_CHUNK]
+            try:
+                response = requests.get(
+                    f"{DSM_URL}/rest/v1/discovery_ip_cache",
+                    headers=headers,
+                    params={
+                        "ip_address": f"in.({','.join(chunk)})",
+                        "select": "*",
+                    },
+                    verify=VERIFY_SSL,
+                    timeout=15
+                )
+                if response.status_code == 200:
+                    for row in _safe_json_parse(response) or []:
+                        cache[row['ip_address']] = row
+                else:
+                    self.log(f"Could not load discovery cache: HTTP {response.status_code}", "WARN")
+            except Exception as e:
+                self.log(f"Could not load discovery cache: {e}", "WARN")
+
+        return cache
+
+    def save_discovery_cache(self, results: List[Dict], job_id: str = None) -> int:
+        """
+        Bulk upsert discovery results into discovery_ip_cache.
+
+        Args:
+            results: discover_single_ip() result dicts
+            job_id: Discovery job that produced the results
+
+        Returns:
+            Number of rows written
+        """
+        if not results:
+            return 0
+
+        now = utc_now_iso()
+        records = []
+        for result in results:
+            if not result.get('ip'):
+                continue
+            if result.get('success'):
+                last_result = 'synced'
+            elif result.get('auth_failed'):
+                last_result = 'auth_failed'
+            elif not result.get('port_open', True):
+                last_result = 'port_closed'
+            else:
+                last_result = 'not_idrac'
+
+            records.append({
+                'ip_address': result['ip'],
+                'port_open': result.get('port_open', True),
+                'idrac_detected': bool(result.get('idrac_detected')),
+                'auth_succeeded': bool(result.get('success')),
+                'service_tag': result.get('service_tag'),
+                'model': result.get('model'),
+                'credential_set_id': result.get('credential_set_id') if result.get('success') else None,
+                'last_result': last_result,
+                'last_probed_at': now,
+                'last_job_id': job_id,
+                'updated_at': now,
+            })
+
+        headers = {
+            "apikey": SERVICE_ROLE_KEY,
+            "Authorization": f"Bearer {SERVICE_ROLE_KEY}",
+            "Content-Type": "application/json",
+            "Prefer": "resolution=merge-duplicates,return=minimal"
+        }
+
+        written = 0
+        for i in range(0, len(records), CACHE_UPSERT_CHUNK):
+            batch = records[i:i + CACHE_UPSERT_CHUNK]
+            try:
+                response = requests.post(
+                    f"{DSM_URL}/rest/v1/discovery_ip_cache?on_conflict=ip_address",
+                    headers=headers,
+                    json=batch,
+                    verify=VERIFY_SSL,
+                    timeout=30
+                )
+                if response.status_code in [200, 201, 204]:
+                    written += len(batch)
+                else:
+                    self.log(f"Discovery cache upsert failed: HTTP {response.status_code} - {response.text[:200]}", "WARN")
+            except Exception as e:
+                self.log(f"Discovery cache upsert failed: {e}", "WARN")
+
+        return written
+
+    def plan_discovery_rescan(
+        self,
+        ips: List[str],
+        cache: Dict[str, Dict],
+        closed_ttl_hours: float = DEFAULT_CLOSED_TTL_HOURS,
+        now: Optional[datetime] = None
+    ) -> Dict[str, List[str]]:
+        """
+        Split a scan list into fast-rescan buckets.
+
+        Args:
+            ips: IPs in scan order
+            cache: Output of get_discovery_cache()
+            closed_ttl_hours: How long a closed port 443 stays trusted
+            now: Reference time (defaults to current UTC time)
+
+        Returns:
+            Dict with 'verify' (known iDRACs to re-authenticate with the cached
+            credential set), 'skip' (closed within TTL) and 'probe' (new or
+            changed IPs that need the full 3-stage probe)
+        """
+        now = now or datetime.now(timezone.utc)
+        ttl = timedelta(hours=closed_ttl_hours)
+        plan = {'verify': [], 'skip': [], 'probe': []}
+
+        for ip in ips:
+            entry = cache.get(ip)
+            if not entry:
+                plan['probe'].append(ip)
+                continue
+
+            if entry.get('idrac_detected') and entry.get('auth_succeeded'):
+                plan['verify'].append(ip)
+                continue
+
+            if not entry.get('port_open') and ttl.total_seconds() > 0:
+                probed_at = self._parse_cache_timestamp(entry.get('last_probed_at'))
+                if probed_at and now - probed_at < ttl:
+                    plan['skip'].append(ip)
+                    continue
+
+            plan['probe'].append(ip)
+
+        return plan
+
+    def _parse_cache_timestamp(self, value: Optional[str]) -> Optional[datetime]:
+        """Parse a PostgREST timestamptz string into an aware datetime"""
+        if not value:
+            return None
+        try:
+            if value.endswith('Z'):
+                value = value[:-1] + '+00:00'
+            parsed = datetime.fromisoformat(value)
+            if parsed.tzinfo is None:
+                parsed = parsed.replace(tzinfo=timezone.utc)
+            return parsed
+        except ValueError:
+            return None
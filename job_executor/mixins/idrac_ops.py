@@ -12,6 +12,8 @@ from datetime import datetime
 from typing import Dict, List, Optional
 
 from job_executor.config import DSM_URL, SERVICE_ROLE_KEY, VERIFY_SSL
+from job_executor.dell_redfish.event_logs import collect_new_entries, DEFAULT_PAGE_SIZE as EVENT_LOG_PAGE_SIZE
+from job_executor.utils import utc_now_iso
 
 
 def _safe_json_parse(response):
@@ -1156,149 +1158,255 @@ class IdracMixin:
             self.log(f"  Error parsing health status: {e}", "DEBUG")
             return None
 
-    def _fetch_initial_event_logs(self, ip: str, username: str, password: str, server_id: str, job_id: str) -> int:
-        """Fetch recent event logs (SEL + Lifecycle) and store in database"""
-        total_logs = 0
-        
-        # Fetch SEL logs (System Event Log)
+    # Redfish log collections ingested incrementally (log_type -> entries endpoint)
+    EVENT_LOG_COLLECTIONS = {
+        'SEL': '/redfish/v1/Managers/iDRAC.Embedded.1/Logs/Sel',
+        'Lifecycle': '/redfish/v1/Managers/iDRAC.Embedded.1/LogServices/Lclog/Entries',
+    }
+
+    def _get_event_log_cursors(self, server_id: str) -> Dict[str, Dict]:
+        """Load per-log-type high-water marks for a server"""
+        cursors = {}
         try:
-            url = f"https://{ip}/redfish/v1/Managers/iDRAC.Embedded.1/Logs/Sel"
-            start_time = time.time()
-            response = self.session_manager.make_request(
-                method='GET',
-                url=url,
-                ip=ip,
-                auth=(username, password),
-                timeout=(2, 15)
-            )
-            response_time = int((time.time() - start_time) * 1000)
-            
-            response_json = None
-            if response and response.status_code == 200 and response.content:
-                try:
-                    response_json = response.json()
-                except json.JSONDecodeError:
-                    pass
-            
-            # Log the API call
-            self.log_idrac_command(
-                server_id=server_id,
-                job_id=job_id,
-                task_id=None,
-                command_type='GET',
-                endpoint='/redfish/v1/Managers/iDRAC.Embedded.1/Logs/Sel',
-                full_url=url,
-                request_headers={'Authorization': f'Basic {username}:***'},
-                request_body=None,
-                status_code=response.status_code if response else None,
-                response_time_ms=response_time,
-                response_body=response_json,
-                success=(response and response.status_code == 200),
-                error_message=None if (response and response.status_code == 200) else f"HTTP {response.status_code}" if response else "Request failed",
-                operation_type='idrac_api'
+            headers = {"apikey": SERVICE_ROLE_KEY, "Authorization": f"Bearer {SERVICE_ROLE_KEY}"}
+            response = requests.get(
+                f"{DSM_URL}/rest/v1/server_event_log_cursors",
+                headers=headers,
+                params={
+                    'server_id': f'eq.{server_id}',
+                    'select': 'log_type,last_event_id,last_event_created',
+                },
+                verify=VERIFY_SSL,
+                timeout=15
             )
-            
-            if response and response.status_code == 200 and response_json:
-                log_count = self._store_event_logs(response_json, server_id, log_type='SEL')
-                total_logs += log_count
-                self.log(f"  Fetched {log_count} SEL logs")
-                
+            if response.status_code == 200:
+                for row in _safe_json_parse(response) or []:
+                    cursors[row['log_type']] = row
         except Exception as e:
-            self.log(f"  Could not fetch SEL logs: {e}", "WARN")
-        
-        # Fetch Lifecycle logs
+            self.log(f"  Could not load event log cursors: {e}", "DEBUG")
+        return cursors
+
+    def _save_event_log_cursor(self, server_id: str, log_type: str, mark: Dict, new_count: int):
+        """Persist the high-water mark after new entries were stored"""
         try:
-            url = f"https://{ip}/redfish/v1/Managers/iDRAC.Embedded.1/LogServices/Lclog/Entries"
-            start_time = time.time()
-            response = self.session_manager.make_request(
-                method='GET',
-                url=url,
-                ip=ip,
-                auth=(username, password),
-                timeout=(2, 15)
-            )
-            response_time = int((time.time() - start_time) * 1000)
-            
-            response_json = None
-            if response and response.status_code == 200 and response.content:
-                try:
-                    response_json = response.json()
-                except json.JSONDecodeError:
-                    pass
-            
-            # Log the API call
-            self.log_idrac_command(
-                server_id=server_id,
-                job_id=job_id,
-                task_id=None,
-                command_type='GET',
-                endpoint='/redfish/v1/Managers/iDRAC.Embedded.1/LogServices/Lclog/Entries',
-                full_url=url,
-                request_headers={'Authorization': f'Basic {username}:***'},
-                request_body=None,
-                status_code=response.status_code if response else None,
-                response_time_ms=response_time,
-                response_body=response_json,
-                success=(response and response.status_code == 200),
-                error_message=None if (response and response.status_code == 200) else f"HTTP {response.status_code}" if response else "Request failed",
-                operation_type='idrac_api'
+            headers = {
+                "apikey": SERVICE_ROLE_KEY,
+                "Authorization": f"Bearer {SERVICE_ROLE_KEY}",
+                "Content-Type": "application/json",
+                "Prefer": "resolution=merge-duplicates,return=minimal"
+            }
+            now = utc_now_iso()
+            requests.post(
+                f"{DSM_URL}/rest/v1/server_event_log_cursors?on_conflict=server_id,log_type",
+                headers=headers,
+                json={
+                    'server_id': server_id,
+                    'log_type': log_type,
+                    'last_event_id': mark.get('last_event_id'),
+                    'last_event_created': mark.get('last_event_created'),
+                    'last_new_count': new_count,
+                    'last_collected_at': now,
+                    'updated_at': now,
+                },
+                verify=VERIFY_SSL,
+                timeout=15
             )
+        except Exception as e:
+            self.log(f"  Could not save {log_type} log cursor: {e}", "DEBUG")
+
+    def _fetch_initial_event_logs(self, ip: str, username: str, password: str, server_id: str, job_id: str,
+                                  limit: int = 50) -> int:
+        """
+        Fetch event logs (SEL + Lifecycle) newer than the stored high-water mark
+        and store them in the database.
+        
+        The first collection for a server takes the newest `limit` entries;
+        later collections page ($top/$skip) only until they reach the mark.
+        """
+        total_logs = 0
+        cursors = self._get_event_log_cursors(server_id)
+        
+        for log_type, endpoint in self.EVENT_LOG_COLLECTIONS.items():
+            def fetch_page(skip: int, top: int, endpoint=endpoint):
+                url = f"https://{ip}{endpoint}?$skip={skip}&$top={top}"
+                start_time = time.time()
+                response = self.session_manager.make_request(
+                    method='GET',
+                    url=url,
+                    ip=ip,
+                    auth=(username, password),
+                    timeout=(2, 15)
+                )
+                response_time = int((time.time() - start_time) * 1000)
+                
+                response_json = None
+                if response is not None and response.status_code == 200 and response.content:
+                    try:
+                        response_json = response.json()
+                    except json.JSONDecodeError:
+                        pass
+                
+                # Log the API call (page bodies are not stored - they can be large)
+                self.log_idrac_command(
+                    server_id=server_id,
+                    job_id=job_id,
+                    task_id=None,
+                    command_type='GET',
+                    endpoint=f"{endpoint}?$skip={skip}&$top={top}",
+                    full_url=url,
+                    request_headers={'Authorization': f'Basic {username}:***'},
+                    request_body=None,
+                    status_code=response.status_code if response is not None else None,
+                    response_time_ms=response_time,
+                    response_body={'member_count': len(response_json.get('Members', []))} if response_json else None,
+                    success=(response is not None and response.status_code == 200),
+                    error_message=None if (response is not None and response.status_code == 200) else f"HTTP {response.status_code}" if response is not None else "Request failed",
+                    operation_type='idrac_api'
+                )
+                
+                if not response_json:
+                    return [], None
+                members = response_json.get('Members', [])
+                total = response_json.get('Members@odata.count')
+                if len(members) > top:
+                    # Firmware ignored paging and returned the whole collection
+                    members = members[skip:skip + top] if total is None or len(members) >= total else members[:top]
+                return members, total
             
-            if response and response.status_code == 200 and response_json:
-                log_count = self._store_event_logs(response_json, server_id, log_type='Lifecycle')
-                total_logs += log_count
-                self.log(f"  Fetched {log_count} Lifecycle logs")
+            try:
+                entries, mark = collect_new_entries(
+                    fetch_page,
+                    cursors.get(log_type),
+                    page_size=min(limit, EVENT_LOG_PAGE_SIZE),
+                    max_entries=limit
+                )
+                if mark and 'skipped_entries' in mark:
+                    skipped = mark['skipped_entries']
+                    self.log(f"  More than {limit} new {log_type} logs since the last collection - "
+                             f"{skipped if skipped is not None else 'some'} older entries were not collected", "WARN")
+                if not entries:
+                    self.log(f"  No new {log_type} logs", "DEBUG")
+                    continue
                 
-        except Exception as e:
-            self.log(f"  Could not fetch Lifecycle logs: {e}", "WARN")
+                log_count = self._store_event_logs(entries, server_id, log_type=log_type)
+                if log_count is not None:
+                    self._save_event_log_cursor(server_id, log_type, mark, log_count)
+                    total_logs += log_count
+                self.log(f"  Fetched {len(entries)} new {log_type} logs")
+            except Exception as e:
+                self.log(f"  Could not fetch {log_type} logs: {e}", "WARN")
         
         return total_logs
 
-    def _store_event_logs(self, data: Dict, server_id: str, log_type: str = 'SEL') -> int:
-        """Parse and store event log entries in database (limit to last 50)"""
+    def _store_event_logs(self, entries: List[Dict], server_id: str, log_type: str = 'SEL') -> Optional[int]:
+        """
+        Bulk insert event log entries, ignoring entries already stored
+        (unique on server_id, log_type, event_id, timestamp - Ids restart
+        at 1 after a log clear, so the Id alone does not identify an entry).
+        Entries without a Created timestamp are skipped: they have no
+        stable key and would be stored again on every collection.
+        
+        Returns:
+            Number of entries submitted, or None if the insert failed
+        """
         try:
-            members = data.get('Members', [])
-            if not members:
+            if not entries:
                 return 0
             
-            # Limit to last 50 entries
-            recent_logs = members[-50:] if len(members) > 50 else members
+            log_rows = []
+            for log_entry in entries:
+                if not log_entry.get('Created'):
+                    continue
+                # Extract fields from log entry
+                # Differentiate between SEL and Lifecycle log formats
+                category = log_entry.get('EntryType', log_type)
+                
+                log_rows.append({
+                    'server_id': server_id,
+                    'log_type': log_type,
+                    'event_id': log_entry.get('Id'),
+                    'timestamp': log_entry['Created'],
+                    'severity': log_entry.get('Severity'),
+                    'message': log_entry.get('Message'),
+                    'category': f"{log_type}:{category}" if category else log_type,
+                    'sensor_type': log_entry.get('SensorType'),
+                    'sensor_number': log_entry.get('SensorNumber'),
+                    'raw_data': log_entry
+                })
             
-            headers = {"apikey": SERVICE_ROLE_KEY, "Authorization": f"Bearer {SERVICE_ROLE_KEY}"}
-            stored_count = 0
+            if len(log_rows) < len(entries):
+                self.log(f"  Skipped {len(entries) - len(log_rows)} {log_type} entries without a timestamp", "DEBUG")
+            if not log_rows:
+                return 0
             
-            for log_entry in recent_logs:
-                try:
-                    # Extract fields from log entry
-                    # Differentiate between SEL and Lifecycle log formats
-                    category = log_entry.get('EntryType', log_type)
-                    
-                    log_data = {
-                        'server_id': server_id,
-                        'event_id': log_entry.get('Id'),
-                        'timestamp': log_entry.get('Created', datetime.utcnow().isoformat() + 'Z'),
-                        'severity': log_entry.get('Severity'),
-                        'message': log_entry.get('Message'),
-                        'category': f"{log_type}:{category}" if category else log_type,
-                        'sensor_type': log_entry.get('SensorType'),
-                        'sensor_number': log_entry.get('SensorNumber'),
-                        'raw_data': log_entry
-                    }
-                    
-                    # Insert into server_event_logs table
-                    insert_url = f"{DSM_URL}/rest/v1/server_event_logs"
-                    response = requests.post(insert_url, headers=headers, json=log_data, verify=VERIFY_SSL)
-                    
-                    if response.status_code in [200, 201]:
-                        stored_count += 1
-                except Exception as e:
-                    self.log(f"  Error storing event log: {e}", "DEBUG")
+            headers = {
+                "apikey": SERVICE_ROLE_KEY,
+                "Authorization": f"Bearer {SERVICE_ROLE_KEY}",
+                "Content-Type": "application/json",
+                "Prefer": "resolution=ignore-duplicates,return=minimal"
+            }
+            insert_url = f"{DSM_URL}/rest/v1/server_event_logs?on_conflict=server_id,log_type,event_id,timestamp"
+            response = requests.post(insert_url, headers=headers, json=log_rows, verify=VERIFY_SSL, timeout=30)
             
-            return stored_count
+            if response.status_code in [200, 201, 204]:
+                return len(log_rows)
+            self.log(f"  Error storing {log_type} logs: HTTP {response.status_code} - {response.text[:200]}", "WARN")
+            return None
             
         except Exception as e:
-            self.log(f"  Error parsing event logs: {e}", "WARN")
-            return 0
+            self.log(f"  Error storing event logs: {e}", "WARN")
+            return None
+
+    def _execute_fetch_event_logs_impl(self, job: Dict):
+        """Collect new SEL/Lifecycle entries for the job's target servers"""
+        self.update_job_status(job['id'], 'running', started_at=utc_now_iso())
+        
+        target_scope = job.get('target_scope', {}) or {}
+        details = job.get('details', {}) or {}
+        limit = int(details.get('limit') or 50)
+        
+        headers = {"apikey": SERVICE_ROLE_KEY, "Authorization": f"Bearer {SERVICE_ROLE_KEY}"}
+        params = {'select': 'id,ip_address'}
+        server_ids = target_scope.get('server_ids') or []
+        if server_ids:
+            params['id'] = f"in.({','.join(server_ids)})"
+        response = requests.get(f"{DSM_URL}/rest/v1/servers", headers=headers, params=params, verify=VERIFY_SSL, timeout=30)
+        servers = _safe_json_parse(response) or []
+        
+        new_events = 0
+        failed = []
+        for index, server in enumerate(servers):
+            self.update_job_status(
+                job['id'],
+                'running',
+                details={
+                    **details,
+                    'current_step': f"Collecting logs from {server['ip_address']} ({index + 1}/{len(servers)})",
+                    'new_events': new_events,
+                }
+            )
+            username, password = self.get_server_credentials(server['id'])
+            if not username or not password:
+                failed.append({'ip_address': server['ip_address'], 'error': 'No credentials configured'})
+                continue
+            try:
+                new_events += self._fetch_initial_event_logs(
+                    server['ip_address'], username, password, server['id'], job['id'], limit=limit
+                )
+            except Exception as e:
+                failed.append({'ip_address': server['ip_address'], 'error': str(e)})
+        
+        self.update_job_status(
+            job['id'],
+            'completed' if servers and len(failed) < len(servers) else 'failed',
+            completed_at=utc_now_iso(),
+            details={
+                **details,
+                'servers_total': len(servers),
+                'new_events': new_events,
+                'failed_servers': failed,
+            }
+        )
 
     def _fetch_bios_attributes(self, ip: str, username: str, password: str, server_id: str = None, job_id: str = None, session: Dict = None, legacy_ssl: bool = False) -> Optional[Dict]:
         """Fetch BIOS attributes for initial snapshot (session-aware, legacy TLS aware)"""
@@ -2119,7 +2227,12 @@ class IdracMixin:
             return None
     
     def _sync_server_drives(self, server_id: str, drives: List[Dict], log_fn=None, job_id: str = None):
-        """Sync drive inventory to server_drives table using bulk upsert
+        """Sync drive inventory to server_drives table using differential bulk upsert
+        
+        The normalized drive set is hashed and compared with the stored
+        fingerprint: an unchanged set skips all writes, otherwise only added and
+        changed drives are upserted and drives no longer reported are removed
+        (unless they carry failure history).
         
         Args:
             server_id: The server UUID
@@ -2137,6 +2250,62 @@ class IdracMixin:
                 "Prefer": "resolution=merge-duplicates,return=minimal"
             }
             
+            # Normalize reported drives, keyed by unique identifier
+            reported = {}
+            for drive in drives:
+                # Generate unique identifier with fallbacks
+                new_serial = drive.get('serial_number')
+                if new_serial:
+                    drive_identifier = f"sn:{new_serial}"
+                else:
+                    # Fallback to composite: controller + slot + name
+                    controller = drive.get('controller', 'unknown')
+                    slot = drive.get('slot', 'unknown')
+                    name = drive.get('name', 'drive')
+                    drive_identifier = f"loc:{controller}:{slot}:{name}"
+                
+                reported[drive_identifier] = {
+                    'name': drive.get('name'),
+                    'manufacturer': drive.get('manufacturer'),
+                    'model': drive.get('model'),
+                    'serial_number': new_serial,
+                    'part_number': drive.get('part_number'),
+                    'media_type': drive.get('media_type'),
+                    'protocol': drive.get('protocol'),
+                    'capacity_bytes': drive.get('capacity_bytes'),
+                    'capacity_gb': drive.get('capacity_gb'),
+                    'slot': drive.get('slot'),
+                    'enclosure': drive.get('enclosure'),
+                    'controller': drive.get('controller'),
+                    'health': drive.get('health'),
+                    'status': drive.get('status'),
+                    'predicted_failure': drive.get('predicted_failure'),
+                    'life_remaining_percent': drive.get('life_remaining_percent'),
+                    'firmware_version': drive.get('firmware_version'),
+                    'rotation_speed_rpm': drive.get('rotation_speed_rpm'),
+                    'capable_speed_gbps': drive.get('capable_speed_gbps'),
+                    # RAID/Volume info for ESXi correlation
+                    'volume_id': drive.get('volume_id'),
+                    'volume_name': drive.get('volume_name'),
+                    'raid_level': drive.get('raid_level'),
+                    'wwn': drive.get('wwn'),
+                }
+            
+            if not reported:
+                self.log(f"  ⚠ No drives to sync for server {server_id}", "WARN")
+                return 0
+            
+            # Calculate total storage
+            total_gb = sum(d.get('capacity_gb') or 0 for d in reported.values())
+            total_tb = round(total_gb / 1024, 2) if total_gb else 0
+            
+            plan = self.plan_inventory_diff(server_id, 'drives', reported)
+            if plan['unchanged']:
+                self.log(f"  ✓ Drives unchanged ({len(reported)}), skipping write", "DEBUG")
+                if log_fn:
+                    log_fn(f"✓ {len(reported)} drives unchanged ({total_tb} TB)", "INFO")
+                return len(reported)
+            
             # Fetch existing drives for this server to preserve historical data
             existing_drives = {}
             try:
@@ -2148,27 +2317,17 @@ class IdracMixin:
             except Exception as e:
                 self.log(f"  ⚠ Could not fetch existing drives for historical preservation: {e}", "WARN")
             
-            # Build list of drive records for bulk upsert
+            # Build drive records for added/changed drives only
             drive_records = []
-            for drive in drives:
-                # Generate unique identifier with fallbacks
-                new_serial = drive.get('serial_number')
-                if new_serial:
-                    drive_identifier = f"sn:{new_serial}"
-                else:
-                    # Fallback to composite: controller + slot + name
-                    controller = drive.get('controller', 'unknown')
-                    slot = drive.get('slot', 'unknown')
-                    name = drive.get('name', 'drive')
-                    drive_identifier = f"loc:{controller}:{slot}:{name}"
+            for drive_identifier in plan['write_keys']:
+                row = reported[drive_identifier]
+                new_serial = row['serial_number']
                 
                 # Check if we have existing data for this drive
                 existing = existing_drives.get(drive_identifier, {})
                 existing_serial = existing.get('serial_number')
                 existing_last_known = existing.get('last_known_serial_number')
                 existing_failed_at = existing.get('failed_at')
-                existing_health = existing.get('health')
-                existing_status = existing.get('status')
                 
                 # Preserve serial number: if new scan returns empty but we had one, keep it
                 final_serial = new_serial
@@ -2178,10 +2337,7 @@ class IdracMixin:
                     last_known_serial = existing_serial  # Also save as last_known for reference
                 
                 # Determine if drive is now faulty
-                new_health = drive.get('health')
-                new_status = drive.get('status')
-                is_now_faulty = new_health == 'Critical' or new_status in ['Disabled', 'UnavailableOffline']
-                was_faulty = existing_health == 'Critical' or existing_status in ['Disabled', 'UnavailableOffline']
+                is_now_faulty = row['health'] == 'Critical' or row['status'] in ['Disabled', 'UnavailableOffline']
                 
                 # Set failed_at timestamp when drive becomes faulty for the first time
                 failed_at = existing_failed_at
@@ -2192,86 +2348,71 @@ class IdracMixin:
                     failed_at = None
                 
                 drive_records.append({
+                    **row,
                     'server_id': server_id,
                     'drive_identifier': drive_identifier,
-                    'name': drive.get('name'),
-                    'manufacturer': drive.get('manufacturer'),
-                    'model': drive.get('model'),
                     'serial_number': final_serial,
                     'last_known_serial_number': last_known_serial,
                     'failed_at': failed_at,
-                    'part_number': drive.get('part_number'),
-                    'media_type': drive.get('media_type'),
-                    'protocol': drive.get('protocol'),
-                    'capacity_bytes': drive.get('capacity_bytes'),
-                    'capacity_gb': drive.get('capacity_gb'),
-                    'slot': drive.get('slot'),
-                    'enclosure': drive.get('enclosure'),
-                    'controller': drive.get('controller'),
-                    'health': drive.get('health'),
-                    'status': drive.get('status'),
-                    'predicted_failure': drive.get('predicted_failure'),
-                    'life_remaining_percent': drive.get('life_remaining_percent'),
-                    'firmware_version': drive.get('firmware_version'),
-                    'rotation_speed_rpm': drive.get('rotation_speed_rpm'),
-                    'capable_speed_gbps': drive.get('capable_speed_gbps'),
-                    # RAID/Volume info for ESXi correlation
-                    'volume_id': drive.get('volume_id'),
-                    'volume_name': drive.get('volume_name'),
-                    'raid_level': drive.get('raid_level'),
-                    'wwn': drive.get('wwn'),
                     'last_sync': datetime.utcnow().isoformat() + 'Z',
                 })
             
-            if not drive_records:
-                self.log(f"  ⚠ No drives to sync for server {server_id}", "WARN")
-                return 0
-            
-            # Calculate total storage
-            total_gb = sum(d.get('capacity_gb') or 0 for d in drive_records)
-            total_tb = round(total_gb / 1024, 2) if total_gb else 0
+            # Drives that vanished are removed, but failed drives keep their history
+            removed = [
+                key for key in plan['removed_keys']
+                if not existing_drives.get(key, {}).get('failed_at')
+            ]
             
             # Log for visibility (both executor and UI console)
-            self.log(f"  → Saving {len(drive_records)} drives ({total_tb} TB)", "DEBUG")
+            self.log(
+                f"  → Saving {len(drive_records)} changed drive(s), removing {len(removed)} "
+                f"({len(reported)} total, {total_tb} TB)", "DEBUG"
+            )
             if log_fn:
-                log_fn(f"Saving {len(drive_records)} drives ({total_tb} TB)", "INFO")
+                log_fn(f"Saving {len(drive_records)} changed drive(s) of {len(reported)} ({total_tb} TB)", "INFO")
             
             # Use column names for on_conflict (PostgREST requirement)
             upsert_url = f"{DSM_URL}/rest/v1/server_drives?on_conflict=server_id,drive_identifier"
             try:
-                start_time = timing_module.time()
-                response = requests.post(
-                    upsert_url, 
-                    headers=headers, 
-                    json=drive_records, 
-                    verify=VERIFY_SSL,
-                    timeout=30
-                )
-                response_time_ms = int((timing_module.time() - start_time) * 1000)
-                
-                # Log database sync operation for visibility
-                self.log_idrac_command(
-                    server_id=server_id,
-                    job_id=job_id,
-                    task_id=None,
-                    command_type='DB_SYNC',
-                    endpoint='/server_drives (upsert)',
-                    full_url=upsert_url,
-                    request_headers=None,
-                    request_body={'drive_count': len(drive_records), 'total_tb': total_tb},
-                    status_code=response.status_code,
-                    response_time_ms=response_time_ms,
-                    response_body=None,
-                    success=response.status_code in [200, 201, 204],
-                    error_message=response.text[:200] if response.status_code not in [200, 201, 204] else None,
-                    operation_type='idrac_api'
-                )
+                status_code = 204
+                if drive_records:
+                    start_time = timing_module.time()
+                    response = requests.post(
+                        upsert_url, 
+                        headers=headers, 
+                        json=drive_records, 
+                        verify=VERIFY_SSL,
+                        timeout=30
+                    )
+                    response_time_ms = int((timing_module.time() - start_time) * 1000)
+                    status_code = response.status_code
+                    
+                    # Log database sync operation for visibility
+                    self.log_idrac_command(
+                        server_id=server_id,
+                        job_id=job_id,
+                        task_id=None,
+                        command_type='DB_SYNC',
+                        endpoint='/server_drives (upsert)',
+                        full_url=upsert_url,
+                        request_headers=None,
+                        request_body={'drive_count': len(drive_records), 'total_tb': total_tb},
+                        status_code=response.status_code,
+                        response_time_ms=response_time_ms,
+                        response_body=None,
+                        success=response.status_code in [200, 201, 204],
+                        error_message=response.text[:200] if response.status_code not in [200, 201, 204] else None,
+                        operation_type='idrac_api'
+                    )
                 
-                if response.status_code in [200, 201, 204]:
+                if status_code in [200, 201, 204]:
+                    removed_ok = self.delete_inventory_rows('server_drives', server_id, 'drive_identifier', removed)
+                    if removed_ok:
+                        self.save_inventory_fingerprint(server_id, 'drives', plan['content_hash'], plan['row_hashes'])
                     self.log(f"  ✓ Synced {len(drive_records)} drives", "DEBUG")
                     if log_fn:
                         log_fn(f"✓ Saved {len(drive_records)} drives", "SUCCESS")
-                    return len(drive_records)
+                    return len(reported)
                 else:
                     # Log full error for debugging
                     error_text = response.text[:300] if response.text else 'Unknown error'
@@ -3033,7 +3174,10 @@ class IdracMixin:
             return None
     
     def _sync_server_nics(self, server_id: str, nics: List[Dict], log_fn=None, job_id: str = None):
-        """Sync NIC inventory to server_nics table using bulk upsert
+        """Sync NIC inventory to server_nics table using differential bulk upsert
+        
+        Unchanged NIC sets (by content hash) are skipped; otherwise only added
+        and changed NICs are upserted and NICs no longer reported are removed.
         
         Args:
             server_id: The server UUID
@@ -3051,13 +3195,13 @@ class IdracMixin:
                 "Prefer": "resolution=merge-duplicates,return=minimal"
             }
             
-            # Build list of NIC records for bulk upsert
-            nic_records = []
+            # Build NIC records keyed by FQDD
+            nic_rows = {}
             for nic in nics:
                 if not nic.get('fqdd'):
                     continue  # Skip NICs without FQDD
                 
-                nic_records.append({
+                nic_rows[nic.get('fqdd')] = {
                     'server_id': server_id,
                     'fqdd': nic.get('fqdd'),
                     'name': nic.get('name'),
@@ -3074,15 +3218,30 @@ class IdracMixin:
                     'switch_connection_id': nic.get('switch_connection_id'),
                     'switch_port_description': nic.get('switch_port_description'),
                     'last_sync': datetime.utcnow().isoformat() + 'Z',
-                })
+                }
             
-            if not nic_records:
+            if not nic_rows:
                 return 0
             
+            plan = self.plan_inventory_diff(server_id, 'nics', nic_rows)
+            if plan['unchanged']:
+                self.log(f"  ✓ NICs unchanged ({len(nic_rows)}), skipping write", "DEBUG")
+                if log_fn:
+                    log_fn(f"✓ {len(nic_rows)} NICs unchanged", "INFO")
+                return len(nic_rows)
+            
+            nic_records = [nic_rows[fqdd] for fqdd in plan['write_keys']]
+            
             # Log for visibility (both executor and UI console)
-            self.log(f"  → Saving {len(nic_records)} NICs", "DEBUG")
+            self.log(f"  → Saving {len(nic_records)} changed NIC(s), removing {len(plan['removed_keys'])}", "DEBUG")
             if log_fn:
-                log_fn(f"Saving {len(nic_records)} NICs", "INFO")
+                log_fn(f"Saving {len(nic_records)} changed NIC(s) of {len(nic_rows)}", "INFO")
+            
+            if not nic_records:
+                # Only removals
+                if self.delete_inventory_rows('server_nics', server_id, 'fqdd', plan['removed_keys']):
+                    self.save_inventory_fingerprint(server_id, 'nics', plan['content_hash'], plan['row_hashes'])
+                return len(nic_rows)
             
             # Use column names for on_conflict (PostgREST requirement)
             upsert_url = f"{DSM_URL}/rest/v1/server_nics?on_conflict=server_id,fqdd"
@@ -3115,10 +3274,12 @@ class IdracMixin:
             )
             
             if response.status_code in [200, 201, 204]:
+                if self.delete_inventory_rows('server_nics', server_id, 'fqdd', plan['removed_keys']):
+                    self.save_inventory_fingerprint(server_id, 'nics', plan['content_hash'], plan['row_hashes'])
                 self.log(f"  ✓ Synced {len(nic_records)} NICs", "DEBUG")
                 if log_fn:
                     log_fn(f"✓ Saved {len(nic_records)} NICs", "SUCCESS")
-                return len(nic_records)
+                return len(nic_rows)
             else:
                 error_text = response.text[:200] if response.text else 'Unknown error'
                 self.log(f"  ⚠ NIC sync failed: HTTP {response.status_code} - {error_text}", "WARN")
@@ -3262,14 +3423,19 @@ class IdracMixin:
         """
         Sync memory/DIMM data to server_memory table using PostgREST bulk upsert.
         Uses on_conflict=server_id,dimm_identifier with merge-duplicates.
+        
+        Unchanged DIMM sets (by content hash) are skipped; otherwise only added
+        and changed DIMMs are upserted and DIMMs no longer reported are removed.
         """
         if not dimms:
             return 0
         
         try:
-            # Prepare memory records with timestamps
-            memory_records = []
+            # Prepare memory records with timestamps, keyed by DIMM identifier
+            memory_rows = {}
             for dimm in dimms:
+                if not dimm.get('dimm_identifier'):
+                    continue
                 record = {
                     'server_id': server_id,
                     'dimm_identifier': dimm.get('dimm_identifier'),
@@ -3289,7 +3455,24 @@ class IdracMixin:
                     'non_volatile_size_mb': dimm.get('non_volatile_size_mb'),
                     'last_updated_at': datetime.utcnow().isoformat() + 'Z',
                 }
-                memory_records.append(record)
+                memory_rows[record['dimm_identifier']] = record
+            
+            if not memory_rows:
+                return 0
+            
+            plan = self.plan_inventory_diff(server_id, 'memory', memory_rows)
+            if plan['unchanged']:
+                self.log(f"  ✓ DIMMs unchanged ({len(memory_rows)}), skipping write", "DEBUG")
+                if log_fn:
+                    log_fn(f"✓ {len(memory_rows)} DIMMs unchanged", "INFO")
+                return len(memory_rows)
+            
+            memory_records = [memory_rows[key] for key in plan['write_keys']]
+            if not memory_records:
+                # Only removals
+                if self.delete_inventory_rows('server_memory', server_id, 'dimm_identifier', plan['removed_keys']):
+                    self.save_inventory_fingerprint(server_id, 'memory', plan['content_hash'], plan['row_hashes'])
+                return len(memory_rows)
             
             # PostgREST bulk upsert with on_conflict using column names
             upsert_url = f"{DSM_URL}/rest/v1/server_memory?on_conflict=server_id,dimm_identifier"
@@ -3329,10 +3512,12 @@ class IdracMixin:
             )
             
             if response.status_code in [200, 201, 204]:
+                if self.delete_inventory_rows('server_memory', server_id, 'dimm_identifier', plan['removed_keys']):
+                    self.save_inventory_fingerprint(server_id, 'memory', plan['content_hash'], plan['row_hashes'])
                 self.log(f"  ✓ Synced {len(memory_records)} DIMMs", "DEBUG")
                 if log_fn:
                     log_fn(f"✓ Saved {len(memory_records)} DIMMs", "SUCCESS")
-                return len(memory_records)
+                return len(memory_rows)
             else:
                 error_text = response.text[:200] if response.text else 'Unknown error'
                 self.log(f"  ⚠ Memory sync failed: HTTP {response.status_code} - {error_text}", "WARN")
@@ -3586,17 +3771,16 @@ class IdracMixin:
                 "auth_failed": False
             }
 
-    def sync_one_server(self, server: Dict, fetch_options: Dict, job_id: str) -> Dict:
+    def sync_one_server(self, server: Dict, fetch_options: Dict, job_id: str, writer=None) -> Dict:
         """
         Sync a single server's data from iDRAC. Pure worker function - no job progress updates.
         
-        This method is designed to be called from a thread pool. It performs:
-        - Credential resolution
-        - Redfish API query for comprehensive info
-        - Database update for server record
-        - Health record insertion
-        - Drive/NIC sync
-        - vCenter auto-linking
+        Runs both pipeline stages back to back: fetch_server_state() (Redfish
+        queries) then write_server_state() (database writes). refresh_existing_servers
+        runs the two stages in separate pools instead.
+        
+        When a DiscoveryBatchWriter is passed, the audit entry is queued on it
+        instead of being written (and its job creator looked up) per server.
         
         Returns a result dict (no side effects on job state):
             {
@@ -3613,22 +3797,38 @@ class IdracMixin:
                 'cred_source': str | None,
             }
         """
-        ip = server['ip_address']
-        server_id = server['id']
-        logs = []  # Thread-local log accumulator
-        
+        fetched = self.fetch_server_state(server, fetch_options, job_id)
+        return self.write_server_state(fetched, job_id, writer=writer)
+
+    def _sync_log_fn(self, logs: List[str]):
+        """Build a per-server logger that records into a thread-local log list"""
         def log_local(message: str, level: str = 'INFO'):
             """Add message to local logs (thread-safe, no shared state)"""
             timestamp = datetime.utcnow().strftime('%H:%M:%S')
             logs.append(f'[{timestamp}] [{level}] {message}')
             self.log(message, level)
+        return log_local
+
+    def fetch_server_state(self, server: Dict, fetch_options: Dict, job_id: str) -> Dict:
+        """
+        Fetch stage of a server sync: resolve credentials and query iDRAC.
         
-        headers = {
-            "apikey": SERVICE_ROLE_KEY,
-            "Authorization": f"Bearer {SERVICE_ROLE_KEY}",
-            "Content-Type": "application/json",
-            "Prefer": "return=representation"
-        }
+        Server row updates are left to write_server_state(); the only writes made here
+        are the iDRAC command log entries recorded by the Redfish calls. Everything the
+        write stage needs is returned:
+            {
+                'server': Dict,
+                'result': Dict,          # Result skeleton (see sync_one_server)
+                'info': Dict | None,     # get_comprehensive_server_info() output
+                'offline_update': Dict | None,  # servers PATCH for failures
+                'cred_source': str | None,
+                'used_cred_set_id': str | None,
+            }
+        """
+        ip = server['ip_address']
+        server_id = server['id']
+        logs = []  # Thread-local log accumulator
+        log_local = self._sync_log_fn(logs)
         
         # Default result structure
         result = {
@@ -3644,6 +3844,14 @@ class IdracMixin:
             'needs_backup': False,
             'cred_source': None,
         }
+        fetched = {
+            'server': server,
+            'result': result,
+            'info': None,
+            'offline_update': None,
+            'cred_source': None,
+            'used_cred_set_id': None,
+        }
         
         try:
             log_local(f'Syncing: {ip}', 'INFO')
@@ -3651,170 +3859,35 @@ class IdracMixin:
             # Resolve credentials using priority order
             username, password, cred_source, used_cred_set_id = self.resolve_credentials_for_server(server)
             result['cred_source'] = cred_source
+            fetched['cred_source'] = cred_source
+            fetched['used_cred_set_id'] = used_cred_set_id
             
             # Handle credential resolution failures
             if cred_source == 'decrypt_failed':
                 error_msg = 'Encryption key not configured; cannot decrypt credentials'
-                update_data = {
+                fetched['offline_update'] = {
                     'connection_status': 'offline',
                     'connection_error': error_msg,
                     'credential_test_status': 'invalid',
                     'credential_last_tested': datetime.utcnow().isoformat() + 'Z'
                 }
-                update_url = f"{DSM_URL}/rest/v1/servers?id=eq.{server_id}"
-                requests.patch(update_url, headers=headers, json=update_data, verify=VERIFY_SSL)
                 
                 log_local(f'✗ Cannot decrypt credentials for {ip}', 'ERROR')
                 result['error'] = error_msg
                 result['error_type'] = 'credentials'
-                return result
+                return fetched
             
             if not username or not password:
                 log_local(f'✗ No credentials available for {ip}', 'WARN')
                 result['error'] = 'No credentials available'
                 result['error_type'] = 'credentials'
-                return result
+                return fetched
             
             # Query iDRAC for comprehensive info
             info = self.get_comprehensive_server_info(ip, username, password, server_id=server_id, job_id=job_id)
             
             if info:
-                # Define allowed server columns for update
-                # Note: hostname is intentionally excluded - it's user-assigned and should not be overwritten
-                # idrac_hostname stores the iDRAC-reported hostname instead
-                allowed_fields = {
-                    "manufacturer", "model", "product_name", "service_tag", "idrac_hostname",
-                    "bios_version", "cpu_count", "memory_gb", "idrac_firmware",
-                    "manager_mac_address", "redfish_version", "supported_endpoints",
-                    "cpu_model", "cpu_cores_per_socket", "cpu_speed",
-                    "boot_mode", "boot_order", "secure_boot", "virtualization_enabled",
-                    "total_drives", "total_storage_tb", "power_state"
-                }
-                
-                # Build filtered update payload (exclude None values and credentials)
-                update_data = {k: v for k, v in info.items() if k in allowed_fields and v is not None}
-                
-                # Add status fields
-                update_data.update({
-                    'connection_status': 'online',
-                    'connection_error': None,
-                    'last_seen': datetime.utcnow().isoformat() + 'Z',
-                    'credential_test_status': 'valid',
-                    'credential_last_tested': datetime.utcnow().isoformat() + 'Z',
-                })
-                
-                # Add health fields from health_status if available
-                if info.get('health_status'):
-                    health_status = info['health_status']
-                    all_healthy = all([
-                        health_status.get('storage_healthy', True) != False,
-                        health_status.get('thermal_healthy', True) != False,
-                        health_status.get('power_healthy', True) != False
-                    ])
-                    update_data['overall_health'] = 'OK' if all_healthy else 'Warning'
-                    update_data['last_health_check'] = datetime.utcnow().isoformat() + 'Z'
-                
-                # Check memory health from DIMMs and update overall health
-                if info.get('memory_dimms'):
-                    memory_healths = [d.get('health') for d in info['memory_dimms'] if d.get('health')]
-                    memory_healthy = all(h == 'OK' for h in memory_healths)
-                    if not memory_healthy:
-                        # Downgrade overall health if any DIMM is unhealthy
-                        update_data['overall_health'] = 'Warning'
-                
-                # Promote credential_set_id if we used discovered_by or ip_range and server doesn't have one
-                if not server.get('credential_set_id') and used_cred_set_id and cred_source in ['discovered_by_credential_set_id', 'ip_range']:
-                    update_data['credential_set_id'] = used_cred_set_id
-                    self.log(f"  → Promoting credential_set_id {used_cred_set_id} from {cred_source}", "INFO")
-                
-                # Mirror model to product_name if missing
-                if 'product_name' not in update_data and info.get('model'):
-                    update_data['product_name'] = info['model']
-                
-                self.log(f"  Updating {ip} with fields: {list(update_data.keys())}", "DEBUG")
-                
-                update_url = f"{DSM_URL}/rest/v1/servers?id=eq.{server_id}"
-                update_response = requests.patch(update_url, headers=headers, json=update_data, verify=VERIFY_SSL)
-                
-                if update_response.status_code in [200, 204]:
-                    log_local(f'✓ Synced: {ip} ({info.get("model", "Unknown")})', 'SUCCESS')
-                    
-                    result['success'] = True
-                    result['model'] = info.get('model')
-                    result['hostname'] = info.get('hostname')
-                    result['service_tag'] = info.get('service_tag')
-                    result['needs_backup'] = True  # Backup should be queued (orchestrator will decide)
-                    
-                    # Insert health record to server_health table if health data exists
-                    if info.get('health_status'):
-                        health_status = info['health_status']
-                        health_record = {
-                            'server_id': server_id,
-                            'timestamp': datetime.utcnow().isoformat() + 'Z',
-                            'overall_health': update_data.get('overall_health', 'Unknown'),
-                            'power_state': health_status.get('power_state') or info.get('power_state'),
-                            'storage_health': 'OK' if health_status.get('storage_healthy') else ('Warning' if health_status.get('storage_healthy') == False else None),
-                            'fan_health': health_status.get('fan_health'),
-                            'psu_health': 'OK' if health_status.get('power_healthy') else ('Warning' if health_status.get('power_healthy') == False else None),
-                            'temperature_celsius': health_status.get('temperature_celsius'),
-                            'sensors': {}
-                        }
-                        
-                        try:
-                            health_url = f"{DSM_URL}/rest/v1/server_health"
-                            health_response = requests.post(
-                                health_url,
-                                headers=headers,
-                                json=health_record,
-                                verify=VERIFY_SSL
-                            )
-                            if health_response.status_code in [200, 201]:
-                                self.log(f"  ✓ Health record saved to server_health table", "DEBUG")
-                            else:
-                                self.log(f"  Warning: Could not save health record: {health_response.status_code}", "WARN")
-                        except Exception as health_err:
-                            self.log(f"  Warning: Failed to save health record: {health_err}", "WARN")
-                    
-                    # Sync drives to server_drives table with console logging
-                    drives_synced = 0
-                    if info.get('drives'):
-                        log_local(f'→ Reading storage: found {len(info["drives"])} drive(s)', 'INFO')
-                        drives_synced = self._sync_server_drives(server_id, info['drives'], log_fn=log_local, job_id=job_id) or 0
-                    
-                    # Sync NICs to server_nics table with console logging
-                    nics_synced = 0
-                    if info.get('nics'):
-                        log_local(f'→ Reading NICs: found {len(info["nics"])} adapter(s)', 'INFO')
-                        nics_synced = self._sync_server_nics(server_id, info['nics'], log_fn=log_local, job_id=job_id) or 0
-                    
-                    # Sync memory/DIMMs to server_memory table with console logging
-                    memory_synced = 0
-                    if info.get('memory_dimms'):
-                        log_local(f'→ Reading memory: found {len(info["memory_dimms"])} DIMM(s)', 'INFO')
-                        memory_synced = self._sync_server_memory(server_id, info['memory_dimms'], log_fn=log_local, job_id=job_id) or 0
-                    
-                    # Try auto-linking to vCenter if service_tag was updated
-                    if info.get('service_tag'):
-                        self.auto_link_vcenter(server_id, info.get('service_tag'))
-                    
-                    # Create audit trail entry for server discovery
-                    self._create_server_audit_entry(
-                        server_id=server_id,
-                        job_id=job_id,
-                        action='server_discovery',
-                        summary=f"Server discovered: {info.get('model', 'Unknown')} ({info.get('service_tag', 'N/A')})",
-                        details={
-                            'bios_version': info.get('bios_version'),
-                            'idrac_firmware': info.get('idrac_firmware'),
-                            'health_status': info.get('health_status'),
-                            'event_logs_fetched': info.get('event_log_count', 0)
-                        }
-                    )
-                else:
-                    error_msg = f'DB update failed: HTTP {update_response.status_code}'
-                    log_local(f'✗ DB update failed: {ip}', 'ERROR')
-                    result['error'] = error_msg
-                    result['error_type'] = 'db_error'
+                fetched['info'] = info
             else:
                 # Failed to query iDRAC - determine specific error cause
                 conn_result = self.test_idrac_connectivity(ip)
@@ -3826,16 +3899,13 @@ class IdracMixin:
                     error_msg = f'Authentication failed using {cred_source} credentials - verify username/password'
                     cred_status = 'invalid'
                 
-                update_data = {
+                fetched['offline_update'] = {
                     'connection_status': 'offline',
                     'connection_error': error_msg,
                     'last_connection_test': datetime.utcnow().isoformat() + 'Z',
                     'credential_test_status': cred_status,
                 }
                 
-                update_url = f"{DSM_URL}/rest/v1/servers?id=eq.{server_id}"
-                requests.patch(update_url, headers=headers, json=update_data, verify=VERIFY_SSL)
-                
                 log_local(f'✗ {error_msg}: {ip}', 'ERROR')
                 result['error'] = error_msg
                 result['error_type'] = 'auth_failed' if cred_status == 'invalid' else 'unreachable'
@@ -3846,11 +3916,193 @@ class IdracMixin:
             result['error'] = error_msg
             result['error_type'] = 'exception'
         
+        return fetched
+
+    def write_server_state(self, fetched: Dict, job_id: str, writer=None) -> Dict:
+        """
+        Write stage of a server sync: persist fetch_server_state() output.
+        
+        Updates the servers row, inserts the health record, syncs drives/NICs/DIMMs,
+        auto-links vCenter and records the audit entry. Returns the result dict.
+        """
+        server = fetched['server']
+        result = fetched['result']
+        info = fetched.get('info')
+        ip = server['ip_address']
+        server_id = server['id']
+        log_local = self._sync_log_fn(result['logs'])
+        cred_source = fetched.get('cred_source')
+        used_cred_set_id = fetched.get('used_cred_set_id')
+        
+        headers = {
+            "apikey": SERVICE_ROLE_KEY,
+            "Authorization": f"Bearer {SERVICE_ROLE_KEY}",
+            "Content-Type": "application/json",
+            "Prefer": "return=representation"
+        }
+        
+        try:
+            if fetched.get('offline_update'):
+                update_url = f"{DSM_URL}/rest/v1/servers?id=eq.{server_id}"
+                requests.patch(update_url, headers=headers, json=fetched['offline_update'], verify=VERIFY_SSL)
+                return result
+            
+            if not info:
+                return result
+            
+            # Define allowed server columns for update
+            # Note: hostname is intentionally excluded - it's user-assigned and should not be overwritten
+            # idrac_hostname stores the iDRAC-reported hostname instead
+            allowed_fields = {
+                "manufacturer", "model", "product_name", "service_tag", "idrac_hostname",
+                "bios_version", "cpu_count", "memory_gb", "idrac_firmware",
+                "manager_mac_address", "redfish_version", "supported_endpoints",
+                "cpu_model", "cpu_cores_per_socket", "cpu_speed",
+                "boot_mode", "boot_order", "secure_boot", "virtualization_enabled",
+                "total_drives", "total_storage_tb", "power_state"
+            }
+            
+            # Build filtered update payload (exclude None values and credentials)
+            update_data = {k: v for k, v in info.items() if k in allowed_fields and v is not None}
+            
+            # Add status fields
+            update_data.update({
+                'connection_status': 'online',
+                'connection_error': None,
+                'last_seen': datetime.utcnow().isoformat() + 'Z',
+                'credential_test_status': 'valid',
+                'credential_last_tested': datetime.utcnow().isoformat() + 'Z',
+            })
+            
+            # Add health fields from health_status if available
+            if info.get('health_status'):
+                health_status = info['health_status']
+                all_healthy = all([
+                    health_status.get('storage_healthy', True) != False,
+                    health_status.get('thermal_healthy', True) != False,
+                    health_status.get('power_healthy', True) != False
+                ])
+                update_data['overall_health'] = 'OK' if all_healthy else 'Warning'
+                update_data['last_health_check'] = datetime.utcnow().isoformat() + 'Z'
+            
+            # Check memory health from DIMMs and update overall health
+            if info.get('memory_dimms'):
+                memory_healths = [d.get('health') for d in info['memory_dimms'] if d.get('health')]
+                memory_healthy = all(h == 'OK' for h in memory_healths)
+                if not memory_healthy:
+                    # Downgrade overall health if any DIMM is unhealthy
+                    update_data['overall_health'] = 'Warning'
+            
+            # Promote credential_set_id if we used discovered_by or ip_range and server doesn't have one
+            if not server.get('credential_set_id') and used_cred_set_id and cred_source in ['discovered_by_credential_set_id', 'ip_range']:
+                update_data['credential_set_id'] = used_cred_set_id
+                self.log(f"  → Promoting credential_set_id {used_cred_set_id} from {cred_source}", "INFO")
+            
+            # Mirror model to product_name if missing
+            if 'product_name' not in update_data and info.get('model'):
+                update_data['product_name'] = info['model']
+            
+            self.log(f"  Updating {ip} with fields: {list(update_data.keys())}", "DEBUG")
+            
+            update_url = f"{DSM_URL}/rest/v1/servers?id=eq.{server_id}"
+            update_response = requests.patch(update_url, headers=headers, json=update_data, verify=VERIFY_SSL)
+            
+            if update_response.status_code in [200, 204]:
+                log_local(f'✓ Synced: {ip} ({info.get("model", "Unknown")})', 'SUCCESS')
+                
+                result['success'] = True
+                result['model'] = info.get('model')
+                result['hostname'] = info.get('hostname')
+                result['service_tag'] = info.get('service_tag')
+                result['needs_backup'] = True  # Backup should be queued (orchestrator will decide)
+                
+                # Insert health record to server_health table if health data exists
+                if info.get('health_status'):
+                    health_status = info['health_status']
+                    health_record = {
+                        'server_id': server_id,
+                        'timestamp': datetime.utcnow().isoformat() + 'Z',
+                        'overall_health': update_data.get('overall_health', 'Unknown'),
+                        'power_state': health_status.get('power_state') or info.get('power_state'),
+                        'storage_health': 'OK' if health_status.get('storage_healthy') else ('Warning' if health_status.get('storage_healthy') == False else None),
+                        'fan_health': health_status.get('fan_health'),
+                        'psu_health': 'OK' if health_status.get('power_healthy') else ('Warning' if health_status.get('power_healthy') == False else None),
+                        'temperature_celsius': health_status.get('temperature_celsius'),
+                        'sensors': {}
+                    }
+                    
+                    try:
+                        health_url = f"{DSM_URL}/rest/v1/server_health"
+                        health_response = requests.post(
+                            health_url,
+                            headers=headers,
+                            json=health_record,
+                            verify=VERIFY_SSL
+                        )
+                        if health_response.status_code in [200, 201]:
+                            self.log(f"  ✓ Health record saved to server_health table", "DEBUG")
+                        else:
+                            self.log(f"  Warning: Could not save health record: {health_response.status_code}", "WARN")
+                    except Exception as health_err:
+                        self.log(f"  Warning: Failed to save health record: {health_err}", "WARN")
+                
+                # Sync drives to server_drives table with console logging
+                drives_synced = 0
+                if info.get('drives'):
+                    log_local(f'→ Reading storage: found {len(info["drives"])} drive(s)', 'INFO')
+                    drives_synced = self._sync_server_drives(server_id, info['drives'], log_fn=log_local, job_id=job_id) or 0
+                
+                # Sync NICs to server_nics table with console logging
+                nics_synced = 0
+                if info.get('nics'):
+                    log_local(f'→ Reading NICs: found {len(info["nics"])} adapter(s)', 'INFO')
+                    nics_synced = self._sync_server_nics(server_id, info['nics'], log_fn=log_local, job_id=job_id) or 0
+                
+                # Sync memory/DIMMs to server_memory table with console logging
+                memory_synced = 0
+                if info.get('memory_dimms'):
+                    log_local(f'→ Reading memory: found {len(info["memory_dimms"])} DIMM(s)', 'INFO')
+                    memory_synced = self._sync_server_memory(server_id, info['memory_dimms'], log_fn=log_local, job_id=job_id) or 0
+                
+                # Try auto-linking to vCenter if service_tag was updated
+                if info.get('service_tag'):
+                    self.auto_link_vcenter(server_id, info.get('service_tag'))
+                
+                # Create audit trail entry for server discovery
+                audit_summary = f"Server discovered: {info.get('model', 'Unknown')} ({info.get('service_tag', 'N/A')})"
+                audit_details = {
+                    'bios_version': info.get('bios_version'),
+                    'idrac_firmware': info.get('idrac_firmware'),
+                    'health_status': info.get('health_status'),
+                    'event_logs_fetched': info.get('event_log_count', 0)
+                }
+                if writer:
+                    writer.add_audit_entry(server_id, 'server_discovery', audit_summary, audit_details)
+                else:
+                    self._create_server_audit_entry(
+                        server_id=server_id,
+                        job_id=job_id,
+                        action='server_discovery',
+                        summary=audit_summary,
+                        details=audit_details
+                    )
+            else:
+                error_msg = f'DB update failed: HTTP {update_response.status_code}'
+                log_local(f'✗ DB update failed: {ip}', 'ERROR')
+                result['error'] = error_msg
+                result['error_type'] = 'db_error'
+                
+        except Exception as e:
+            error_msg = f'Exception during sync: {str(e)}'
+            log_local(f'✗ {error_msg}: {ip}', 'ERROR')
+            result['error'] = error_msg
+            result['error_type'] = 'exception'
+        
         return result
 
     def refresh_existing_servers(self, job: Dict, server_ids: List[str]):
         """Refresh information for existing servers by querying iDRAC using parallel sync"""
-        from concurrent.futures import ThreadPoolExecutor, as_completed
+        from concurrent.futures import ThreadPoolExecutor
         
         self.log(f"Refreshing {len(server_ids)} existing server(s)")
         
@@ -3911,7 +4163,17 @@ class IdracMixin:
                 console_log.append(f'[{timestamp}] [{level}] {message}')
                 self.log(message, level)
             
-            log_console(f'Starting data sync for {total_servers} server(s) (concurrency: 4)', 'INFO')
+            # Staged pipeline: fetch pool (Redfish) -> bounded queue -> write pool (DB)
+            settings = self.fetch_activity_settings() if hasattr(self, 'fetch_activity_settings') else {}
+            fetch_workers = max(1, min(int(settings.get('refresh_fetch_concurrency') or 4), total_servers or 1))
+            write_workers = max(1, min(int(settings.get('refresh_write_concurrency') or 2), total_servers or 1))
+            queue_size = max(1, fetch_workers * 2)
+            
+            log_console(
+                f'Starting data sync for {total_servers} server(s) '
+                f'(fetch concurrency: {fetch_workers}, write concurrency: {write_workers})',
+                'INFO'
+            )
             
             if not should_backup_scp:
                 log_console('SCP backup disabled - will not queue backup jobs', 'INFO')
@@ -3938,140 +4200,217 @@ class IdracMixin:
                     'current_step': f'Starting parallel sync of {total_servers} server(s)',
                     'servers_refreshed': 0,
                     'servers_total': total_servers,
-                    'in_syncing': min(4, total_servers),
+                    'in_syncing': min(fetch_workers, total_servers),
                     'console_log': console_log,
                 }
             )
             
-            # Dispatch to thread pool - workers return results, don't update progress
-            # Concurrency default 4 matches throttler limit
-            max_workers = min(4, total_servers) if total_servers > 0 else 1
             results = []
             backup_queue = []  # Servers that need SCP backup queued
             
             # Thread-safe tracking of active servers (for progress display)
+            import queue
             import threading
             active_servers_lock = threading.Lock()
-            active_servers = {}  # server_id -> {'ip': str, 'started': str}
+            active_servers = {}  # server_id -> {'ip': str, 'started': str, 'stage': str}
+            
+            # Per-stage timing (seconds) aggregated for job details
+            stage_timings = {'fetch': [], 'queue_wait': [], 'write': []}
+            timings_lock = threading.Lock()
+            pipeline_started = time.time()
+            
+            # Audit entries and backup jobs are buffered and written in bulk
+            from job_executor.batch_writer import DiscoveryBatchWriter
+            writer = DiscoveryBatchWriter(self, job['id'])
+            
+            # Bounded queue applies back-pressure: fetchers pause when writers fall behind
+            write_queue = queue.Queue(maxsize=queue_size)
+            result_queue = queue.Queue()
+            # Set when the result loop fails so fetchers stop instead of blocking on a full queue
+            abort = threading.Event()
             
-            def tracked_sync(srv):
-                """Wrapper to track active servers during sync"""
-                server_id = srv['id']
-                ip = srv['ip_address']
+            def failed_result(srv, error):
+                return {
+                    'server_id': srv['id'],
+                    'ip': srv['ip_address'],
+                    'success': False,
+                    'error': str(error),
+                    'error_type': 'exception',
+                    'logs': [f'[{datetime.utcnow().strftime("%H:%M:%S")}] [ERROR] Exception: {error}'],
+                    'needs_backup': False,
+                    'cred_source': None,
+                }
+            
+            def fetch_stage(srv):
+                """Fetch worker: credentials and Redfish queries, hands off to the write queue"""
+                if abort.is_set():
+                    return
                 with active_servers_lock:
-                    active_servers[server_id] = {'ip': ip, 'started': datetime.utcnow().isoformat()}
+                    active_servers[srv['id']] = {'ip': srv['ip_address'], 'started': datetime.utcnow().isoformat(), 'stage': 'fetch'}
+                started = time.time()
                 try:
-                    return self.sync_one_server(srv, fetch_options, job['id'])
-                finally:
-                    with active_servers_lock:
-                        active_servers.pop(server_id, None)
-            
-            with ThreadPoolExecutor(max_workers=max_workers) as pool:
-                # Submit all servers to pool with tracking wrapper
-                future_to_server = {
-                    pool.submit(tracked_sync, srv): srv
-                    for srv in servers
-                }
-                
-                # Process results as they complete (main thread only - progress updates here)
-                for future in as_completed(future_to_server):
+                    fetched = self.fetch_server_state(srv, fetch_options, job['id'])
+                except Exception as e:
+                    # Should not happen - fetch_server_state catches exceptions
+                    fetched = {'server': srv, 'result': failed_result(srv, e), 'info': None, 'offline_update': None}
+                with timings_lock:
+                    stage_timings['fetch'].append(time.time() - started)
+                fetched['enqueued_at'] = time.time()
+                with active_servers_lock:
+                    if srv['id'] in active_servers:
+                        active_servers[srv['id']]['stage'] = 'write'
+                while True:
                     try:
-                        result = future.result()
+                        write_queue.put(fetched, timeout=1)
+                        return
+                    except queue.Full:
+                        if abort.is_set():
+                            return
+            
+            def write_stage():
+                """Write worker: drains the queue and persists each fetched server"""
+                while True:
+                    fetched = write_queue.get()
+                    if fetched is None:
+                        return
+                    srv = fetched['server']
+                    started = time.time()
+                    try:
+                        result = self.write_server_state(fetched, job['id'], writer=writer)
                     except Exception as e:
-                        # Should not happen - sync_one_server catches exceptions
-                        server = future_to_server[future]
-                        result = {
-                            'server_id': server['id'],
-                            'ip': server['ip_address'],
-                            'success': False,
-                            'error': str(e),
-                            'error_type': 'exception',
-                            'logs': [f'[{datetime.utcnow().strftime("%H:%M:%S")}] [ERROR] Exception: {e}'],
-                            'needs_backup': False,
-                            'cred_source': None,
+                        # Should not happen - write_server_state catches exceptions
+                        result = failed_result(srv, e)
+                    finally:
+                        with active_servers_lock:
+                            active_servers.pop(srv['id'], None)
+                    with timings_lock:
+                        stage_timings['queue_wait'].append(started - fetched['enqueued_at'])
+                        stage_timings['write'].append(time.time() - started)
+                    result_queue.put(result)
+            
+            def summarize_timings():
+                with timings_lock:
+                    summary = {}
+                    for stage, values in stage_timings.items():
+                        summary[stage] = {
+                            'count': len(values),
+                            'total_seconds': round(sum(values), 2),
+                            'avg_seconds': round(sum(values) / len(values), 2) if values else 0,
+                            'max_seconds': round(max(values), 2) if values else 0,
                         }
+                summary['wall_seconds'] = round(time.time() - pipeline_started, 2)
+                summary['fetch_concurrency'] = fetch_workers
+                summary['write_concurrency'] = write_workers
+                return summary
+            
+            with ThreadPoolExecutor(max_workers=fetch_workers) as fetch_pool, \
+                    ThreadPoolExecutor(max_workers=write_workers) as write_pool:
+                for _ in range(write_workers):
+                    write_pool.submit(write_stage)
+                for srv in servers:
+                    fetch_pool.submit(fetch_stage, srv)
+                
+                # Process results as they complete (main thread only - progress updates here)
+                try:
+                    for _ in range(total_servers):
+                        result = result_queue.get()
+                        results.append(result)
                     
-                    results.append(result)
-                    
-                    # Aggregate logs to shared console_log (main thread)
-                    console_log.extend(result.get('logs', []))
+                        # Aggregate logs to shared console_log (main thread)
+                        console_log.extend(result.get('logs', []))
                     
-                    # Update counters
-                    if result['success']:
-                        refreshed_count += 1
-                        # Check if backup should be queued
-                        if should_backup_scp and result.get('needs_backup'):
-                            # Check staleness before queuing
-                            should_run_backup = True
-                            if scp_only_if_stale:
-                                should_run_backup = self._should_backup_server(result['server_id'], scp_max_age_days)
+                        # Update counters
+                        if result['success']:
+                            refreshed_count += 1
+                            # Check if backup should be queued
+                            if should_backup_scp and result.get('needs_backup'):
+                                # Check staleness before queuing
+                                should_run_backup = True
+                                if scp_only_if_stale:
+                                    should_run_backup = self._should_backup_server(result['server_id'], scp_max_age_days)
                             
-                            if should_run_backup:
-                                backup_queue.append(result)
-                    else:
-                        failed_count += 1
+                                if should_run_backup:
+                                    backup_queue.append(result)
+                        else:
+                            failed_count += 1
                     
-                    # Update task status (main thread)
-                    task = task_by_server.get(result['server_id'])
-                    if task:
-                        last_log = result.get('logs', [''])[-1] if result.get('logs') else ''
-                        self.update_task_status(
-                            task['id'],
-                            'completed' if result['success'] else 'failed',
-                            log=last_log,
-                            progress=100,
-                            completed_at=datetime.now().isoformat()
-                        )
+                        # Update task status (main thread)
+                        task = task_by_server.get(result['server_id'])
+                        if task:
+                            last_log = result.get('logs', [''])[-1] if result.get('logs') else ''
+                            self.update_task_status(
+                                task['id'],
+                                'completed' if result['success'] else 'failed',
+                                log=last_log,
+                                progress=100,
+                                completed_at=datetime.now().isoformat()
+                            )
                     
-                    # Update job progress (main thread) - show completed count and active servers
-                    completed_count = refreshed_count + failed_count
-                    remaining = total_servers - completed_count
+                        # Update job progress (main thread) - show completed count and active servers
+                        completed_count = refreshed_count + failed_count
                     
-                    # Get snapshot of currently active servers for progress display
-                    with active_servers_lock:
-                        current_active = list(active_servers.values())
-                    active_ips = [s['ip'] for s in current_active]
-                    in_syncing = len(active_ips)
+                        # Get snapshot of currently active servers for progress display
+                        with active_servers_lock:
+                            current_active = list(active_servers.values())
+                        active_ips = [s['ip'] for s in current_active]
+                        in_syncing = len(active_ips)
                     
-                    # Build human-readable current step
-                    if in_syncing > 0:
-                        if in_syncing <= 3:
-                            current_step = f'Syncing: {", ".join(active_ips)}'
+                        # Build human-readable current step
+                        if in_syncing > 0:
+                            if in_syncing <= 3:
+                                current_step = f'Syncing: {", ".join(active_ips)}'
+                            else:
+                                current_step = f'Syncing: {", ".join(active_ips[:2])} +{in_syncing - 2} more'
                         else:
-                            current_step = f'Syncing: {", ".join(active_ips[:2])} +{in_syncing - 2} more'
-                    else:
-                        current_step = f'Synced {completed_count}/{total_servers} server(s)'
+                            current_step = f'Synced {completed_count}/{total_servers} server(s)'
                     
-                    self.update_job_status(
-                        job['id'],
-                        'running',
-                        details={
-                            **base_details,
-                            'current_stage': 'sync',
-                            'current_step': current_step,
-                            'current_server_ip': active_ips[0] if active_ips else None,
-                            'active_server_ips': active_ips,
-                            'in_syncing': in_syncing,
-                            'servers_refreshed': refreshed_count,
-                            'servers_failed': failed_count,
-                            'servers_total': total_servers,
-                            'console_log': console_log,
-                        }
-                    )
+                        self.update_job_status(
+                            job['id'],
+                            'running',
+                            details={
+                                **base_details,
+                                'current_stage': 'sync',
+                                'current_step': current_step,
+                                'current_server_ip': active_ips[0] if active_ips else None,
+                                'active_server_ips': active_ips,
+                                'in_syncing': in_syncing,
+                                'in_fetching': sum(1 for s in current_active if s.get('stage') == 'fetch'),
+                                'in_writing': sum(1 for s in current_active if s.get('stage') == 'write'),
+                                'servers_refreshed': refreshed_count,
+                                'servers_failed': failed_count,
+                                'servers_total': total_servers,
+                                'stage_timings': summarize_timings(),
+                                'console_log': console_log,
+                            }
+                        )
+                except BaseException:
+                    abort.set()
+                    raise
+                finally:
+                    # Always stop the write workers, otherwise they block on the queue forever
+                    for _ in range(write_workers):
+                        write_queue.put(None)
+            
+            stage_summary = summarize_timings()
+            log_console(
+                f"Pipeline timing: fetch {stage_summary['fetch']['total_seconds']}s, "
+                f"queue wait {stage_summary['queue_wait']['total_seconds']}s, "
+                f"write {stage_summary['write']['total_seconds']}s "
+                f"(wall {stage_summary['wall_seconds']}s)",
+                'INFO'
+            )
             
             # After all syncs complete, queue backup jobs for servers that need it
-            backups_queued = 0
             if backup_queue:
                 log_console(f'Queuing {len(backup_queue)} config backup job(s)', 'INFO')
                 for result in backup_queue:
-                    try:
-                        self._create_automatic_scp_backup_job(result['server_id'], job['id'])
-                        backups_queued += 1
-                    except Exception as backup_err:
-                        self.log(f"  Failed to queue backup for {result['ip']}: {backup_err}", "WARN")
-                
-                if backups_queued > 0:
-                    log_console(f'✓ Queued {backups_queued} backup job(s) - will run separately', 'SUCCESS')
+                    writer.add_scp_backup_job(result['server_id'])
+            
+            # Flush buffered audit entries + backup jobs in bulk
+            write_stats = writer.close()
+            backups_queued = write_stats['jobs_created']
+            if backups_queued > 0:
+                log_console(f'✓ Queued {backups_queued} backup job(s) - will run separately', 'SUCCESS')
             
             # Complete the job
             summary = f"Synced {refreshed_count} server(s)"
@@ -4090,6 +4429,7 @@ class IdracMixin:
                 'backups_queued': backups_queued,  # SCP backups queued as separate jobs
                 'servers_refreshed': refreshed_count,
                 'servers_total': total_servers,
+                'stage_timings': stage_summary,
                 'current_stage': 'complete',
                 'console_log': console_log,
             }
@@ -4175,7 +4515,7 @@ class IdracMixin:
         except:
             return False
     
-    def discover_single_ip(self, ip: str, credential_sets: List[Dict], job_id: str, stage_callback=None) -> Dict:
+    def discover_single_ip(self, ip: str, credential_sets: List[Dict], job_id: str, stage_callback=None, cached_entry: Dict = None) -> Dict:
         """
         3-Stage optimized IP discovery:
         Stage 1: Quick TCP port check (443)
@@ -4187,44 +4527,55 @@ class IdracMixin:
             credential_sets: List of credential sets to try
             job_id: Job ID for logging
             stage_callback: Optional callback(ip, stage) for real-time progress
+            cached_entry: Optional discovery_ip_cache row for a known iDRAC (fast rescan).
+                Stages 1-2 are skipped and the cached credential set is tried first;
+                if the host no longer answers, a full probe is performed instead.
         
         Priority:
-          1. Credential sets matching IP ranges (highest priority)
-          2. Global credential sets selected in the discovery job
+          1. Cached credential set that last succeeded (fast rescan only)
+          2. Credential sets matching IP ranges
+          3. Global credential sets selected in the discovery job
         """
         
-        # Stage 1: Quick port check - skip IPs with closed port 443
-        if stage_callback:
-            stage_callback(ip, 'port_check')
-        
-        port_open = self._quick_port_check(ip, port=443, timeout=1.0)
-        if not port_open:
-            return {
-                'success': False,
-                'ip': ip,
-                'idrac_detected': False,
-                'auth_failed': False,
-                'port_open': False
-            }
-        
-        # Stage 2: Quick iDRAC detection - skip non-iDRAC devices
-        if stage_callback:
-            stage_callback(ip, 'detecting')
-        
-        if not self._detect_idrac(ip, timeout=2.0):
-            return {
-                'success': False,
-                'ip': ip,
-                'idrac_detected': False,
-                'auth_failed': False,
-                'port_open': True
-            }
+        preferred_credential_id = None
+        if cached_entry and cached_entry.get('idrac_detected'):
+            preferred_credential_id = cached_entry.get('credential_set_id')
+        else:
+            # Stage 1: Quick port check - skip IPs with closed port 443
+            if stage_callback:
+                stage_callback(ip, 'port_check')
+            
+            port_open = self._quick_port_check(ip, port=443, timeout=1.0)
+            if not port_open:
+                return {
+                    'success': False,
+                    'ip': ip,
+                    'idrac_detected': False,
+                    'auth_failed': False,
+                    'port_open': False
+                }
+            
+            # Stage 2: Quick iDRAC detection - skip non-iDRAC devices
+            if stage_callback:
+                stage_callback(ip, 'detecting')
+            
+            if not self._detect_idrac(ip, timeout=2.0):
+                return {
+                    'success': False,
+                    'ip': ip,
+                    'idrac_detected': False,
+                    'auth_failed': False,
+                    'port_open': True
+                }
         
         # Stage 3: Full authentication on confirmed iDRACs
         if stage_callback:
             stage_callback(ip, 'authenticating')
         
-        self.log(f"iDRAC detected at {ip}, attempting authentication...", "INFO")
+        if cached_entry:
+            self.log(f"Re-verifying known iDRAC at {ip}...", "INFO")
+        else:
+            self.log(f"iDRAC detected at {ip}, attempting authentication...", "INFO")
         
         # Step 1: Get credential sets that match this IP's range
         range_based_credentials = self.get_credential_sets_for_ip(ip)
@@ -4243,8 +4594,18 @@ class IdracMixin:
         # Track if any response indicated an iDRAC exists (401/403 response)
         idrac_detected = False
         
-        # Step 3: Try each credential set in order
-        for cred_set in sorted(unique_credentials, key=lambda x: x.get('priority', 999)):
+        # Step 3: Try each credential set in learned order - the set that most often
+        # succeeds on this /24 (and model) goes first to avoid failed auths and lockouts.
+        # On fast rescan the cached winner for this exact IP goes ahead of everything.
+        known_model = cached_entry.get('model') if cached_entry else None
+        ordered_credentials = self.order_credentials_by_history(ip, unique_credentials, model=known_model)
+        if preferred_credential_id:
+            ordered_credentials.sort(key=lambda x: x.get('id') != preferred_credential_id)
+        
+        failed_credential_ids = []
+        auth_attempts = 0
+        
+        for cred_set in ordered_credentials:
             try:
                 matched_by = cred_set.get('matched_range', 'manual_selection')
                 self.log(f"Trying {cred_set['name']} for {ip} (matched: {matched_by})", "INFO")
@@ -4262,6 +4623,7 @@ class IdracMixin:
                     self.log(f"No valid password for {cred_set['name']}", "WARN")
                     continue
                 
+                auth_attempts += 1
                 result = self.test_idrac_connection(
                     ip,
                     cred_set['username'],
@@ -4275,9 +4637,20 @@ class IdracMixin:
                     if result.get('idrac_detected'):
                         idrac_detected = True
                     
+                    if result.get('auth_failed'):
+                        failed_credential_ids.append(cred_set.get('id'))
+                        self.record_credential_outcome(ip, cred_set.get('id'), False, model=known_model)
+                    
                     # If successful, return immediately
                     if result.get('success'):
-                        return {
+                        model = result.get('model')
+                        self.record_credential_outcome(ip, cred_set.get('id'), True, model=model)
+                        if model and model != known_model:
+                            # Model only became known now - attribute earlier failures to it too
+                            for failed_id in failed_credential_ids:
+                                self.record_credential_outcome(None, failed_id, False, model=model)
+                        
+                        discovered = {
                             'success': True,
                             'ip': ip,
                             'idrac_detected': True,
@@ -4285,17 +4658,81 @@ class IdracMixin:
                             'credential_set_name': cred_set['name'],
                             'matched_by': matched_by,
                             'auth_failed': False,
+                            'port_open': True,
+                            'auth_attempts': auth_attempts,
                             **result
                         }
+                        if cached_entry:
+                            discovered['cache_verified'] = True
+                            cached_tag = cached_entry.get('service_tag')
+                            if cached_tag and result.get('service_tag') and cached_tag != result.get('service_tag'):
+                                discovered['changed'] = True
+                                self.log(f"Service tag at {ip} changed: {cached_tag} -> {result.get('service_tag')}", "INFO")
+                        return discovered
             except Exception as e:
                 continue  # Try next credential set
         
+        # Known iDRAC no longer answering - fall back to the full 3-stage probe
+        if cached_entry and not idrac_detected:
+            self.log(f"Cached iDRAC at {ip} did not respond, running full probe", "DEBUG")
+            return self.discover_single_ip(ip, credential_sets, job_id, stage_callback)
+        
         # All credential sets failed
         return {
             'success': False,
             'ip': ip,
             'idrac_detected': idrac_detected,  # Only True if we got 401/403
-            'auth_failed': idrac_detected  # Only mark auth_failed if iDRAC exists
+            'auth_failed': idrac_detected,  # Only mark auth_failed if iDRAC exists
+            'port_open': True,
+            'auth_attempts': auth_attempts,
+            'changed': bool(cached_entry)
+        }
+
+    def _build_discovered_server_record(self, server: Dict, job_id: str) -> Dict:
+        """Build the servers row written for an authenticated discovery result (without ip_address)"""
+        return {
+            'hostname': server.get('hostname'),
+            'model': server.get('model'),
+            'service_tag': server.get('service_tag'),
+            'manager_mac_address': server.get('manager_mac_address'),
+            'product_name': server.get('product_name'),
+            'manufacturer': server.get('manufacturer', 'Dell'),
+            'redfish_version': server.get('redfish_version'),
+            'idrac_firmware': server.get('idrac_firmware'),
+            'bios_version': server.get('bios_version'),
+            'cpu_count': server.get('cpu_count'),
+            'memory_gb': server.get('memory_gb'),
+            'supported_endpoints': server.get('supported_endpoints'),
+            'connection_status': 'online',
+            'last_seen': datetime.now().isoformat(),
+            # Link to credential set directly - don't store plaintext passwords
+            'credential_set_id': server.get('credential_set_id'),
+            'credential_test_status': 'valid',
+            'credential_last_tested': datetime.now().isoformat(),
+            'discovered_by_credential_set_id': server.get('credential_set_id'),
+            'discovery_job_id': job_id,
+            'cpu_model': server.get('cpu_model'),
+            'cpu_cores_per_socket': server.get('cpu_cores_per_socket'),
+            'cpu_speed': server.get('cpu_speed'),
+            'boot_mode': server.get('boot_mode'),
+            'boot_order': server.get('boot_order'),
+            'secure_boot': server.get('secure_boot'),
+            'virtualization_enabled': server.get('virtualization_enabled'),
+            'total_drives': server.get('total_drives'),
+            'total_storage_tb': server.get('total_storage_tb'),
+        }
+
+    def _build_auth_failed_server_record(self, ip: str, job_id: str) -> Dict:
+        """Build the servers row written for an iDRAC that was detected but rejected all credentials"""
+        return {
+            'ip_address': ip,
+            'connection_status': 'offline',
+            'connection_error': 'Authentication failed - credentials required',
+            'credential_test_status': 'invalid',
+            'credential_last_tested': datetime.now().isoformat(),
+            'last_connection_test': datetime.now().isoformat(),
+            'discovery_job_id': job_id,
+            'notes': f'Discovered by IP scan on {datetime.now().strftime("%Y-%m-%d %H:%M:%S")} - iDRAC detected but no valid credentials'
         }
 
     def insert_discovered_server(self, server: Dict, job_id: str):
@@ -4308,37 +4745,7 @@ class IdracMixin:
             check_params = {"ip_address": f"eq.{server['ip']}", "select": "id"}
             existing = requests.get(check_url, headers=headers, params=check_params, verify=VERIFY_SSL)
             
-            server_data = {
-                'hostname': server.get('hostname'),
-                'model': server.get('model'),
-                'service_tag': server.get('service_tag'),
-                'manager_mac_address': server.get('manager_mac_address'),
-                'product_name': server.get('product_name'),
-                'manufacturer': server.get('manufacturer', 'Dell'),
-                'redfish_version': server.get('redfish_version'),
-                'idrac_firmware': server.get('idrac_firmware'),
-                'bios_version': server.get('bios_version'),
-                'cpu_count': server.get('cpu_count'),
-                'memory_gb': server.get('memory_gb'),
-                'supported_endpoints': server.get('supported_endpoints'),
-                'connection_status': 'online',
-                'last_seen': datetime.now().isoformat(),
-                # Link to credential set directly - don't store plaintext passwords
-                'credential_set_id': server.get('credential_set_id'),
-                'credential_test_status': 'valid',
-                'credential_last_tested': datetime.now().isoformat(),
-                'discovered_by_credential_set_id': server.get('credential_set_id'),
-                'discovery_job_id': job_id,
-                'cpu_model': server.get('cpu_model'),
-                'cpu_cores_per_socket': server.get('cpu_cores_per_socket'),
-                'cpu_speed': server.get('cpu_speed'),
-                'boot_mode': server.get('boot_mode'),
-                'boot_order': server.get('boot_order'),
-                'secure_boot': server.get('secure_boot'),
-                'virtualization_enabled': server.get('virtualization_enabled'),
-                'total_drives': server.get('total_drives'),
-                'total_storage_tb': server.get('total_storage_tb'),
-            }
+            server_data = self._build_discovered_server_record(server, job_id)
             
             if existing.status_code == 200 and _safe_json_parse(existing):
                 # Update existing server
@@ -4386,16 +4793,7 @@ class IdracMixin:
             params = {"ip_address": f"eq.{ip}"}
             existing = requests.get(check_url, headers=headers, params=params, verify=VERIFY_SSL)
             
-            server_data = {
-                'ip_address': ip,
-                'connection_status': 'offline',
-                'connection_error': 'Authentication failed - credentials required',
-                'credential_test_status': 'invalid',
-                'credential_last_tested': datetime.now().isoformat(),
-                'last_connection_test': datetime.now().isoformat(),
-                'discovery_job_id': job_id,
-                'notes': f'Discovered by IP scan on {datetime.now().strftime("%Y-%m-%d %H:%M:%S")} - iDRAC detected but no valid credentials'
-            }
+            server_data = self._build_auth_failed_server_record(ip, job_id)
             
             if existing.status_code == 200 and _safe_json_parse(existing):
                 # Update existing server with auth failure status
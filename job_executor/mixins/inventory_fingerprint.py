@@ -0,0 +1,265 @@
+"""Content-hash fingerprints for differential hardware inventory sync"""
+
+import json
+import hashlib
+import requests
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from job_executor.config import DSM_URL, SERVICE_ROLE_KEY, VERIFY_SSL
+from job_executor.utils import _safe_json_parse, utc_now_iso
+
+
+# Bookkeeping columns that change on every sync and must not affect the hash
+VOLATILE_FIELDS = {'server_id', 'last_sync', 'last_updated_at', 'created_at', 'updated_at'}
+
+
+def hash_record(record: Dict, ignore: Iterable[str] = VOLATILE_FIELDS) -> str:
+    """Stable SHA-256 of a record's normalized content (key order independent)"""
+    ignore = set(ignore)
+    normalized = {k: v for k, v in record.items() if k not in ignore}
+    payload = json.dumps(normalized, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def hash_component_set(row_hashes: Dict[str, str]) -> str:
+    """Hash of a whole component set from its per-row hashes"""
+    payload = '\n'.join(f"{key}={row_hashes[key]}" for key in sorted(row_hashes))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def diff_row_hashes(current: Dict[str, str], stored: Dict[str, str]) -> Tuple[List[str], List[str], List[str]]:
+    """
+    Compare per-row hashes against the stored fingerprint.
+
+    Returns:
+        (added, changed, removed) lists of row keys
+    """
+    added = [key for key in current if key not in stored]
+    changed = [key for key in current if key in stored and stored[key] != current[key]]
+    removed = [key for key in stored if key not in current]
+    return added, changed, removed
+
+
+def hash_bios_snapshot(attributes: Dict, pending_attributes: Optional[Dict] = None,
+                       bios_version: Optional[str] = None) -> str:
+    """Content hash of a BIOS snapshot (current + pending attributes and version)"""
+    return hash_record({
+        'attributes': attributes or {},
+        'pending_attributes': pending_attributes or {},
+        'bios_version': bios_version,
+    }, ignore=())
+
+
+class InventoryFingerprintMixin:
+    """
+    Mixin storing per-server fingerprints of drive / NIC / DIMM inventory.
+
+    Each fingerprint holds a hash of the whole normalized component set plus
+    one hash per row (keyed by the row's natural identifier). A refresh whose
+    set hash matches skips the writes entirely; otherwise only added and
+    changed rows are upserted and removed rows are deleted.
+    """
+
+    def get_inventory_fingerprint(self, server_id: str, component_type: str) -> Optional[Dict]:
+        """
+        Load the stored fingerprint for one server component set.
+
+        Returns:
+            Row with content_hash and row_hashes, or None if never synced
+            (or the lookup failed - callers then fall back to a full write)
+        """
+        headers = {
+            "apikey": SERVICE_ROLE_KEY,
+            "Authorization": f"Bearer {SERVICE_ROLE_KEY}",
+        }
+        try:
+            response = requests.get(
+                f"{DSM_URL}/rest/v1/server_inventory_fingerprints",
+                headers=headers,
+                params={
+                    'server_id': f'eq.{server_id}',
+                    'component_type': f'eq.{component_type}',
+                    'select': 'content_hash,row_hashes',
+                },
+                verify=VERIFY_SSL,
+                timeout=15
+            )
+            if response.status_code == 200:
+                rows = _safe_json_parse(response) or []
+                return rows[0] if rows else None
+        except Exception as e:
+            self.log(f"  Could not load {component_type} fingerprint: {e}", "DEBUG")
+        return None
+
+    def save_inventory_fingerprint(self, server_id: str, component_type: str,
+                                   content_hash: str, row_hashes: Dict[str, str]) -> bool:
+        """Upsert the fingerprint after a successful differential write"""
+        headers = {
+            "apikey": SERVICE_ROLE_KEY,
+            "Authorization": f"Bearer {SERVICE_ROLE_KEY}",
+            "Content-Type": "application/json",
+            "Prefer": "resolution=merge-duplicates,return=minimal"
+        }
+        now = utc_now_iso()
+        try:
+            response = requests.post(
+                f"{DSM_URL}/rest/v1/server_inventory_fingerprints?on_conflict=server_id,component_type",
+                headers=headers,
+                json={
+                    'server_id': server_id,
+                    'component_type': component_type,
+                    'content_hash': content_hash,
+                    'row_hashes': row_hashes,
+                    'item_count': len(row_hashes),
+                    'last_changed_at': now,
+                    'updated_at': now,
+                },
+                verify=VERIFY_SSL,
+                timeout=15
+            )
+            return response.status_code in [200, 201, 204]
+        except Exception as e:
+            self.log(f"  Could not save {component_type} fingerprint: {e}", "DEBUG")
+            return False
+
+    def plan_inventory_diff(self, server_id: str, component_type: str,
+                            rows_by_key: Dict[str, Dict]) -> Dict:
+        """
+        Decide which rows of a component set need writing.
+
+        Args:
+            server_id: The server UUID
+            component_type: 'drives', 'nics' or 'memory'
+            rows_by_key: Normalized rows keyed by their natural identifier
+
+        Returns:
+            Dict with 'unchanged' (bool), 'write_keys' (added + changed),
+            'removed_keys', 'content_hash' and 'row_hashes'. Without a stored
+            fingerprint every row is written and nothing is removed.
+        """
+        row_hashes = {key: hash_record(row) for key, row in rows_by_key.items()}
+        content_hash = hash_component_set(row_hashes)
+
+        stored = self.get_inventory_fingerprint(server_id, component_type)
+        if stored and stored.get('content_hash') == content_hash:
+            return {
+                'unchanged': True,
+                'write_keys': [],
+                'removed_keys': [],
+                'content_hash': content_hash,
+                'row_hashes': row_hashes,
+            }
+
+        if not stored:
+            return {
+                'unchanged': False,
+                'write_keys': list(rows_by_key.keys()),
+                'removed_keys': [],
+                'content_hash': content_hash,
+                'row_hashes': row_hashes,
+            }
+
+        added, changed, removed = diff_row_hashes(row_hashes, stored.get('row_hashes') or {})
+        return {
+            'unchanged': False,
+            'write_keys': added + changed,
+            'removed_keys': removed,
+            'content_hash': content_hash,
+            'row_hashes': row_hashes,
+        }
+
+    def delete_inventory_rows(self, table: str, server_id: str, key_field: str, keys: List[str]) -> bool:
+        """Delete rows that disappeared from a server's inventory"""
+        if not keys:
+            return True
+        headers = {
+            "apikey": SERVICE_ROLE_KEY,
+            "Authorization": f"Bearer {SERVICE_ROLE_KEY}",
+            "Prefer": "return=minimal"
+        }
+        key_list = ','.join(f'"{key}"' for key in keys)
+        try:
+            response = requests.delete(
+                f"{DSM_URL}/rest/v1/{table}",
+                headers=headers,
+                params={
+                    'server_id': f'eq.{server_id}',
+                    key_field: f'in.({key_list})',
+                },
+                verify=VERIFY_SSL,
+                timeout=15
+            )
+            return response.status_code in [200, 204]
+        except Exception as e:
+            self.log(f"  Could not delete removed {table} rows: {e}", "WARN")
+            return False
+
+    def compare_bios_snapshot(self, server_id: str, attributes: Dict,
+                              pending_attributes: Optional[Dict] = None,
+                              bios_version: Optional[str] = None) -> Dict:
+        """
+        Compare a freshly read BIOS configuration with the latest stored snapshot.
+
+        Only the latest snapshot's hash is read; its attributes are fetched
+        just when the hash differs, to report which attributes changed.
+
+        Returns:
+            Dict with 'attributes_hash', 'unchanged' (bool), 'previous_id',
+            'previous_captured_at' and 'changed_attributes' (added, changed or
+            removed attribute names; None when there is no prior snapshot)
+        """
+        attributes_hash = hash_bios_snapshot(attributes, pending_attributes, bios_version)
+        comparison = {
+            'attributes_hash': attributes_hash,
+            'unchanged': False,
+            'previous_id': None,
+            'previous_captured_at': None,
+            'changed_attributes': None,
+        }
+        headers = {
+            "apikey": SERVICE_ROLE_KEY,
+            "Authorization": f"Bearer {SERVICE_ROLE_KEY}",
+        }
+        url = f"{DSM_URL}/rest/v1/bios_configurations"
+        try:
+            response = requests.get(
+                url,
+                headers=headers,
+                params={
+                    'server_id': f'eq.{server_id}',
+                    'select': 'id,attributes_hash,captured_at',
+                    'order': 'captured_at.desc',
+                    'limit': '1',
+                },
+                verify=VERIFY_SSL,
+                timeout=15
+            )
+            latest = (_safe_json_parse(response) or [None])[0] if response.status_code == 200 else None
+            if not latest:
+                return comparison
+
+            comparison['previous_id'] = latest.get('id')
+            comparison['previous_captured_at'] = latest.get('captured_at')
+            if latest.get('attributes_hash') == attributes_hash:
+                comparison['unchanged'] = True
+                comparison['changed_attributes'] = []
+                return comparison
+
+            response = requests.get(
+                url,
+                headers=headers,
+                params={'id': f"eq.{latest['id']}", 'select': 'attributes'},
+                verify=VERIFY_SSL,
+                timeout=15
+            )
+            if response.status_code == 200:
+                rows = _safe_json_parse(response) or []
+                previous = (rows[0].get('attributes') if rows else None) or {}
+                current = attributes or {}
+                current_hashes = {k: hash_record({'v': v}, ignore=()) for k, v in current.items()}
+                previous_hashes = {k: hash_record({'v': v}, ignore=()) for k, v in previous.items()}
+                added, changed, removed = diff_row_hashes(current_hashes, previous_hashes)
+                comparison['changed_attributes'] = sorted(added + changed + removed)
+        except Exception as e:
+            self.log(f"  Could not compare BIOS snapshot: {e}", "DEBUG")
+        return comparison
@@ -2,19 +2,115 @@
 Database upsert functions for PropertyCollector-based vCenter sync.
 
 These functions batch-upsert JSON-serializable inventory data from
-sync_vcenter_fast() to the database.
+sync_vcenter_fast(), sync_vcenter_incremental() or a StreamingInventory
+to the database.
 """
 
 import time
 import logging
 import requests
-from typing import Dict, List, Any, Optional, Callable
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Callable, Tuple
 
-from job_executor.config import DSM_URL, SERVICE_ROLE_KEY, VERIFY_SSL
-from job_executor.utils import utc_now_iso
+from job_executor.config import (
+    DSM_URL,
+    SERVICE_ROLE_KEY,
+    VCENTER_UPSERT_WORKERS,
+    VERIFY_SSL,
+    VM_TOUCH_CHUNK_SIZE,
+)
+from job_executor.mixins.vcenter_streaming_sync import vm_link_data
+from job_executor.mixins.vcenter_upsert_state import AdaptiveBatchSize, get_row_hash_cache, row_hash
+from job_executor.utils import _safe_json_parse, utc_now_iso
 
 logger = logging.getLogger(__name__)
 
+# PostgREST returns at most this many rows per request; id lists in DELETE URLs stay short
+REST_PAGE_SIZE = 1000
+RELATIONSHIP_DELETE_CHUNK_SIZE = 100
+
+
+def _parse_timestamp(value: str):
+    """Timestamps compare as instants (PostgREST reformats what was written)"""
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return value
+
+
+def fetch_all_rows(table: str, params: Dict[str, str]) -> Optional[List[Dict]]:
+    """GET every matching row, page by page. Returns None if a request fails."""
+    rows = []
+    offset = 0
+    while True:
+        try:
+            response = requests.get(
+                f"{DSM_URL}/rest/v1/{table}",
+                params={**params, 'order': 'id', 'limit': REST_PAGE_SIZE, 'offset': offset},
+                headers={
+                    'apikey': SERVICE_ROLE_KEY,
+                    'Authorization': f'Bearer {SERVICE_ROLE_KEY}'
+                },
+                verify=VERIFY_SSL,
+                timeout=30
+            )
+        except Exception as e:
+            logger.warning(f"Failed to fetch {table}: {e}")
+            return None
+        if response.status_code != 200:
+            logger.warning(f"Failed to fetch {table}: HTTP {response.status_code}")
+            return None
+        page = _safe_json_parse(response) or []
+        rows.extend(page)
+        if len(page) < REST_PAGE_SIZE:
+            return rows
+        offset += REST_PAGE_SIZE
+
+
+class SyncIdMaps:
+    """
+    vCenter MoRef -> database id lookups for one sync.
+    
+    Each map is fetched on first use and shared by the relationship phases
+    that follow, so create one after the VM upsert (VM ids must include the
+    VMs just written). Methods return None if the fetch failed.
+    """
+    
+    def __init__(self, source_vcenter_id: str):
+        self.source_vcenter_id = source_vcenter_id
+        self._rows: Dict[str, Optional[List[Dict]]] = {}
+    
+    def _fetch(self, table: str, select: str) -> Optional[List[Dict]]:
+        if table not in self._rows:
+            self._rows[table] = fetch_all_rows(table, {
+                'source_vcenter_id': f'eq.{self.source_vcenter_id}',
+                'select': select,
+            })
+        return self._rows[table]
+    
+    def vms(self) -> Optional[Dict[str, str]]:
+        rows = self._fetch('vcenter_vms', 'id,vcenter_id')
+        if rows is None:
+            return None
+        return {r['vcenter_id']: r['id'] for r in rows if r.get('vcenter_id')}
+    
+    def datastores(self) -> Optional[Dict[str, str]]:
+        rows = self._fetch('vcenter_datastores', 'id,vcenter_id')
+        if rows is None:
+            return None
+        return {r['vcenter_id']: r['id'] for r in rows if r.get('vcenter_id')}
+    
+    def networks(self) -> Optional[Tuple[Dict[str, str], Dict[str, str]]]:
+        """(by MoRef, by name)"""
+        rows = self._fetch('vcenter_networks', 'id,vcenter_id,name')
+        if rows is None:
+            return None
+        by_moref = {r['vcenter_id']: r['id'] for r in rows if r.get('vcenter_id')}
+        by_name = {r['name']: r['id'] for r in rows if r.get('name')}
+        return by_moref, by_name
+
 
 class VCenterDbUpsertMixin:
     """Mixin providing database upsert operations for PropertyCollector sync."""
@@ -30,8 +126,14 @@ class VCenterDbUpsertMixin:
         """
         Batch upsert all inventory from sync_vcenter_fast() to database.
         
+        For sync_vcenter_incremental() output the entity tables still get
+        the full lists, so every row's last_sync is bumped (unchanged VMs
+        only get a bulk touch, see _upsert_vms_batch), but relationship
+        tables are rebuilt only when inventory["changed"] or
+        inventory["removed"] shows that VMs, datastores or networks changed.
+        
         Args:
-            inventory: Output from sync_vcenter_fast()
+            inventory: Output from sync_vcenter_fast() or sync_vcenter_incremental()
             source_vcenter_id: vCenter UUID for foreign key
             vcenter_name: Human-readable name for logging
             job_id: Optional job ID for activity logging
@@ -64,6 +166,19 @@ class VCenterDbUpsertMixin:
         
         prefix = f"[{vcenter_name}] " if vcenter_name else ""
         
+        # Incremental sync: relationship tables only need rebuilding when their inputs changed
+        changed = inventory.get("changed")
+        if changed is not None:
+            removed = inventory.get("removed", {})
+            vms_changed = bool(changed["vms"] or removed.get("vms"))
+            datastores_changed = bool(changed["datastores"] or removed.get("datastores"))
+            networks_changed = bool(changed["networks"] or changed["dvpgs"] or
+                                    removed.get("networks") or removed.get("dvpgs"))
+            self.log(f"{prefix}Incremental sync ({inventory.get('mode')}): "
+                     f"{inventory.get('changed_objects', 0)} of {inventory.get('total_objects', 0)} objects changed")
+        else:
+            vms_changed = datastores_changed = networks_changed = True
+        
         # 1. Upsert clusters (phase 0)
         self.log(f"{prefix}Upserting {len(inventory['clusters'])} clusters...")
         if progress_callback:
@@ -95,11 +210,12 @@ class VCenterDbUpsertMixin:
         results["datastores"] = ds_result
         
         # 3b. Upsert datastore-host relationships (for cluster-aware filtering)
-        self.log(f"{prefix}Upserting datastore-host relationships...")
-        ds_hosts_result = self._upsert_datastore_hosts_batch(
-            inventory["datastores"], source_vcenter_id, job_id
-        )
-        results["datastore_hosts"] = ds_hosts_result
+        if inventory["datastores"] and datastores_changed:
+            self.log(f"{prefix}Upserting datastore-host relationships...")
+            ds_hosts_result = self._upsert_datastore_hosts_batch(
+                inventory["datastores"], source_vcenter_id, job_id
+            )
+            results["datastore_hosts"] = ds_hosts_result
         
         # 4. Upsert networks (phase 3)
         total_networks = len(inventory["networks"]) + len(inventory["dvpgs"])
@@ -116,13 +232,8 @@ class VCenterDbUpsertMixin:
         )
         results["networks"] = net_result
         
-        # 5. Upsert VMs (phase 4)
-        # DEBUG: Enhanced logging for Marseille VM sync diagnosis
+        # 5. Upsert VMs (phase 4) - unchanged rows are only touched
         self.log(f"{prefix}Upserting {len(inventory['vms'])} VMs from inventory...")
-        if len(inventory['vms']) < 100:
-            # Log all VM names if count is suspiciously low
-            vm_names = [vm.get('name', 'unknown') for vm in inventory['vms'][:20]]
-            self.log(f"{prefix}  DEBUG: VM names (first 20): {vm_names}")
         if progress_callback:
             progress_callback(80, f"{prefix}Syncing VMs...", 4)
         
@@ -131,56 +242,181 @@ class VCenterDbUpsertMixin:
         )
         results["vms"] = vm_result
         
-        # 6. Upsert Network-VM relationships (phase 5)
-        self.log(f"{prefix}Upserting network-VM relationships...")
-        if progress_callback:
-            progress_callback(85, f"{prefix}Syncing network-VM relationships...", 5)
+        # Relationship tables are diffed per vCenter against the full VM list,
+        # so an incremental sync skips them unless VMs (or their targets) changed.
+        # The MoRef -> id maps are fetched once, after the VM upsert, and shared.
+        id_maps = SyncIdMaps(source_vcenter_id)
+        if vms_changed or networks_changed:
+            # 6. Upsert Network-VM relationships (phase 5)
+            self.log(f"{prefix}Upserting network-VM relationships...")
+            if progress_callback:
+                progress_callback(85, f"{prefix}Syncing network-VM relationships...", 5)
+            
+            network_vm_result = self._upsert_network_vms_batch(
+                inventory["vms"], source_vcenter_id, job_id, id_maps
+            )
+            results["network_vms"] = network_vm_result
         
-        network_vm_result = self._upsert_network_vms_batch(
-            inventory["vms"], source_vcenter_id, job_id
-        )
-        results["network_vms"] = network_vm_result
+        if vms_changed or datastores_changed:
+            # 7. Upsert Datastore-VM relationships (phase 6) - for decommission safety
+            self.log(f"{prefix}Upserting datastore-VM relationships...")
+            if progress_callback:
+                progress_callback(90, f"{prefix}Syncing datastore-VM relationships...", 6)
+            
+            datastore_vm_result = self._upsert_datastore_vms_batch(
+                inventory["vms"], source_vcenter_id, job_id, id_maps
+            )
+            results["datastore_vms"] = datastore_vm_result
         
-        # 7. Upsert Datastore-VM relationships (phase 6) - for decommission safety
-        self.log(f"{prefix}Upserting datastore-VM relationships...")
+        if vms_changed:
+            # 8. Upsert VM snapshots (phase 7)
+            self.log(f"{prefix}Upserting VM snapshots...")
+            if progress_callback:
+                progress_callback(94, f"{prefix}Syncing VM snapshots...", 7)
+            
+            snapshots_result = self._upsert_vm_snapshots_batch(
+                inventory["vms"], source_vcenter_id, job_id, id_maps
+            )
+            results["vm_snapshots"] = snapshots_result
+            
+            # 9. Upsert VM custom attributes (phase 8)
+            self.log(f"{prefix}Upserting VM custom attributes...")
+            if progress_callback:
+                progress_callback(97, f"{prefix}Syncing VM custom attributes...", 8)
+            
+            custom_attrs_result = self._upsert_vm_custom_attributes_batch(
+                inventory["vms"], source_vcenter_id, job_id, id_maps
+            )
+            results["vm_custom_attributes"] = custom_attrs_result
+        
+        # 10. Update network VM counts from relationships
+        if vms_changed or networks_changed:
+            self._update_network_vm_counts(source_vcenter_id)
+        
+        # Phase 6 (alarms) is handled separately in vcenter_handlers.py
         if progress_callback:
-            progress_callback(90, f"{prefix}Syncing datastore-VM relationships...", 6)
+            progress_callback(100, f"{prefix}Inventory sync complete", 9)
         
-        datastore_vm_result = self._upsert_datastore_vms_batch(
-            inventory["vms"], source_vcenter_id, job_id
-        )
-        results["datastore_vms"] = datastore_vm_result
+        duration_ms = int((time.time() - start_time) * 1000)
+        self.log(f"{prefix}Inventory upsert completed in {duration_ms}ms")
+        
+        return results
+    
+    def upsert_inventory_streaming(
+        self,
+        stream,
+        source_vcenter_id: str,
+        vcenter_name: str = "",
+        job_id: str = None,
+        progress_callback: Optional[Callable[[int, str, int], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Fetch and upsert a full inventory page by page (see vcenter_streaming_sync).
+        
+        Hosts, datastores and networks are written first, then each VM page
+        is upserted while the next page is fetched, then clusters (whose VM
+        counts are only known once every VM page has passed) and the
+        relationship tables.
         
-        # 8. Upsert VM snapshots (phase 7)
-        self.log(f"{prefix}Upserting VM snapshots...")
+        Args:
+            stream: StreamingInventory for the vCenter (not yet loaded)
+            source_vcenter_id: vCenter UUID for foreign key
+            vcenter_name: Human-readable name for logging
+            job_id: Optional job ID for activity logging
+            progress_callback: Optional (percent, message, phase_idx) callback
+            
+        Returns:
+            Same shape as upsert_inventory_fast(); stream.summary() describes
+            what was fetched
+        """
+        start_time = time.time()
+        results = {
+            "clusters": {"synced": 0, "total": 0},
+            "hosts": {"synced": 0, "total": 0, "auto_linked": 0},
+            "vms": {"synced": 0, "total": 0},
+            "datastores": {"synced": 0, "total": 0},
+            "datastore_hosts": {"synced": 0, "total": 0},
+            "datastore_vms": {"synced": 0, "total": 0},
+            "networks": {"synced": 0, "total": 0},
+            "network_vms": {"synced": 0, "total": 0},
+            "vm_snapshots": {"synced": 0, "total": 0},
+            "vm_custom_attributes": {"synced": 0, "total": 0},
+            "errors": []
+        }
+        prefix = f"[{vcenter_name}] " if vcenter_name else ""
+        
+        # 1. Everything VM rows depend on
         if progress_callback:
-            progress_callback(94, f"{prefix}Syncing VM snapshots...", 7)
+            progress_callback(5, f"{prefix}Fetching hosts, datastores and networks...", 0)
+        stream.load_context()
         
-        snapshots_result = self._upsert_vm_snapshots_batch(
-            inventory["vms"], source_vcenter_id, job_id
-        )
-        results["vm_snapshots"] = snapshots_result
+        if progress_callback:
+            progress_callback(20, f"{prefix}Syncing hosts...", 1)
+        results["hosts"] = self._upsert_hosts_batch(stream.rows("hosts"), source_vcenter_id, job_id)
         
-        # 9. Upsert VM custom attributes (phase 8)
-        self.log(f"{prefix}Upserting VM custom attributes...")
         if progress_callback:
-            progress_callback(97, f"{prefix}Syncing VM custom attributes...", 8)
+            progress_callback(30, f"{prefix}Syncing datastores...", 2)
+        datastores = stream.rows("datastores")
+        results["datastores"] = self._upsert_datastores_batch(datastores, source_vcenter_id, job_id)
+        if datastores:
+            results["datastore_hosts"] = self._upsert_datastore_hosts_batch(datastores, source_vcenter_id, job_id)
         
-        custom_attrs_result = self._upsert_vm_custom_attributes_batch(
-            inventory["vms"], source_vcenter_id, job_id
+        if progress_callback:
+            progress_callback(40, f"{prefix}Syncing networks...", 3)
+        results["networks"] = self._upsert_networks_batch(
+            stream.rows("networks"), stream.rows("dvpgs"), stream.rows("dvswitches"),
+            source_vcenter_id, job_id
         )
-        results["vm_custom_attributes"] = custom_attrs_result
         
-        # 10. Update network VM counts from relationships
+        # 2. VMs, one page at a time (the next page is fetched meanwhile)
+        host_id_map = self._fetch_host_id_map(source_vcenter_id)
+        vm_links = []
+        vm_errors = []
+        for page_number, page in enumerate(stream.vm_pages(), start=1):
+            if not page:
+                continue
+            if progress_callback:
+                progress_callback(
+                    min(45 + page_number * 5, 80),
+                    f"{prefix}Syncing VMs (page {page_number}, {results['vms']['total'] + len(page)} so far)...", 4
+                )
+            page_result = self._upsert_vms_batch(page, source_vcenter_id, job_id, host_id_map)
+            results["vms"]["synced"] += page_result.get("synced", 0)
+            results["vms"]["total"] += page_result.get("total", 0)
+            if page_result.get("error"):
+                vm_errors.append(page_result["error"])
+            vm_links.extend(vm_link_data(vm) for vm in page)
+        if vm_errors:
+            results["vms"]["error"] = "; ".join(vm_errors)
+        self.log(f"{prefix}Streamed {results['vms']['total']} VMs "
+                 f"(fetch {stream.fetch_time_ms}ms, process {stream.process_time_ms}ms)")
+        
+        # 3. Clusters, now that every VM has been counted
+        if progress_callback:
+            progress_callback(82, f"{prefix}Syncing clusters...", 0)
+        results["clusters"] = self._upsert_clusters_batch(stream.rows("clusters"), source_vcenter_id, job_id)
+        
+        # 4. Relationship tables (sharing one set of MoRef -> id maps)
+        id_maps = SyncIdMaps(source_vcenter_id)
+        if progress_callback:
+            progress_callback(85, f"{prefix}Syncing network-VM relationships...", 5)
+        results["network_vms"] = self._upsert_network_vms_batch(vm_links, source_vcenter_id, job_id, id_maps)
+        if progress_callback:
+            progress_callback(90, f"{prefix}Syncing datastore-VM relationships...", 6)
+        results["datastore_vms"] = self._upsert_datastore_vms_batch(vm_links, source_vcenter_id, job_id, id_maps)
+        if progress_callback:
+            progress_callback(94, f"{prefix}Syncing VM snapshots...", 7)
+        results["vm_snapshots"] = self._upsert_vm_snapshots_batch(vm_links, source_vcenter_id, job_id, id_maps)
+        if progress_callback:
+            progress_callback(97, f"{prefix}Syncing VM custom attributes...", 8)
+        results["vm_custom_attributes"] = self._upsert_vm_custom_attributes_batch(vm_links, source_vcenter_id, job_id, id_maps)
         self._update_network_vm_counts(source_vcenter_id)
         
-        # Phase 6 (alarms) is handled separately in vcenter_handlers.py
         if progress_callback:
             progress_callback(100, f"{prefix}Inventory sync complete", 9)
         
         duration_ms = int((time.time() - start_time) * 1000)
-        self.log(f"{prefix}Inventory upsert completed in {duration_ms}ms")
-        
+        self.log(f"{prefix}Streaming inventory sync completed in {duration_ms}ms")
         return results
     
     def upsert_inventory_partial(
@@ -234,6 +470,14 @@ class VCenterDbUpsertMixin:
             return {"synced": 0, "total": 0}
         
         # Fetch existing hosts for this vCenter to resolve host_id
+        host_id_map = self._fetch_host_id_map(source_vcenter_id)
+        
+        # Now upsert VMs
+        return self._upsert_vms_batch(vms, source_vcenter_id, job_id, host_id_map)
+    
+    def _fetch_host_id_map(self, source_vcenter_id: str) -> Dict[str, str]:
+        """Host DB ids keyed by MoRef and by name, for resolving VM host_id."""
+        host_id_map = {}
         try:
             response = requests.get(
                 f"{DSM_URL}/rest/v1/vcenter_hosts?source_vcenter_id=eq.{source_vcenter_id}&select=id,vcenter_id,name",
@@ -245,7 +489,6 @@ class VCenterDbUpsertMixin:
                 timeout=15
             )
             
-            host_id_map = {}
             if response.status_code == 200:
                 for h in response.json():
                     if h.get('vcenter_id'):
@@ -254,10 +497,7 @@ class VCenterDbUpsertMixin:
                         host_id_map[h['name']] = h['id']
         except Exception as e:
             self.log(f"Warning: Could not fetch hosts for VM resolution: {e}", "WARN")
-            host_id_map = {}
-        
-        # Now upsert VMs
-        return self._upsert_vms_batch(vms, source_vcenter_id, job_id, host_id_map)
+        return host_id_map
     
     def _upsert_clusters_batch(
         self, 
@@ -888,12 +1128,12 @@ class VCenterDbUpsertMixin:
                 host_lookup = {h['name']: h['id'] for h in hosts_list}
         
         synced = 0
-        failed_vms = []
-        batch_size = 50
         errors = []
+        sync_time = utc_now_iso()
+        row_hashes = get_row_hash_cache()
         
         def build_vm_record(v):
-            """Build a VM record dict for upsert."""
+            """Build a VM record dict for upsert (last_sync is added when it is sent)."""
             host_id = host_lookup.get(v.get('host_name', ''))
             return {
                 'name': v.get('name', ''),
@@ -918,42 +1158,47 @@ class VCenterDbUpsertMixin:
                 'hardware_version': v.get('hardware_version', ''),
                 'folder_path': v.get('folder_path', ''),
                 'snapshot_count': v.get('snapshot_count', 0),
-                'last_sync': utc_now_iso()
             }
         
-        for i in range(0, len(vms), batch_size):
-            batch_vms = vms[i:i+batch_size]
-            batch = [build_vm_record(v) for v in batch_vms]
-            
-            try:
-                response = requests.post(
-                    f"{DSM_URL}/rest/v1/vcenter_vms?on_conflict=vcenter_id,source_vcenter_id",
-                    headers=headers,
-                    json=batch,
-                    verify=VERIFY_SSL,
-                    timeout=30
-                )
-                
-                if response.status_code in [200, 201, 204]:
-                    synced += len(batch)
-                else:
-                    # Batch failed - queue for individual retry
-                    error_text = response.text[:300] if response.text else "No response"
-                    self.log(f"  VM batch {i//batch_size + 1} failed (HTTP {response.status_code}), will retry individually", "WARN")
-                    failed_vms.extend(batch_vms)
-                    
-            except Exception as e:
-                self.log(f"  VM batch {i//batch_size + 1} error: {e}, will retry individually", "WARN")
-                failed_vms.extend(batch_vms)
+        # Only rows whose content changed since the last sync are written in full;
+        # unchanged rows just get last_sync bumped by a bulk touch
+        records = {}
+        hashes = {}
+        for v in vms:
+            record = build_vm_record(v)
+            records[record['vcenter_id']] = record
+            hashes[record['vcenter_id']] = row_hash(record)
+        changed = row_hashes.changed('vcenter_vms', source_vcenter_id, hashes)
+        unchanged = [moref for moref in records if moref not in changed]
+        
+        if unchanged:
+            touched = self._touch_vms(source_vcenter_id, unchanged, sync_time)
+            synced += len(touched)
+            missing = [moref for moref in unchanged if moref not in touched]
+            if missing:
+                # Rows gone from the database (or a failed touch) - write them in full
+                self.log(f"  {len(missing)} unchanged VMs were not touched, upserting them in full")
+                row_hashes.forget('vcenter_vms', source_vcenter_id, missing)
+                changed.update(missing)
+        
+        changed_records = [{**records[moref], 'last_sync': sync_time} for moref in records if moref in changed]
+        self.log(f"  {len(changed_records)} of {len(records)} VMs changed since the last sync")
+        
+        written, failed_records = self._post_batches_parallel(
+            f"{DSM_URL}/rest/v1/vcenter_vms?on_conflict=vcenter_id,source_vcenter_id",
+            changed_records, headers, label="VM"
+        )
+        synced += len(written)
+        row_hashes.update('vcenter_vms', source_vcenter_id,
+                          {r['vcenter_id']: hashes[r['vcenter_id']] for r in written})
         
         # Retry failed VMs individually to identify and skip only problematic ones
-        if failed_vms:
-            self.log(f"  Retrying {len(failed_vms)} failed VMs individually...")
+        if failed_records:
+            self.log(f"  Retrying {len(failed_records)} failed VMs individually...")
             retry_success = 0
             retry_failures = []
             
-            for v in failed_vms:
-                record = build_vm_record(v)
+            for record in failed_records:
                 vm_name = record.get('name', 'unknown')
                 
                 try:
@@ -967,6 +1212,8 @@ class VCenterDbUpsertMixin:
                     
                     if response.status_code in [200, 201, 204]:
                         retry_success += 1
+                        row_hashes.update('vcenter_vms', source_vcenter_id,
+                                          {record['vcenter_id']: hashes[record['vcenter_id']]})
                     else:
                         # Check if it's a name conflict (duplicate name with different moRef)
                         if 'unique constraint' in response.text.lower() or 'duplicate' in response.text.lower():
@@ -994,11 +1241,96 @@ class VCenterDbUpsertMixin:
         else:
             self.log(f"  ⚠ Synced {synced}/{len(vms)} VMs ({100*synced//len(vms)}% - {len(vms)-synced} missing)", "WARN")
         
-        result = {"synced": synced, "total": len(vms)}
+        result = {"synced": synced, "total": len(vms), "written": len(changed_records)}
         if errors:
             result["error"] = "; ".join(errors)
         return result
     
+    def _touch_vms(self, source_vcenter_id: str, morefs: List[str], sync_time: str) -> set:
+        """
+        Bulk-set last_sync on existing VM rows (liveness only, no content).
+        
+        Returns:
+            MoRefs of the rows that were touched; rows missing from the
+            database (or in a chunk whose PATCH failed) are not included
+        """
+        headers = {
+            'apikey': SERVICE_ROLE_KEY,
+            'Authorization': f'Bearer {SERVICE_ROLE_KEY}',
+            'Content-Type': 'application/json',
+            'Prefer': 'return=representation'
+        }
+        
+        def touch(chunk):
+            try:
+                response = requests.patch(
+                    f"{DSM_URL}/rest/v1/vcenter_vms",
+                    params={
+                        "source_vcenter_id": f"eq.{source_vcenter_id}",
+                        "vcenter_id": f"in.({','.join(chunk)})",
+                        "select": "vcenter_id",
+                    },
+                    headers=headers,
+                    json={'last_sync': sync_time},
+                    verify=VERIFY_SSL,
+                    timeout=30
+                )
+                if response.status_code in [200, 201]:
+                    return [row['vcenter_id'] for row in (response.json() or [])]
+                self.log(f"  VM touch failed: HTTP {response.status_code}", "WARN")
+            except Exception as e:
+                self.log(f"  VM touch error: {e}", "WARN")
+            return []
+        
+        chunks = [morefs[i:i + VM_TOUCH_CHUNK_SIZE] for i in range(0, len(morefs), VM_TOUCH_CHUNK_SIZE)]
+        touched = set()
+        with ThreadPoolExecutor(max_workers=min(VCENTER_UPSERT_WORKERS, len(chunks))) as pool:
+            for result in pool.map(touch, chunks):
+                touched.update(result)
+        return touched
+    
+    def _post_batches_parallel(self, url: str, records: List[Dict], headers: Dict,
+                               label: str = "Row") -> Tuple[List[Dict], List[Dict]]:
+        """
+        POST records in concurrent batches whose size adapts to response times.
+        
+        Returns:
+            (records written, records in batches that failed)
+        """
+        if not records:
+            return [], []
+        
+        sizer = AdaptiveBatchSize()
+        pending = deque(records)
+        written, failed = [], []
+        
+        def post(batch):
+            started = time.monotonic()
+            try:
+                response = requests.post(url, headers=headers, json=batch, verify=VERIFY_SSL, timeout=60)
+                ok = response.status_code in [200, 201, 204]
+                if not ok:
+                    self.log(f"  {label} batch of {len(batch)} failed (HTTP {response.status_code}), "
+                             f"will retry individually", "WARN")
+            except Exception as e:
+                ok = False
+                self.log(f"  {label} batch of {len(batch)} error: {e}, will retry individually", "WARN")
+            return ok, time.monotonic() - started
+        
+        with ThreadPoolExecutor(max_workers=VCENTER_UPSERT_WORKERS) as pool:
+            in_flight = {}
+            while pending or in_flight:
+                while pending and len(in_flight) < VCENTER_UPSERT_WORKERS:
+                    batch = [pending.popleft() for _ in range(min(sizer.size, len(pending)))]
+                    in_flight[pool.submit(post, batch)] = batch
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    batch = in_flight.pop(future)
+                    ok, elapsed = future.result()
+                    sizer.record(ok, elapsed)
+                    (written if ok else failed).extend(batch)
+        return written, failed
+    
     def _update_vm_by_name(self, record: Dict, headers: Dict) -> bool:
         """
         Update an existing VM record by name when moRef has changed.
@@ -1058,53 +1390,20 @@ class VCenterDbUpsertMixin:
         self,
         vms: List[Dict],
         source_vcenter_id: str,
-        job_id: str = None
+        job_id: str = None,
+        id_maps: "SyncIdMaps" = None
     ) -> Dict[str, int]:
-        """Batch upsert network-VM relationships from VM network interfaces."""
+        """Sync network-VM relationships from VM network interfaces (changed rows only)."""
         if not vms:
             return {"synced": 0, "total": 0}
         
-        headers = {
-            'apikey': SERVICE_ROLE_KEY,
-            'Authorization': f'Bearer {SERVICE_ROLE_KEY}',
-            'Content-Type': 'application/json',
-            'Prefer': 'resolution=merge-duplicates,return=minimal'
-        }
-        
-        # Fetch network lookup (vcenter_id -> id mapping)
-        networks_response = requests.get(
-            f"{DSM_URL}/rest/v1/vcenter_networks?source_vcenter_id=eq.{source_vcenter_id}&select=id,vcenter_id,name",
-            headers={
-                'apikey': SERVICE_ROLE_KEY,
-                'Authorization': f'Bearer {SERVICE_ROLE_KEY}'
-            },
-            verify=VERIFY_SSL
-        )
-        network_lookup = {}
-        network_name_lookup = {}
-        if networks_response.status_code == 200:
-            from job_executor.utils import _safe_json_parse
-            networks_list = _safe_json_parse(networks_response) or []
-            for n in networks_list:
-                if n.get('vcenter_id'):
-                    network_lookup[n['vcenter_id']] = n['id']
-                if n.get('name'):
-                    network_name_lookup[n['name']] = n['id']
-        
-        # Fetch VM lookup (vcenter_id -> id mapping)
-        vms_response = requests.get(
-            f"{DSM_URL}/rest/v1/vcenter_vms?source_vcenter_id=eq.{source_vcenter_id}&select=id,vcenter_id",
-            headers={
-                'apikey': SERVICE_ROLE_KEY,
-                'Authorization': f'Bearer {SERVICE_ROLE_KEY}'
-            },
-            verify=VERIFY_SSL
-        )
-        vm_lookup = {}
-        if vms_response.status_code == 200:
-            from job_executor.utils import _safe_json_parse
-            vms_list = _safe_json_parse(vms_response) or []
-            vm_lookup = {v['vcenter_id']: v['id'] for v in vms_list if v.get('vcenter_id')}
+        id_maps = id_maps or SyncIdMaps(source_vcenter_id)
+        vm_lookup = id_maps.vms()
+        network_maps = id_maps.networks()
+        if vm_lookup is None or network_maps is None:
+            self.log(f"  Failed to fetch VM/network mappings, skipping network-VM relationships", "WARN")
+            return {"synced": 0, "total": 0, "error": "VM/network id lookup failed"}
+        network_lookup, network_name_lookup = network_maps
         
         # Build relationship records
         relationships = []
@@ -1138,105 +1437,34 @@ class VCenterDbUpsertMixin:
                     'ip_addresses': nic.get('ip_addresses', []),
                     'adapter_type': nic.get('adapter_type'),
                     'connected': nic.get('connected', True),
-                    'last_sync': utc_now_iso()
                 })
         
-        if not relationships:
-            self.log(f"  No network-VM relationships found")
-            return {"synced": 0, "total": 0}
-        
-        # Clear old relationships for this vCenter before inserting new ones
-        try:
-            requests.delete(
-                f"{DSM_URL}/rest/v1/vcenter_network_vms?source_vcenter_id=eq.{source_vcenter_id}",
-                headers={
-                    'apikey': SERVICE_ROLE_KEY,
-                    'Authorization': f'Bearer {SERVICE_ROLE_KEY}'
-                },
-                verify=VERIFY_SSL,
-                timeout=30
-            )
-        except Exception as e:
-            self.log(f"  Failed to clear old network-VM relationships: {e}", "WARN")
-        
-        # Batch upsert relationships
-        synced = 0
-        batch_size = 100
-        
-        for i in range(0, len(relationships), batch_size):
-            batch = relationships[i:i+batch_size]
-            
-            try:
-                response = requests.post(
-                    f"{DSM_URL}/rest/v1/vcenter_network_vms",
-                    headers=headers,
-                    json=batch,
-                    verify=VERIFY_SSL,
-                    timeout=30
-                )
-                
-                if response.status_code in [200, 201, 204]:
-                    synced += len(batch)
-                else:
-                    self.log(f"  Network-VM batch {i//batch_size + 1} upsert failed: {response.status_code} - {response.text}", "WARN")
-                    
-            except Exception as e:
-                self.log(f"  Network-VM batch upsert error: {e}", "ERROR")
-        
-        self.log(f"  ✓ Batch upserted {synced}/{len(relationships)} network-VM relationships")
-        return {"synced": synced, "total": len(relationships)}
+        result = self._sync_relationship_rows(
+            'vcenter_network_vms', source_vcenter_id, relationships,
+            key_fields=('network_id', 'vm_id', 'nic_label')
+        )
+        self.log(f"  ✓ Network-VM relationships: {result['synced']}/{result['total']} in sync "
+                 f"({result['inserted']} written, {result['deleted']} removed)")
+        return result
     
     def _update_network_vm_counts(self, source_vcenter_id: str):
-        """Update vm_count on networks based on relationship counts."""
+        """Recompute vm_count on this vCenter's networks from the relationship table (one call)."""
         try:
-            # Get counts per network from relationships
-            count_response = requests.get(
-                f"{DSM_URL}/rest/v1/vcenter_network_vms?source_vcenter_id=eq.{source_vcenter_id}&select=network_id",
+            response = requests.post(
+                f"{DSM_URL}/rest/v1/rpc/refresh_network_vm_counts",
                 headers={
                     'apikey': SERVICE_ROLE_KEY,
-                    'Authorization': f'Bearer {SERVICE_ROLE_KEY}'
+                    'Authorization': f'Bearer {SERVICE_ROLE_KEY}',
+                    'Content-Type': 'application/json'
                 },
-                verify=VERIFY_SSL
+                json={'p_source_vcenter_id': source_vcenter_id},
+                verify=VERIFY_SSL,
+                timeout=30
             )
-            
-            if count_response.status_code != 200:
-                self.log(f"  Failed to fetch network-VM counts", "WARN")
-                return
-            
-            from job_executor.utils import _safe_json_parse
-            relationships = _safe_json_parse(count_response) or []
-            
-            # Count VMs per network
-            network_counts = {}
-            for rel in relationships:
-                net_id = rel.get('network_id')
-                if net_id:
-                    network_counts[net_id] = network_counts.get(net_id, 0) + 1
-            
-            # Update each network's vm_count
-            headers = {
-                'apikey': SERVICE_ROLE_KEY,
-                'Authorization': f'Bearer {SERVICE_ROLE_KEY}',
-                'Content-Type': 'application/json',
-                'Prefer': 'return=minimal'
-            }
-            
-            updated = 0
-            for network_id, count in network_counts.items():
-                try:
-                    response = requests.patch(
-                        f"{DSM_URL}/rest/v1/vcenter_networks?id=eq.{network_id}",
-                        headers=headers,
-                        json={'vm_count': count},
-                        verify=VERIFY_SSL,
-                        timeout=10
-                    )
-                    if response.status_code in [200, 204]:
-                        updated += 1
-                except Exception:
-                    pass
-            
-            self.log(f"  ✓ Updated VM counts for {updated} networks")
+            if response.status_code == 200:
+                self.log(f"  ✓ Updated VM counts for {response.json()} networks")
+            else:
+                self.log(f"  Failed to update network VM counts: HTTP {response.status_code}", "WARN")
             
         except Exception as e:
             self.log(f"  Failed to update network VM counts: {e}", "WARN")
@@ -1245,10 +1473,11 @@ class VCenterDbUpsertMixin:
         self,
         vms: List[Dict],
         source_vcenter_id: str,
-        job_id: str = None
+        job_id: str = None,
+        id_maps: "SyncIdMaps" = None
     ) -> Dict[str, int]:
         """
-        Batch upsert datastore-VM relationships from VM datastore usage.
+        Sync datastore-VM relationships from VM datastore usage (changed rows only).
         
         This enables:
         - Tracking which VMs are stored on which datastores
@@ -1258,52 +1487,15 @@ class VCenterDbUpsertMixin:
         if not vms:
             return {"synced": 0, "total": 0}
         
-        headers = {
-            'apikey': SERVICE_ROLE_KEY,
-            'Authorization': f'Bearer {SERVICE_ROLE_KEY}',
-            'Content-Type': 'application/json',
-            'Prefer': 'resolution=merge-duplicates,return=minimal'
-        }
-        
-        # Fetch datastore lookup (vcenter_id -> id mapping)
-        try:
-            datastores_response = requests.get(
-                f"{DSM_URL}/rest/v1/vcenter_datastores?source_vcenter_id=eq.{source_vcenter_id}&select=id,vcenter_id",
-                headers={
-                    'apikey': SERVICE_ROLE_KEY,
-                    'Authorization': f'Bearer {SERVICE_ROLE_KEY}'
-                },
-                verify=VERIFY_SSL,
-                timeout=30
-            )
-            datastore_lookup = {}
-            if datastores_response.status_code == 200:
-                from job_executor.utils import _safe_json_parse
-                datastores_list = _safe_json_parse(datastores_response) or []
-                datastore_lookup = {d['vcenter_id']: d['id'] for d in datastores_list if d.get('vcenter_id')}
-        except Exception as e:
-            self.log(f"  Failed to fetch datastore mappings: {e}", "ERROR")
-            return {"synced": 0, "total": 0, "error": str(e)}
-        
-        # Fetch VM lookup (vcenter_id -> id mapping)
-        try:
-            vms_response = requests.get(
-                f"{DSM_URL}/rest/v1/vcenter_vms?source_vcenter_id=eq.{source_vcenter_id}&select=id,vcenter_id",
-                headers={
-                    'apikey': SERVICE_ROLE_KEY,
-                    'Authorization': f'Bearer {SERVICE_ROLE_KEY}'
-                },
-                verify=VERIFY_SSL,
-                timeout=30
-            )
-            vm_lookup = {}
-            if vms_response.status_code == 200:
-                from job_executor.utils import _safe_json_parse
-                vms_list = _safe_json_parse(vms_response) or []
-                vm_lookup = {v['vcenter_id']: v['id'] for v in vms_list if v.get('vcenter_id')}
-        except Exception as e:
-            self.log(f"  Failed to fetch VM mappings: {e}", "ERROR")
-            return {"synced": 0, "total": 0, "error": str(e)}
+        id_maps = id_maps or SyncIdMaps(source_vcenter_id)
+        datastore_lookup = id_maps.datastores()
+        if datastore_lookup is None:
+            self.log(f"  Failed to fetch datastore mappings", "ERROR")
+            return {"synced": 0, "total": 0, "error": "Datastore id lookup failed"}
+        vm_lookup = id_maps.vms()
+        if vm_lookup is None:
+            self.log(f"  Failed to fetch VM mappings", "ERROR")
+            return {"synced": 0, "total": 0, "error": "VM id lookup failed"}
         
         # Build relationship records from VM datastore_usage
         relationships = []
@@ -1328,60 +1520,14 @@ class VCenterDbUpsertMixin:
                     'committed_bytes': ds_usage.get('committed_bytes', 0),
                     'uncommitted_bytes': ds_usage.get('uncommitted_bytes', 0),
                     'is_primary_datastore': ds_usage.get('is_primary', False),
-                    'last_sync': utc_now_iso()
                 })
         
-        if not relationships:
-            self.log(f"  No datastore-VM relationships found")
-            return {"synced": 0, "total": 0}
-        
-        # Clear old relationships for this vCenter before inserting new ones
-        try:
-            requests.delete(
-                f"{DSM_URL}/rest/v1/vcenter_datastore_vms?source_vcenter_id=eq.{source_vcenter_id}",
-                headers={
-                    'apikey': SERVICE_ROLE_KEY,
-                    'Authorization': f'Bearer {SERVICE_ROLE_KEY}'
-                },
-                verify=VERIFY_SSL,
-                timeout=30
-            )
-        except Exception as e:
-            self.log(f"  Failed to clear old datastore-VM relationships: {e}", "WARN")
-        
-        # Batch upsert relationships
-        synced = 0
-        batch_size = 100
-        errors = []
-        
-        for i in range(0, len(relationships), batch_size):
-            batch = relationships[i:i+batch_size]
-            
-            try:
-                response = requests.post(
-                    f"{DSM_URL}/rest/v1/vcenter_datastore_vms?on_conflict=datastore_id,vm_id",
-                    headers=headers,
-                    json=batch,
-                    verify=VERIFY_SSL,
-                    timeout=30
-                )
-                
-                if response.status_code in [200, 201, 204]:
-                    synced += len(batch)
-                else:
-                    error_msg = f"Batch {i//batch_size + 1}: HTTP {response.status_code}: {response.text[:200]}"
-                    self.log(f"  Datastore-VM batch upsert failed: {error_msg}", "WARN")
-                    errors.append(error_msg)
-                    
-            except Exception as e:
-                error_msg = f"Batch {i//batch_size + 1}: {str(e)}"
-                self.log(f"  Datastore-VM batch upsert error: {e}", "ERROR")
-                errors.append(error_msg)
-        
-        self.log(f"  ✓ Batch upserted {synced}/{len(relationships)} datastore-VM relationships")
-        result = {"synced": synced, "total": len(relationships)}
-        if errors:
-            result["error"] = "; ".join(errors)
+        result = self._sync_relationship_rows(
+            'vcenter_datastore_vms', source_vcenter_id, relationships,
+            key_fields=('datastore_id', 'vm_id')
+        )
+        self.log(f"  ✓ Datastore-VM relationships: {result['synced']}/{result['total']} in sync "
+                 f"({result['inserted']} written, {result['deleted']} removed)")
         return result
     
     def detect_datastore_changes(
@@ -1475,33 +1621,16 @@ class VCenterDbUpsertMixin:
         self,
         vms: List[Dict],
         source_vcenter_id: str,
-        job_id: str = None
+        job_id: str = None,
+        id_maps: "SyncIdMaps" = None
     ) -> Dict[str, int]:
-        """Batch upsert VM snapshots from all VMs."""
+        """Sync VM snapshots from all VMs (changed rows only)."""
         if not vms:
             return {"synced": 0, "total": 0}
         
-        headers = {
-            'apikey': SERVICE_ROLE_KEY,
-            'Authorization': f'Bearer {SERVICE_ROLE_KEY}',
-            'Content-Type': 'application/json',
-            'Prefer': 'resolution=merge-duplicates,return=minimal'
-        }
-        
-        # Fetch VM lookup (vcenter_id -> db id mapping)
-        vms_response = requests.get(
-            f"{DSM_URL}/rest/v1/vcenter_vms?source_vcenter_id=eq.{source_vcenter_id}&select=id,vcenter_id",
-            headers={
-                'apikey': SERVICE_ROLE_KEY,
-                'Authorization': f'Bearer {SERVICE_ROLE_KEY}'
-            },
-            verify=VERIFY_SSL
-        )
-        vm_lookup = {}
-        if vms_response.status_code == 200:
-            from job_executor.utils import _safe_json_parse
-            vms_list = _safe_json_parse(vms_response) or []
-            vm_lookup = {v['vcenter_id']: v['id'] for v in vms_list if v.get('vcenter_id')}
+        vm_lookup = (id_maps or SyncIdMaps(source_vcenter_id)).vms()
+        if vm_lookup is None:
+            return {"synced": 0, "total": 0, "error": "VM id lookup failed"}
         
         # Collect all snapshots from all VMs
         all_snapshots = []
@@ -1522,83 +1651,30 @@ class VCenterDbUpsertMixin:
                     'is_current': snap.get('is_current', False),
                     'parent_snapshot_id': snap.get('parent_snapshot_id'),
                     'source_vcenter_id': source_vcenter_id,
-                    'last_sync': utc_now_iso()
                 })
         
-        if not all_snapshots:
-            return {"synced": 0, "total": 0}
-        
-        # Delete existing snapshots for this vCenter (full refresh)
-        try:
-            requests.delete(
-                f"{DSM_URL}/rest/v1/vcenter_vm_snapshots?source_vcenter_id=eq.{source_vcenter_id}",
-                headers={
-                    'apikey': SERVICE_ROLE_KEY,
-                    'Authorization': f'Bearer {SERVICE_ROLE_KEY}'
-                },
-                verify=VERIFY_SSL,
-                timeout=30
-            )
-        except Exception as e:
-            self.log(f"  Warning: Could not delete old snapshots: {e}", "WARN")
-        
-        # Insert new snapshots in batches
-        synced = 0
-        batch_size = 100
-        
-        for i in range(0, len(all_snapshots), batch_size):
-            batch = all_snapshots[i:i+batch_size]
-            try:
-                response = requests.post(
-                    f"{DSM_URL}/rest/v1/vcenter_vm_snapshots",
-                    headers=headers,
-                    json=batch,
-                    verify=VERIFY_SSL,
-                    timeout=30
-                )
-                
-                if response.status_code in [200, 201, 204]:
-                    synced += len(batch)
-                else:
-                    self.log(f"  Snapshot batch insert failed: HTTP {response.status_code}", "WARN")
-                    
-            except Exception as e:
-                self.log(f"  Snapshot batch insert error: {e}", "ERROR")
-        
-        self.log(f"  ✓ Synced {synced} VM snapshots")
-        return {"synced": synced, "total": len(all_snapshots)}
+        result = self._sync_relationship_rows(
+            'vcenter_vm_snapshots', source_vcenter_id, all_snapshots,
+            key_fields=('vm_id', 'snapshot_id'), timestamp_fields=('created_at',)
+        )
+        self.log(f"  ✓ Synced {result['synced']} VM snapshots "
+                 f"({result['inserted']} written, {result['deleted']} removed)")
+        return result
     
     def _upsert_vm_custom_attributes_batch(
         self,
         vms: List[Dict],
         source_vcenter_id: str,
-        job_id: str = None
+        job_id: str = None,
+        id_maps: "SyncIdMaps" = None
     ) -> Dict[str, int]:
-        """Batch upsert VM custom attributes from all VMs."""
+        """Sync VM custom attributes from all VMs (changed rows only)."""
         if not vms:
             return {"synced": 0, "total": 0}
         
-        headers = {
-            'apikey': SERVICE_ROLE_KEY,
-            'Authorization': f'Bearer {SERVICE_ROLE_KEY}',
-            'Content-Type': 'application/json',
-            'Prefer': 'resolution=merge-duplicates,return=minimal'
-        }
-        
-        # Fetch VM lookup (vcenter_id -> db id mapping)
-        vms_response = requests.get(
-            f"{DSM_URL}/rest/v1/vcenter_vms?source_vcenter_id=eq.{source_vcenter_id}&select=id,vcenter_id",
-            headers={
-                'apikey': SERVICE_ROLE_KEY,
-                'Authorization': f'Bearer {SERVICE_ROLE_KEY}'
-            },
-            verify=VERIFY_SSL
-        )
-        vm_lookup = {}
-        if vms_response.status_code == 200:
-            from job_executor.utils import _safe_json_parse
-            vms_list = _safe_json_parse(vms_response) or []
-            vm_lookup = {v['vcenter_id']: v['id'] for v in vms_list if v.get('vcenter_id')}
+        vm_lookup = (id_maps or SyncIdMaps(source_vcenter_id)).vms()
+        if vm_lookup is None:
+            return {"synced": 0, "total": 0, "error": "VM id lookup failed"}
         
         # Collect all custom attributes from all VMs
         all_attrs = []
@@ -1614,48 +1690,111 @@ class VCenterDbUpsertMixin:
                     'attribute_key': attr.get('attribute_key', ''),
                     'attribute_value': attr.get('attribute_value', ''),
                     'source_vcenter_id': source_vcenter_id,
-                    'last_sync': utc_now_iso()
                 })
         
-        if not all_attrs:
-            return {"synced": 0, "total": 0}
+        result = self._sync_relationship_rows(
+            'vcenter_vm_custom_attributes', source_vcenter_id, all_attrs,
+            key_fields=('vm_id', 'attribute_key')
+        )
+        self.log(f"  ✓ Synced {result['synced']} VM custom attributes "
+                 f"({result['inserted']} written, {result['deleted']} removed)")
+        return result
+    
+    def _sync_relationship_rows(
+        self,
+        table: str,
+        source_vcenter_id: str,
+        rows: List[Dict],
+        key_fields: Tuple[str, ...],
+        timestamp_fields: Tuple[str, ...] = (),
+        touch_field: str = 'last_sync'
+    ) -> Dict[str, Any]:
+        """
+        Make a relationship table's rows for one vCenter match rows with
+        the fewest writes.
         
-        # Delete existing custom attributes for this vCenter (full refresh)
-        try:
-            requests.delete(
-                f"{DSM_URL}/rest/v1/vcenter_vm_custom_attributes?source_vcenter_id=eq.{source_vcenter_id}",
-                headers={
-                    'apikey': SERVICE_ROLE_KEY,
-                    'Authorization': f'Bearer {SERVICE_ROLE_KEY}'
-                },
-                verify=VERIFY_SSL,
-                timeout=30
-            )
-        except Exception as e:
-            self.log(f"  Warning: Could not delete old custom attributes: {e}", "WARN")
+        The existing rows are fetched once and compared locally by key:
+        rows whose key is gone are deleted, new rows and rows whose content
+        changed are upserted on the key (with touch_field set to now), and
+        identical rows are left alone.
         
-        # Insert new attributes in batches
-        synced = 0
-        batch_size = 100
+        Returns:
+            {"synced", "total", "inserted", "deleted"[, "error"]}
+        """
+        # Last row wins if vCenter reports the same key twice
+        desired = {tuple(r.get(f) for f in key_fields): r for r in rows}
+        result = {"synced": 0, "total": len(desired), "inserted": 0, "deleted": 0}
+        compare_fields = sorted({f for r in rows for f in r} - set(key_fields) - {'source_vcenter_id'})
+        
+        existing_rows = fetch_all_rows(table, {
+            'source_vcenter_id': f'eq.{source_vcenter_id}',
+            'select': ','.join(['id', *key_fields, *compare_fields]),
+        })
+        if existing_rows is None:
+            result["error"] = f"Could not read existing {table} rows"
+            self.log(f"  {result['error']}, skipping", "WARN")
+            return result
+        
+        def comparable(row):
+            values = []
+            for field in compare_fields:
+                value = row.get(field)
+                if field in timestamp_fields and isinstance(value, str):
+                    value = _parse_timestamp(value)
+                values.append(value)
+            return values
+        
+        existing = {}
+        stale_ids = []
+        for row in existing_rows:
+            key = tuple(row.get(f) for f in key_fields)
+            if key in existing or key not in desired:
+                stale_ids.append(row['id'])
+            else:
+                existing[key] = row
         
-        for i in range(0, len(all_attrs), batch_size):
-            batch = all_attrs[i:i+batch_size]
+        to_write = []
+        for key, row in desired.items():
+            current = existing.get(key)
+            if current is not None and comparable(current) == comparable(row):
+                continue
+            if current is not None and None in key:
+                # NULL key columns never match on conflict - replace the row instead
+                stale_ids.append(current['id'])
+            to_write.append({**row, touch_field: utc_now_iso()})
+        unchanged = len(desired) - len(to_write)
+        
+        errors = []
+        auth = {'apikey': SERVICE_ROLE_KEY, 'Authorization': f'Bearer {SERVICE_ROLE_KEY}'}
+        for i in range(0, len(stale_ids), RELATIONSHIP_DELETE_CHUNK_SIZE):
+            chunk = stale_ids[i:i + RELATIONSHIP_DELETE_CHUNK_SIZE]
             try:
-                response = requests.post(
-                    f"{DSM_URL}/rest/v1/vcenter_vm_custom_attributes",
-                    headers=headers,
-                    json=batch,
+                response = requests.delete(
+                    f"{DSM_URL}/rest/v1/{table}",
+                    params={'id': f"in.({','.join(chunk)})"},
+                    headers=auth,
                     verify=VERIFY_SSL,
                     timeout=30
                 )
-                
-                if response.status_code in [200, 201, 204]:
-                    synced += len(batch)
+                if response.status_code in [200, 204]:
+                    result["deleted"] += len(chunk)
                 else:
-                    self.log(f"  Custom attrs batch insert failed: HTTP {response.status_code}", "WARN")
-                    
+                    errors.append(f"delete HTTP {response.status_code}")
             except Exception as e:
-                self.log(f"  Custom attrs batch insert error: {e}", "ERROR")
-        
-        self.log(f"  ✓ Synced {synced} VM custom attributes")
-        return {"synced": synced, "total": len(all_attrs)}
+                errors.append(f"delete: {e}")
+        
+        written, failed = self._post_batches_parallel(
+            f"{DSM_URL}/rest/v1/{table}?on_conflict={','.join(key_fields)}",
+            to_write,
+            {**auth, 'Content-Type': 'application/json',
+             'Prefer': 'resolution=merge-duplicates,return=minimal'},
+            label=table
+        )
+        if failed:
+            errors.append(f"{len(failed)} rows not written")
+        result["inserted"] = len(written)
+        result["synced"] = unchanged + len(written)
+        if errors:
+            result["error"] = "; ".join(errors)
+            self.log(f"  {table} sync errors: {result['error']}", "WARN")
+        return result
@@ -0,0 +1,353 @@
+"""
+Incremental vCenter inventory sync using PropertyCollector WaitForUpdatesEx
+
+sync_vcenter_fast() retrieves every property of every object on each sync.
+An InventoryTracker instead keeps one filter open on a private
+PropertyCollector for the life of the vCenter session. The first poll
+returns the whole inventory; each later poll returns only the objects that
+entered, left or had a property change since the last version. Deltas are
+applied to the cached (obj, props) inventory, only affected objects are
+re-transformed, and only rows whose JSON differs from the last push are
+reported as changed.
+
+A full resync happens only when the collector no longer knows our version
+(InvalidCollectorVersion, filter gone), the session changed, or a caller
+asks for one.
+
+"Last push" means the last poll whose rows the caller committed (commit())
+after writing them to the database. Rows from a poll that is never
+committed - cancelled job, failed upsert - are compared against the last
+committed push again, so they are reported as changed on the next poll.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from pyVmomi import vim, vmodl
+
+from job_executor.config import ENABLE_DEEP_RELATIONSHIPS
+from job_executor.mixins.vcenter_property_collector import (
+    _build_moref_lookups,
+    _build_property_specs,
+    _build_traversal_spec,
+    _cluster_to_dict,
+    _collect_networks_direct,
+    _datastore_to_dict,
+    _dvpg_to_dict,
+    _dvs_to_dict,
+    _host_to_dict,
+    _inventory_view_types,
+    _network_to_dict,
+    _object_category,
+    _vm_to_dict,
+)
+
+logger = logging.getLogger(__name__)
+
+
+CATEGORIES = ("clusters", "hosts", "vms", "datastores", "networks", "dvpgs", "dvswitches")
+
+_TRANSFORMS = {
+    "clusters": _cluster_to_dict,
+    "hosts": _host_to_dict,
+    "vms": _vm_to_dict,
+    "datastores": _datastore_to_dict,
+    "networks": _network_to_dict,
+    "dvpgs": _dvpg_to_dict,
+    "dvswitches": _dvs_to_dict,
+}
+
+# Object updates per WaitForUpdatesEx response (larger sets arrive truncated)
+UPDATE_PAGE_SIZE = 1000
+
+
+class InventoryTracker:
+    """
+    Cached inventory of one vCenter session, kept current with WaitForUpdatesEx.
+
+    Non-VM objects are re-transformed on every poll (there are few of them
+    and their rows carry aggregates such as cluster VM counts). VMs are
+    re-transformed only when they changed, or when host names or host
+    cluster membership changed, since VM rows embed both.
+    """
+
+    def __init__(self, si, enable_deep: bool = None):
+        self.si = si
+        self.enable_deep = ENABLE_DEEP_RELATIONSHIPS if enable_deep is None else enable_deep
+        self.lock = threading.Lock()
+        self._collector = None
+        self._view = None
+        self._version: Optional[str] = None  # None until the filter exists
+        self._objects: Dict[str, Dict[str, tuple]] = {c: {} for c in CATEGORIES}
+        self._rows: Dict[str, Dict[str, Dict]] = {c: {} for c in CATEGORIES}
+        self._vm_context = None
+        self._pending = None  # (rows, vm_context) of the last poll until commit()
+        self.full_resyncs = 0
+
+    # ------------------------------------------------------------------
+    # Filter lifecycle
+    # ------------------------------------------------------------------
+
+    def _create_filter(self, content):
+        """(Re)create the view, collector and filter; the next wait returns everything"""
+        self.close()
+        self._collector = content.propertyCollector.CreatePropertyCollector()
+        self._view = content.viewManager.CreateContainerView(
+            container=content.rootFolder,
+            type=_inventory_view_types(),
+            recursive=True
+        )
+        filter_spec = vim.PropertyCollector.FilterSpec(
+            objectSet=[vim.PropertyCollector.ObjectSpec(
+                obj=self._view,
+                selectSet=[_build_traversal_spec()],
+                skip=False
+            )],
+            propSet=_build_property_specs(self.enable_deep)
+        )
+        self._collector.CreateFilter(filter_spec, partialUpdates=False)
+        self._version = ''
+        self._objects = {c: {} for c in CATEGORIES}
+        self.full_resyncs += 1
+
+    def close(self):
+        """Destroy the private collector (and with it the filter) and the view"""
+        for ref in (self._collector, self._view):
+            if ref is not None:
+                try:
+                    ref.Destroy()
+                except Exception:
+                    pass
+        self._collector = None
+        self._view = None
+        self._version = None
+
+    def reset_rows(self):
+        """Forget what was pushed, so the next poll reports every row as changed"""
+        with self.lock:
+            self._rows = {c: {} for c in CATEGORIES}
+            self._vm_context = None
+            self._pending = None
+
+    def commit(self):
+        """Record the last poll's rows as pushed (call once they are in the database)"""
+        with self.lock:
+            if self._pending is not None:
+                self._rows, self._vm_context = self._pending
+                self._pending = None
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def _wait_for_updates(self) -> Dict[str, Set[str]]:
+        """Drain pending updates into the cache; returns changed MoRefs per category"""
+        dirty = {c: set() for c in CATEGORIES}
+        options = vim.PropertyCollector.WaitOptions(maxWaitSeconds=0, maxObjectUpdates=UPDATE_PAGE_SIZE)
+        while True:
+            update_set = self._collector.WaitForUpdatesEx(self._version, options)
+            if update_set is None:
+                break  # Nothing changed since self._version
+            for filter_update in update_set.filterSet or []:
+                for object_update in filter_update.objectSet or []:
+                    self._apply(object_update, dirty)
+            self._version = update_set.version
+            if not update_set.truncated:
+                break
+        return dirty
+
+    def _apply(self, object_update, dirty: Dict[str, Set[str]]):
+        obj = object_update.obj
+        category = _object_category(obj)
+        if category is None:
+            return
+        moref = str(obj._moId)
+        kind = str(object_update.kind)
+
+        if kind == 'leave':
+            self._objects[category].pop(moref, None)
+            dirty[category].add(moref)
+            return
+
+        existing = self._objects[category].get(moref) if kind != 'enter' else None
+        props = dict(existing[1]) if existing else {}
+        for change in object_update.changeSet or []:
+            if str(change.op) in ('remove', 'indirectRemove'):
+                props.pop(change.name, None)
+            else:
+                props[change.name] = change.val
+        self._objects[category][moref] = (obj, props)
+        dirty[category].add(moref)
+
+    def _add_direct_networks(self, content, dirty: Dict[str, Set[str]], errors: List[Dict]):
+        """Same fallback as collect_vcenter_inventory() when the view yields no networks"""
+        logger.warning("PropertyCollector returned no networks - using direct datacenter traversal")
+        try:
+            direct_result = _collect_networks_direct(content)
+        except Exception as e:
+            errors.append({
+                "object": "DirectNetworkCollection",
+                "message": f"Direct network traversal failed: {str(e)}",
+                "severity": "warning"
+            })
+            return
+        for category in ("networks", "dvpgs", "dvswitches"):
+            for obj, props in direct_result[category]:
+                moref = str(obj._moId)
+                self._objects[category][moref] = (obj, props)
+                dirty[category].add(moref)
+
+    # ------------------------------------------------------------------
+    # Poll
+    # ------------------------------------------------------------------
+
+    def poll(self, content, source_vcenter_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Bring the cache up to date and transform what changed.
+
+        "changed" and "removed" are relative to the last committed poll;
+        call commit() once they have been written.
+
+        Returns:
+            sync_vcenter_fast()-shaped result (full row lists from the cache)
+            plus:
+                "mode": "full" or "incremental"
+                "changed": {category: [rows that differ from the last poll]}
+                "removed": {category: [MoRefs no longer in vCenter]}
+        """
+        with self.lock:
+            start_time = time.time()
+            errors: List[Dict] = []
+            mode = "incremental"
+
+            if self._version is None:
+                self._create_filter(content)
+                mode = "full"
+            try:
+                dirty = self._wait_for_updates()
+            except (vmodl.query.InvalidCollectorVersion, vmodl.fault.ManagedObjectNotFound) as e:
+                logger.warning(f"PropertyCollector version lost ({type(e).__name__}) - full resync")
+                self._create_filter(content)
+                mode = "full"
+                dirty = self._wait_for_updates()
+
+            if mode == "full" and not any(self._objects[c] for c in ("networks", "dvpgs", "dvswitches")):
+                self._add_direct_networks(content, dirty, errors)
+            fetch_time_ms = int((time.time() - start_time) * 1000)
+
+            process_start = time.time()
+            changed, removed, polled_rows, vm_context = self._transform(dirty, errors)
+            self._pending = (polled_rows, vm_context)
+            process_time_ms = int((time.time() - process_start) * 1000)
+
+            rows = {c: list(polled_rows[c].values()) for c in CATEGORIES}
+            counts = {c: len(rows[c]) for c in CATEGORIES}
+            changed_count = sum(len(changed[c]) for c in CATEGORIES)
+            logger.info(
+                f"Incremental sync ({mode}): {changed_count} changed rows, "
+                f"{sum(len(removed[c]) for c in CATEGORIES)} removed objects, "
+                f"fetch={fetch_time_ms}ms, process={process_time_ms}ms"
+            )
+
+            return {
+                "source_vcenter_id": source_vcenter_id,
+                **rows,
+                "mode": mode,
+                "changed": changed,
+                "removed": removed,
+                "fetch_time_ms": fetch_time_ms,
+                "process_time_ms": process_time_ms,
+                "total_objects": sum(counts.values()),
+                "changed_objects": changed_count,
+                "errors": errors,
+                "counts": counts,
+            }
+
+    def _transform(self, dirty: Dict[str, Set[str]], errors: List[Dict]):
+        inventory = {c: list(self._objects[c].values()) for c in CATEGORIES}
+        lookups = _build_moref_lookups(inventory)
+
+        vm_context = (lookups["host_moref_to_name"], lookups["host_moref_to_cluster_name"])
+        if vm_context != self._vm_context or self._pending is not None:
+            # Host context changed, or VMs dirtied by an uncommitted poll are not in dirty
+            vm_targets = list(self._objects["vms"])
+        else:
+            vm_targets = dirty["vms"]
+
+        changed = {c: [] for c in CATEGORIES}
+        removed = {c: [] for c in CATEGORIES}
+        polled_rows = {c: dict(self._rows[c]) for c in CATEGORIES}
+        for category in CATEGORIES:
+            objects = self._objects[category]
+            rows = polled_rows[category]
+
+            for moref in [m for m in rows if m not in objects]:
+                del rows[moref]
+                removed[category].append(moref)
+
+            for moref in (vm_targets if category == "vms" else list(objects)):
+                entry = objects.get(moref)
+                if entry is None:
+                    continue
+                try:
+                    row = _TRANSFORMS[category](entry[0], entry[1], lookups)
+                except Exception as e:
+                    errors.append({
+                        "object": moref,
+                        "message": f"{category} processing error: {str(e)}",
+                        "severity": "warning"
+                    })
+                    continue
+                if rows.get(moref) != row:
+                    rows[moref] = row
+                    changed[category].append(row)
+        return changed, removed, polled_rows, vm_context
+
+
+# =============================================================================
+# Per-vCenter trackers
+# =============================================================================
+
+_trackers_lock = threading.Lock()
+_trackers: Dict[str, InventoryTracker] = {}
+
+
+def get_inventory_tracker(source_vcenter_id: str, si) -> InventoryTracker:
+    """Tracker for a vCenter, replaced when the session (ServiceInstance) changes"""
+    with _trackers_lock:
+        tracker = _trackers.get(source_vcenter_id)
+        if tracker is not None and tracker.si is not si:
+            tracker.close()  # Filter belonged to the previous session
+            tracker = None
+        if tracker is None:
+            tracker = _trackers[source_vcenter_id] = InventoryTracker(si)
+        return tracker
+
+
+def drop_inventory_tracker(source_vcenter_id: str):
+    """Discard a vCenter's tracker; the next sync starts with a full resync"""
+    with _trackers_lock:
+        tracker = _trackers.pop(source_vcenter_id, None)
+    if tracker is not None:
+        tracker.close()
+
+
+def sync_vcenter_incremental(si, source_vcenter_id: str, full_resync: bool = False) -> Dict[str, Any]:
+    """
+    Stage B for scheduled and repeated syncs: only deltas since the last poll.
+
+    Args:
+        si: Connected ServiceInstance (the filter lives in its session)
+        source_vcenter_id: vCenter UUID the tracker is kept under
+        full_resync: Rebuild the filter and report every row as changed
+    """
+    if full_resync:
+        drop_inventory_tracker(source_vcenter_id)
+    tracker = get_inventory_tracker(source_vcenter_id, si)
+    try:
+        return tracker.poll(si.RetrieveContent(), source_vcenter_id)
+    except Exception:
+        drop_inventory_tracker(source_vcenter_id)
+        raise
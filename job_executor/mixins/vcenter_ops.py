@@ -6,9 +6,8 @@ import time
 import requests
 from typing import Dict, List, Optional
 from datetime import datetime
-from pyVim.connect import SmartConnect, Disconnect
+from pyVim.connect import SmartConnect
 from pyVmomi import vim, vmodl
-import atexit
 
 from job_executor.config import (
     DSM_URL,
@@ -19,7 +18,10 @@ from job_executor.config import (
     VCENTER_PASSWORD
 )
 from job_executor.utils import _safe_json_parse, utc_now_iso
+from job_executor.mixins.vcenter_alarm_collector import collect_triggered_alarms
 from job_executor.mixins.vcenter_errors import parse_vcenter_error
+from job_executor.vcenter_lookup import find_by_moref, find_by_name
+from job_executor.vcenter_pool import get_vcenter_pool
 
 
 class VCenterMixin:
@@ -1168,7 +1170,7 @@ class VCenterMixin:
                 result['error'] = f"vCenter {vcenter_id} not found in database"
                 return result
             
-            vc = self.connect_vcenter(settings=vcenter_settings, force_reconnect=True)
+            vc = self.connect_vcenter(settings=vcenter_settings)
             if not vc:
                 result['error'] = f"Failed to connect to vCenter {vcenter_settings.get('host')}"
                 return result
@@ -1285,45 +1287,18 @@ class VCenterMixin:
     
     def _find_datastore_in_vcenter(self, content, datastore_name: str):
         """
-        Recursively search for datastore in vCenter, including StoragePods.
+        Find a datastore by name anywhere in vCenter, including StoragePods.
         
-        This handles:
-        - Direct children of datastoreFolder
-        - Datastores inside StoragePods (datastore clusters)
-        - Nested folder structures
+        Uses the per-connection name index (one PropertyCollector retrieval
+        over every datastore - direct children of datastoreFolder, datastores
+        inside StoragePods and nested folders alike) instead of walking the
+        folder tree one round trip per object.
         """
-        def search_folder(folder, depth=0):
-            if depth > 10:  # Prevent infinite recursion
-                return None
-            try:
-                for item in folder.childEntity:
-                    # Direct datastore match
-                    if isinstance(item, vim.Datastore):
-                        if item.name == datastore_name:
-                            return item
-                    # StoragePod (datastore cluster) - search children
-                    elif isinstance(item, vim.StoragePod):
-                        for ds in item.childEntity:
-                            if isinstance(ds, vim.Datastore) and ds.name == datastore_name:
-                                return ds
-                    # Nested folder - recurse
-                    elif hasattr(item, 'childEntity'):
-                        result = search_folder(item, depth + 1)
-                        if result:
-                            return result
-            except Exception as e:
-                self.log(f"[_find_datastore] Error searching folder: {e}", "DEBUG")
+        try:
+            return find_by_name(content, vim.Datastore, datastore_name)
+        except Exception as e:
+            self.log(f"[_find_datastore] Error searching datastores: {e}", "DEBUG")
             return None
-        
-        # Search all datacenters
-        for dc in content.rootFolder.childEntity:
-            if isinstance(dc, vim.Datacenter):
-                if hasattr(dc, 'datastoreFolder') and dc.datastoreFolder:
-                    result = search_folder(dc.datastoreFolder)
-                    if result:
-                        return result
-        
-        return None
     
     def _sync_datastore_to_db(self, vcenter_id: str, live_data: Dict) -> bool:
         """Update vcenter_datastores table with live data."""
@@ -1405,18 +1380,12 @@ class VCenterMixin:
         result = {'live': True, 'found': False, 'data': None, 'synced': False, 'error': None}
         
         try:
-            # Search for VM by name or MoRef
-            vm_view = content.viewManager.CreateContainerView(
-                content.rootFolder, [vim.VirtualMachine], True
-            )
-            
+            # Search for VM by MoRef, then by name
             target_vm = None
-            for vm in vm_view.view:
-                if vm.name == vm_identifier or str(vm._moId) == vm_identifier:
-                    target_vm = vm
-                    break
-            
-            vm_view.Destroy()
+            if vm_identifier.startswith('vm-'):
+                target_vm = find_by_moref(content, vim.VirtualMachine, vm_identifier)
+            if not target_vm:
+                target_vm = find_by_name(content, vim.VirtualMachine, vm_identifier)
             
             if not target_vm:
                 return result
@@ -1508,65 +1477,69 @@ class VCenterMixin:
         
         return result
 
-    def connect_vcenter(self, settings=None, force_reconnect=False):
-        """Connect to vCenter if not already connected, with session validation.
+    def connect_vcenter(self, settings=None, force_reconnect=False, lease=False):
+        """Connect to vCenter using the shared session pool, with session validation.
+        
+        Sessions are pooled per (host, user), so switching between vCenters
+        no longer logs out of the previous one, and a repeat connect reuses
+        the pooled login instead of opening a new one.
+        
+        By default no lease is taken: self.vcenter_conn is replaced on every
+        connect, so it cannot hand a lease back, and the pool logs the
+        session out once it has been idle for a while. Pass lease=True to
+        hold the session until release_vcenter_session() is called.
         
         Args:
             settings: Optional vCenter connection settings dict
-            force_reconnect: If True, disconnect existing connection and reconnect
+            force_reconnect: If True, check the pooled session now (and log in
+                again if it is no longer authenticated)
+            lease: Take a pool lease the caller must release
         
         Returns:
             vCenter connection object or None if connection fails
         """
-        # Determine the target host for this connection request
-        target_host = settings.get('host') if settings else VCENTER_HOST
-        
-        # If we have a cached connection, check if it's to the SAME vCenter
-        if self.vcenter_conn and not force_reconnect:
-            # Check if cached connection is to a DIFFERENT vCenter
-            cached_host = getattr(self, 'vcenter_conn_host', None)
-            if cached_host and cached_host != target_host:
-                self.log(f"Switching vCenter connection: {cached_host} → {target_host}")
-                # Force disconnect from old vCenter before connecting to new one
-                try:
-                    Disconnect(self.vcenter_conn)
-                except:
-                    pass
-                self.vcenter_conn = None
-                self.vcenter_conn_host = None
-            else:
-                # Same vCenter (or unknown) - validate session is still alive
-                try:
-                    # Quick validation - check session is still authenticated
-                    content = self.vcenter_conn.RetrieveContent()
-                    session = content.sessionManager.currentSession
-                    if session is not None:
-                        return self.vcenter_conn  # Session still valid
-                    else:
-                        self.log("vCenter session expired (no active session), reconnecting...", "WARN")
-                except vim.fault.NotAuthenticated:
-                    self.log("vCenter session not authenticated, reconnecting...", "WARN")
-                except Exception as e:
-                    self.log(f"vCenter connection lost ({e}), reconnecting...", "WARN")
-                
-                # Clear stale connection
-                try:
-                    Disconnect(self.vcenter_conn)
-                except:
-                    pass
-                self.vcenter_conn = None
-                self.vcenter_conn_host = None
-        elif force_reconnect and self.vcenter_conn:
-            # Force disconnect existing connection
-            try:
-                Disconnect(self.vcenter_conn)
-            except:
-                pass
-            self.vcenter_conn = None
-            self.vcenter_conn_host = None
+        si = self.vcenter_session(settings, revalidate=force_reconnect, lease=lease)
+        if si is None:
+            return None
+        self.vcenter_conn = si
+        # Track which vCenter this connection is for
+        self.vcenter_conn_host = settings.get('host') if settings else VCENTER_HOST
+        return self.vcenter_conn
 
+    def vcenter_session(self, settings=None, revalidate=False, lease=True):
+        """Pooled ServiceInstance for the vCenter in settings (or the env defaults).
+        
+        The session is shared with other jobs and threads - do not
+        Disconnect() it. With lease=True (the default) hand it back with
+        release_vcenter_session() when done.
+        """
+        host = settings.get('host') if settings else VCENTER_HOST
+        user = settings.get('username') if settings else VCENTER_USER
+        secret = (settings.get('password') or settings.get('password_encrypted')) if settings else VCENTER_PASSWORD
+        verify_ssl = settings.get('verify_ssl', VERIFY_SSL) if settings else VERIFY_SSL
+        return get_vcenter_pool().get(
+            host, user,
+            login=lambda: self.open_vcenter_session(settings),
+            secret=secret,
+            revalidate=revalidate,
+            verify_ssl=verify_ssl,
+            lease=lease
+        )
+
+    def open_vcenter_session(self, settings=None):
+        """Log in to vCenter and return a new ServiceInstance (not pooled).
+        
+        Used by the session pool to log in; the caller owns the session and
+        should Disconnect() it when done. Prefer vcenter_session().
+        
+        Args:
+            settings: Optional vCenter connection settings dict
+        
+        Returns:
+            ServiceInstance or None if the login fails
+        """
         # Use provided settings or fall back to environment variables
-        host = target_host
+        host = settings.get('host') if settings else VCENTER_HOST
         user = settings.get('username') if settings else VCENTER_USER
         
         # Handle encrypted passwords from database
@@ -1600,24 +1573,16 @@ class VCenterMixin:
             context.verify_mode = ssl.CERT_NONE
         
         try:
-            # Add timeout to prevent indefinite hanging
-            import socket
-            old_timeout = socket.getdefaulttimeout()
-            socket.setdefaulttimeout(30)  # 30 second timeout
-            
-            try:
-                self.vcenter_conn = SmartConnect(
-                    host=host,
-                    user=user,
-                    pwd=pwd,
-                    sslContext=context
-                )
-            finally:
-                socket.setdefaulttimeout(old_timeout)  # Reset timeout
+            # Timeout on the connection's socket (not the process-wide default,
+            # which other threads may be changing) to prevent indefinite hanging
+            si = SmartConnect(
+                host=host,
+                user=user,
+                pwd=pwd,
+                sslContext=context,
+                httpConnectionTimeout=30
+            )
             
-            atexit.register(Disconnect, self.vcenter_conn)
-            # Track which vCenter this connection is for
-            self.vcenter_conn_host = host
             self.log(f"✓ Connected to vCenter at {host}")
             self.log_vcenter_activity(
                 operation="connect_vcenter",
@@ -1625,7 +1590,7 @@ class VCenterMixin:
                 success=True,
                 details={"verify_ssl": verify_ssl}
             )
-            return self.vcenter_conn
+            return si
         except Exception as e:
             self.log(f"✗ Failed to connect to vCenter: {e}", "ERROR")
             self.log_vcenter_activity(
@@ -2645,6 +2610,7 @@ class VCenterMixin:
             # Handle session expiry with automatic retry
             if _retry_count < max_retries:
                 self.log(f"  vCenter session not authenticated, reconnecting (retry {_retry_count + 1}/{max_retries})...", "WARN")
+                get_vcenter_pool().invalidate(self.vcenter_conn)
                 self.vcenter_conn = None  # Force fresh connection
                 return self.enter_vcenter_maintenance_mode(host_id, timeout, _retry_count=_retry_count + 1)
             else:
@@ -2820,6 +2786,7 @@ class VCenterMixin:
             # Handle session expiry with automatic retry
             if _retry_count < max_retries:
                 self.log(f"  vCenter session not authenticated, reconnecting (retry {_retry_count + 1}/{max_retries})...", "WARN")
+                get_vcenter_pool().invalidate(self.vcenter_conn)
                 self.vcenter_conn = None  # Force fresh connection
                 return self.exit_vcenter_maintenance_mode(host_id, timeout, _retry_count=_retry_count + 1)
             else:
@@ -3450,6 +3417,10 @@ class VCenterMixin:
         """
         Sync triggered alarms from vCenter to the vcenter_alarms table.
         
+        Alarm definitions and entity names are fetched in one bulk
+        PropertyCollector retrieval (definitions are cached across syncs),
+        and only new, changed and cleared alarms are written.
+        
         Args:
             content: vCenter ServiceInstance content object
             source_vcenter_id: The UUID of the vCenter in our database
@@ -3464,158 +3435,35 @@ class VCenterMixin:
         
         try:
             # Collect triggered alarms from vCenter
-            root_folder = content.rootFolder
-            triggered_alarm_states = root_folder.triggeredAlarmState or []
+            alarm_records, result['errors'] = collect_triggered_alarms(content, source_vcenter_id)
             
-            self.log(f"  Found {len(triggered_alarm_states)} triggered alarms in vCenter")
+            self.log(f"  Found {len(alarm_records)} triggered alarms in vCenter")
             
             if progress_callback:
-                progress_callback(5, f"Found {len(triggered_alarm_states)} triggered alarms")
-            
-            # Build alarm records
-            alarm_records = []
-            active_alarm_keys = set()
-            
-            for idx, alarm_state in enumerate(triggered_alarm_states):
-                # Check for cancellation every 50 alarms
-                if idx > 0 and idx % 50 == 0 and job_id:
-                    if self.check_job_cancelled(job_id):
-                        self.log(f"  Job cancelled during alarm sync at {idx}/{len(triggered_alarm_states)}")
-                        return result
-                
-                try:
-                    # Extract alarm details
-                    alarm_key = str(alarm_state.key) if hasattr(alarm_state, 'key') else None
-                    if not alarm_key:
-                        # Generate key from alarm + entity
-                        alarm_moref = str(alarm_state.alarm._moId) if alarm_state.alarm else 'unknown'
-                        entity_moref = str(alarm_state.entity._moId) if alarm_state.entity else 'unknown'
-                        alarm_key = f"{alarm_moref}.{entity_moref}"
-                    
-                    active_alarm_keys.add(alarm_key)
-                    
-                    # Entity info
-                    entity = alarm_state.entity
-                    entity_type = type(entity).__name__ if entity else 'Unknown'
-                    entity_name = entity.name if entity and hasattr(entity, 'name') else 'Unknown'
-                    entity_id = str(entity._moId) if entity else None
-                    
-                    # Alarm definition info
-                    alarm_def = alarm_state.alarm
-                    alarm_name = 'Unknown Alarm'
-                    alarm_description = None
-                    if alarm_def:
-                        try:
-                            alarm_info = alarm_def.info
-                            alarm_name = alarm_info.name if alarm_info else 'Unknown Alarm'
-                            alarm_description = alarm_info.description if alarm_info else None
-                        except:
-                            alarm_name = str(alarm_def._moId)
-                    
-                    # Status and timing
-                    overall_status = str(alarm_state.overallStatus) if hasattr(alarm_state, 'overallStatus') else 'gray'
-                    acknowledged = bool(alarm_state.acknowledged) if hasattr(alarm_state, 'acknowledged') else False
-                    triggered_time = alarm_state.time if hasattr(alarm_state, 'time') else None
-                    
-                    # Convert time to ISO format
-                    triggered_at = None
-                    if triggered_time:
-                        try:
-                            triggered_at = triggered_time.isoformat()
-                        except:
-                            triggered_at = str(triggered_time)
-                    
-                    alarm_record = {
-                        'alarm_key': alarm_key,
-                        'entity_type': entity_type,
-                        'entity_name': entity_name,
-                        'entity_id': entity_id,
-                        'alarm_name': alarm_name,
-                        'alarm_status': overall_status,
-                        'acknowledged': acknowledged,
-                        'triggered_at': triggered_at,
-                        'description': alarm_description,
-                        'source_vcenter_id': source_vcenter_id,
-                        'updated_at': utc_now_iso()
-                    }
-                    
-                    alarm_records.append(alarm_record)
-                    
-                except Exception as alarm_err:
-                    self.log(f"    Error processing alarm: {alarm_err}", "DEBUG")
-                    result['errors'] += 1
-                    continue
+                progress_callback(5, f"Found {len(alarm_records)} triggered alarms")
             
-            # Upsert alarms to database
-            if alarm_records:
-                if progress_callback:
-                    progress_callback(50, f"Upserting {len(alarm_records)} alarms to database")
-                
-                # Use upsert with ON CONFLICT
-                headers = {
-                    'apikey': SERVICE_ROLE_KEY,
-                    'Authorization': f'Bearer {SERVICE_ROLE_KEY}',
-                    'Content-Type': 'application/json',
-                    'Prefer': 'resolution=merge-duplicates'
-                }
-                
-                # Process in batches
-                batch_size = 100
-                for i in range(0, len(alarm_records), batch_size):
-                    batch = alarm_records[i:i + batch_size]
-                    
-                    response = requests.post(
-                        f"{DSM_URL}/rest/v1/vcenter_alarms?on_conflict=alarm_key",
-                        headers=headers,
-                        json=batch,
-                        verify=VERIFY_SSL,
-                        timeout=30
-                    )
-                    
-                    if response.status_code in [200, 201]:
-                        result['synced'] += len(batch)
-                    else:
-                        self.log(f"    Failed to upsert alarm batch: {response.status_code} - {response.text[:200]}", "WARN")
-                        result['errors'] += len(batch)
+            if job_id and self.check_job_cancelled(job_id):
+                self.log(f"  Job cancelled during alarm sync")
+                return result
             
-            # Clear stale alarms (alarms no longer active in vCenter)
+            # Write only alarm state differences; clear alarms no longer active in vCenter
             if progress_callback:
-                progress_callback(80, "Clearing stale alarms")
+                progress_callback(50, f"Syncing {len(alarm_records)} alarms to database")
             
-            # Get existing alarms for this vCenter
-            response = requests.get(
-                f"{DSM_URL}/rest/v1/vcenter_alarms?source_vcenter_id=eq.{source_vcenter_id}&select=id,alarm_key",
-                headers={'apikey': SERVICE_ROLE_KEY, 'Authorization': f'Bearer {SERVICE_ROLE_KEY}'},
-                verify=VERIFY_SSL,
-                timeout=30
+            diff = self._sync_relationship_rows(
+                'vcenter_alarms', source_vcenter_id, alarm_records,
+                key_fields=('alarm_key',), timestamp_fields=('triggered_at',), touch_field='updated_at'
             )
-            
-            if response.status_code == 200:
-                existing_alarms = _safe_json_parse(response) or []
-                stale_alarm_ids = []
-                
-                for existing in existing_alarms:
-                    if existing.get('alarm_key') not in active_alarm_keys:
-                        stale_alarm_ids.append(existing['id'])
-                
-                # Delete stale alarms
-                if stale_alarm_ids:
-                    for alarm_id in stale_alarm_ids:
-                        del_response = requests.delete(
-                            f"{DSM_URL}/rest/v1/vcenter_alarms?id=eq.{alarm_id}",
-                            headers={'apikey': SERVICE_ROLE_KEY, 'Authorization': f'Bearer {SERVICE_ROLE_KEY}'},
-                            verify=VERIFY_SSL,
-                            timeout=10
-                        )
-                        if del_response.status_code in [200, 204]:
-                            result['cleared'] += 1
-                    
-                    self.log(f"  Cleared {result['cleared']} stale alarms")
+            result['synced'] = diff['synced']
+            result['cleared'] = diff['deleted']
+            if diff.get('error'):
+                result['errors'] += 1
             
             if progress_callback:
                 progress_callback(100, f"Alarm sync complete: {result['synced']} synced, {result['cleared']} cleared")
             
-            self.log(f"  Alarm sync complete: {result['synced']} synced, {result['cleared']} cleared, {result['errors']} errors")
+            self.log(f"  Alarm sync complete: {result['synced']} synced ({diff['inserted']} changed), "
+                     f"{result['cleared']} cleared, {result['errors']} errors")
             
         except Exception as e:
             self.log(f"  Error syncing alarms: {e}", "ERROR")
@@ -10,7 +10,7 @@ Contract defined in: docs/vmware_sync_remaster_1.md
 
 import time
 import logging
-from typing import Dict, List, Tuple, Any, Optional
+from typing import Dict, Iterator, List, Tuple, Any, Optional
 
 from pyVmomi import vim, vmodl
 
@@ -161,6 +161,51 @@ def _parse_object_content(oc) -> Tuple[Any, Dict[str, Any]]:
     return obj, props
 
 
+def _object_category(obj) -> Optional[str]:
+    """
+    Inventory category for a PropertyCollector object.
+    
+    Networks are also matched by type name and MoRef prefix, since some
+    vCenter versions return them as generic managed objects.
+    
+    Returns:
+        "vms", "hosts", "clusters", "datastores", "dvpgs", "dvswitches",
+        "networks" or None for anything else
+    """
+    type_name = type(obj).__name__
+    full_type_str = str(type(obj))  # Full class path for pyVmomi
+    moref_id = str(obj._moId) if hasattr(obj, '_moId') else ''
+    
+    if isinstance(obj, vim.VirtualMachine):
+        return "vms"
+    if isinstance(obj, vim.HostSystem):
+        return "hosts"
+    if isinstance(obj, vim.ClusterComputeResource):
+        return "clusters"
+    if isinstance(obj, vim.Datastore):
+        return "datastores"
+    # DVPGs - multiple detection strategies including MoRef prefix fallback
+    if (isinstance(obj, vim.dvs.DistributedVirtualPortgroup) or
+            'DistributedVirtualPortgroup' in type_name or
+            'DistributedVirtualPortgroup' in full_type_str or
+            moref_id.startswith('dvportgroup-')):
+        return "dvpgs"
+    # DVS - multiple detection strategies including MoRef prefix fallback
+    if (isinstance(obj, vim.DistributedVirtualSwitch) or
+            'DistributedVirtualSwitch' in type_name or
+            'DistributedVirtualSwitch' in full_type_str or
+            'VmwareDistributedVirtualSwitch' in type_name or
+            moref_id.startswith('dvs-')):
+        return "dvswitches"
+    # Standard networks - multiple detection strategies including MoRef prefix fallback
+    if (isinstance(obj, vim.Network) or
+            type_name == 'Network' or
+            'vim.Network' in full_type_str or
+            moref_id.startswith('network-')):
+        return "networks"
+    return None
+
+
 def _build_property_specs(enable_deep: bool = False) -> List[vim.PropertyCollector.PropertySpec]:
     """
     Build PropertySpec list for all 7 object types.
@@ -225,6 +270,19 @@ def _build_property_specs(enable_deep: bool = False) -> List[vim.PropertyCollect
     return specs
 
 
+def _inventory_view_types() -> List[type]:
+    """The 7 object types covered by the inventory ContainerView."""
+    return [
+        vim.VirtualMachine,
+        vim.HostSystem,
+        vim.ClusterComputeResource,
+        vim.Datastore,
+        vim.Network,
+        vim.dvs.DistributedVirtualPortgroup,
+        vim.DistributedVirtualSwitch,
+    ]
+
+
 def _build_traversal_spec() -> vim.PropertyCollector.TraversalSpec:
     """
     Build TraversalSpec for ContainerView traversal.
@@ -242,6 +300,57 @@ def _build_traversal_spec() -> vim.PropertyCollector.TraversalSpec:
     )
 
 
+def iter_property_pages(
+    content,
+    view_types: List[type],
+    property_specs: List[vim.PropertyCollector.PropertySpec],
+    page_size: int = 1000
+) -> Iterator[List[Any]]:
+    """
+    Yield RetrievePropertiesEx results one page (list of ObjectContent) at a time.
+    
+    The ContainerView is destroyed - and a retrieval that was not read to
+    the end is cancelled - when the generator finishes or is closed.
+    """
+    view_ref = content.viewManager.CreateContainerView(
+        container=content.rootFolder,
+        type=view_types,
+        recursive=True
+    )
+    pc = content.propertyCollector
+    token = None
+    try:
+        filter_spec = vim.PropertyCollector.FilterSpec(
+            objectSet=[vim.PropertyCollector.ObjectSpec(
+                obj=view_ref,
+                selectSet=[_build_traversal_spec()],
+                skip=False
+            )],
+            propSet=property_specs
+        )
+        options = vim.PropertyCollector.RetrieveOptions(maxObjects=page_size)
+        result = pc.RetrievePropertiesEx(specSet=[filter_spec], options=options)
+        
+        # MANDATORY: Handle pagination token
+        while result is not None:
+            token = result.token
+            yield list(result.objects or [])
+            if not token:
+                break
+            result = pc.ContinueRetrievePropertiesEx(token)
+        token = None
+    finally:
+        if token:
+            try:
+                pc.CancelRetrievePropertiesEx(token)
+            except Exception:
+                pass
+        try:
+            view_ref.Destroy()
+        except Exception:
+            pass
+
+
 # =============================================================================
 # Stage A: collect_vcenter_inventory() - RAW Inventory Collection
 # =============================================================================
@@ -287,54 +396,11 @@ def collect_vcenter_inventory(
     dvpgs = []
     dvswitches = []
     
-    view_ref = None
-    
     try:
-        # Create single ContainerView for all 7 object types
-        view_ref = content.viewManager.CreateContainerView(
-            container=content.rootFolder,
-            type=[
-                vim.VirtualMachine,
-                vim.HostSystem,
-                vim.ClusterComputeResource,
-                vim.Datastore,
-                vim.Network,
-                vim.dvs.DistributedVirtualPortgroup,
-                vim.DistributedVirtualSwitch,
-            ],
-            recursive=True
-        )
-        
-        # Build PropertyCollector filter
-        traversal_spec = _build_traversal_spec()
-        
-        obj_spec = vim.PropertyCollector.ObjectSpec(
-            obj=view_ref,
-            selectSet=[traversal_spec],
-            skip=False
-        )
-        
-        property_specs = _build_property_specs(enable_deep)
-        
-        filter_spec = vim.PropertyCollector.FilterSpec(
-            objectSet=[obj_spec],
-            propSet=property_specs
-        )
-        
-        # Execute with MANDATORY pagination
-        pc = content.propertyCollector
-        options = vim.PropertyCollector.RetrieveOptions(maxObjects=1000)
-        
-        result = pc.RetrievePropertiesEx(specSet=[filter_spec], options=options)
-        
-        objects = result.objects or []
-        token = result.token
-        
-        # MANDATORY: Handle pagination token
-        while token:
-            result = pc.ContinueRetrievePropertiesEx(token)
-            objects.extend(result.objects or [])
-            token = result.token
+        # Single ContainerView for all 7 object types, read page by page
+        objects = []
+        for page in iter_property_pages(content, _inventory_view_types(), _build_property_specs(enable_deep)):
+            objects.extend(page)
         
         logger.info(f"PropertyCollector fetched {len(objects)} TOTAL objects (before categorization)")
         
@@ -349,46 +415,31 @@ def collect_vcenter_inventory(
         logger.info(f"PropertyCollector objects by type: {type_counts}")
         
         # Parse and categorize objects
+        categorized = {
+            "clusters": clusters,
+            "hosts": hosts,
+            "vms": vms,
+            "datastores": datastores,
+            "networks": networks,
+            "dvpgs": dvpgs,
+            "dvswitches": dvswitches,
+        }
+        network_labels = {"networks": "Network", "dvpgs": "DVPG", "dvswitches": "DVS"}
         for obj_content in objects:
             try:
                 obj, props = _parse_object_content(obj_content)
-                type_name = type(obj).__name__
-                full_type_str = str(type(obj))  # Full class path for pyVmomi
                 moref_id = str(obj._moId) if hasattr(obj, '_moId') else ''
+                category = _object_category(obj)
                 
-                if isinstance(obj, vim.VirtualMachine):
-                    vms.append((obj, props))
-                elif isinstance(obj, vim.HostSystem):
-                    hosts.append((obj, props))
-                elif isinstance(obj, vim.ClusterComputeResource):
-                    clusters.append((obj, props))
-                elif isinstance(obj, vim.Datastore):
-                    datastores.append((obj, props))
-                # DVPGs - multiple detection strategies including MoRef prefix fallback
-                elif (isinstance(obj, vim.dvs.DistributedVirtualPortgroup) or 
-                      'DistributedVirtualPortgroup' in type_name or
-                      'DistributedVirtualPortgroup' in full_type_str or
-                      moref_id.startswith('dvportgroup-')):
-                    dvpgs.append((obj, props))
-                    logger.info(f"Captured DVPG: {props.get('name', 'unknown')} (type: {type_name}, moref: {moref_id})")
-                # DVS - multiple detection strategies including MoRef prefix fallback
-                elif (isinstance(obj, vim.DistributedVirtualSwitch) or 
-                      'DistributedVirtualSwitch' in type_name or
-                      'DistributedVirtualSwitch' in full_type_str or
-                      'VmwareDistributedVirtualSwitch' in type_name or
-                      moref_id.startswith('dvs-')):
-                    dvswitches.append((obj, props))
-                    logger.info(f"Captured DVS: {props.get('name', 'unknown')} (type: {type_name}, moref: {moref_id})")
-                # Standard networks - multiple detection strategies including MoRef prefix fallback
-                elif (isinstance(obj, vim.Network) or 
-                      type_name == 'Network' or
-                      'vim.Network' in full_type_str or
-                      moref_id.startswith('network-')):
-                    networks.append((obj, props))
-                    logger.info(f"Captured Network: {props.get('name', 'unknown')} (type: {type_name}, moref: {moref_id})")
+                if category is not None:
+                    categorized[category].append((obj, props))
+                    if category in network_labels:
+                        logger.info(f"Captured {network_labels[category]}: {props.get('name', 'unknown')} "
+                                    f"(type: {type(obj).__name__}, moref: {moref_id})")
                 else:
                     # Log unrecognized types for debugging
-                    logger.warning(f"Unrecognized object type: {type_name} (full: {full_type_str}, moref: {moref_id})")
+                    logger.warning(f"Unrecognized object type: {type(obj).__name__} "
+                                   f"(full: {type(obj)}, moref: {moref_id})")
                     
             except vmodl.fault.ManagedObjectNotFound:
                 errors.append({
@@ -411,14 +462,6 @@ def collect_vcenter_inventory(
             "severity": "error"
         })
         logger.error(f"PropertyCollector error: {e}")
-        
-    finally:
-        # Cleanup ContainerView
-        if view_ref:
-            try:
-                view_ref.Destroy()
-            except Exception:
-                pass
     
     fetch_time_ms = int((time.time() - start_time) * 1000)
     
@@ -0,0 +1,257 @@
+"""
+Streaming full vCenter inventory sync
+
+sync_vcenter_fast() holds every PropertyCollector page, then every row,
+before upsert_inventory_fast() writes anything, so memory and wall time grow
+with the whole inventory. A StreamingInventory instead:
+
+1. fetches the non-VM objects first (clusters, hosts, datastores, networks -
+   a few hundred objects, needed to resolve VM host and cluster names) and
+   builds the MoRef lookups from them;
+2. fetches VMs page by page on a background thread, one page ahead of the
+   caller, which transforms and upserts each page while the next one is on
+   the wire;
+3. accumulates cluster VM counts as VM pages pass, so cluster rows (the
+   only rows that depend on VMs) are built last.
+
+Raw VM objects and VM rows are dropped page by page; only the small
+per-VM relationship data (NICs, datastore usage, snapshots, attributes)
+is kept for the relationship tables.
+"""
+
+import logging
+import queue
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from pyVmomi import vim, vmodl
+
+from job_executor.config import ENABLE_DEEP_RELATIONSHIPS, VCENTER_SYNC_PAGE_SIZE
+from job_executor.mixins.vcenter_property_collector import (
+    _build_moref_lookups,
+    _build_property_specs,
+    _collect_networks_direct,
+    _inventory_view_types,
+    _object_category,
+    _parse_object_content,
+    iter_property_pages,
+)
+from job_executor.mixins.vcenter_incremental_sync import CATEGORIES, _TRANSFORMS
+
+logger = logging.getLogger(__name__)
+
+
+CONTEXT_CATEGORIES = ("clusters", "hosts", "datastores", "networks", "dvpgs", "dvswitches")
+
+# VM row fields the relationship tables are built from
+VM_LINK_FIELDS = ("id", "network_interfaces", "datastore_usage", "snapshots", "custom_attributes")
+
+_DONE = object()
+
+
+def vm_link_data(vm: Dict) -> Dict:
+    """The part of a VM row the relationship tables are built from"""
+    return {field: vm[field] for field in VM_LINK_FIELDS if field in vm}
+
+
+def prefetch_pages(pages: Iterator[Any], depth: int = 1) -> Iterator[Any]:
+    """
+    Iterate pages on a background thread, up to depth pages ahead of the consumer.
+
+    Errors raised while fetching are re-raised in the consumer. Closing the
+    returned generator early stops the fetch thread (and closes pages).
+    """
+    buffer: queue.Queue = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for page in pages:
+                if not put((page, None)):
+                    break
+            else:
+                put((_DONE, None))
+        except BaseException as e:
+            put((_DONE, e))
+        finally:
+            close = getattr(pages, 'close', None)
+            if close:
+                close()
+
+    producer = threading.Thread(target=produce, name='vcenter-page-prefetch', daemon=True)
+    producer.start()
+    try:
+        while True:
+            page, error = buffer.get()
+            if page is _DONE:
+                if error is not None:
+                    raise error
+                return
+            yield page
+    finally:
+        stop.set()
+        producer.join(timeout=5)
+
+
+class StreamingInventory:
+    """
+    One full inventory fetch, handed over in stages.
+
+    Usage: load_context(), upsert rows(...) for the context categories,
+    consume vm_pages(), then rows("clusters") and summary().
+    """
+
+    def __init__(self, content, source_vcenter_id: Optional[str] = None,
+                 enable_deep: bool = None, page_size: int = VCENTER_SYNC_PAGE_SIZE):
+        self.content = content
+        self.source_vcenter_id = source_vcenter_id
+        self.enable_deep = ENABLE_DEEP_RELATIONSHIPS if enable_deep is None else enable_deep
+        self.page_size = page_size
+        self.lookups: Optional[Dict[str, Any]] = None
+        self.errors: List[Dict] = []
+        self.counts = {c: 0 for c in CATEGORIES}
+        self.datastores: List[Dict] = []  # Kept for datastore change detection
+        self.fetch_time_ms = 0
+        self.process_time_ms = 0
+        self._objects: Dict[str, List[tuple]] = {c: [] for c in CONTEXT_CATEGORIES}
+
+    # ------------------------------------------------------------------
+    # Stage 1: everything but VMs
+    # ------------------------------------------------------------------
+
+    def load_context(self):
+        """Fetch clusters, hosts, datastores and networks and build the MoRef lookups"""
+        start_time = time.time()
+        view_types = [t for t in _inventory_view_types() if t is not vim.VirtualMachine]
+        specs = [s for s in _build_property_specs(self.enable_deep) if s.type is not vim.VirtualMachine]
+
+        for page in iter_property_pages(self.content, view_types, specs, self.page_size):
+            for obj_content in page:
+                try:
+                    obj, props = _parse_object_content(obj_content)
+                    category = _object_category(obj)
+                    if category in self._objects:
+                        self._objects[category].append((obj, props))
+                except vmodl.fault.ManagedObjectNotFound:
+                    self._error(obj_content, "Object was deleted during fetch", "warning")
+                except Exception as e:
+                    self._error(obj_content, str(e), "error")
+
+        if not any(self._objects[c] for c in ("networks", "dvpgs", "dvswitches")):
+            logger.warning("PropertyCollector returned no networks - using direct datacenter traversal")
+            try:
+                direct_result = _collect_networks_direct(self.content)
+                for category in ("networks", "dvpgs", "dvswitches"):
+                    self._objects[category] = direct_result[category]
+            except Exception as e:
+                self.errors.append({
+                    "object": "DirectNetworkCollection",
+                    "message": f"Direct network traversal failed: {str(e)}",
+                    "severity": "warning"
+                })
+
+        self.lookups = _build_moref_lookups({**self._objects, "vms": []})
+        self.fetch_time_ms += int((time.time() - start_time) * 1000)
+
+    def rows(self, category: str) -> List[Dict]:
+        """JSON rows for a context category (clusters only once vm_pages() is consumed)"""
+        process_start = time.time()
+        rows = self._transform(category, self._objects[category])
+        self.counts[category] = len(rows)
+        if category == "datastores":
+            self.datastores = rows
+        self.process_time_ms += int((time.time() - process_start) * 1000)
+        return rows
+
+    # ------------------------------------------------------------------
+    # Stage 2: VMs, page by page
+    # ------------------------------------------------------------------
+
+    def vm_pages(self) -> Iterator[List[Dict]]:
+        """
+        Yield VM rows one PropertyCollector page at a time.
+
+        The next page is fetched while the caller works on the current one.
+        """
+        vm_specs = [s for s in _build_property_specs(self.enable_deep) if s.type is vim.VirtualMachine]
+        host_to_cluster = self.lookups["host_moref_to_cluster"]
+        cluster_vm_counts = self.lookups["cluster_moref_to_vm_count"]
+        pages = prefetch_pages(
+            iter_property_pages(self.content, [vim.VirtualMachine], vm_specs, self.page_size)
+        )
+        try:
+            while True:
+                wait_start = time.time()
+                page = next(pages, None)
+                self.fetch_time_ms += int((time.time() - wait_start) * 1000)
+                if page is None:
+                    return
+
+                process_start = time.time()
+                objects = []
+                for obj_content in page:
+                    try:
+                        obj, props = _parse_object_content(obj_content)
+                    except Exception as e:
+                        self._error(obj_content, str(e), "error")
+                        continue
+                    objects.append((obj, props))
+                    # Incremental lookup: VMs per cluster, for the cluster rows built last
+                    host_ref = props.get("summary.runtime.host")
+                    cluster_moref = host_to_cluster.get(str(host_ref._moId)) if hasattr(host_ref, "_moId") else None
+                    if cluster_moref in cluster_vm_counts:
+                        cluster_vm_counts[cluster_moref] += 1
+                rows = self._transform("vms", objects)
+                self.counts["vms"] += len(rows)
+                self.process_time_ms += int((time.time() - process_start) * 1000)
+                yield rows
+        finally:
+            pages.close()
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _transform(self, category: str, objects: List[tuple]) -> List[Dict]:
+        rows = []
+        for obj, props in objects:
+            try:
+                rows.append(_TRANSFORMS[category](obj, props, self.lookups))
+            except Exception as e:
+                self.errors.append({
+                    "object": str(obj._moId) if obj else "unknown",
+                    "message": f"{category} processing error: {str(e)}",
+                    "severity": "warning"
+                })
+        return rows
+
+    def _error(self, obj_content, message: str, severity: str):
+        self.errors.append({
+            "object": str(obj_content.obj) if obj_content else "unknown",
+            "message": message,
+            "severity": severity
+        })
+
+    def summary(self) -> Dict[str, Any]:
+        """sync_vcenter_fast()-style result without the row lists (datastores excepted)"""
+        return {
+            "source_vcenter_id": self.source_vcenter_id,
+            "datastores": self.datastores,
+            "mode": "full",
+            "streamed": True,
+            "fetch_time_ms": self.fetch_time_ms,
+            "process_time_ms": self.process_time_ms,
+            "total_objects": sum(self.counts.values()),
+            "errors": self.errors,
+            "counts": dict(self.counts),
+        }
@@ -0,0 +1,94 @@
+"""
+Cross-sync state for vCenter database upserts
+
+Most VM rows are identical from one sync to the next, but every sync used to
+re-send all of them. RowHashCache remembers the content hash of each row as
+last written, per table and vCenter, so a sync only sends rows whose hash
+changed (liveness is tracked separately with a bulk last_sync touch).
+
+The cache lives in process memory: the first sync after a restart writes
+everything and refills it. Hashes are only recorded for rows the database
+accepted, so a failed write is retried on the next sync.
+"""
+
+import threading
+from typing import Dict, Iterable, Optional, Set
+
+from job_executor.config import (
+    VCENTER_UPSERT_BATCH_MAX,
+    VCENTER_UPSERT_BATCH_MIN,
+    VCENTER_UPSERT_BATCH_SIZE,
+    VCENTER_UPSERT_SLOW_SECONDS,
+)
+from job_executor.mixins.inventory_fingerprint import hash_record
+
+
+def row_hash(record: Dict) -> str:
+    """Content hash of a row, ignoring bookkeeping columns such as last_sync"""
+    return hash_record(record)
+
+
+class RowHashCache:
+    """Thread-safe {(table, source_vcenter_id): {key: hash}} of rows as last written"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hashes: Dict[tuple, Dict[str, str]] = {}
+
+    def changed(self, table: str, source_vcenter_id: str, hashes: Dict[str, str]) -> Set[str]:
+        """Keys whose hash differs from (or is missing in) the cache"""
+        with self._lock:
+            known = self._hashes.get((table, source_vcenter_id), {})
+            return {key for key, value in hashes.items() if known.get(key) != value}
+
+    def update(self, table: str, source_vcenter_id: str, hashes: Dict[str, str]):
+        """Record hashes of rows the database accepted"""
+        if not hashes:
+            return
+        with self._lock:
+            self._hashes.setdefault((table, source_vcenter_id), {}).update(hashes)
+
+    def forget(self, table: str, source_vcenter_id: str, keys: Optional[Iterable[str]] = None):
+        """Drop cached hashes (all of a vCenter's rows when keys is None)"""
+        with self._lock:
+            if keys is None:
+                self._hashes.pop((table, source_vcenter_id), None)
+                return
+            known = self._hashes.get((table, source_vcenter_id), {})
+            for key in keys:
+                known.pop(key, None)
+
+
+class AdaptiveBatchSize:
+    """
+    Batch size that grows while batches come back quickly and shrinks on
+    failures or slow responses, within [minimum, maximum].
+    """
+
+    def __init__(self, initial: int = VCENTER_UPSERT_BATCH_SIZE, minimum: int = VCENTER_UPSERT_BATCH_MIN,
+                 maximum: int = VCENTER_UPSERT_BATCH_MAX, slow_seconds: float = VCENTER_UPSERT_SLOW_SECONDS):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.slow_seconds = slow_seconds
+        self.size = max(minimum, min(initial, maximum))
+        self._lock = threading.Lock()
+
+    def record(self, ok: bool, elapsed: float):
+        with self._lock:
+            if not ok or elapsed >= self.slow_seconds:
+                self.size = max(self.minimum, self.size // 2)
+            elif elapsed < self.slow_seconds / 2:
+                self.size = min(self.maximum, self.size * 2)
+
+
+_cache_lock = threading.Lock()
+_row_hash_cache: Optional[RowHashCache] = None
+
+
+def get_row_hash_cache() -> RowHashCache:
+    """Process-wide row hash cache"""
+    global _row_hash_cache
+    with _cache_lock:
+        if _row_hash_cache is None:
+            _row_hash_cache = RowHashCache()
+        return _row_hash_cache
@@ -0,0 +1,123 @@
+"""
+Single-flight request coalescing with a short result cache
+
+Several operators opening the same server page each fire the same instant
+reads (health, firmware inventory, iDRAC jobs, BIOS) at one iDRAC. With the
+coalescer, concurrent identical reads share one fetch and its result is
+reused for a few seconds, so iDRAC load stays flat however many people are
+watching.
+
+Keys are tuples starting with (endpoint, server_id); invalidate(server_id)
+drops a server's results after an operation that changes it.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from job_executor.config import API_RESULT_CACHE_SECONDS
+
+
+# Cached results above this count trigger a sweep of expired entries
+MAX_CACHED_RESULTS = 1024
+
+
+class _Flight:
+    """A fetch in progress that other callers can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+        self.stale = False  # Invalidated while running - do not cache
+
+
+class RequestCoalescer:
+    """
+    Shares in-flight fetches and caches their results for ttl_seconds.
+
+    Failures are passed to every caller waiting on that fetch but are not
+    cached, so the next call tries again.
+    """
+
+    def __init__(self, ttl_seconds: float = API_RESULT_CACHE_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._results: Dict[Hashable, Tuple[float, Any]] = {}
+        self._in_flight: Dict[Hashable, _Flight] = {}
+        self.stats = {'fetched': 0, 'cached': 0, 'coalesced': 0}
+
+    def fetch(self, key: Tuple, loader: Callable[[], Any], refresh: bool = False) -> Tuple[Any, str]:
+        """
+        Return loader()'s result for key, sharing or reusing it where possible.
+
+        Args:
+            key: (endpoint, server_id, ...) identifying the read
+            loader: Performs the read when no usable result exists
+            refresh: Skip the cache (still joins a fetch already running)
+
+        Returns:
+            (value, source) where source is 'fetched', 'cached' or 'coalesced'
+        """
+        with self._lock:
+            if not refresh:
+                entry = self._results.get(key)
+                if entry and time.monotonic() - entry[0] < self.ttl_seconds:
+                    self.stats['cached'] += 1
+                    return entry[1], 'cached'
+            flight = self._in_flight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._in_flight[key] = _Flight()
+                self.stats['fetched'] += 1
+            else:
+                self.stats['coalesced'] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value, 'coalesced'
+
+        try:
+            flight.value = loader()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+                if flight.error is None and not flight.stale and self.ttl_seconds > 0:
+                    self._store(key, flight.value)
+            flight.done.set()
+        return flight.value, 'fetched'
+
+    def _store(self, key: Tuple, value: Any):
+        """Cache a result (caller holds _lock)"""
+        now = time.monotonic()
+        if len(self._results) >= MAX_CACHED_RESULTS:
+            for stale_key in [k for k, (at, _) in self._results.items() if now - at >= self.ttl_seconds]:
+                del self._results[stale_key]
+        self._results[key] = (now, value)
+
+    def invalidate(self, server_id: str = None):
+        """Forget results for one server (or all), including fetches still running"""
+        with self._lock:
+            for key in [k for k in self._results if server_id is None or k[1] == server_id]:
+                del self._results[key]
+            for key, flight in self._in_flight.items():
+                if server_id is None or key[1] == server_id:
+                    flight.stale = True
+
+
+_coalescer_lock = threading.Lock()
+_coalescer: Optional[RequestCoalescer] = None
+
+
+def get_request_coalescer() -> RequestCoalescer:
+    """Process-wide coalescer for the API server's instant reads"""
+    global _coalescer
+    with _coalescer_lock:
+        if _coalescer is None:
+            _coalescer = RequestCoalescer()
+        return _coalescer
@@ -12,6 +12,7 @@ from urllib.parse import urlparse
 import requests
 
 from job_executor.config import SERVICE_ROLE_KEY, SUPABASE_URL
+from job_executor.request_coalescer import get_request_coalescer
 from job_executor.utils import _safe_json_parse
 
 
@@ -1419,6 +1420,8 @@ class ScpMixin:
                         'success': False,
                         'error': str(e)
                     })
+                finally:
+                    get_request_coalescer().invalidate(server_id)  # Cached BIOS reads show the old settings
 
             if failed_count == 0:
                 self.update_job_status(
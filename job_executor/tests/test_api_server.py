@@ -0,0 +1,106 @@
+import http.client
+import json
+import threading
+import time
+import unittest
+from unittest import mock
+
+from job_executor import api_server
+from job_executor.api_server import APIHandler, PooledHTTPServer, endpoint_key
+
+
+class BlockingHandler(APIHandler):
+    """vCenter sync that holds its slot until released"""
+
+    release = threading.Event()
+
+    def _handle_vcenter_sync(self):
+        self._read_json_body()
+        self.release.wait(5)
+        self._send_json({'success': True})
+
+
+class APIServerTests(unittest.TestCase):
+    def setUp(self):
+        BlockingHandler.release.clear()
+        self.server = PooledHTTPServer(('127.0.0.1', 0), BlockingHandler, max_workers=4)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.port = self.server.server_address[1]
+
+    def tearDown(self):
+        BlockingHandler.release.set()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _connection(self):
+        return http.client.HTTPConnection('127.0.0.1', self.port, timeout=10)
+
+    def test_endpoint_key_collapses_ids(self):
+        self.assertEqual(endpoint_key('/api/iso-upload/abc/chunks/3'), '/api/iso-upload/*')
+        self.assertEqual(endpoint_key('/api/health?x=1'), '/api/health')
+
+    def test_keep_alive_and_timing(self):
+        conn = self._connection()
+        for _ in range(2):
+            conn.request('GET', '/api/health')
+            response = conn.getresponse()
+            self.assertEqual(json.loads(response.read())['status'], 'ok')
+            self.assertIsNotNone(response.getheader('X-Response-Time-Ms'))
+        sock = conn.sock
+        conn.request('GET', '/api/metrics')
+        response = conn.getresponse()
+        metrics = json.loads(response.read())
+        self.assertIs(conn.sock, sock)  # Same connection for all three requests
+        self.assertEqual(metrics['endpoints']['/api/health']['count'], 2)
+        conn.close()
+
+    def test_idle_keep_alive_connection_is_closed(self):
+        conn = self._connection()
+        with mock.patch.object(BlockingHandler, 'keepalive_timeout', 0.2):
+            conn.request('GET', '/api/health')
+            response = conn.getresponse()
+            response.read()
+            self.assertIsNone(response.getheader('Connection'))  # Kept alive
+            time.sleep(0.5)
+            self.assertEqual(conn.sock.recv(1), b'')  # Server gave the worker back
+        conn.close()
+
+    def test_idle_connection_yields_worker_to_queued_ones(self):
+        idle = [self._connection() for _ in range(4)]  # Every worker
+        for conn in idle:
+            conn.request('GET', '/api/health')
+            conn.getresponse().read()
+
+        queued = self._connection()
+        queued.request('GET', '/api/health')
+        started = time.monotonic()
+        self.assertEqual(queued.getresponse().status, 200)
+        self.assertLess(time.monotonic() - started, 2)  # Not after the 5 s idle timeout
+        for conn in idle:
+            conn.close()
+        queued.close()
+
+    def test_endpoint_limit_rejects_while_busy(self):
+        first = self._connection()
+        first.request('POST', '/api/vcenter-sync', body='{}', headers={'Content-Type': 'application/json'})
+
+        # Health checks are not held up by the running sync
+        health = self._connection()
+        health.request('GET', '/api/health')
+        self.assertEqual(health.getresponse().status, 200)
+
+        with mock.patch.object(api_server, 'ENDPOINT_WAIT_SECONDS', 0.2):
+            second = self._connection()
+            second.request('POST', '/api/vcenter-sync', body='{}', headers={'Content-Type': 'application/json'})
+            response = second.getresponse()
+            self.assertEqual(response.status, 429)
+            self.assertEqual(response.getheader('Retry-After'), '5')
+
+        BlockingHandler.release.set()
+        self.assertEqual(first.getresponse().status, 200)
+        snapshot = self.server.metrics.snapshot()['/api/vcenter-sync']
+        self.assertEqual((snapshot['count'], snapshot['rejected'], snapshot['in_flight']), (1, 1, 0))
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
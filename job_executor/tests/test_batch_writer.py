@@ -0,0 +1,87 @@
+import unittest
+from unittest import mock
+
+from job_executor.batch_writer import DiscoveryBatchWriter, JobTaskWriter
+from job_executor.mixins.idrac_ops import IdracMixin
+
+
+class DummyExecutor(IdracMixin):
+    """Lightweight executor exposing the record builders used by the writer."""
+
+    def log(self, *args, **kwargs):  # pragma: no cover - noop logger for tests
+        pass
+
+
+def _response(status_code, payload=None):
+    response = mock.Mock()
+    response.status_code = status_code
+    response.json.return_value = payload
+    response.text = ""
+    return response
+
+
+class DiscoveryBatchWriterTests(unittest.TestCase):
+    def test_servers_written_in_batches_of_n(self):
+        """Five discovered hosts with batch size 2 take three bulk upserts."""
+        def fake_post(url, headers=None, params=None, json=None, **kwargs):
+            return _response(201, [{"id": f"id-{row['ip_address']}", "ip_address": row["ip_address"],
+                                    "service_tag": None} for row in json])
+
+        with mock.patch("job_executor.batch_writer.requests") as req:
+            req.post.side_effect = fake_post
+            writer = DiscoveryBatchWriter(DummyExecutor(), "job-1", batch_size=2)
+            for i in range(5):
+                writer.add_discovered_server({"ip": f"10.0.0.{i}", "model": "R750"})
+            stats = writer.close()
+
+        self.assertEqual(req.post.call_count, 3)
+        self.assertEqual(stats["servers_written"], 5)
+        self.assertEqual(writer.server_ids["10.0.0.4"], "id-10.0.0.4")
+
+    def test_rejected_batch_falls_back_to_single_rows(self):
+        """A conflicting row only fails itself, not the rest of its batch."""
+        def fake_post(url, headers=None, params=None, json=None, **kwargs):
+            if len(json) > 1 or json[0]["ip_address"] == "10.0.0.2":
+                return _response(409)
+            row = json[0]
+            return _response(201, [{"id": "x", "ip_address": row["ip_address"], "service_tag": None}])
+
+        with mock.patch("job_executor.batch_writer.requests") as req:
+            req.post.side_effect = fake_post
+            writer = DiscoveryBatchWriter(DummyExecutor(), "job-1", batch_size=10)
+            for ip in ("10.0.0.1", "10.0.0.2", "10.0.0.3"):
+                writer.add_auth_failed_server(ip)
+            stats = writer.close()
+
+        self.assertEqual(stats["servers_written"], 2)
+        self.assertEqual(stats["servers_failed"], 1)
+
+
+class JobTaskWriterTests(unittest.TestCase):
+    def test_task_updates_are_batched_into_upserts(self):
+        """Twenty status changes for ten tasks become one create and two upserts."""
+        def fake_post(url, headers=None, params=None, json=None, **kwargs):
+            if params is None:
+                return _response(201, [{"id": f"task-{row['server_id']}", **row} for row in json])
+            return _response(201)
+
+        with mock.patch("job_executor.batch_writer.requests") as req:
+            req.post.side_effect = fake_post
+            writer = JobTaskWriter(DummyExecutor(), "job-1", batch_size=10, flush_interval=3600)
+            task_map = writer.create_tasks([f"s{i}" for i in range(10)])
+            for server_id, task_id in task_map.items():
+                writer.update(task_id, "running", log="Scanning")
+            for server_id, task_id in task_map.items():
+                writer.update(task_id, "completed", log="Done", progress=100)
+            writer.close()
+
+        self.assertEqual(req.post.call_count, 3)
+        final_rows = req.post.call_args_list[-1].kwargs["json"]
+        self.assertEqual(len(final_rows), 10)
+        self.assertEqual({row["status"] for row in final_rows}, {"completed"})
+        self.assertEqual(len(final_rows[0]["log"].splitlines()), 2)
+        self.assertEqual(req.post.call_args_list[-1].kwargs["params"], {"on_conflict": "id"})
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,192 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from job_executor import firmware_catalog
+from job_executor.firmware_catalog import clear_catalog_index_cache, get_catalog_index, sync_catalog
+from job_executor.firmware_download import ChecksumMismatch, download_file, download_packages
+
+
+PACKAGE = os.urandom(300 * 1024)
+PACKAGE_SHA256 = hashlib.sha256(PACKAGE).hexdigest()
+
+CATALOG_XML = f"""<?xml version="1.0" encoding="utf-8"?>
+<Manifest baseLocation="" version="24.02.00" dateTime="2026-02-01T00:00:00">
+  <SoftwareComponent path="FOLDER1/BIOS_R640_2.19.1.EXE" vendorVersion="2.19.1" size="{len(PACKAGE)}">
+    <Name><Display lang="en">BIOS</Display></Name>
+    <ComponentType value="BIOS"/>
+    <Cryptography><Hash algorithm="SHA256">{PACKAGE_SHA256}</Hash></Cryptography>
+    <SupportedDevices><Device componentID="159"/></SupportedDevices>
+    <SupportedSystems><Brand><Model systemID="0716"><Display lang="en">R640</Display></Model></Brand></SupportedSystems>
+  </SoftwareComponent>
+  <SoftwareComponent path="FOLDER0/BIOS_R640_2.10.0.EXE" vendorVersion="2.10.0">
+    <ComponentType value="BIOS"/>
+    <SupportedDevices><Device componentID="159"/></SupportedDevices>
+    <SupportedSystems><Brand><Model><Display lang="en">R640</Display></Model></Brand></SupportedSystems>
+  </SoftwareComponent>
+</Manifest>
+""".encode()
+
+
+class RepositoryHandler(BaseHTTPRequestHandler):
+    """Minimal stand-in for downloads.dell.com (ETag + Range support)"""
+
+    requests_seen = []
+    drop_after = None  # Truncate the next package response after N bytes
+    catalog = (CATALOG_XML, '"v1"')  # Current catalog body and its ETag
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        RepositoryHandler.requests_seen.append((self.path, dict(self.headers)))
+        if self.path == '/catalog/Catalog.xml':
+            body, etag = RepositoryHandler.catalog
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self._send(200, body, {'ETag': etag})
+        elif self.path == '/FOLDER1/BIOS_R640_2.19.1.EXE':
+            body, status, extra = PACKAGE, 200, {}
+            range_header = self.headers.get('Range')
+            if range_header:
+                start = int(range_header.split('=')[1].rstrip('-'))
+                body, status = PACKAGE[start:], 206
+                extra['Content-Range'] = f'bytes {start}-{len(PACKAGE) - 1}/{len(PACKAGE)}'
+            if RepositoryHandler.drop_after is not None:
+                cut, RepositoryHandler.drop_after = RepositoryHandler.drop_after, None
+                self.send_response(status)
+                self.send_header('Content-Length', str(len(body)))
+                for key, value in extra.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body[:cut])
+                self.close_connection = True
+                return
+            self._send(status, body, extra)
+        else:
+            self._send(404, b'')
+
+    def _send(self, status, body, headers):
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class CatalogSyncTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        os.environ.setdefault('NO_PROXY', '127.0.0.1')
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), RepositoryHandler)
+        cls.base_url = f'http://127.0.0.1:{cls.server.server_port}'
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        RepositoryHandler.requests_seen = []
+        RepositoryHandler.drop_after = None
+        RepositoryHandler.catalog = (CATALOG_XML, '"v1"')
+        clear_catalog_index_cache()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(clear_catalog_index_cache)
+
+    def test_second_sync_is_conditional(self):
+        url = f'{self.base_url}/catalog/Catalog.xml'
+        first = sync_catalog(url, cache_dir=self.tmp.name)
+        clear_catalog_index_cache()
+        second = sync_catalog(url, cache_dir=self.tmp.name)
+
+        self.assertTrue(first['changed'])
+        self.assertFalse(second['changed'])
+        self.assertEqual(second['index'].meta['catalog_version'], '24.02.00')
+        self.assertEqual(RepositoryHandler.requests_seen[-1][1].get('If-None-Match'), '"v1"')
+
+    def _age_index(self, url, seconds):
+        meta_path = firmware_catalog._meta_path(url, self.tmp.name)
+        with open(meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+        meta['synced_at'] -= seconds
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+
+    def test_stale_index_is_revalidated_before_use(self):
+        url = f'{self.base_url}/catalog/Catalog.xml'
+        sync_catalog(url, cache_dir=self.tmp.name)
+
+        self._age_index(url, 7200)
+        index = get_catalog_index(url, cache_dir=self.tmp.name, max_age_seconds=3600)
+        self.assertEqual(index.meta['catalog_version'], '24.02.00')
+        self.assertEqual(RepositoryHandler.requests_seen[-1][1].get('If-None-Match'), '"v1"')  # 304
+
+        requests_before = len(RepositoryHandler.requests_seen)
+        get_catalog_index(url, cache_dir=self.tmp.name, max_age_seconds=3600)
+        self.assertEqual(len(RepositoryHandler.requests_seen), requests_before)  # Fresh again
+
+        RepositoryHandler.catalog = (CATALOG_XML.replace(b'24.02.00', b'24.03.00'), '"v2"')
+        self._age_index(url, 7200)
+        index = get_catalog_index(url, cache_dir=self.tmp.name, max_age_seconds=3600)
+        self.assertEqual(index.meta['catalog_version'], '24.03.00')
+
+    def test_failed_build_is_not_retried_per_caller(self):
+        url = f'{self.base_url}/catalog/Missing.xml'
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(get_catalog_index(url, cache_dir=self.tmp.name)))
+                   for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(results, [None] * 4)
+        self.assertEqual(len(RepositoryHandler.requests_seen), 1)
+
+    def test_prefetch_picks_latest_and_verifies_sha256(self):
+        index = sync_catalog(f'{self.base_url}/catalog/Catalog.xml', cache_dir=self.tmp.name)['index']
+        packages = index.packages_for_models(['R640'], latest_only=True)
+        self.assertEqual([p['version'] for p in packages], ['2.19.1'])
+
+        summary = download_packages(packages, self.base_url, self.tmp.name, max_workers=2)
+        again = download_packages(packages, self.base_url, self.tmp.name, max_workers=2)
+
+        with open(os.path.join(self.tmp.name, 'FOLDER1', 'BIOS_R640_2.19.1.EXE'), 'rb') as f:
+            self.assertEqual(f.read(), PACKAGE)
+        self.assertEqual((summary['downloaded'], summary['bytes']), (1, len(PACKAGE)))
+        self.assertEqual(again['skipped'], 1)
+
+    def test_interrupted_download_resumes_with_range(self):
+        dest = os.path.join(self.tmp.name, 'bios.exe')
+        RepositoryHandler.drop_after = 200 * 1024
+
+        result = download_file(f'{self.base_url}/FOLDER1/BIOS_R640_2.19.1.EXE', dest,
+                               size=len(PACKAGE), sha256=PACKAGE_SHA256)
+
+        self.assertEqual(result['status'], 'downloaded')
+        self.assertEqual(len(RepositoryHandler.requests_seen), 2)
+        resumed_at = int(RepositoryHandler.requests_seen[-1][1]['Range'][len('bytes='):-1])
+        self.assertTrue(0 < resumed_at <= 200 * 1024)
+        with open(dest, 'rb') as f:
+            self.assertEqual(f.read(), PACKAGE)
+
+    def test_checksum_mismatch_is_not_kept(self):
+        dest = os.path.join(self.tmp.name, 'bios.exe')
+        with self.assertRaises(ChecksumMismatch):
+            download_file(f'{self.base_url}/FOLDER1/BIOS_R640_2.19.1.EXE', dest, sha256='0' * 64)
+        self.assertFalse(os.path.exists(dest))
+        self.assertFalse(os.path.exists(dest + '.part'))
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
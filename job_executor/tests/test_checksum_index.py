@@ -0,0 +1,53 @@
+import hashlib
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from job_executor import checksum_index
+from job_executor.checksum_index import ChecksumIndex, checksum_files, hash_file
+
+
+class ChecksumIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.index_path = os.path.join(self.tmp.name, 'checksum-index.json')
+        self.iso = os.path.join(self.tmp.name, 'esxi.iso')
+        self.data = os.urandom(3 * 1024 * 1024 + 17)
+        with open(self.iso, 'wb') as f:
+            f.write(self.data)
+
+    def test_hash_file_matches_hashlib(self):
+        self.assertEqual(hash_file(self.iso, buffer_size=1024 * 1024), hashlib.sha256(self.data).hexdigest())
+
+    def test_unchanged_files_are_not_rehashed_across_runs(self):
+        first = checksum_files([self.iso], index=ChecksumIndex(self.index_path))
+        self.assertFalse(first[self.iso]['cached'])
+
+        with mock.patch.object(checksum_index, 'hash_file', side_effect=AssertionError('re-hashed')):
+            second = checksum_files([self.iso], index=ChecksumIndex(self.index_path))
+        self.assertTrue(second[self.iso]['cached'])
+        self.assertEqual(second[self.iso]['sha256'], hashlib.sha256(self.data).hexdigest())
+
+    def test_modified_file_is_rehashed(self):
+        index = ChecksumIndex(self.index_path)
+        checksum_files([self.iso], index=index)
+        with open(self.iso, 'ab') as f:
+            f.write(b'x')
+
+        result = checksum_files([self.iso], index=index)
+
+        self.assertFalse(result[self.iso]['cached'])
+        self.assertEqual(result[self.iso]['sha256'], hashlib.sha256(self.data + b'x').hexdigest())
+
+    def test_prune_drops_deleted_files(self):
+        index = ChecksumIndex(self.index_path)
+        checksum_files([self.iso], index=index)
+        os.remove(self.iso)
+        index.prune(self.tmp.name, [])
+        self.assertEqual(len(index), 0)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
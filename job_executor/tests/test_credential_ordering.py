@@ -0,0 +1,78 @@
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from job_executor.mixins.credentials import CredentialsMixin
+
+
+class DummyCredentials(CredentialsMixin):
+    """Lightweight subclass to expose mixin helpers for testing."""
+
+    def log(self, *args, **kwargs):  # pragma: no cover - noop logger for tests
+        pass
+
+
+class CredentialOrderingTests(unittest.TestCase):
+    def setUp(self):
+        self.mixin = DummyCredentials()
+        self.mixin.credential_stats = {}
+        self.mixin.credential_stats_pending = {}
+        self.creds = [
+            {"id": "default", "name": "Default", "priority": 1},
+            {"id": "lab", "name": "Lab", "priority": 5},
+        ]
+
+    def test_static_priority_without_history(self):
+        """With no statistics the original priority order is kept."""
+        ordered = self.mixin.order_credentials_by_history("10.1.2.3", self.creds)
+        self.assertEqual([c["id"] for c in ordered], ["default", "lab"])
+
+    def test_subnet_history_promotes_successful_set(self):
+        """A set that succeeds on the /24 moves ahead of one that fails there."""
+        for _ in range(3):
+            self.mixin.record_credential_outcome("10.1.2.10", "default", False)
+            self.mixin.record_credential_outcome("10.1.2.10", "lab", True)
+
+        ordered = self.mixin.order_credentials_by_history("10.1.2.200", self.creds)
+        self.assertEqual([c["id"] for c in ordered], ["lab", "default"])
+
+        # Other subnets are unaffected
+        ordered = self.mixin.order_credentials_by_history("10.1.3.5", self.creds)
+        self.assertEqual([c["id"] for c in ordered], ["default", "lab"])
+
+    def test_model_history_breaks_subnet_ties(self):
+        """Per-model statistics order sets when the subnet has no history."""
+        self.mixin.record_credential_outcome("10.9.9.9", "lab", True, model="PowerEdge R750")
+
+        ordered = self.mixin.order_credentials_by_history("10.1.4.5", self.creds, model="PowerEdge R750")
+        self.assertEqual([c["id"] for c in ordered], ["lab", "default"])
+
+    def test_outcomes_ignored_until_stats_loaded(self):
+        """Without loaded statistics nothing is recorded (avoids flushing partial counts)."""
+        mixin = DummyCredentials()
+        mixin.record_credential_outcome("10.1.2.3", "lab", True)
+        self.assertIsNone(mixin.credential_stats)
+
+    def test_flush_sends_increments_and_keeps_them_on_failure(self):
+        """Only counts since the last flush are sent; a failed flush retries them."""
+        self.mixin.credential_stats[("subnet", "10.1.2.0/24", "lab")] = {"success_count": 7, "failure_count": 0}
+        self.mixin.record_credential_outcome("10.1.2.10", "lab", True)
+
+        with mock.patch("job_executor.mixins.credentials.requests.post",
+                        return_value=SimpleNamespace(status_code=500, text="down")):
+            self.assertEqual(self.mixin.flush_credential_stats(), 0)
+        self.mixin.record_credential_outcome("10.1.2.11", "lab", True)
+
+        with mock.patch("job_executor.mixins.credentials.requests.post",
+                        return_value=SimpleNamespace(status_code=200, text="")) as post:
+            self.assertEqual(self.mixin.flush_credential_stats(), 1)
+        self.assertTrue(post.call_args.args[0].endswith("/rpc/increment_credential_set_stats"))
+        self.assertEqual(post.call_args.kwargs["json"]["p_deltas"], [{
+            "scope_type": "subnet", "scope_key": "10.1.2.0/24", "credential_set_id": "lab",
+            "success_count": 2, "failure_count": 0,
+        }])
+        self.assertEqual(self.mixin.credential_stats_pending, {})
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+from datetime import datetime, timezone, timedelta
+
+from job_executor.mixins.discovery_cache import DiscoveryCacheMixin
+
+
+class DummyDiscoveryCache(DiscoveryCacheMixin):
+    """Lightweight subclass to expose mixin helpers for testing."""
+
+    def log(self, *args, **kwargs):  # pragma: no cover - noop logger for tests
+        pass
+
+
+class DiscoveryRescanPlanTests(unittest.TestCase):
+    def setUp(self):
+        self.mixin = DummyDiscoveryCache()
+        self.now = datetime(2026, 1, 12, 12, 0, tzinfo=timezone.utc)
+
+    def _probed(self, hours_ago):
+        return (self.now - timedelta(hours=hours_ago)).isoformat()
+
+    def test_known_idracs_are_verified_first(self):
+        """Authenticated iDRACs go to the verify bucket regardless of age."""
+        cache = {
+            "10.0.0.2": {"idrac_detected": True, "auth_succeeded": True, "port_open": True,
+                         "last_probed_at": self._probed(500)},
+        }
+
+        plan = self.mixin.plan_discovery_rescan(["10.0.0.1", "10.0.0.2"], cache, 24, now=self.now)
+
+        self.assertEqual(plan["verify"], ["10.0.0.2"])
+        self.assertEqual(plan["probe"], ["10.0.0.1"])
+        self.assertEqual(plan["skip"], [])
+
+    def test_closed_ports_skipped_only_within_ttl(self):
+        """Recently closed IPs are skipped, stale closed IPs are probed again."""
+        cache = {
+            "10.0.0.3": {"port_open": False, "last_probed_at": self._probed(2)},
+            "10.0.0.4": {"port_open": False, "last_probed_at": self._probed(30)},
+        }
+
+        plan = self.mixin.plan_discovery_rescan(["10.0.0.3", "10.0.0.4"], cache, 24, now=self.now)
+
+        self.assertEqual(plan["skip"], ["10.0.0.3"])
+        self.assertEqual(plan["probe"], ["10.0.0.4"])
+
+    def test_auth_failed_idracs_are_fully_probed(self):
+        """iDRACs without working credentials are re-probed so new credentials get tried."""
+        cache = {
+            "10.0.0.5": {"idrac_detected": True, "auth_succeeded": False, "port_open": True,
+                         "last_probed_at": self._probed(1)},
+        }
+
+        plan = self.mixin.plan_discovery_rescan(["10.0.0.5"], cache, 24, now=self.now)
+
+        self.assertEqual(plan["probe"], ["10.0.0.5"])
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
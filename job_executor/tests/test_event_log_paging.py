@@ -0,0 +1,95 @@
+import unittest
+
+from job_executor.dell_redfish.event_logs import collect_new_entries
+
+
+def make_log(count, newest_first):
+    entries = [{"Id": str(i), "Created": f"2026-01-12T10:{i // 60:02d}:{i % 60:02d}+00:00"}
+               for i in range(1, count + 1)]
+    return list(reversed(entries)) if newest_first else entries
+
+
+class FakeCollection:
+    """Serves $skip/$top pages and records which pages were requested."""
+
+    def __init__(self, members, with_count=True):
+        self.members = members
+        self.with_count = with_count
+        self.requests = []
+
+    def __call__(self, skip, top):
+        self.requests.append((skip, top))
+        total = len(self.members) if self.with_count else None
+        return self.members[skip:skip + top], total
+
+
+class CollectNewEntriesTests(unittest.TestCase):
+    def test_newest_first_stops_at_mark(self):
+        """Lifecycle-style collections read only the first page when few entries are new."""
+        fetch = FakeCollection(make_log(500, newest_first=True))
+
+        entries, mark = collect_new_entries(fetch, {"last_event_id": "495"}, page_size=50)
+
+        self.assertEqual([e["Id"] for e in entries], ["496", "497", "498", "499", "500"])
+        self.assertEqual(mark["last_event_id"], "500")
+        self.assertEqual(fetch.requests, [(0, 50)])
+
+    def test_oldest_first_reads_from_tail(self):
+        """SEL-style collections are read backwards from Members@odata.count."""
+        fetch = FakeCollection(make_log(500, newest_first=False))
+
+        entries, mark = collect_new_entries(fetch, {"last_event_id": "440"}, page_size=50)
+
+        self.assertEqual(len(entries), 60)
+        self.assertEqual(entries[0]["Id"], "441")
+        self.assertEqual(mark["last_event_id"], "500")
+        self.assertEqual(fetch.requests, [(0, 50), (450, 50), (400, 50)])
+
+    def test_first_collection_takes_newest_limit(self):
+        fetch = FakeCollection(make_log(500, newest_first=True))
+
+        entries, mark = collect_new_entries(fetch, None, page_size=50, max_entries=50)
+
+        self.assertEqual(entries[-1]["Id"], "500")
+        self.assertEqual(len(entries), 50)
+        self.assertEqual(mark["last_event_id"], "500")
+
+    def test_cleared_log_restarts_from_scratch(self):
+        """A sequence that restarted below the mark is collected again."""
+        fetch = FakeCollection(make_log(3, newest_first=True))
+
+        entries, mark = collect_new_entries(fetch, {"last_event_id": "900"}, page_size=50)
+
+        self.assertEqual([e["Id"] for e in entries], ["1", "2", "3"])
+        self.assertEqual(mark["last_event_id"], "3")
+
+    def test_nothing_new_keeps_mark(self):
+        fetch = FakeCollection(make_log(10, newest_first=True))
+
+        entries, mark = collect_new_entries(fetch, {"last_event_id": "10"}, page_size=50)
+
+        self.assertEqual(entries, [])
+        self.assertEqual(mark, {"last_event_id": "10"})
+
+    def test_backlog_over_limit_reports_the_gap(self):
+        """More new entries than max_entries: the newest are kept and the gap is counted."""
+        for newest_first in (True, False):
+            fetch = FakeCollection(make_log(500, newest_first=newest_first))
+
+            entries, mark = collect_new_entries(fetch, {"last_event_id": "300"}, page_size=50, max_entries=100)
+
+            self.assertEqual([entries[0]["Id"], entries[-1]["Id"]], ["401", "500"])
+            self.assertEqual(mark["last_event_id"], "500")
+            self.assertEqual(mark["skipped_entries"], 100)
+
+    def test_cap_on_the_mark_is_not_a_gap(self):
+        fetch = FakeCollection(make_log(500, newest_first=True))
+
+        entries, mark = collect_new_entries(fetch, {"last_event_id": "400"}, page_size=50, max_entries=100)
+
+        self.assertEqual(len(entries), 100)
+        self.assertNotIn("skipped_entries", mark)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
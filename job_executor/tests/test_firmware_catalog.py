@@ -0,0 +1,104 @@
+import gzip
+import io
+import os
+import tempfile
+import unittest
+
+from job_executor.firmware_catalog import (
+    CatalogIndex,
+    is_newer_version,
+    normalize_model,
+    parse_catalog,
+)
+
+
+CATALOG_XML = b"""<?xml version="1.0" encoding="utf-16"?>
+<Manifest baseLocation="downloads.dell.com" version="24.01.00" dateTime="2026-01-10T00:00:00">
+  <SoftwareComponent path="FOLDER1/BIOS_R640_2.19.1.EXE" vendorVersion="2.19.1" dellVersion="2.19.1"
+                     rebootRequired="true" hashMD5="aa" size="1000">
+    <Name><Display lang="en">Dell Server BIOS PowerEdge R640</Display></Name>
+    <ComponentType value="BIOS"><Display lang="en">BIOS</Display></ComponentType>
+    <Criticality value="1"><Display lang="en">Urgent</Display></Criticality>
+    <SupportedDevices><Device componentID="159" embedded="1"><Display lang="en">BIOS</Display></Device></SupportedDevices>
+    <SupportedSystems><Brand key="3" prefix="PE"><Display lang="en">PowerEdge</Display>
+      <Model systemID="0716"><Display lang="en">R640</Display></Model>
+    </Brand></SupportedSystems>
+  </SoftwareComponent>
+  <SoftwareComponent path="FOLDER2/BIOS_R640_2.17.0.EXE" vendorVersion="2.17.0" rebootRequired="true">
+    <Name><Display lang="en">Dell Server BIOS PowerEdge R640 (older)</Display></Name>
+    <ComponentType value="BIOS"><Display lang="en">BIOS</Display></ComponentType>
+    <SupportedDevices><Device componentID="159"/></SupportedDevices>
+    <SupportedSystems><Brand><Model systemID="0716"><Display lang="en">R640</Display></Model></Brand></SupportedSystems>
+  </SoftwareComponent>
+  <SoftwareComponent path="FOLDER3/Network_Firmware_X710_22.5.7.EXE" vendorVersion="22.5.7" rebootRequired="false">
+    <Name><Display lang="en">Intel X710 Firmware</Display></Name>
+    <ComponentType value="FRMW"><Display lang="en">Firmware</Display></ComponentType>
+    <SupportedDevices><Device componentID="0">
+      <PCIInfo vendorID="8086" deviceID="1572" subVendorID="1028" subDeviceID="1F99"/>
+    </Device></SupportedDevices>
+    <SupportedSystems><Brand><Model systemID="0716"><Display lang="en">R640</Display></Model></Brand></SupportedSystems>
+  </SoftwareComponent>
+  <SoftwareComponent path="FOLDER4/Driver.EXE" vendorVersion="9.9.9">
+    <ComponentType value="DRVR"><Display lang="en">Driver</Display></ComponentType>
+    <SupportedDevices><Device componentID="159"/></SupportedDevices>
+  </SoftwareComponent>
+</Manifest>
+""".replace(b'encoding="utf-16"', b'encoding="utf-8"')
+
+
+INVENTORY = [
+    {"Id": "Installed-159-2.15.1", "Name": "BIOS", "Version": "2.15.1", "ComponentID": "159"},
+    {"Id": "Previous-159-2.10.0", "Name": "BIOS", "Version": "2.10.0", "ComponentID": "159"},
+    {"Id": "Installed-0-22.5.7__NIC.Integrated.1-1-1", "Name": "Intel(R) Ethernet 10G X710", "Version": "22.5.7",
+     "VendorID": "8086", "DeviceID": "1572", "SubVendorID": "1028", "SubDeviceID": "1f99"},
+]
+
+
+class CatalogParseTests(unittest.TestCase):
+    def setUp(self):
+        self.index = parse_catalog(io.BufferedReader(io.BytesIO(CATALOG_XML)))
+
+    def test_index_keeps_updateable_packages_only(self):
+        self.assertEqual(self.index.meta["catalog_version"], "24.01.00")
+        self.assertEqual(len(self.index.packages), 3)  # driver package skipped
+        self.assertEqual(self.index.resolve_model("PowerEdge R640"), "R640")
+        self.assertEqual(self.index.resolve_model(system_id=1814), "R640")
+
+    def test_find_updates_picks_newest_applicable_version(self):
+        updates = self.index.find_updates(INVENTORY, model="PowerEdge R640")
+
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(updates[0]["name"], "BIOS")
+        self.assertEqual(updates[0]["available_version"], "2.19.1")
+        self.assertEqual(updates[0]["criticality"], "Critical")
+        self.assertEqual(updates[0]["package_path"], "FOLDER1/BIOS_R640_2.19.1.EXE")
+
+    def test_unknown_model_has_no_offline_answer(self):
+        self.assertFalse(self.index.has_model("PowerEdge R750"))
+        self.assertEqual(self.index.find_updates(INVENTORY, model="PowerEdge R750"), [])
+
+    def test_gzip_catalog_and_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            catalog_path = os.path.join(tmp, "Catalog.xml.gz")
+            with gzip.open(catalog_path, "wb") as f:
+                f.write(CATALOG_XML)
+            index = parse_catalog(catalog_path)
+
+            index_file = os.path.join(tmp, "index.json.gz")
+            index.save(index_file)
+            loaded = CatalogIndex.load(index_file)
+
+        self.assertEqual(loaded.find_updates(INVENTORY, model="R640"), index.find_updates(INVENTORY, model="R640"))
+
+
+class VersionCompareTests(unittest.TestCase):
+    def test_dell_version_strings(self):
+        self.assertTrue(is_newer_version("2.19.1", "2.9.10"))
+        self.assertTrue(is_newer_version("7.00.00.174", "6.10.80.00"))
+        self.assertFalse(is_newer_version("2.8.0", "2.8"))
+        self.assertTrue(is_newer_version("A06", "A05"))
+        self.assertEqual(normalize_model(" PowerEdge  r640 "), "R640")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
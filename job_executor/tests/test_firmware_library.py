@@ -0,0 +1,44 @@
+import unittest
+
+from job_executor.firmware_library import FirmwarePackageIndex
+
+
+PACKAGES = [
+    {"id": "bios-old", "filename": "BIOS_R750_1.5.0.EXE", "dell_version": "1.5.0", "component_type": "BIOS",
+     "applicable_models": ["PowerEdge R750"]},
+    {"id": "bios-new", "filename": "BIOS_R750_1.10.2.EXE", "dell_version": "1.10.2", "component_type": "BIOS",
+     "applicable_models": ["R750"]},
+    {"id": "bios-r640", "filename": "BIOS_R640_2.19.1.EXE", "dell_version": "2.19.1", "component_type": "BIOS",
+     "applicable_models": ["R640"]},
+    {"id": "idrac", "filename": "iDRAC_7.00.00.174.EXE", "dell_version": "7.00.00.174", "component_type": "iDRAC",
+     "component_name_pattern": "Integrated Dell Remote Access Controller", "applicable_models": []},
+]
+
+INVENTORY = [
+    {"Name": "BIOS", "Version": "1.6.0", "component_type": "BIOS"},
+    {"Name": "Integrated Dell Remote Access Controller", "Version": "6.10.80.00"},
+    {"Name": "PERC H755 Front", "Version": "52.16.1-4405", "component_type": "RAID"},
+]
+
+
+class FirmwarePackageIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.index = FirmwarePackageIndex(PACKAGES)
+
+    def test_applicable_uses_model_tokens_and_types(self):
+        ids = [p["id"] for p in self.index.applicable("PowerEdge R750")]
+        self.assertEqual(ids, ["idrac", "bios-new", "bios-old"])  # newest version first
+        self.assertEqual([p["id"] for p in self.index.applicable("R750", ["bios"])], ["bios-new", "bios-old"])
+        self.assertEqual([p["id"] for p in self.index.applicable("PowerEdge R7525")], ["idrac"])
+
+    def test_find_updates_one_update_per_component(self):
+        updates = {u["component_name"]: u for u in self.index.find_updates(INVENTORY, "PowerEdge R750")}
+
+        self.assertEqual(set(updates), {"BIOS", "Integrated Dell Remote Access Controller"})
+        self.assertEqual(updates["BIOS"]["package_id"], "bios-new")
+        self.assertEqual(updates["Integrated Dell Remote Access Controller"]["available_version"], "7.00.00.174")
+        self.assertEqual(updates["BIOS"]["source"], "local_repository")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
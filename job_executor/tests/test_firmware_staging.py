@@ -0,0 +1,45 @@
+import unittest
+
+from job_executor.dell_redfish.errors import DellRedfishError
+from job_executor.dell_redfish.operations import DellOperations
+
+
+class FakeAdapter:
+    """Answers SimpleUpdate with a task URI, then returns queued task states."""
+
+    def __init__(self, task_states):
+        self.task_states = list(task_states)
+        self.payloads = []
+
+    def make_request(self, method, ip, endpoint, username, password, payload=None, **kwargs):
+        if method == 'POST':
+            self.payloads.append(payload)
+            return {'_location_header': '/redfish/v1/TaskService/Tasks/JID_123'}
+        return self.task_states.pop(0)
+
+
+class StageFirmwareSimpleTests(unittest.TestCase):
+    def stage(self, *task_states):
+        adapter = FakeAdapter(task_states)
+        result = DellOperations(adapter).stage_firmware_simple(
+            '10.0.0.5', 'root', 'calvin', 'http://10.0.0.1:8888/firmware/BIOS.EXE', poll_interval=0)
+        return adapter, result
+
+    def test_scheduled_job_is_staged_for_reset(self):
+        adapter, result = self.stage(
+            {'TaskState': 'Running', 'Oem': {'Dell': {'JobState': 'Downloading'}}},
+            {'TaskState': 'Running', 'Oem': {'Dell': {'JobState': 'Scheduled'}}},
+        )
+
+        self.assertEqual(adapter.payloads[0]['@Redfish.OperationApplyTime'], 'OnReset')
+        self.assertEqual(adapter.payloads[0]['TransferProtocol'], 'HTTP')
+        self.assertTrue(result['staged'])
+        self.assertEqual(result['job_state'], 'Scheduled')
+
+    def test_failed_download_raises(self):
+        with self.assertRaises(DellRedfishError):
+            self.stage({'TaskState': 'Exception', 'Messages': [{'Message': 'Unable to transfer image'}]})
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
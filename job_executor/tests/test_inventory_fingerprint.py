@@ -0,0 +1,79 @@
+import unittest
+
+from job_executor.mixins.inventory_fingerprint import (
+    InventoryFingerprintMixin,
+    diff_row_hashes,
+    hash_component_set,
+    hash_record,
+)
+
+
+class DummyFingerprint(InventoryFingerprintMixin):
+    """Lightweight subclass to expose mixin helpers for testing."""
+
+    def __init__(self, stored=None):
+        self.stored = stored
+
+    def log(self, *args, **kwargs):  # pragma: no cover - noop logger for tests
+        pass
+
+    def get_inventory_fingerprint(self, server_id, component_type):
+        return self.stored
+
+
+class InventoryHashTests(unittest.TestCase):
+    def test_hash_ignores_key_order_and_sync_timestamps(self):
+        """Volatile bookkeeping fields do not change a row's hash."""
+        a = {"fqdd": "NIC.1", "health": "OK", "last_sync": "2026-01-01T00:00:00Z"}
+        b = {"health": "OK", "last_sync": "2026-01-13T12:00:00Z", "fqdd": "NIC.1"}
+
+        self.assertEqual(hash_record(a), hash_record(b))
+        self.assertNotEqual(hash_record(a), hash_record({**a, "health": "Warning"}))
+
+    def test_diff_reports_added_changed_removed(self):
+        stored = {"a": "1", "b": "2", "c": "3"}
+        current = {"a": "1", "b": "20", "d": "4"}
+
+        added, changed, removed = diff_row_hashes(current, stored)
+
+        self.assertEqual((added, changed, removed), (["d"], ["b"], ["c"]))
+
+
+class InventoryPlanTests(unittest.TestCase):
+    rows = {
+        "DIMM.A1": {"dimm_identifier": "DIMM.A1", "health": "OK"},
+        "DIMM.A2": {"dimm_identifier": "DIMM.A2", "health": "OK"},
+    }
+
+    def _fingerprint(self, rows):
+        row_hashes = {k: hash_record(v) for k, v in rows.items()}
+        return {"content_hash": hash_component_set(row_hashes), "row_hashes": row_hashes}
+
+    def test_matching_fingerprint_skips_writes(self):
+        mixin = DummyFingerprint(self._fingerprint(self.rows))
+
+        plan = mixin.plan_inventory_diff("srv", "memory", self.rows)
+
+        self.assertTrue(plan["unchanged"])
+        self.assertEqual(plan["write_keys"], [])
+
+    def test_only_changed_and_removed_rows_are_planned(self):
+        previous = {**self.rows, "DIMM.B1": {"dimm_identifier": "DIMM.B1", "health": "OK"}}
+        mixin = DummyFingerprint(self._fingerprint(previous))
+        current = {**self.rows, "DIMM.A2": {"dimm_identifier": "DIMM.A2", "health": "Critical"}}
+
+        plan = mixin.plan_inventory_diff("srv", "memory", current)
+
+        self.assertFalse(plan["unchanged"])
+        self.assertEqual(plan["write_keys"], ["DIMM.A2"])
+        self.assertEqual(plan["removed_keys"], ["DIMM.B1"])
+
+    def test_missing_fingerprint_writes_everything(self):
+        plan = DummyFingerprint(None).plan_inventory_diff("srv", "memory", self.rows)
+
+        self.assertEqual(sorted(plan["write_keys"]), ["DIMM.A1", "DIMM.A2"])
+        self.assertEqual(plan["removed_keys"], [])
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
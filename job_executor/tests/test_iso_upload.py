@@ -0,0 +1,109 @@
+import hashlib
+import io
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from job_executor.iso_upload import UploadError, UploadManager
+
+
+CHUNK = 64 * 1024
+ISO = os.urandom(10 * CHUNK + 123)
+ISO_SHA256 = hashlib.sha256(ISO).hexdigest()
+
+
+def chunk(index):
+    return ISO[index * CHUNK:(index + 1) * CHUNK]
+
+
+class IsoUploadTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.manager = UploadManager(self.tmp.name)
+
+    def start(self, manager=None):
+        return (manager or self.manager).start('iso-1', 'esxi.iso', len(ISO), chunk_size=CHUNK, sha256=ISO_SHA256)
+
+    def send(self, session, index):
+        data = chunk(index)
+        return session.write_chunk(index, io.BytesIO(data), len(data),
+                                   sha256=hashlib.sha256(data).hexdigest())
+
+    def test_parallel_out_of_order_chunks(self):
+        session = self.start()
+        order = [3, 0, 10, 1, 2, 7, 4, 5, 6, 9, 8]
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(lambda i: self.send(session, i), order))
+
+        result = self.manager.finish('iso-1')
+
+        self.assertEqual(result['checksum'], ISO_SHA256)
+        with open(os.path.join(self.tmp.name, 'esxi.iso'), 'rb') as f:
+            self.assertEqual(f.read(), ISO)
+        self.assertEqual(os.listdir(os.path.join(self.tmp.name, '.uploads')), [])
+
+    def test_resume_after_restart_sends_only_missing_chunks(self):
+        session = self.start()
+        for index in range(6):
+            self.send(session, index)
+
+        restarted = UploadManager(self.tmp.name)
+        resumed = self.start(restarted)
+        self.assertEqual(resumed.missing(), [6, 7, 8, 9, 10])
+        for index in resumed.missing():
+            self.send(resumed, index)
+
+        self.assertEqual(restarted.finish('iso-1')['checksum'], ISO_SHA256)
+
+    def test_bad_chunk_is_rejected_and_incomplete_upload_cannot_finish(self):
+        session = self.start()
+        with self.assertRaises(UploadError):
+            session.write_chunk(0, io.BytesIO(chunk(0)), CHUNK, sha256='0' * 64)
+        with self.assertRaises(UploadError):
+            session.write_chunk(0, io.BytesIO(chunk(0)[:100]), 100)
+        with self.assertRaises(UploadError) as ctx:
+            self.manager.finish('iso-1')
+        self.assertEqual(ctx.exception.status, 409)
+
+    def test_resent_chunk_after_hashing_keeps_checksum_right(self):
+        session = self.start()
+        for index in range(11):
+            self.send(session, index)
+        self.send(session, 2)  # Already in the running digest
+
+        self.assertEqual(self.manager.finish('iso-1')['checksum'], ISO_SHA256)
+
+    def test_finish_does_not_replace_existing_iso(self):
+        with open(os.path.join(self.tmp.name, 'esxi.iso'), 'wb') as f:
+            f.write(b'other')
+        session = self.start()
+        for index in range(11):
+            self.send(session, index)
+
+        with self.assertRaises(UploadError) as ctx:
+            self.manager.finish('iso-1')
+        self.assertEqual(ctx.exception.status, 409)
+        with open(os.path.join(self.tmp.name, 'esxi.iso'), 'rb') as f:
+            self.assertEqual(f.read(), b'other')
+
+    def test_concurrent_finish_is_rejected(self):
+        session = self.start()
+        for index in range(11):
+            self.send(session, index)
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            futures = [pool.submit(self.manager.finish, 'iso-1') for _ in range(4)]
+        statuses = []
+        for future in futures:
+            try:
+                statuses.append(future.result()['checksum'])
+            except UploadError as e:
+                statuses.append(e.status)
+        self.assertEqual(statuses.count(ISO_SHA256), 1)
+        self.assertTrue(set(statuses) - {ISO_SHA256} <= {404, 409})
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,116 @@
+import http.client
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from job_executor.media_server import BandwidthScheduler, MediaRequestHandler, ThreadingMediaServer, parse_range
+
+
+ISO = os.urandom(256 * 1024)
+
+
+class ParseRangeTests(unittest.TestCase):
+    def test_forms(self):
+        self.assertEqual(parse_range('bytes=0-99', 1000), (0, 99))
+        self.assertEqual(parse_range('bytes=900-', 1000), (900, 999))
+        self.assertEqual(parse_range('bytes=-100', 1000), (900, 999))
+        self.assertEqual(parse_range('bytes=990-5000', 1000), (990, 999))
+        self.assertIsNone(parse_range('bytes=0-1,5-6', 1000))  # Multi-range: whole file
+        with self.assertRaises(ValueError):
+            parse_range('bytes=1000-', 1000)
+
+
+class BandwidthSchedulerTests(unittest.TestCase):
+    def test_global_rate_is_shared_between_clients(self):
+        scheduler = BandwidthScheduler(max_bytes_per_sec=1000000, client_max_bytes_per_sec=400000)
+        a = scheduler.begin('10.0.0.1', '/isos/esxi.iso', 100)
+        self.assertEqual(scheduler.snapshot()['limits']['client_share_bytes_per_sec'], 400000)
+
+        scheduler.begin('10.0.0.2', '/isos/esxi.iso', 100)
+        scheduler.begin('10.0.0.3', '/isos/esxi.iso', 100)
+        scheduler.begin('10.0.0.3', '/firmware/BIOS.EXE', 100)  # Extra connections do not buy a bigger share
+        self.assertAlmostEqual(scheduler.snapshot()['limits']['client_share_bytes_per_sec'], 1000000 / 3)
+
+        scheduler.end(a)
+        self.assertEqual(scheduler.snapshot()['active_clients'], 2)
+
+    def test_pace_holds_sender_to_its_rate(self):
+        scheduler = BandwidthScheduler(client_max_bytes_per_sec=1000000)
+        transfer = scheduler.begin('10.0.0.1', '/isos/esxi.iso', 600000)
+
+        started = time.monotonic()
+        for _ in range(3):
+            scheduler.pace(transfer, 200000)
+            scheduler.record(transfer, 200000)
+
+        # 250ms of burst allowance, the remaining 350KB at 1MB/s
+        self.assertGreaterEqual(time.monotonic() - started, 0.3)
+        self.assertEqual(scheduler.snapshot()['transfers'][0]['bytes_sent'], 600000)
+
+
+class MediaServerTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        iso_dir = os.path.join(cls.tmp.name, 'isos')
+        firmware_dir = os.path.join(cls.tmp.name, 'firmware')
+        os.makedirs(os.path.join(firmware_dir, 'FOLDER1'))
+        os.makedirs(iso_dir)
+        with open(os.path.join(iso_dir, 'esxi 8.iso'), 'wb') as f:
+            f.write(ISO)
+        with open(os.path.join(firmware_dir, 'FOLDER1', 'BIOS.EXE'), 'wb') as f:
+            f.write(b'dup')
+
+        def handler(*args, **kwargs):
+            return MediaRequestHandler(*args, iso_dir=iso_dir, firmware_dir=firmware_dir, timeout=5, **kwargs)
+
+        cls.server = ThreadingMediaServer(('127.0.0.1', 0), handler, max_connections=4)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.tmp.cleanup()
+
+    def connect(self):
+        conn = http.client.HTTPConnection('127.0.0.1', self.server.server_port, timeout=5)
+        self.addCleanup(conn.close)
+        return conn
+
+    def get(self, conn, path, headers=None):
+        conn.request('GET', path, headers=headers or {})
+        response = conn.getresponse()
+        return response, response.read()
+
+    def test_ranges_on_one_keepalive_connection(self):
+        conn = self.connect()
+
+        first, body = self.get(conn, '/isos/esxi%208.iso', {'Range': 'bytes=1000-1999'})
+        self.assertEqual(first.status, 206)
+        self.assertEqual(first.getheader('Content-Range'), f'bytes 1000-1999/{len(ISO)}')
+        self.assertEqual(body, ISO[1000:2000])
+
+        second, body = self.get(conn, '/isos/esxi%208.iso', {'Range': 'bytes=-16'})
+        self.assertEqual((second.status, body), (206, ISO[-16:]))
+
+        full, body = self.get(conn, '/isos/esxi%208.iso')
+        self.assertEqual((full.status, body), (200, ISO))
+        self.assertEqual(full.getheader('Accept-Ranges'), 'bytes')
+
+    def test_unsatisfiable_range_and_traversal(self):
+        conn = self.connect()
+        response, _ = self.get(conn, '/isos/esxi%208.iso', {'Range': f'bytes={len(ISO)}-'})
+        self.assertEqual(response.status, 416)
+
+        response, _ = self.get(conn, '/firmware/..%2Fisos%2Fesxi%208.iso')
+        self.assertEqual(response.status, 404)
+
+        response, body = self.get(conn, '/firmware/FOLDER1/BIOS.EXE')
+        self.assertEqual((response.status, body), (200, b'dup'))
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,52 @@
+import threading
+import time
+import unittest
+
+from job_executor.request_coalescer import RequestCoalescer
+
+
+class RequestCoalescerTests(unittest.TestCase):
+    def test_concurrent_calls_share_one_fetch(self):
+        coalescer = RequestCoalescer(ttl_seconds=5)
+        calls = []
+        release = threading.Event()
+
+        def loader():
+            calls.append(1)
+            release.wait(5)
+            return {'power_state': 'On'}
+
+        sources = []
+        threads = [threading.Thread(target=lambda: sources.append(coalescer.fetch(('health_check', 's1'), loader)[1]))
+                   for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        while coalescer.stats['coalesced'] < 4:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(sources), ['coalesced'] * 4 + ['fetched'])
+        self.assertEqual(coalescer.fetch(('health_check', 's1'), loader)[1], 'cached')
+        self.assertEqual(coalescer.fetch(('health_check', 's1'), loader, refresh=True)[1], 'fetched')
+
+    def test_errors_are_not_cached_and_invalidate_drops_server(self):
+        coalescer = RequestCoalescer(ttl_seconds=5)
+
+        def failing():
+            raise RuntimeError('iDRAC unreachable')
+
+        with self.assertRaises(RuntimeError):
+            coalescer.fetch(('idrac_jobs', 's1', True), failing)
+        self.assertEqual(coalescer.fetch(('idrac_jobs', 's1', True), lambda: [])[1], 'fetched')
+
+        coalescer.fetch(('health_check', 's2'), lambda: {})
+        coalescer.invalidate('s1')
+        self.assertEqual(coalescer.fetch(('idrac_jobs', 's1', True), lambda: [])[1], 'fetched')
+        self.assertEqual(coalescer.fetch(('health_check', 's2'), lambda: {})[1], 'cached')
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from pyVmomi import vim, vmodl
+
+from job_executor.mixins.vcenter_alarm_collector import AlarmDefinitionCache, collect_triggered_alarms
+
+
+ALARM = vim.alarm.Alarm('alarm-7')
+HOSTS = [vim.HostSystem(f'host-{i}') for i in range(3)]
+
+
+class FakeCollector:
+    """Serves alarm info and entity names; records which objects each retrieval asked for"""
+
+    def __init__(self, faulty=()):
+        self.requests = []
+        self.faulty = set(faulty)  # MoRefs whose retrieval raises a fault
+
+    def RetrievePropertiesEx(self, specSet, options):
+        objects = [spec.obj for spec in specSet[0].objectSet]
+        self.requests.append(sorted(obj._moId for obj in objects))
+        if self.faulty & {obj._moId for obj in objects}:
+            raise vmodl.fault.InvalidArgument()
+        contents = []
+        for obj in objects:
+            if isinstance(obj, vim.alarm.Alarm):
+                props = {'info.name': 'Host connection lost', 'info.description': 'Host is unreachable'}
+            else:
+                props = {'name': f'esx{obj._moId[-1]}.lab'}
+            contents.append(SimpleNamespace(obj=obj, propSet=[SimpleNamespace(name=k, val=v) for k, v in props.items()]))
+        return SimpleNamespace(objects=contents, token=None)
+
+
+def alarm_state(host):
+    return SimpleNamespace(key=f'alarm-7.{host._moId}', alarm=ALARM, entity=host, overallStatus='red',
+                           acknowledged=False, time=datetime(2026, 1, 5, 10, 0, tzinfo=timezone.utc))
+
+
+class CollectTriggeredAlarmsTests(unittest.TestCase):
+    def setUp(self):
+        self.collector = FakeCollector()
+        self.content = SimpleNamespace(
+            rootFolder=SimpleNamespace(triggeredAlarmState=[alarm_state(h) for h in HOSTS]),
+            propertyCollector=self.collector,
+        )
+        self.cache = AlarmDefinitionCache(ttl=3600)
+
+    def test_definitions_and_names_come_from_one_retrieval(self):
+        rows, errors = collect_triggered_alarms(self.content, 'vc-1', self.cache)
+
+        self.assertEqual(errors, 0)
+        self.assertEqual(self.collector.requests, [['alarm-7', 'host-0', 'host-1', 'host-2']])
+        self.assertEqual([r['entity_name'] for r in rows], ['esx0.lab', 'esx1.lab', 'esx2.lab'])
+        self.assertEqual(rows[0]['alarm_name'], 'Host connection lost')
+        self.assertEqual(rows[0]['entity_type'], 'vim.HostSystem')
+        self.assertEqual(rows[0]['triggered_at'], '2026-01-05T10:00:00+00:00')
+
+    def test_cached_definitions_are_not_fetched_again(self):
+        collect_triggered_alarms(self.content, 'vc-1', self.cache)
+        rows, _ = collect_triggered_alarms(self.content, 'vc-1', self.cache)
+
+        self.assertEqual(self.collector.requests[1], ['host-0', 'host-1', 'host-2'])
+        self.assertEqual(rows[2]['description'], 'Host is unreachable')
+
+
+    def test_fault_falls_back_to_per_object_fetch_and_keeps_every_row(self):
+        self.collector.faulty = {'host-1'}
+        rows, errors = collect_triggered_alarms(self.content, 'vc-1', self.cache)
+
+        self.assertEqual(len(self.collector.requests), 5)  # Bulk, then one per object
+        self.assertEqual([r['alarm_key'] for r in rows], ['alarm-7.host-0', 'alarm-7.host-1', 'alarm-7.host-2'])
+        self.assertEqual([r['entity_name'] for r in rows], ['esx0.lab', 'Unknown', 'esx2.lab'])
+        self.assertEqual(errors, 0)
+
+    def test_unreadable_state_still_yields_its_row(self):
+        class BrokenTime:
+            def isoformat(self):
+                raise ValueError('bad time')
+
+            def __str__(self):
+                raise ValueError('bad time')
+
+        self.content.rootFolder.triggeredAlarmState[0].time = BrokenTime()
+        rows, errors = collect_triggered_alarms(self.content, 'vc-1', self.cache)
+
+        self.assertEqual(errors, 1)
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]['alarm_key'], 'alarm-7.host-0')
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,125 @@
+import unittest
+from types import SimpleNamespace
+
+from pyVmomi import vim, vmodl
+
+from job_executor.mixins.vcenter_incremental_sync import InventoryTracker
+
+
+HOST = vim.HostSystem('host-1')
+VM = vim.VirtualMachine('vm-1')
+NETWORK = vim.Network('network-1')
+
+
+def update(kind, obj, **props):
+    return SimpleNamespace(kind=kind, obj=obj, changeSet=[
+        SimpleNamespace(name=name, op='assign', val=val) for name, val in props.items()
+    ])
+
+
+def update_set(version, *object_updates):
+    return SimpleNamespace(version=version, truncated=False,
+                           filterSet=[SimpleNamespace(objectSet=list(object_updates))])
+
+
+class FakeCollector:
+    def __init__(self, responses):
+        self.responses = responses
+        self.versions = []
+
+    def CreateFilter(self, spec, partialUpdates):
+        pass
+
+    def WaitForUpdatesEx(self, version, options):
+        self.versions.append(version)
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    def Destroy(self):
+        pass
+
+
+class FakeContent:
+    def __init__(self, collector):
+        self.rootFolder = vim.Folder('group-d1')
+        self.propertyCollector = SimpleNamespace(CreatePropertyCollector=lambda: collector)
+        self.viewManager = SimpleNamespace(
+            CreateContainerView=lambda container, type, recursive: vim.view.ContainerView('view-1'))
+
+
+INITIAL = update_set(
+    '1',
+    update('enter', HOST, name='esx01'),
+    update('enter', VM, name='app01', **{'runtime.powerState': 'poweredOn', 'summary.runtime.host': HOST}),
+    update('enter', NETWORK, name='VM Network'),
+)
+
+
+class InventoryTrackerTests(unittest.TestCase):
+    def test_deltas_report_only_changed_rows(self):
+        collector = FakeCollector([
+            INITIAL,
+            update_set('2', update('modify', VM, **{'runtime.powerState': 'poweredOff'})),
+            None,  # Nothing new
+        ])
+        tracker = InventoryTracker(si=None, enable_deep=False)
+        content = FakeContent(collector)
+
+        first = tracker.poll(content)
+        self.assertEqual(first['mode'], 'full')
+        self.assertEqual((len(first['changed']['vms']), len(first['changed']['hosts'])), (1, 1))
+        tracker.commit()
+
+        second = tracker.poll(content)
+        self.assertEqual(second['mode'], 'incremental')
+        self.assertEqual([vm['name'] for vm in second['changed']['vms']], ['app01'])
+        self.assertEqual(second['changed']['hosts'], [])
+        self.assertEqual(second['counts']['vms'], 1)
+        tracker.commit()
+
+        third = tracker.poll(content)
+        self.assertEqual(third['changed_objects'], 0)
+        self.assertEqual(collector.versions, ['', '1', '2'])
+
+    def test_version_loss_resyncs_and_reports_removed_objects(self):
+        collector = FakeCollector([
+            INITIAL,
+            vmodl.query.InvalidCollectorVersion(),
+            update_set('1', update('enter', HOST, name='esx01'), update('enter', NETWORK, name='VM Network')),
+        ])
+        tracker = InventoryTracker(si=None, enable_deep=False)
+        content = FakeContent(collector)
+        tracker.poll(content)
+        tracker.commit()
+
+        result = tracker.poll(content)
+        self.assertEqual(result['mode'], 'full')
+        self.assertEqual(result['removed']['vms'], ['vm-1'])
+        self.assertEqual(result['changed']['hosts'], [])  # Unchanged rows are not pushed again
+        self.assertEqual(tracker.full_resyncs, 2)
+
+
+    def test_uncommitted_rows_are_reported_again(self):
+        collector = FakeCollector([
+            INITIAL,
+            update_set('2', update('modify', VM, **{'runtime.powerState': 'poweredOff'})),
+            None,
+            None,
+        ])
+        tracker = InventoryTracker(si=None, enable_deep=False)
+        content = FakeContent(collector)
+        tracker.poll(content)
+        tracker.commit()
+
+        tracker.poll(content)  # Upsert failed or job cancelled - not committed
+        retry = tracker.poll(content)
+        self.assertEqual([vm['name'] for vm in retry['changed']['vms']], ['app01'])
+        tracker.commit()
+
+        self.assertEqual(tracker.poll(content)['changed_objects'], 0)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,104 @@
+import gc
+import unittest
+import weakref
+from types import SimpleNamespace
+
+from pyVmomi import vim, vmodl
+
+from job_executor.vcenter_lookup import ManagedObjectLookup, find_by_moref, get_lookup
+
+
+class FakeStub:
+    pass
+
+
+class FakeCollector:
+    """Answers name fetches for single objects and paged name retrievals over a view"""
+
+    def __init__(self, names):
+        self._stub = FakeStub()
+        self.names = names  # moref -> name
+        self.single_fetches = 0
+        self.view_retrievals = 0
+
+    def RetrievePropertiesEx(self, specSet, options):
+        obj = specSet[0].objectSet[0].obj
+        if isinstance(obj, vim.view.ContainerView):
+            self.view_retrievals += 1
+            objects = [SimpleNamespace(obj=vim.VirtualMachine(moref), propSet=[SimpleNamespace(name='name', val=name)])
+                       for moref, name in self.names.items()]
+            return SimpleNamespace(objects=objects, token=None)
+        self.single_fetches += 1
+        if obj._moId not in self.names:
+            raise vmodl.fault.ManagedObjectNotFound(obj=obj)
+        return SimpleNamespace(objects=[SimpleNamespace(
+            obj=obj, propSet=[SimpleNamespace(name='name', val=self.names[obj._moId])])], token=None)
+
+
+def fake_content(collector):
+    return SimpleNamespace(
+        rootFolder=vim.Folder('group-d1'),
+        propertyCollector=collector,
+        viewManager=SimpleNamespace(
+            CreateContainerView=lambda container, type, recursive: vim.view.ContainerView('view-1')),
+    )
+
+
+class ManagedObjectLookupTests(unittest.TestCase):
+    def setUp(self):
+        self.collector = FakeCollector({'vm-1': 'web01', 'vm-2': 'db01'})
+        self.lookup = ManagedObjectLookup(fake_content(self.collector), ttl=60)
+
+    def test_moref_lookup_is_one_fetch_then_cached(self):
+        vm = self.lookup.by_moref(vim.VirtualMachine, 'vm-2')
+        self.assertEqual(vm._moId, 'vm-2')
+        self.assertIs(vm._stub, self.collector._stub)
+        self.assertIs(self.lookup.by_moref(vim.VirtualMachine, 'vm-2'), vm)
+        self.assertEqual(self.collector.single_fetches, 1)
+        self.assertEqual(self.collector.view_retrievals, 0)
+
+        self.assertIsNone(self.lookup.by_moref(vim.VirtualMachine, 'vm-404'))
+
+    def test_destroyed_vm_is_not_returned_from_cache(self):
+        self.assertIsNotNone(self.lookup.by_moref(vim.VirtualMachine, 'vm-2'))
+        del self.collector.names['vm-2']  # Destroyed elsewhere
+
+        self.assertIsNone(self.lookup.by_moref(vim.VirtualMachine, 'vm-2', fresh=True))
+        self.assertIsNone(self.lookup.by_moref(vim.VirtualMachine, 'vm-2'))  # Miss was not cached
+
+        self.collector.names['vm-1'] = 'web01'
+        self.lookup.by_moref(vim.VirtualMachine, 'vm-1')
+        del self.collector.names['vm-1']
+        self.lookup.forget(vim.VirtualMachine, 'vm-1')  # Destroyed by us
+        self.assertIsNone(self.lookup.by_moref(vim.VirtualMachine, 'vm-1'))
+
+    def test_name_lookup_indexes_once_and_follows_renames(self):
+        self.assertEqual(self.lookup.by_name(vim.VirtualMachine, 'db01')._moId, 'vm-2')
+        self.assertEqual(self.lookup.by_name(vim.VirtualMachine, 'web01')._moId, 'vm-1')
+        self.assertEqual(self.collector.view_retrievals, 1)
+
+        self.collector.names = {'vm-1': 'web01-old', 'vm-3': 'web01'}
+        self.assertEqual(self.lookup.by_name(vim.VirtualMachine, 'web01')._moId, 'vm-3')
+        self.assertEqual(self.collector.view_retrievals, 2)
+        self.assertIsNone(self.lookup.by_name(vim.VirtualMachine, 'missing'))
+
+    def test_lookups_are_shared_per_connection(self):
+        content = fake_content(self.collector)
+        self.assertIs(get_lookup(content), get_lookup(fake_content(self.collector)))
+        self.assertIsNotNone(find_by_moref(content, vim.VirtualMachine, 'vm-1'))
+        self.assertIsNot(get_lookup(fake_content(FakeCollector({}))), get_lookup(content))
+
+    def test_lookup_is_freed_with_its_connection(self):
+        content = fake_content(FakeCollector({'vm-1': 'web01'}))
+        self.assertIsNotNone(find_by_moref(content, vim.VirtualMachine, 'vm-1'))  # Caches an object
+        lookup = weakref.ref(get_lookup(content))
+        stub = weakref.ref(content.propertyCollector._stub)
+
+        del content
+        gc.collect()
+        self.assertIsNone(lookup())
+        self.assertIsNone(stub())
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
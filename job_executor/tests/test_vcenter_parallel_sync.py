@@ -0,0 +1,66 @@
+import threading
+import time
+import unittest
+
+from job_executor.handlers.vcenter_handlers import VCenterHandlers
+
+
+class FakeExecutor:
+    def __init__(self):
+        self.published = []
+
+    def log(self, message, level="INFO"):
+        pass
+
+    def update_job_status(self, job_id, status, **kwargs):
+        self.published.append(kwargs.get("details"))
+        return True
+
+
+class StubSyncHandlers(VCenterHandlers):
+    """Replaces the per-vCenter sync with a timed stub"""
+
+    def __init__(self, executor):
+        super().__init__(executor)
+        self.running = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def _sync_single_vcenter(self, job, vcenter_config, vcenter_index, total_vcenters, job_details,
+                             dedicated_session=False):
+        with self.lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        try:
+            self._publish_progress(job, job_details, vcenter_index, {"current_step": f"Syncing {vcenter_config['name']}"})
+            time.sleep(0.05)
+            if vcenter_config["name"] == "broken":
+                raise RuntimeError("login failed")
+            return {"vcenter_name": vcenter_config["name"], "status": "success", "vms": 10,
+                    "dedicated": dedicated_session}
+        finally:
+            with self.lock:
+                self.running -= 1
+
+
+class ParallelVCenterSyncTests(unittest.TestCase):
+    def test_failures_are_isolated_and_concurrency_is_capped(self):
+        executor = FakeExecutor()
+        handler = StubSyncHandlers(executor)
+        vcenters = [{"id": str(i), "name": name, "host": f"vc{i}"}
+                    for i, name in enumerate(["a", "broken", "c", "d", "e"])]
+        job_details = {}
+
+        results = handler._sync_vcenters_parallel({"id": "job-1"}, vcenters, 2, job_details)
+
+        self.assertEqual([r["vcenter_name"] for r in results], ["a", "broken", "c", "d", "e"])
+        self.assertEqual([r["status"] for r in results], ["success", "failed", "success", "success", "success"])
+        self.assertTrue(all(r.get("dedicated") for r in results if r["status"] == "success"))
+        self.assertEqual(handler.peak, 2)
+        self.assertEqual(job_details["vcenters_completed"], 5)
+        self.assertEqual(job_details["vcenter_progress"]["1"]["status"], "failed")
+        self.assertIsNot(executor.published[-1], job_details)  # Published snapshots, not the live dict
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
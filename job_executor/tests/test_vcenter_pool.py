@@ -0,0 +1,136 @@
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from job_executor import vcenter_pool
+from job_executor.vcenter_pool import VCenterSessionPool
+
+
+class FakeServiceInstance:
+    def __init__(self):
+        self.alive = True
+        self.checks = 0
+
+    def RetrieveContent(self):
+        self.checks += 1
+        if not self.alive:
+            raise RuntimeError("NotAuthenticated")
+        return SimpleNamespace(sessionManager=SimpleNamespace(currentSession=object()))
+
+
+class CountingLogin:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.sessions = []
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        time.sleep(self.delay)
+        si = FakeServiceInstance()
+        with self.lock:
+            self.sessions.append(si)
+        return si
+
+
+class VCenterSessionPoolTests(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(vcenter_pool, 'Disconnect')
+        self.disconnect = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.pool = VCenterSessionPool(validate_seconds=60, keepalive_seconds=0, idle_seconds=3600)
+
+    def test_concurrent_callers_share_one_login_per_host(self):
+        login = CountingLogin(delay=0.05)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.pool.get('VC1.lab', 'admin', login, 'pw')))
+                   for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(login.sessions), 1)
+        self.assertTrue(all(si is login.sessions[0] for si in results))
+        self.assertIsNot(self.pool.get('vc2.lab', 'admin', login, 'pw'), login.sessions[0])
+        self.assertEqual(self.pool.snapshot()['sessions'], 2)
+
+    def test_expired_session_is_replaced_after_release(self):
+        login = CountingLogin()
+        first = self.pool.get('vc1', 'admin', login, 'pw')
+        self.assertIs(self.pool.get('vc1', 'admin', login, 'pw'), first)
+        self.assertEqual(first.checks, 0)  # Recently validated - no round trip
+
+        first.alive = False
+        self.assertTrue(self.pool.release(first))  # Pooled: kept, but re-checked next time
+        self.disconnect.assert_not_called()
+
+        second = self.pool.get('vc1', 'admin', login, 'pw')
+        self.assertIsNot(second, first)
+        self.disconnect.assert_called_once_with(first)
+        self.assertEqual(self.pool.stats['expired'], 1)
+
+    def test_changed_credentials_force_new_login(self):
+        login = CountingLogin()
+        first = self.pool.get('vc1', 'admin', login, 'old')
+        second = self.pool.get('vc1', 'admin', login, 'new')
+        self.assertIsNot(first, second)
+        self.assertEqual(self.pool.stats['logins'], 2)
+
+    def test_keepalive_logs_out_idle_sessions(self):
+        login = CountingLogin()
+        si = self.pool.get('vc1', 'admin', login, 'pw')
+        self.pool.release(si)
+        self.pool.idle_seconds = 0
+        self.pool.keepalive()
+        self.disconnect.assert_called_once_with(si)
+        self.assertEqual(self.pool.snapshot()['sessions'], 0)
+
+    def test_keepalive_keeps_held_sessions(self):
+        login = CountingLogin()
+        si = self.pool.get('vc1', 'admin', login, 'pw')
+        self.pool.idle_seconds = 0
+        self.pool.keepalive()  # Still leased by a long-running job
+        self.disconnect.assert_not_called()
+
+        self.pool.release(si)
+        self.pool.idle_seconds = 60
+        self.pool.keepalive()  # Release counts as use
+        self.disconnect.assert_not_called()
+
+        self.pool.idle_seconds = 0
+        self.pool.keepalive()
+        self.disconnect.assert_called_once_with(si)
+
+    def test_unleased_sessions_are_logged_out_when_idle(self):
+        login = CountingLogin()
+        si = self.pool.get('vc1', 'admin', login, 'pw', lease=False)
+        self.assertIs(self.pool.get('vc1', 'admin', login, 'pw', lease=False), si)
+        self.pool.idle_seconds = 0
+        self.pool.keepalive()  # Nothing to hand back - reaped once idle
+        self.disconnect.assert_called_once_with(si)
+
+    def test_sessions_are_keyed_by_ssl_verification(self):
+        login = CountingLogin()
+        insecure = self.pool.get('vc1', 'admin', login, 'pw')
+        verified = self.pool.get('vc1', 'admin', login, 'pw', verify_ssl=True)
+        self.assertIsNot(insecure, verified)
+        self.assertIs(self.pool.get('vc1', 'admin', login, 'pw', verify_ssl=True), verified)
+
+    def test_verified_smart_connect_loads_default_cas(self):
+        default_context = mock.Mock()
+        with mock.patch.object(vcenter_pool, 'get_vcenter_pool', return_value=self.pool), \
+                mock.patch.object(vcenter_pool.ssl, 'create_default_context', return_value=default_context), \
+                mock.patch.object(vcenter_pool, 'SmartConnect', return_value=FakeServiceInstance()) as connect:
+            vcenter_pool.pooled_smart_connect('vc1', 'admin', 'pw', verify_ssl=True)
+        self.assertIs(connect.call_args.kwargs['sslContext'], default_context)
+
+    def test_unpooled_sessions_are_disconnected_on_release(self):
+        stray = FakeServiceInstance()
+        self.assertFalse(self.pool.release(stray))
+        self.disconnect.assert_called_once_with(stray)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,107 @@
+import unittest
+from collections import Counter
+from types import SimpleNamespace
+from unittest import mock
+
+from job_executor.mixins import vcenter_db_upsert
+from job_executor.mixins.vcenter_db_upsert import SyncIdMaps, VCenterDbUpsertMixin
+
+
+class FakePostgrest:
+    """Tables of rows; GET filters on source_vcenter_id, DELETE on id=in.(...)"""
+
+    def __init__(self, tables):
+        self.tables = tables
+        self.gets = Counter()
+        self.posted = []
+        self.deleted = []
+
+    @staticmethod
+    def _table(url):
+        return url.split('/rest/v1/')[1].split('?')[0]
+
+    def get(self, url, params=None, headers=None, verify=None, timeout=None):
+        table = self._table(url)
+        self.gets[table] += 1
+        source = params['source_vcenter_id'][len('eq.'):]
+        fields = params['select'].split(',')
+        rows = [{f: r.get(f) for f in fields} for r in self.tables.get(table, [])
+                if r['source_vcenter_id'] == source]
+        page = rows[params['offset']:params['offset'] + params['limit']]
+        return SimpleNamespace(status_code=200, json=lambda: page, text='')
+
+    def post(self, url, headers=None, json=None, verify=None, timeout=None):
+        self.posted.extend(json)
+        return SimpleNamespace(status_code=201, text='')
+
+    def delete(self, url, params=None, headers=None, verify=None, timeout=None):
+        self.deleted.extend(params['id'][len('in.('):-1].split(','))
+        return SimpleNamespace(status_code=204, text='')
+
+
+class Executor(VCenterDbUpsertMixin):
+    def log(self, message, level="INFO"):
+        pass
+
+
+def snapshot_row(row_id, snapshot_id, name, created_at='2026-01-05T10:00:00+00:00'):
+    return {'id': row_id, 'vm_id': 'db-vm-1', 'snapshot_id': snapshot_id, 'name': name, 'description': '',
+            'created_at': created_at, 'size_bytes': 0, 'is_current': False, 'parent_snapshot_id': None,
+            'source_vcenter_id': 'vc-1'}
+
+
+class RelationshipSyncTests(unittest.TestCase):
+    def setUp(self):
+        self.db = FakePostgrest({
+            'vcenter_vms': [{'id': 'db-vm-1', 'vcenter_id': 'vm-1', 'source_vcenter_id': 'vc-1'}],
+            'vcenter_networks': [{'id': 'db-net-1', 'vcenter_id': 'network-1', 'name': 'VM Network',
+                                  'source_vcenter_id': 'vc-1'}],
+            'vcenter_datastores': [{'id': 'db-ds-1', 'vcenter_id': 'datastore-1', 'source_vcenter_id': 'vc-1'}],
+            'vcenter_vm_snapshots': [
+                snapshot_row('row-1', 'snap-1', 'before upgrade'),
+                snapshot_row('row-2', 'snap-2', 'nightly'),
+                snapshot_row('row-3', 'snap-3', 'deleted in vCenter'),
+            ],
+        })
+        patcher = mock.patch.object(vcenter_db_upsert, 'requests', self.db)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.executor = Executor()
+
+    def test_snapshots_are_diffed_not_rewritten(self):
+        vms = [{'id': 'vm-1', 'snapshots': [
+            # Same instant as stored, formatted differently by vCenter
+            {'snapshot_id': 'snap-1', 'name': 'before upgrade', 'description': '',
+             'created_at': '2026-01-05T10:00:00Z'},
+            {'snapshot_id': 'snap-2', 'name': 'nightly (renamed)', 'description': '',
+             'created_at': '2026-01-05T10:00:00+00:00'},
+            {'snapshot_id': 'snap-4', 'name': 'new', 'description': '', 'created_at': None},
+        ]}]
+        result = self.executor._upsert_vm_snapshots_batch(vms, 'vc-1')
+
+        self.assertEqual(self.db.deleted, ['row-3'])
+        self.assertEqual(sorted(r['snapshot_id'] for r in self.db.posted), ['snap-2', 'snap-4'])
+        self.assertEqual((result['synced'], result['inserted'], result['deleted']), (3, 2, 1))
+
+    def test_relationship_phases_share_one_id_lookup(self):
+        vms = [{'id': 'vm-1',
+                'network_interfaces': [{'network_moref': 'network-1', 'nic_label': 'Network adapter 1'}],
+                'datastore_usage': [{'datastore_moref': 'datastore-1', 'committed_bytes': 10}]}]
+        id_maps = SyncIdMaps('vc-1')
+        self.executor._upsert_network_vms_batch(vms, 'vc-1', id_maps=id_maps)
+        self.executor._upsert_datastore_vms_batch(vms, 'vc-1', id_maps=id_maps)
+        self.executor._upsert_vm_snapshots_batch(vms, 'vc-1', id_maps=id_maps)
+
+        self.assertEqual(self.db.gets['vcenter_vms'], 1)
+        self.assertEqual({r.get('network_id') or r.get('datastore_id') for r in self.db.posted},
+                         {'db-net-1', 'db-ds-1'})
+
+    def test_failed_existing_fetch_writes_nothing(self):
+        self.db.get = lambda *args, **kwargs: SimpleNamespace(status_code=500, text='')
+        result = self.executor._sync_relationship_rows('vcenter_vm_snapshots', 'vc-1', [], ('vm_id', 'snapshot_id'))
+        self.assertIn('error', result)
+        self.assertEqual((self.db.posted, self.db.deleted), ([], []))
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
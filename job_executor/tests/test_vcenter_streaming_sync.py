@@ -0,0 +1,95 @@
+import unittest
+from types import SimpleNamespace
+
+from pyVmomi import vim
+
+from job_executor.mixins.vcenter_streaming_sync import StreamingInventory, prefetch_pages
+
+
+CLUSTER = vim.ClusterComputeResource('domain-c1')
+HOST = vim.HostSystem('host-1')
+NETWORK = vim.Network('network-1')
+
+
+def object_content(obj, **props):
+    return SimpleNamespace(obj=obj, propSet=[SimpleNamespace(name=k, val=v) for k, v in props.items()])
+
+
+class FakeCollector:
+    """Serves non-VM objects in one page and VMs in pages of two"""
+
+    def __init__(self, vm_count):
+        self.context = [
+            object_content(CLUSTER, name='prod'),
+            object_content(HOST, name='esx01', parent=CLUSTER),
+            object_content(NETWORK, name='VM Network'),
+        ]
+        vms = [object_content(vim.VirtualMachine(f'vm-{i}'), name=f'app{i:02d}', **{'summary.runtime.host': HOST})
+               for i in range(vm_count)]
+        self.vm_pages = [vms[i:i + 2] for i in range(0, len(vms), 2)]
+        self.cancelled = []
+
+    def RetrievePropertiesEx(self, specSet, options):
+        if specSet[0].propSet[0].type is vim.VirtualMachine:
+            return self._page(0)
+        return SimpleNamespace(objects=self.context, token=None)
+
+    def ContinueRetrievePropertiesEx(self, token):
+        return self._page(int(token))
+
+    def CancelRetrievePropertiesEx(self, token):
+        self.cancelled.append(token)
+
+    def _page(self, index):
+        more = index + 1 < len(self.vm_pages)
+        return SimpleNamespace(objects=self.vm_pages[index], token=str(index + 1) if more else None)
+
+
+def fake_content(collector):
+    return SimpleNamespace(
+        rootFolder=vim.Folder('group-d1'),
+        propertyCollector=collector,
+        viewManager=SimpleNamespace(
+            CreateContainerView=lambda container, type, recursive: vim.view.ContainerView('view-1')),
+    )
+
+
+class StreamingInventoryTests(unittest.TestCase):
+    def test_vm_pages_resolve_hosts_and_feed_cluster_counts(self):
+        stream = StreamingInventory(fake_content(FakeCollector(vm_count=5)), 'vc-1', enable_deep=False)
+        stream.load_context()
+        self.assertEqual([h['name'] for h in stream.rows('hosts')], ['esx01'])
+
+        pages = list(stream.vm_pages())
+        self.assertEqual([len(p) for p in pages], [2, 2, 1])
+        self.assertTrue(all(vm['host_name'] == 'esx01' and vm['cluster_name'] == 'prod'
+                            for page in pages for vm in page))
+
+        clusters = stream.rows('clusters')
+        self.assertEqual(clusters[0]['vm_count'], 5)
+        summary = stream.summary()
+        self.assertEqual(summary['counts']['vms'], 5)
+        self.assertNotIn('vms', summary)  # Rows were handed over page by page
+
+    def test_abandoned_stream_cancels_the_retrieval(self):
+        collector = FakeCollector(vm_count=10)
+        stream = StreamingInventory(fake_content(collector), 'vc-1', enable_deep=False)
+        stream.load_context()
+        pages = stream.vm_pages()
+        next(pages)
+        pages.close()
+        self.assertEqual(len(collector.cancelled), 1)
+
+    def test_prefetch_reraises_fetch_errors(self):
+        def pages():
+            yield [1]
+            raise RuntimeError('connection reset')
+
+        fetched = prefetch_pages(pages())
+        self.assertEqual(next(fetched), [1])
+        with self.assertRaises(RuntimeError):
+            next(fetched)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,98 @@
+import threading
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from job_executor.mixins import vcenter_db_upsert
+from job_executor.mixins.vcenter_db_upsert import VCenterDbUpsertMixin
+from job_executor.mixins.vcenter_upsert_state import AdaptiveBatchSize, RowHashCache
+
+
+class FakeVmTable:
+    """vcenter_vms behind PostgREST: POST upserts, PATCH touches by vcenter_id"""
+
+    def __init__(self):
+        self.rows = {}
+        self.posted = []
+        self.touched = []
+        self.lock = threading.Lock()
+
+    def post(self, url, headers=None, json=None, verify=None, timeout=None):
+        with self.lock:
+            self.posted.extend(r['vcenter_id'] for r in json)
+            for record in json:
+                self.rows[record['vcenter_id']] = dict(record)
+        return SimpleNamespace(status_code=201, text='')
+
+    def patch(self, url, params=None, headers=None, json=None, verify=None, timeout=None):
+        morefs = params['vcenter_id'][len('in.('):-1].split(',')
+        with self.lock:
+            hits = [m for m in morefs if m in self.rows]
+            self.touched.extend(hits)
+            for moref in hits:
+                self.rows[moref].update(json)
+        return SimpleNamespace(status_code=200, json=lambda: [{'vcenter_id': m} for m in hits])
+
+
+class Executor(VCenterDbUpsertMixin):
+    def log(self, message, level="INFO"):
+        pass
+
+
+def vm(i, power_state='poweredOn'):
+    return {'id': f'vm-{i}', 'name': f'app{i:02d}', 'host_name': 'esx01', 'power_state': power_state}
+
+
+class ChangedRowsUpsertTests(unittest.TestCase):
+    def setUp(self):
+        self.table = FakeVmTable()
+        patches = [
+            mock.patch.object(vcenter_db_upsert, 'requests', SimpleNamespace(post=self.table.post,
+                                                                             patch=self.table.patch)),
+            mock.patch.object(vcenter_db_upsert, 'get_row_hash_cache', return_value=RowHashCache()),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.executor = Executor()
+        self.host_map = {'esx01': 'host-uuid-1'}
+
+    def sync(self, vms):
+        return self.executor._upsert_vms_batch(vms, 'vc-1', host_id_map=self.host_map)
+
+    def test_second_sync_writes_only_changed_rows(self):
+        first = self.sync([vm(i) for i in range(120)])
+        self.assertEqual((first['synced'], first['written']), (120, 120))
+        self.table.posted.clear()
+
+        vms = [vm(i) for i in range(120)]
+        vms[7] = vm(7, power_state='poweredOff')
+        second = self.sync(vms)
+
+        self.assertEqual(self.table.posted, ['vm-7'])
+        self.assertEqual(len(self.table.touched), 119)
+        self.assertEqual((second['synced'], second['written']), (120, 1))
+        self.assertEqual(self.table.rows['vm-7']['power_state'], 'poweredOff')
+
+    def test_rows_missing_from_the_database_are_rewritten(self):
+        self.sync([vm(i) for i in range(5)])
+        del self.table.rows['vm-3']
+        self.table.posted.clear()
+
+        result = self.sync([vm(i) for i in range(5)])
+        self.assertEqual(self.table.posted, ['vm-3'])
+        self.assertEqual(result['synced'], 5)
+        self.assertIn('vm-3', self.table.rows)
+
+    def test_batch_size_adapts_to_response_times(self):
+        sizer = AdaptiveBatchSize(initial=50, minimum=25, maximum=200, slow_seconds=4)
+        sizer.record(True, 0.5)
+        sizer.record(True, 0.5)
+        self.assertEqual(sizer.size, 200)
+        sizer.record(False, 0.1)
+        sizer.record(True, 10)
+        self.assertEqual(sizer.size, 50)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,179 @@
+"""
+Managed object lookups by MoRef or name without scanning the inventory
+
+Handlers used to find a VM by walking a ContainerView of every VM and
+reading each one's _moId or name - one round trip per VM for name
+matches, and a full view for every lookup. Instead:
+
+- find_by_moref() builds the object straight from its MoRef and confirms it
+  exists with a single property fetch;
+- find_by_name() keeps a name -> MoRef index per connection and type, built
+  with one PropertyCollector retrieval of just "name", and confirms a hit
+  with a single property fetch (the index is rebuilt when a name is not
+  found or has moved).
+
+Objects found by MoRef are cached per connection for
+VCENTER_LOOKUP_CACHE_SECONDS, so repeated lookups in a polling loop cost
+nothing. A cached hit can outlive the object, so lookups whose result
+decides whether to create, delete or retry something pass fresh=True, and
+code that destroys or unregisters a VM calls forget_object().
+"""
+
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from pyVmomi import vim, vmodl
+
+from job_executor.config import VCENTER_LOOKUP_CACHE_SECONDS
+
+# Faults meaning "no such object of that type"
+_NOT_FOUND = (vmodl.fault.ManagedObjectNotFound, vmodl.fault.InvalidArgument, vmodl.fault.InvalidType)
+
+
+class ManagedObjectLookup:
+    """Lookups for one vCenter connection (see get_lookup())"""
+
+    def __init__(self, content, ttl: float = VCENTER_LOOKUP_CACHE_SECONDS):
+        self.content = content
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._objects: Dict[Tuple[type, str], Tuple[Any, str, float]] = {}
+        self._names: Dict[type, Dict[str, str]] = {}
+
+    def by_moref(self, vim_type: type, moref: str, fresh: bool = False):
+        """
+        The object of vim_type with this MoRef, or None if it does not exist.
+
+        fresh skips the cache and confirms the object exists now.
+        """
+        if not moref:
+            return None
+        cached = None if fresh else self._cached(vim_type, moref)
+        if cached is not None:
+            return cached
+        obj = vim_type(moref, self.content.propertyCollector._stub)
+        name = self._fetch_name(vim_type, obj)
+        if name is None:
+            self.forget(vim_type, moref)
+            return None
+        self._remember(vim_type, obj, name)
+        return obj
+
+    def by_name(self, vim_type: type, name: str):
+        """
+        The first object of vim_type with this name, or None.
+
+        Names are only unique per folder; like the inventory scans this
+        replaces, the first match wins.
+        """
+        if not name:
+            return None
+        with self._lock:
+            moref = self._names.get(vim_type, {}).get(name)
+        if moref is not None:
+            # Always re-checked: names move between objects more often than MoRefs vanish
+            obj = vim_type(moref, self.content.propertyCollector._stub)
+            if self._fetch_name(vim_type, obj) == name:
+                self._remember(vim_type, obj, name)
+                return obj
+
+        # Unknown, renamed or deleted - rebuild the index for this type
+        self._index_names(vim_type)
+        with self._lock:
+            moref = self._names[vim_type].get(name)
+        if moref is None:
+            return None
+        obj = vim_type(moref, self.content.propertyCollector._stub)
+        self._remember(vim_type, obj, name)
+        return obj
+
+    def forget(self, vim_type: type, moref: str):
+        """Drop a cached object (e.g. after destroying it)"""
+        with self._lock:
+            self._objects.pop((vim_type, moref), None)
+
+    # ------------------------------------------------------------------
+
+    def _cached(self, vim_type: type, moref: str):
+        with self._lock:
+            entry = self._objects.get((vim_type, moref))
+            if entry is not None and time.monotonic() - entry[2] < self.ttl:
+                return entry[0]
+        return None
+
+    def _remember(self, vim_type: type, obj, name: str):
+        with self._lock:
+            self._objects[(vim_type, obj._moId)] = (obj, name, time.monotonic())
+            self._names.setdefault(vim_type, {})[name] = obj._moId
+
+    def _fetch_name(self, vim_type: type, obj) -> Optional[str]:
+        """One RetrievePropertiesEx for obj's name; None if obj does not exist"""
+        spec = vim.PropertyCollector.FilterSpec(
+            objectSet=[vim.PropertyCollector.ObjectSpec(obj=obj, skip=False)],
+            propSet=[vim.PropertyCollector.PropertySpec(type=vim_type, pathSet=['name'])]
+        )
+        try:
+            result = self.content.propertyCollector.RetrievePropertiesEx(
+                specSet=[spec], options=vim.PropertyCollector.RetrieveOptions()
+            )
+        except _NOT_FOUND:
+            return None
+        for obj_content in (result.objects if result else None) or []:
+            for prop in obj_content.propSet or []:
+                if prop.name == 'name':
+                    return prop.val
+        return None
+
+    def _index_names(self, vim_type: type):
+        # Imported here: the mixins package imports this module
+        from job_executor.mixins.vcenter_property_collector import iter_property_pages
+        
+        names: Dict[str, str] = {}
+        specs = [vim.PropertyCollector.PropertySpec(type=vim_type, pathSet=['name'])]
+        for page in iter_property_pages(self.content, [vim_type], specs):
+            for obj_content in page:
+                for prop in obj_content.propSet or []:
+                    if prop.name == 'name':
+                        names.setdefault(prop.val, obj_content.obj._moId)
+        with self._lock:
+            self._names[vim_type] = names
+
+
+_lookups_lock = threading.Lock()
+# Attribute on the connection's SOAP stub holding its lookup. The lookup (and
+# every object it caches) references the stub, so it lives on the stub and is
+# freed with it instead of being kept in a process-wide map.
+_LOOKUP_ATTR = '_managed_object_lookup'
+
+
+def get_lookup(conn) -> ManagedObjectLookup:
+    """
+    The lookup cache for a connection.
+
+    Args:
+        conn: ServiceInstance, or its RetrieveContent() result
+    """
+    content = conn if hasattr(conn, 'propertyCollector') else None
+    stub = (content.propertyCollector if content is not None else conn)._stub
+    with _lookups_lock:
+        lookup = getattr(stub, _LOOKUP_ATTR, None)
+        if lookup is None:
+            lookup = ManagedObjectLookup(content or conn.RetrieveContent())
+            setattr(stub, _LOOKUP_ATTR, lookup)
+        return lookup
+
+
+def find_by_moref(conn, vim_type: type, moref: str, fresh: bool = False):
+    """Managed object of vim_type by MoRef (e.g. 'vm-2041'), or None"""
+    return get_lookup(conn).by_moref(vim_type, moref, fresh=fresh)
+
+
+def find_by_name(conn, vim_type: type, name: str):
+    """First managed object of vim_type with this name, or None"""
+    return get_lookup(conn).by_name(vim_type, name)
+
+
+def forget_object(conn, vim_type: type, moref: str):
+    """Drop a cached object after destroying or unregistering it"""
+    get_lookup(conn).forget(vim_type, moref)
@@ -0,0 +1,311 @@
+"""
+Shared vCenter sessions keyed by (host, user, verify_ssl)
+
+A SmartConnect login takes seconds, and handlers used to log in for every
+job (or every call, for live entity checks) and log out when done. The pool
+keeps one authenticated ServiceInstance per (host, user, verify_ssl) for the
+whole process:
+
+- get() returns the pooled session, checking that it is still
+  authenticated if it has not been used for a while, and logs in only when
+  there is no usable session (or the stored credentials changed).
+- Every get() takes a lease on the session and release_vcenter_session()
+  returns it. A daemon thread pings idle sessions so vCenter does not expire
+  them, and logs out sessions that nobody holds and nobody has used for a
+  long time.
+
+Pooled sessions are shared between threads and jobs: callers must not
+Disconnect() them. release_vcenter_session() is the drop-in replacement -
+it leaves pooled sessions open (marking them for a check before their next
+use) and disconnects anything else.
+"""
+
+import atexit
+import hashlib
+import logging
+import ssl
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from pyVim.connect import Disconnect, SmartConnect
+
+from job_executor.config import (
+    VCENTER_POOL_IDLE_SECONDS,
+    VCENTER_POOL_KEEPALIVE_SECONDS,
+    VCENTER_POOL_VALIDATE_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _fingerprint(secret: Optional[str]) -> Optional[str]:
+    """Hash of the credentials a session was opened with (never stored in clear)"""
+    if not secret:
+        return None
+    return hashlib.sha256(secret.encode('utf-8')).hexdigest()
+
+
+def session_is_alive(si) -> bool:
+    """True if the ServiceInstance's session is still authenticated (one round trip)"""
+    try:
+        return si.RetrieveContent().sessionManager.currentSession is not None
+    except Exception:
+        return False
+
+
+def _logout(si):
+    try:
+        Disconnect(si)
+    except Exception:
+        pass
+
+
+class _PooledSession:
+    """One (host, user, verify_ssl) slot; the lock serialises login and validation"""
+
+    def __init__(self, key: Tuple[str, str, bool]):
+        self.key = key
+        self.lock = threading.Lock()
+        self.si = None
+        self.fingerprint: Optional[str] = None
+        self.validated_at = 0.0
+        self.last_used = 0.0
+        self.holders = 0  # Leases taken by get() and not yet released
+
+
+class VCenterSessionPool:
+    """
+    Thread-safe pool of authenticated vCenter sessions.
+
+    Sessions are checked before reuse once validate_seconds have passed
+    since the last check, so a session that expired (vCenter restart, idle
+    timeout) is replaced transparently instead of failing the job.
+    """
+
+    def __init__(self, validate_seconds: float = VCENTER_POOL_VALIDATE_SECONDS,
+                 keepalive_seconds: float = VCENTER_POOL_KEEPALIVE_SECONDS,
+                 idle_seconds: float = VCENTER_POOL_IDLE_SECONDS):
+        self.validate_seconds = validate_seconds
+        self.keepalive_seconds = keepalive_seconds
+        self.idle_seconds = idle_seconds
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, str, bool], _PooledSession] = {}
+        self._by_session: Dict[int, _PooledSession] = {}
+        self._keepalive_thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.stats = {'logins': 0, 'reused': 0, 'expired': 0, 'logouts': 0}
+
+    # ------------------------------------------------------------------
+    # Sessions
+    # ------------------------------------------------------------------
+
+    def get(self, host: str, user: str, login: Callable[[], Any], secret: Optional[str] = None,
+            revalidate: bool = False, verify_ssl: bool = False, lease: bool = True):
+        """
+        Return the pooled session for (host, user, verify_ssl), logging in if needed.
+
+        With lease=True each successful call takes a lease that release()
+        hands back; a session is never logged out for idleness while it has
+        holders. With lease=False the session is only marked as used, so it
+        stays pooled until it has been idle for idle_seconds.
+
+        Args:
+            host: vCenter host name or address
+            user: Login user name
+            login: Opens a new session; returns a ServiceInstance or None
+            secret: Password (plain or encrypted) - a change forces a new login
+            revalidate: Check the session now instead of trusting a recent check
+            verify_ssl: Whether login() verifies the certificate (part of the key)
+            lease: Take a lease the caller must hand back with release()
+
+        Returns:
+            ServiceInstance, or None if login() failed
+        """
+        key = ((host or '').lower(), user or '', bool(verify_ssl))
+        fingerprint = _fingerprint(secret)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _PooledSession(key)
+
+        with entry.lock:
+            now = time.monotonic()
+            if entry.si is not None and fingerprint and entry.fingerprint != fingerprint:
+                logger.info(f"vCenter credentials for {key[1]}@{key[0]} changed - logging in again")
+                self._drop_locked(entry)
+            if entry.si is not None and (revalidate or now - entry.validated_at >= self.validate_seconds):
+                if session_is_alive(entry.si):
+                    entry.validated_at = now
+                else:
+                    logger.warning(f"Pooled vCenter session for {key[1]}@{key[0]} expired - logging in again")
+                    self.stats['expired'] += 1
+                    self._drop_locked(entry)
+
+            if entry.si is None:
+                si = login()
+                if si is None:
+                    return None
+                entry.si = si
+                entry.fingerprint = fingerprint
+                entry.validated_at = now
+                with self._lock:
+                    self._by_session[id(si)] = entry
+                self.stats['logins'] += 1
+            else:
+                self.stats['reused'] += 1
+            entry.last_used = time.monotonic()
+            if lease:
+                entry.holders += 1
+            si = entry.si
+
+        self._ensure_keepalive()
+        return si
+
+    def is_pooled(self, si) -> bool:
+        with self._lock:
+            entry = self._by_session.get(id(si))
+        return entry is not None and entry.si is si
+
+    def release(self, si) -> bool:
+        """
+        Hand a session back after use, returning the lease taken by get().
+
+        Pooled sessions stay open and are checked before their next use
+        (callers typically release after an error). Returns False if si was
+        not pooled, in which case it has been disconnected.
+        """
+        if si is None:
+            return False
+        with self._lock:
+            entry = self._by_session.get(id(si))
+        if entry is None:
+            _logout(si)
+            return False
+        with entry.lock:
+            if entry.si is not si:
+                pooled = False
+            else:
+                pooled = True
+                entry.holders = max(0, entry.holders - 1)
+                entry.last_used = time.monotonic()
+                entry.validated_at = 0.0
+        if not pooled:
+            _logout(si)
+        return pooled
+
+    def invalidate(self, si):
+        """Log out a pooled session known to be broken; the next get() logs in again"""
+        with self._lock:
+            entry = self._by_session.get(id(si))
+        if entry is None:
+            return
+        with entry.lock:
+            if entry.si is si:
+                self._drop_locked(entry)
+
+    def _drop_locked(self, entry: _PooledSession):
+        """Log out and forget an entry's session (caller holds entry.lock)"""
+        si, entry.si = entry.si, None
+        entry.fingerprint = None
+        entry.validated_at = 0.0
+        entry.holders = 0  # Leases on the old session are released as unpooled
+        if si is None:
+            return
+        with self._lock:
+            self._by_session.pop(id(si), None)
+        _logout(si)
+        self.stats['logouts'] += 1
+
+    def close_all(self):
+        """Log out every pooled session (process exit)"""
+        self._stop.set()
+        with self._lock:
+            entries = list(self._entries.values())
+        for entry in entries:
+            with entry.lock:
+                self._drop_locked(entry)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            sessions = sum(1 for e in self._entries.values() if e.si is not None)
+        return {'sessions': sessions, **self.stats}
+
+    # ------------------------------------------------------------------
+    # Keepalive
+    # ------------------------------------------------------------------
+
+    def _ensure_keepalive(self):
+        if self.keepalive_seconds <= 0:
+            return
+        with self._lock:
+            if self._keepalive_thread is not None and self._keepalive_thread.is_alive():
+                return
+            self._keepalive_thread = threading.Thread(
+                target=self._keepalive_loop, name='vcenter-session-keepalive', daemon=True)
+            self._keepalive_thread.start()
+
+    def _keepalive_loop(self):
+        while not self._stop.wait(self.keepalive_seconds):
+            self.keepalive()
+
+    def keepalive(self):
+        """Ping sessions that have been idle, log out unheld ones idle for too long"""
+        now = time.monotonic()
+        with self._lock:
+            entries = list(self._entries.values())
+        for entry in entries:
+            if not entry.lock.acquire(blocking=False):
+                continue  # Login or validation in progress - checked next round
+            try:
+                if entry.si is None:
+                    continue
+                if entry.holders == 0 and now - entry.last_used >= self.idle_seconds:
+                    logger.info(f"Logging out idle vCenter session {entry.key[1]}@{entry.key[0]}")
+                    self._drop_locked(entry)
+                elif now - entry.validated_at >= self.keepalive_seconds:
+                    if session_is_alive(entry.si):
+                        entry.validated_at = now
+                    else:
+                        self.stats['expired'] += 1
+                        self._drop_locked(entry)
+            finally:
+                entry.lock.release()
+
+
+_pool_lock = threading.Lock()
+_pool: Optional[VCenterSessionPool] = None
+
+
+def get_vcenter_pool() -> VCenterSessionPool:
+    """Process-wide vCenter session pool"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = VCenterSessionPool()
+            atexit.register(_pool.close_all)
+        return _pool
+
+
+def release_vcenter_session(si):
+    """Use instead of Disconnect(): leaves pooled sessions open, disconnects others"""
+    get_vcenter_pool().release(si)
+
+
+def pooled_smart_connect(host: str, user: str, pwd: str, port: int = 443, verify_ssl: bool = False):
+    """
+    SmartConnect() through the pool: returns the shared session for
+    (host:port, user, verify_ssl), logging in only if there is none. Raises
+    like SmartConnect() when the login fails.
+    """
+    def login():
+        if verify_ssl:
+            context = ssl.create_default_context()  # System CAs and hostname checks
+        else:
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+        return SmartConnect(host=host, user=user, pwd=pwd, port=port, sslContext=context)
+
+    pool_host = host if int(port or 443) == 443 else f'{host}:{port}'
+    return get_vcenter_pool().get(pool_host, user, login, secret=pwd, verify_ssl=verify_ssl)
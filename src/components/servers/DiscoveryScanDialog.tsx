@@ -50,6 +50,7 @@ export const DiscoveryScanDialog = ({
   const [selectedCredentialSets, setSelectedCredentialSets] = useState<string[]>([]);
   const [parsedIpCount, setParsedIpCount] = useState(0);
   const [dataOptionsOpen, setDataOptionsOpen] = useState(false);
+  const [fastRescan, setFastRescan] = useState(false);
   const { toast } = useToast();
   const { user } = useAuth();
   
@@ -94,6 +95,7 @@ export const DiscoveryScanDialog = ({
       setNotes("");
       setSelectedCredentialSets([]);
       setDataOptionsOpen(false);
+      setFastRescan(false);
     }
   }, [open, quickScanIp]);
 
@@ -152,6 +154,7 @@ export const DiscoveryScanDialog = ({
           details: {
             notes,
             scan_type: 'redfish',
+            rescan_mode: fastRescan && !quickScanIp ? 'fast' : 'full',
             credential_set_ids: selectedCredentialSets,
             fetch_options: {
               firmware: fetchFirmware,
@@ -273,6 +276,18 @@ export const DiscoveryScanDialog = ({
             </p>
           </div>
 
+          {!quickScanIp && (
+            <div className="space-y-1">
+              <div className="flex items-center space-x-2">
+                <Checkbox id="fast-rescan" checked={fastRescan} onCheckedChange={(c) => setFastRescan(c === true)} />
+                <Label htmlFor="fast-rescan" className="text-sm cursor-pointer">Fast rescan</Label>
+              </div>
+              <p className="text-xs text-muted-foreground">
+                Re-verify known iDRACs first, skip IPs that were recently closed, and fully probe only new or changed addresses
+              </p>
+            </div>
+          )}
+
           {/* Data Options - Collapsible */}
           <Collapsible open={dataOptionsOpen} onOpenChange={setDataOptionsOpen}>
             <CollapsibleTrigger asChild>
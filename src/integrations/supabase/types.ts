@@ -21,6 +21,7 @@ export type Database = {
           auto_cancel_stale_jobs: boolean | null
           auto_cleanup_enabled: boolean
           created_at: string
+          discovery_closed_ttl_hours: number | null
           discovery_max_threads: number | null
           encryption_key: string | null
           executor_shared_secret_encrypted: string | null
@@ -38,6 +39,8 @@ export type Database = {
           max_request_body_kb: number
           max_response_body_kb: number
           pause_idrac_operations: boolean | null
+          refresh_fetch_concurrency: number | null
+          refresh_write_concurrency: number | null
           scp_share_enabled: boolean | null
           scp_share_password_encrypted: string | null
           scp_share_path: string | null
@@ -57,6 +60,7 @@ export type Database = {
           auto_cancel_stale_jobs?: boolean | null
           auto_cleanup_enabled?: boolean
           created_at?: string
+          discovery_closed_ttl_hours?: number | null
           discovery_max_threads?: number | null
           encryption_key?: string | null
           executor_shared_secret_encrypted?: string | null
@@ -74,6 +78,8 @@ export type Database = {
           max_request_body_kb?: number
           max_response_body_kb?: number
           pause_idrac_operations?: boolean | null
+          refresh_fetch_concurrency?: number | null
+          refresh_write_concurrency?: number | null
           scp_share_enabled?: boolean | null
           scp_share_password_encrypted?: string | null
           scp_share_path?: string | null
@@ -93,6 +99,7 @@ export type Database = {
           auto_cancel_stale_jobs?: boolean | null
           auto_cleanup_enabled?: boolean
           created_at?: string
+          discovery_closed_ttl_hours?: number | null
           discovery_max_threads?: number | null
           encryption_key?: string | null
           executor_shared_secret_encrypted?: string | null
@@ -110,6 +117,8 @@ export type Database = {
           max_request_body_kb?: number
           max_response_body_kb?: number
           pause_idrac_operations?: boolean | null
+          refresh_fetch_concurrency?: number | null
+          refresh_write_concurrency?: number | null
           scp_share_enabled?: boolean | null
           scp_share_password_encrypted?: string | null
           scp_share_path?: string | null
@@ -342,6 +351,7 @@ export type Database = {
       bios_configurations: {
         Row: {
           attributes: Json
+          attributes_hash: string | null
           bios_version: string | null
           captured_at: string | null
           created_at: string | null
@@ -355,6 +365,7 @@ export type Database = {
         }
         Insert: {
           attributes: Json
+          attributes_hash?: string | null
           bios_version?: string | null
           captured_at?: string | null
           created_at?: string | null
@@ -368,6 +379,7 @@ export type Database = {
         }
         Update: {
           attributes?: Json
+          attributes_hash?: string | null
           bios_version?: string | null
           captured_at?: string | null
           created_at?: string | null
@@ -570,6 +582,47 @@ export type Database = {
           },
         ]
       }
+      credential_set_stats: {
+        Row: {
+          created_at: string
+          credential_set_id: string
+          failure_count: number
+          id: string
+          scope_key: string
+          scope_type: string
+          success_count: number
+          updated_at: string
+        }
+        Insert: {
+          created_at?: string
+          credential_set_id: string
+          failure_count?: number
+          id?: string
+          scope_key: string
+          scope_type: string
+          success_count?: number
+          updated_at?: string
+        }
+        Update: {
+          created_at?: string
+          credential_set_id?: string
+          failure_count?: number
+          id?: string
+          scope_key?: string
+          scope_type?: string
+          success_count?: number
+          updated_at?: string
+        }
+        Relationships: [
+          {
+            foreignKeyName: "credential_set_stats_credential_set_id_fkey"
+            columns: ["credential_set_id"]
+            isOneToOne: false
+            referencedRelation: "credential_sets"
+            referencedColumns: ["id"]
+          },
+        ]
+      }
       credential_sets: {
         Row: {
           created_at: string | null
@@ -620,6 +673,66 @@ export type Database = {
           },
         ]
       }
+      discovery_ip_cache: {
+        Row: {
+          auth_succeeded: boolean
+          created_at: string
+          credential_set_id: string | null
+          idrac_detected: boolean
+          ip_address: string
+          last_job_id: string | null
+          last_probed_at: string
+          last_result: string | null
+          model: string | null
+          port_open: boolean
+          service_tag: string | null
+          updated_at: string
+        }
+        Insert: {
+          auth_succeeded?: boolean
+          created_at?: string
+          credential_set_id?: string | null
+          idrac_detected?: boolean
+          ip_address: string
+          last_job_id?: string | null
+          last_probed_at?: string
+          last_result?: string | null
+          model?: string | null
+          port_open?: boolean
+          service_tag?: string | null
+          updated_at?: string
+        }
+        Update: {
+          auth_succeeded?: boolean
+          created_at?: string
+          credential_set_id?: string | null
+          idrac_detected?: boolean
+          ip_address?: string
+          last_job_id?: string | null
+          last_probed_at?: string
+          last_result?: string | null
+          model?: string | null
+          port_open?: boolean
+          service_tag?: string | null
+          updated_at?: string
+        }
+        Relationships: [
+          {
+            foreignKeyName: "discovery_ip_cache_credential_set_id_fkey"
+            columns: ["credential_set_id"]
+            isOneToOne: false
+            referencedRelation: "credential_sets"
+            referencedColumns: ["id"]
+          },
+          {
+            foreignKeyName: "discovery_ip_cache_last_job_id_fkey"
+            columns: ["last_job_id"]
+            isOneToOne: false
+            referencedRelation: "jobs"
+            referencedColumns: ["id"]
+          },
+        ]
+      }
       esxi_upgrade_history: {
         Row: {
           completed_at: string | null
@@ -3288,12 +3401,57 @@ export type Database = {
           },
         ]
       }
+      server_event_log_cursors: {
+        Row: {
+          created_at: string | null
+          id: string
+          last_collected_at: string | null
+          last_event_created: string | null
+          last_event_id: string | null
+          last_new_count: number
+          log_type: string
+          server_id: string
+          updated_at: string | null
+        }
+        Insert: {
+          created_at?: string | null
+          id?: string
+          last_collected_at?: string | null
+          last_event_created?: string | null
+          last_event_id?: string | null
+          last_new_count?: number
+          log_type: string
+          server_id: string
+          updated_at?: string | null
+        }
+        Update: {
+          created_at?: string | null
+          id?: string
+          last_collected_at?: string | null
+          last_event_created?: string | null
+          last_event_id?: string | null
+          last_new_count?: number
+          log_type?: string
+          server_id?: string
+          updated_at?: string | null
+        }
+        Relationships: [
+          {
+            foreignKeyName: "server_event_log_cursors_server_id_fkey"
+            columns: ["server_id"]
+            isOneToOne: false
+            referencedRelation: "servers"
+            referencedColumns: ["id"]
+          },
+        ]
+      }
       server_event_logs: {
         Row: {
           category: string | null
           created_at: string
           event_id: string | null
           id: string
+          log_type: string | null
           message: string | null
           raw_data: Json | null
           sensor_number: string | null
@@ -3307,6 +3465,7 @@ export type Database = {
           created_at?: string
           event_id?: string | null
           id?: string
+          log_type?: string | null
           message?: string | null
           raw_data?: Json | null
           sensor_number?: string | null
@@ -3320,6 +3479,7 @@ export type Database = {
           created_at?: string
           event_id?: string | null
           id?: string
+          log_type?: string | null
           message?: string | null
           raw_data?: Json | null
           sensor_number?: string | null
@@ -3625,6 +3785,50 @@ export type Database = {
           },
         ]
       }
+      server_inventory_fingerprints: {
+        Row: {
+          component_type: string
+          content_hash: string
+          created_at: string | null
+          id: string
+          item_count: number
+          last_changed_at: string | null
+          row_hashes: Json
+          server_id: string
+          updated_at: string | null
+        }
+        Insert: {
+          component_type: string
+          content_hash: string
+          created_at?: string | null
+          id?: string
+          item_count?: number
+          last_changed_at?: string | null
+          row_hashes?: Json
+          server_id: string
+          updated_at?: string | null
+        }
+        Update: {
+          component_type?: string
+          content_hash?: string
+          created_at?: string | null
+          id?: string
+          item_count?: number
+          last_changed_at?: string | null
+          row_hashes?: Json
+          server_id?: string
+          updated_at?: string | null
+        }
+        Relationships: [
+          {
+            foreignKeyName: "server_inventory_fingerprints_server_id_fkey"
+            columns: ["server_id"]
+            isOneToOne: false
+            referencedRelation: "servers"
+            referencedColumns: ["id"]
+          },
+        ]
+      }
       server_memory: {
         Row: {
           capacity_mb: number | null
@@ -5780,6 +5984,10 @@ export type Database = {
         }
         Returns: boolean
       }
+      increment_credential_set_stats: {
+        Args: { p_deltas: Json }
+        Returns: number
+      }
       increment_template_deployment: {
         Args: { template_id: string }
         Returns: undefined
@@ -5795,6 +6003,10 @@ export type Database = {
         }
         Returns: undefined
       }
+      refresh_network_vm_counts: {
+        Args: { p_source_vcenter_id: string }
+        Returns: number
+      }
       run_scheduled_cluster_safety_checks: { Args: never; Returns: undefined }
       send_maintenance_reminders: { Args: never; Returns: undefined }
       upsert_agent_heartbeat: {
@@ -5854,6 +6066,7 @@ export type Database = {
         | "idm_sync_users"
         | "idm_test_connection"
         | "firmware_inventory_scan"
+        | "firmware_stage"
         | "idm_search_groups"
         | "idm_test_auth"
         | "idm_network_check"
@@ -6088,6 +6301,7 @@ export const Constants = {
         "idm_sync_users",
         "idm_test_connection",
         "firmware_inventory_scan",
+        "firmware_stage",
         "idm_search_groups",
         "idm_test_auth",
         "idm_network_check",
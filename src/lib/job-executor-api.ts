@@ -1370,3 +1370,105 @@ export async function syncProtectionConfigApi(
     throw new Error('Unknown error syncing protection config');
   }
 }
+
+// ============================================
+// Chunked ISO Upload
+// ============================================
+
+export interface IsoUploadState {
+  success: boolean;
+  upload_id: string;
+  filename: string;
+  size: number;
+  chunk_size: number;
+  total_chunks: number;
+  received_chunks: number;
+  bytes_received: number;
+  missing: number[];
+  complete: boolean;
+  error?: string;
+}
+
+export interface IsoUploadResult {
+  success: boolean;
+  served_url: string;
+  local_path: string;
+  checksum: string;
+  size: number;
+  error?: string;
+}
+
+const ISO_UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024;
+const ISO_UPLOAD_PARALLEL = 4;
+const ISO_UPLOAD_RETRIES = 3;
+
+/**
+ * Upload an ISO to the Job Executor in parallel chunks.
+ *
+ * Calling again for the same isoImageId after a failure resumes: the
+ * executor reports which chunks it already has and only the rest are sent.
+ */
+export async function uploadIsoChunked(
+  file: File,
+  isoImageId: string,
+  onProgress?: (bytesSent: number, total: number) => void
+): Promise<IsoUploadResult> {
+  const startResponse = await fetch(`${apiBaseUrl}/api/iso-upload`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({
+      iso_image_id: isoImageId,
+      filename: file.name,
+      size: file.size,
+      chunk_size: ISO_UPLOAD_CHUNK_SIZE,
+    }),
+  });
+  const state: IsoUploadState = await startResponse.json();
+  if (!startResponse.ok) {
+    throw new Error(state.error || 'Failed to start ISO upload');
+  }
+
+  let bytesSent = state.bytes_received;
+  onProgress?.(bytesSent, file.size);
+  const queue = [...state.missing];
+
+  const sendChunk = async (index: number) => {
+    const blob = file.slice(index * state.chunk_size, Math.min(file.size, (index + 1) * state.chunk_size));
+    for (let attempt = 1; ; attempt++) {
+      try {
+        const response = await fetch(`${apiBaseUrl}/api/iso-upload/${state.upload_id}/chunks/${index}`, {
+          method: 'PUT',
+          headers: { 'Content-Type': 'application/octet-stream' },
+          body: blob,
+        });
+        if (!response.ok) {
+          const data = await response.json().catch(() => ({}));
+          throw new Error(data.error || `Chunk ${index} failed: HTTP ${response.status}`);
+        }
+        bytesSent += blob.size;
+        onProgress?.(bytesSent, file.size);
+        return;
+      } catch (error) {
+        if (attempt >= ISO_UPLOAD_RETRIES) throw error;
+      }
+    }
+  };
+
+  const worker = async () => {
+    while (queue.length > 0) {
+      await sendChunk(queue.shift() as number);
+    }
+  };
+  await Promise.all(Array.from({ length: ISO_UPLOAD_PARALLEL }, worker));
+
+  const completeResponse = await fetch(`${apiBaseUrl}/api/iso-upload/${state.upload_id}/complete`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: '{}',
+  });
+  const result: IsoUploadResult = await completeResponse.json();
+  if (!completeResponse.ok) {
+    throw new Error(result.error || 'Failed to complete ISO upload');
+  }
+  return result;
+}
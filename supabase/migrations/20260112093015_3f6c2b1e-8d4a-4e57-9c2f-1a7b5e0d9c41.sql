@@ -0,0 +1,40 @@
+-- Per-IP discovery cache used by fast rescan discovery mode
+CREATE TABLE IF NOT EXISTS public.discovery_ip_cache (
+  ip_address TEXT PRIMARY KEY,
+  port_open BOOLEAN NOT NULL DEFAULT false,
+  idrac_detected BOOLEAN NOT NULL DEFAULT false,
+  auth_succeeded BOOLEAN NOT NULL DEFAULT false,
+  service_tag TEXT,
+  model TEXT,
+  credential_set_id UUID REFERENCES public.credential_sets(id) ON DELETE SET NULL,
+  last_result TEXT CHECK (last_result IN ('synced', 'auth_failed', 'port_closed', 'not_idrac')),
+  last_probed_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  last_job_id UUID REFERENCES public.jobs(id) ON DELETE SET NULL,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Enable RLS
+ALTER TABLE public.discovery_ip_cache ENABLE ROW LEVEL SECURITY;
+
+-- Allow authenticated users to view the cache
+CREATE POLICY "Authenticated users can view discovery cache"
+ON public.discovery_ip_cache
+FOR SELECT
+USING (auth.uid() IS NOT NULL);
+
+-- Allow system to manage the cache (via service role key)
+CREATE POLICY "System can manage discovery cache"
+ON public.discovery_ip_cache
+FOR ALL
+USING (true)
+WITH CHECK (true);
+
+CREATE INDEX IF NOT EXISTS idx_discovery_ip_cache_last_probed ON public.discovery_ip_cache(last_probed_at DESC);
+
+-- How long a closed port 443 is trusted before a fast rescan probes the IP again
+ALTER TABLE public.activity_settings
+ADD COLUMN IF NOT EXISTS discovery_closed_ttl_hours INTEGER DEFAULT 24;
+
+COMMENT ON TABLE public.discovery_ip_cache IS 'Last discovery result per IP (port state, iDRAC detection, service tag, working credential set) for fast rescans';
+COMMENT ON COLUMN public.activity_settings.discovery_closed_ttl_hours IS 'Fast rescan skips IPs whose port 443 was closed within this many hours';
@@ -0,0 +1,32 @@
+-- Learned credential ordering: success statistics per /24 subnet and per server model
+CREATE TABLE IF NOT EXISTS public.credential_set_stats (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  scope_type TEXT NOT NULL CHECK (scope_type IN ('subnet', 'model')),
+  scope_key TEXT NOT NULL,
+  credential_set_id UUID NOT NULL REFERENCES public.credential_sets(id) ON DELETE CASCADE,
+  success_count INTEGER NOT NULL DEFAULT 0,
+  failure_count INTEGER NOT NULL DEFAULT 0,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  UNIQUE (scope_type, scope_key, credential_set_id)
+);
+
+-- Enable RLS
+ALTER TABLE public.credential_set_stats ENABLE ROW LEVEL SECURITY;
+
+-- Allow authenticated users to view statistics
+CREATE POLICY "Authenticated users can view credential statistics"
+ON public.credential_set_stats
+FOR SELECT
+USING (auth.uid() IS NOT NULL);
+
+-- Allow system to manage statistics (via service role key)
+CREATE POLICY "System can manage credential statistics"
+ON public.credential_set_stats
+FOR ALL
+USING (true)
+WITH CHECK (true);
+
+CREATE INDEX IF NOT EXISTS idx_credential_set_stats_scope ON public.credential_set_stats(scope_type, scope_key);
+
+COMMENT ON TABLE public.credential_set_stats IS 'Authentication success/failure counts per credential set, scoped by /24 subnet or server model, used to order discovery credential attempts';
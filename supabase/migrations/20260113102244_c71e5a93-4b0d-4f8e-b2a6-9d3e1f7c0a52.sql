@@ -0,0 +1,7 @@
+-- Concurrency for the staged server refresh pipeline (Redfish fetch pool -> bounded queue -> DB write pool)
+ALTER TABLE public.activity_settings
+ADD COLUMN IF NOT EXISTS refresh_fetch_concurrency INTEGER DEFAULT 4,
+ADD COLUMN IF NOT EXISTS refresh_write_concurrency INTEGER DEFAULT 2;
+
+COMMENT ON COLUMN public.activity_settings.refresh_fetch_concurrency IS 'Parallel iDRAC (Redfish) queries during server refresh';
+COMMENT ON COLUMN public.activity_settings.refresh_write_concurrency IS 'Parallel database writers consuming fetched server data during server refresh';
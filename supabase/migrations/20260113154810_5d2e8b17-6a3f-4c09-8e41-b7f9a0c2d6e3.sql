@@ -0,0 +1,35 @@
+-- Content-hash fingerprints for differential hardware inventory sync
+CREATE TABLE IF NOT EXISTS public.server_inventory_fingerprints (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  server_id UUID NOT NULL REFERENCES public.servers(id) ON DELETE CASCADE,
+  component_type TEXT NOT NULL CHECK (component_type IN ('drives', 'nics', 'memory')),
+  content_hash TEXT NOT NULL,
+  row_hashes JSONB NOT NULL DEFAULT '{}'::jsonb,
+  item_count INTEGER NOT NULL DEFAULT 0,
+  last_changed_at TIMESTAMPTZ DEFAULT now(),
+  created_at TIMESTAMPTZ DEFAULT now(),
+  updated_at TIMESTAMPTZ DEFAULT now(),
+  UNIQUE (server_id, component_type)
+);
+
+ALTER TABLE public.server_inventory_fingerprints ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Authenticated users can view inventory fingerprints"
+ON public.server_inventory_fingerprints FOR SELECT
+USING (auth.uid() IS NOT NULL);
+
+CREATE POLICY "System can manage inventory fingerprints"
+ON public.server_inventory_fingerprints FOR ALL
+USING (true)
+WITH CHECK (true);
+
+-- BIOS snapshots carry their content hash so unchanged reads are not duplicated
+ALTER TABLE public.bios_configurations
+ADD COLUMN IF NOT EXISTS attributes_hash TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_bios_configurations_server_captured
+ON public.bios_configurations(server_id, captured_at DESC);
+
+COMMENT ON TABLE public.server_inventory_fingerprints IS 'Per-server hash of normalized drive/NIC/DIMM inventory; refreshes with a matching hash skip writes, otherwise only changed rows are written';
+COMMENT ON COLUMN public.server_inventory_fingerprints.row_hashes IS 'Row identifier (drive_identifier / fqdd / dimm_identifier) -> content hash of that row';
+COMMENT ON COLUMN public.bios_configurations.attributes_hash IS 'SHA-256 of attributes, pending_attributes and bios_version';
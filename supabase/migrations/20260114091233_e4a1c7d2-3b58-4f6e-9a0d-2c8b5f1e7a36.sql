@@ -0,0 +1,52 @@
+-- Incremental SEL / Lifecycle log ingestion: per-server high-water marks and de-duplication
+
+-- Log type as its own column so entries can be de-duplicated per collection
+ALTER TABLE public.server_event_logs
+ADD COLUMN IF NOT EXISTS log_type TEXT;
+
+UPDATE public.server_event_logs
+SET log_type = split_part(category, ':', 1)
+WHERE log_type IS NULL AND category IS NOT NULL;
+
+UPDATE public.server_event_logs
+SET log_type = 'SEL'
+WHERE log_type IS NULL;
+
+-- Earlier collections re-inserted the same entries on every fetch; keep the first copy
+DELETE FROM public.server_event_logs a
+USING public.server_event_logs b
+WHERE a.server_id = b.server_id
+  AND a.log_type = b.log_type
+  AND a.event_id = b.event_id
+  AND (a.created_at, a.id) > (b.created_at, b.id);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_server_event_logs_server_type_event
+ON public.server_event_logs(server_id, log_type, event_id);
+
+CREATE TABLE IF NOT EXISTS public.server_event_log_cursors (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  server_id UUID NOT NULL REFERENCES public.servers(id) ON DELETE CASCADE,
+  log_type TEXT NOT NULL CHECK (log_type IN ('SEL', 'Lifecycle')),
+  last_event_id TEXT,
+  last_event_created TEXT,
+  last_new_count INTEGER NOT NULL DEFAULT 0,
+  last_collected_at TIMESTAMPTZ DEFAULT now(),
+  created_at TIMESTAMPTZ DEFAULT now(),
+  updated_at TIMESTAMPTZ DEFAULT now(),
+  UNIQUE (server_id, log_type)
+);
+
+ALTER TABLE public.server_event_log_cursors ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Authenticated users can view event log cursors"
+ON public.server_event_log_cursors FOR SELECT
+USING (auth.uid() IS NOT NULL);
+
+CREATE POLICY "System can manage event log cursors"
+ON public.server_event_log_cursors FOR ALL
+USING (true)
+WITH CHECK (true);
+
+COMMENT ON TABLE public.server_event_log_cursors IS 'Per-server high-water mark of the last ingested SEL / Lifecycle entry; collections only fetch newer entries';
+COMMENT ON COLUMN public.server_event_log_cursors.last_event_created IS 'Created timestamp of the last entry as reported by the iDRAC (kept verbatim, including its offset)';
+COMMENT ON COLUMN public.server_event_logs.log_type IS 'Source collection: SEL or Lifecycle';
@@ -0,0 +1,2 @@
+-- Fleet firmware staging: push library DUPs to many iDRACs ahead of a maintenance window
+ALTER TYPE public.job_type ADD VALUE IF NOT EXISTS 'firmware_stage';
@@ -0,0 +1,29 @@
+-- Recompute network VM counts for one vCenter in a single statement (replaces one PATCH per network)
+CREATE OR REPLACE FUNCTION public.refresh_network_vm_counts(p_source_vcenter_id uuid)
+RETURNS integer
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path TO 'public'
+AS $$
+DECLARE
+  v_updated integer;
+BEGIN
+  UPDATE vcenter_networks n
+  SET vm_count = COALESCE(c.vm_count, 0)
+  FROM vcenter_networks target
+  LEFT JOIN (
+    SELECT network_id, COUNT(*)::integer AS vm_count
+    FROM vcenter_network_vms
+    WHERE source_vcenter_id = p_source_vcenter_id
+    GROUP BY network_id
+  ) c ON c.network_id = target.id
+  WHERE n.id = target.id
+    AND target.source_vcenter_id = p_source_vcenter_id
+    AND n.vm_count IS DISTINCT FROM COALESCE(c.vm_count, 0);
+
+  GET DIAGNOSTICS v_updated = ROW_COUNT;
+  RETURN v_updated;
+END;
+$$;
+
+COMMENT ON FUNCTION public.refresh_network_vm_counts(uuid) IS 'Set vm_count on a vCenter''s networks from vcenter_network_vms (networks without relationships get 0); returns the number of networks changed';
@@ -0,0 +1,6 @@
+-- iDRAC restarts SEL / Lifecycle entry Ids at 1 after a log clear; the entry's
+-- Created timestamp keeps re-used Ids apart so post-clear entries are not dropped
+DROP INDEX IF EXISTS public.idx_server_event_logs_server_type_event;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_server_event_logs_server_type_event_time
+ON public.server_event_logs(server_id, log_type, event_id, timestamp);
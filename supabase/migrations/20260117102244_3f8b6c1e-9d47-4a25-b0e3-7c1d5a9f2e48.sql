@@ -0,0 +1,25 @@
+-- Add credential statistic deltas atomically, so concurrent discovery jobs
+-- don't overwrite each other's counts with absolute values
+CREATE OR REPLACE FUNCTION public.increment_credential_set_stats(p_deltas jsonb)
+RETURNS integer
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path TO 'public'
+AS $$
+DECLARE
+  affected integer;
+BEGIN
+  INSERT INTO credential_set_stats (scope_type, scope_key, credential_set_id, success_count, failure_count, updated_at)
+  SELECT d.scope_type, d.scope_key, d.credential_set_id,
+         COALESCE(d.success_count, 0), COALESCE(d.failure_count, 0), now()
+  FROM jsonb_to_recordset(p_deltas) AS d(
+    scope_type text, scope_key text, credential_set_id uuid, success_count integer, failure_count integer
+  )
+  ON CONFLICT (scope_type, scope_key, credential_set_id) DO UPDATE
+  SET success_count = credential_set_stats.success_count + excluded.success_count,
+      failure_count = credential_set_stats.failure_count + excluded.failure_count,
+      updated_at = excluded.updated_at;
+  GET DIAGNOSTICS affected = ROW_COUNT;
+  RETURN affected;
+END;
+$$;